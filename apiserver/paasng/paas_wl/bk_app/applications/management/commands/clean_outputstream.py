@@ -25,7 +25,7 @@ from django.core.management.base import BaseCommand
 from django.db import transaction
 from django.utils import timezone
 
-from paas_wl.bk_app.applications.models.misc import OutputStream, OutputStreamLine
+from paas_wl.bk_app.applications.models.misc import OutputStream, OutputStreamArchive, OutputStreamLine
 
 logger = logging.getLogger(__name__)
 
@@ -39,7 +39,7 @@ class Command(BaseCommand):
     """清理过期的 OutputStream 记录的详情记录数据
 
     对于 2 年前的部署日志数据进行"压缩"处理：
-    1. 删除所有日志记录
+    1. 删除所有日志记录，已归档的日志将同时删除归档记录与对象存储中的归档文件
     2. 插入一条提示信息, 告知日志已被平台按照保留策略删除
     """
 
@@ -133,6 +133,9 @@ class Command(BaseCommand):
 
         for stream_id in stream_ids:
             count = OutputStreamLine.objects.filter(output_stream_id=stream_id).count()
+            archive = OutputStreamArchive.objects.filter(output_stream_id=stream_id).first()
+            if archive:
+                count += archive.lines_count
             if count <= 1:
                 self.stdout.write(f"[预览] OutputStream {stream_id}: 只有 {count} 条详细记录, 无需压缩")
             else:
@@ -148,16 +151,24 @@ class Command(BaseCommand):
             try:
                 queryset = OutputStreamLine.objects.filter(output_stream_id=stream_id).order_by("-created")
                 count = queryset.count()
-                if count <= 1:
+                archive = OutputStreamArchive.objects.filter(output_stream_id=stream_id).first()
+                if count <= 1 and not archive:
                     logger.debug(f"OutputStream {stream_id} 详细记录只有 {count} 条，跳过, 无需压缩")
                     continue
 
                 recycle_time = timezone.localtime(timezone.now()).strftime("%Y-%m-%d %H:%M:%S")
-                # 最后一条记录的时间
-                last_line_created = timezone.localtime(queryset.first().created).strftime("%Y-%m-%d %H:%M:%S")
+                # 最后一条记录的时间，日志全部归档时使用归档时间
+                last_line = queryset.first()
+                last_line_created = timezone.localtime(last_line.created if last_line else archive.created).strftime(
+                    "%Y-%m-%d %H:%M:%S"
+                )
                 # 单个 OutputStream 单独事务
                 with transaction.atomic():
                     deleted_count, _ = OutputStreamLine.objects.filter(output_stream_id=stream_id).delete()
+                    if archive:
+                        # 归档文件将在事务提交后被删除
+                        archive.delete()
+                        deleted_count += archive.lines_count
 
                     info_message = (
                         f"{OBSOLETE_MESSAGE}\n[Original log info] line count: {deleted_count},"
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.23 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0024_config_tenant_id_outputstream_tenant_id_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="outputstreamline",
+            options={"ordering": ["created", "seq"]},
+        ),
+        migrations.AddField(
+            model_name="outputstreamline",
+            name="seq",
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.23 on 2026-10-18 10:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0025_outputstreamline_seq"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutputStreamArchive",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("blob_key", models.CharField(help_text="归档文件在对象存储中的 key", max_length=255)),
+                ("lines_count", models.IntegerField(default=0, help_text="归档的日志总行数")),
+                (
+                    "chunks",
+                    models.JSONField(
+                        default=list, help_text="分块索引，每项为 [起始行号, 压缩数据偏移量, 压缩数据长度]"
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                (
+                    "output_stream",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="archive", to="api.outputstream"
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -20,7 +20,7 @@ from paas_wl.utils.models import AuditedModel, UuidAuditedModel
 from .app import WlApp
 from .build import DEFAULT_SLUG_RUNNER_ENTRYPOINT, Build, BuildProcess
 from .config import Config
-from .misc import OutputStream, OutputStreamLine
+from .misc import BufferedOutputStreamWriter, OutputStream, OutputStreamArchive, OutputStreamLine
 from .release import Release
 
 __all__ = [
@@ -34,4 +34,6 @@ __all__ = [
     "Release",
     "OutputStream",
     "OutputStreamLine",
+    "BufferedOutputStreamWriter",
+    "OutputStreamArchive",
 ]
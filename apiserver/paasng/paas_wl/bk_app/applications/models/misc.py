@@ -15,11 +15,19 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
-from django.db import models
+import logging
+import threading
+import time
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import connections, models
 
 from paas_wl.bk_app.applications.models import UuidAuditedModel
 from paasng.core.tenant.fields import tenant_id_field_factory
 
+logger = logging.getLogger(__name__)
+
 
 class OutputStream(UuidAuditedModel):
     tenant_id = tenant_id_field_factory()
@@ -29,6 +37,10 @@ class OutputStream(UuidAuditedModel):
             line += "\n"
         OutputStreamLine.objects.create(output_stream=self, line=line, stream=stream)
 
+    def buffered_writer(self, **kwargs) -> "BufferedOutputStreamWriter":
+        """Return a writer which saves lines to current stream in batches, see `BufferedOutputStreamWriter`."""
+        return BufferedOutputStreamWriter(self, **kwargs)
+
 
 class OutputStreamLine(models.Model):
     """日志数据量巨大且数据性质纯粹，和租户关联不大，因此设置为“租户无关”。
@@ -39,11 +51,127 @@ class OutputStreamLine(models.Model):
     output_stream = models.ForeignKey("OutputStream", related_name="lines", on_delete=models.CASCADE)
     stream = models.CharField(max_length=16)
     line = models.TextField()
+    # 同一个 stream 内的行序号，批量写入时 created 可能相同，需要用它保证顺序
+    seq = models.IntegerField(default=0)
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
 
     class Meta:
-        ordering = ["created"]
+        ordering = ["created", "seq"]
 
     def __str__(self):
         return "%s-%s" % (self.id, self.line)
+
+
+class OutputStreamArchive(models.Model):
+    """已归档的日志流：日志行被压缩后保存在对象存储中，数据库中的日志行记录会被删除。
+
+    归档文件由多个独立的 gzip 分块拼接而成，`chunks` 记录了每个分块的索引，
+    读取时可以只下载所需的分块，而无需下载整个文件。
+
+    [multi-tenancy] This model is not tenant-aware.
+    """
+
+    output_stream = models.OneToOneField("OutputStream", related_name="archive", on_delete=models.CASCADE)
+    blob_key = models.CharField(max_length=255, help_text="归档文件在对象存储中的 key")
+    lines_count = models.IntegerField(default=0, help_text="归档的日志总行数")
+    chunks = models.JSONField(default=list, help_text="分块索引，每项为 [起始行号, 压缩数据偏移量, 压缩数据长度]")
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return "%s-%s" % (self.output_stream_id, self.blob_key)
+
+
+class BufferedOutputStreamWriter:
+    """A writer which buffers lines in memory and saves them to the output stream in batches
+    by `bulk_create`, instead of inserting a row for every line.
+
+    The buffer will be flushed when any of the following conditions was met:
+
+    - the number of buffered lines reaches `batch_size`
+    - `flush_interval` seconds have passed since the first line was buffered, a background timer
+      flushes the buffer even if no more lines arrive
+    - `flush()` or `close()` was called explicitly
+
+    :param output_stream: The stream object to write lines to.
+    :param batch_size: The max number of lines to buffer.
+    :param flush_interval: The max seconds between two flushes.
+    """
+
+    def __init__(
+        self,
+        output_stream: OutputStream,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+    ):
+        self.output_stream = output_stream
+        self.batch_size = batch_size or settings.OUTPUT_STREAM_FLUSH_BATCH_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else settings.OUTPUT_STREAM_FLUSH_INTERVAL
+
+        self._buffer: List[OutputStreamLine] = []
+        self._lock = threading.Lock()
+        self._next_seq: Optional[int] = None
+        self._last_flushed_at = time.monotonic()
+        self._timer: Optional[threading.Timer] = None
+
+    def write(self, line: str, stream: Optional[str] = "STDOUT"):
+        if not line.endswith("\n"):
+            line += "\n"
+
+        with self._lock:
+            self._buffer.append(
+                OutputStreamLine(output_stream=self.output_stream, line=line, stream=stream or "STDOUT")
+            )
+            if len(self._buffer) >= self.batch_size or time.monotonic() - self._last_flushed_at >= self.flush_interval:
+                self._flush()
+            elif self._timer is None:
+                self._start_timer()
+
+    def flush(self):
+        """Save all buffered lines to the database."""
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        self.flush()
+
+    def _start_timer(self):
+        """Start a timer to flush the buffer after `flush_interval` seconds, so that the lines will not be
+        held in memory when no more lines arrive, e.g. the build process prints nothing for a long time.
+        """
+        timer = threading.Timer(self.flush_interval, lambda: self._flush_by_timer(timer))
+        timer.daemon = True
+        self._timer = timer
+        timer.start()
+
+    def _flush_by_timer(self, timer: threading.Timer):
+        try:
+            with self._lock:
+                # The buffer has been flushed and a new timer might have been started since this one fired
+                if self._timer is not timer:
+                    return
+                self._flush()
+        except Exception:
+            logger.exception("Failed to flush the buffered lines of output stream %s", self.output_stream.pk)
+        finally:
+            # The timer thread has its own database connections, close them to avoid leaking
+            connections.close_all()
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._last_flushed_at = time.monotonic()
+        if not self._buffer:
+            return
+
+        if self._next_seq is None:
+            # The stream might have been written by other writers before, continue with its max seq
+            max_seq = self.output_stream.lines.aggregate(max_seq=models.Max("seq"))["max_seq"]
+            self._next_seq = 0 if max_seq is None else max_seq + 1
+        for obj in self._buffer:
+            obj.seq = self._next_seq
+            self._next_seq += 1
+
+        lines, self._buffer = self._buffer, []
+        OutputStreamLine.objects.bulk_create(lines, batch_size=self.batch_size)
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+
+import threading
+import time
+from typing import Dict, List, Optional
+
+from django.core.management.base import BaseCommand
+
+from paas_wl.bk_app.cnative.specs.status_events import BkAppStatusWatcher
+from paas_wl.infras.cluster.models import Cluster
+
+
+class Command(BaseCommand):
+    """监听集群中 BkApp 资源的部署状态变化, 并通知等待部署结果的任务
+
+    需要作为常驻进程运行, 并配合 CNATIVE_DEPLOY_STATUS_EVENTS_ENABLED 配置项使用
+    """
+
+    help = "Watch the deploy status of BkApp resources and notify the deploy waiters"
+
+    # 检查是否有新增集群的间隔（秒）
+    refresh_clusters_interval = 60
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--cluster",
+            dest="cluster_names",
+            action="append",
+            help="只监听指定的集群（可多次指定），默认监听所有集群",
+        )
+
+    def handle(self, cluster_names: Optional[List[str]], *args, **options):
+        threads: Dict[str, threading.Thread] = {}
+        while True:
+            for name in cluster_names or Cluster.objects.values_list("name", flat=True):
+                if name in threads:
+                    continue
+
+                self.stdout.write(f"start watching BkApp status in cluster: {name}")
+                thread = threading.Thread(target=BkAppStatusWatcher(name).run, name=f"bkapp-status-{name}")
+                thread.daemon = True
+                thread.start()
+                threads[name] = thread
+            time.sleep(self.refresh_clusters_interval)
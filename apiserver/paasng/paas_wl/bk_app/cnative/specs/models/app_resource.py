@@ -276,4 +276,19 @@ def _get_env_is_running(env):
     return AppModelDeploy.objects.any_successful(env) and not env.is_offlined
 
 
+def _get_envs_is_running(envs: List[ModuleEnvironment]) -> Dict[int, bool]:
+    """Bulk version of `_get_env_is_running`"""
+    succeeded = set(
+        AppModelDeploy.objects.filter(application_id__in={env.application_id for env in envs})
+        .filter_succeeded()
+        .values_list("application_id", "module_id", "environment_name")
+        .distinct()
+    )
+    return {
+        env.id: (env.application_id, env.module_id, env.environment) in succeeded and not env.is_offlined
+        for env in envs
+    }
+
+
 EnvIsRunningHub.register_func(ApplicationType.CLOUD_NATIVE, _get_env_is_running)
+EnvIsRunningHub.register_bulk_func(ApplicationType.CLOUD_NATIVE, _get_envs_is_running)
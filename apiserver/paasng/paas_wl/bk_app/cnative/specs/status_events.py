@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+
+"""Notify the deploy waiters as soon as the operator reports a BkApp's deploy status.
+
+`BkAppStatusWatcher` watches all BkApp resources of a cluster through the shared informer. When the
+`status.deployId` or the conditions of a BkApp changed, it increases the `DeployStatusChannel`
+counter of the deploy. The waiters check the counter on each short tick, and query the deploy status
+from the cluster as soon as it changed instead of waiting for the next polling. The short ticks are only
+used while the watcher is alive, see `WatcherHeartbeat`.
+"""
+
+import logging
+import time
+from typing import Dict, NamedTuple, Optional, Set, Tuple
+
+import redis
+from kubernetes.dynamic import ResourceInstance
+
+from paas_wl.bk_app.cnative.specs.constants import BKPAAS_DEPLOY_ID_ANNO_KEY, ApiVersion
+from paas_wl.infras.resources.base import crd
+from paas_wl.infras.resources.kube_res.informer import InformerWatch, get_informer, iter_informer_events
+from paasng.core.core.storages.redisdb import get_default_redis
+
+logger = logging.getLogger(__name__)
+
+
+class DeployStatusChannel:
+    """A redis counter for notifying the status changes of a cloud-native deploy, the counter is increased
+    whenever the deploy status changed. The waiters compare it with the value they saw last time to find out
+    if the status has changed, without blocking.
+
+    :param deploy_id: ID of the AppModelDeploy object
+    """
+
+    key_prefix = "bk_paas:cnative:deploy_status"
+    # 计数器的过期时间（秒）, 需要长于等待部署结果的最长时间
+    expires_seconds = 3600
+
+    def __init__(self, deploy_id: str, redis_db: Optional[redis.Redis] = None):
+        self.deploy_id = str(deploy_id)
+        self.redis_db = redis_db or get_default_redis()
+        self.key = f"{self.key_prefix}:{self.deploy_id}"
+
+    def notify(self) -> int:
+        """Notify the waiters that the deploy status has changed
+
+        :return: the current version of the deploy status
+        """
+        pipe = self.redis_db.pipeline()
+        pipe.incr(self.key)
+        pipe.expire(self.key, self.expires_seconds)
+        return pipe.execute()[0]
+
+    def get_version(self) -> int:
+        """Get the current version of the deploy status, 0 if the status has never changed"""
+        return int(self.redis_db.get(self.key) or 0)
+
+
+class WatcherHeartbeat:
+    """The heartbeat of the running `BkAppStatusWatcher`, the waiters check the status channel on short
+    ticks only when the watcher is alive, otherwise the checking is useless.
+    """
+
+    key = "bk_paas:cnative:deploy_status:watcher_heartbeat"
+
+    def __init__(self, redis_db: Optional[redis.Redis] = None):
+        self.redis_db = redis_db or get_default_redis()
+
+    def beat(self, expires_seconds: int):
+        """Mark the watcher as alive in the next `expires_seconds` seconds"""
+        self.redis_db.set(self.key, int(time.time()), ex=expires_seconds)
+
+    def is_alive(self) -> bool:
+        return bool(self.redis_db.exists(self.key))
+
+
+class _BkAppEvent(NamedTuple):
+    type: str
+    obj: Optional[ResourceInstance] = None
+
+
+class BkAppStatusWatcher:
+    """Watch the BkApp resources of a cluster, and notify the deploy's status channel when the deploy
+    status of a BkApp changed.
+
+    :param cluster_name: name of the cluster
+    """
+
+    # Re-list the BkApps from the informer periodically, in case any change was missed
+    resync_seconds = 300
+    # The seconds to wait before retrying when the informer is not available
+    retry_interval = 30
+
+    def __init__(self, cluster_name: str, redis_db: Optional[redis.Redis] = None):
+        self.cluster_name = cluster_name
+        self.redis_db = redis_db or get_default_redis()
+        # (namespace, name) -> the deploy status of the BkApp which was notified last time
+        self._published: Dict[Tuple[str, str], Tuple] = {}
+
+    def run(self):
+        """Keep watching until the process exits"""
+        while True:
+            try:
+                self.watch(timeout_seconds=self.resync_seconds)
+            except Exception:
+                logger.exception("failed to watch BkApp status, cluster: %s", self.cluster_name)
+                time.sleep(self.retry_interval)
+
+    def watch(self, timeout_seconds: float):
+        """List all BkApps and watch the changes, until timed out or the informer was re-listed"""
+        informer = get_informer(self.cluster_name, crd.BkApp, ApiVersion.V1ALPHA2)
+        objs, resource_version = informer.list()
+        # The heartbeat outlives a whole watching cycle, it expires only when the watcher was stopped
+        WatcherHeartbeat(self.redis_db).beat(expires_seconds=int(timeout_seconds) * 2 + self.retry_interval)
+        # Forget the BkApps which were deleted when not watching
+        existing_keys = {_get_key(obj) for obj in objs}
+        self._published = {key: v for key, v in self._published.items() if key in existing_keys}
+        for obj in objs:
+            self.handle(obj)
+
+        watch = InformerWatch(
+            informer=informer,
+            namespace=None,
+            labels=None,
+            resource_version=resource_version,
+            convert=lambda raw_event: _BkAppEvent(raw_event["type"], raw_event.get("object")),
+        )
+        for event in iter_informer_events([watch], timeout_seconds):
+            if event.type == "ERROR":
+                return
+            if event.type == "DELETED":
+                self._published.pop(_get_key(event.obj), None)
+            else:
+                self.handle(event.obj)
+
+    def handle(self, obj: ResourceInstance) -> Set[str]:
+        """Notify the waiters of the deploys if the deploy status of the BkApp has changed since last time
+
+        :return: the deploy ids which were notified
+        """
+        key = _get_key(obj)
+        status = _get_deploy_status(obj)
+        if self._published.get(key) == status:
+            return set()
+        self._published[key] = status
+
+        status_deploy_id, anno_deploy_id = status[0], status[1]
+        # 新的部署下发后, 等待旧部署(status 中的 deployId)的任务也需要收到通知, 以结束等待
+        deploy_ids = {i for i in (status_deploy_id, anno_deploy_id) if i}
+        for deploy_id in deploy_ids:
+            DeployStatusChannel(deploy_id, redis_db=self.redis_db).notify()
+        return deploy_ids
+
+
+def _get_key(obj: ResourceInstance) -> Tuple[str, str]:
+    return obj.metadata.namespace or "", obj.metadata.name
+
+
+def _get_deploy_status(obj: ResourceInstance) -> Tuple:
+    """Get the fields which affect the deploy status of a BkApp, see `WaitAppModelReady`
+
+    :return: (status.deployId, deploy id in annotations, phase, conditions)
+    """
+    data = obj.to_dict()
+    annotations = data["metadata"].get("annotations") or {}
+    status = data.get("status") or {}
+    conditions = tuple(
+        (c.get("type"), c.get("status"), c.get("reason"), c.get("message"), c.get("observedGeneration"))
+        for c in status.get("conditions") or []
+    )
+    return status.get("deployId"), annotations.get(BKPAAS_DEPLOY_ID_ANNO_KEY), status.get("phase"), conditions
@@ -19,12 +19,12 @@ import logging
 import re
 from collections import defaultdict
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Pattern, Set, Tuple
+from typing import Collection, Dict, Iterable, List, Optional, Pattern, Set, Tuple
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
 
-from paas_wl.bk_app.applications.models.build import Build
+from paas_wl.bk_app.applications.models.build import Build, BuildProcess
 from paas_wl.utils.blobstore import BKGenericRepo, S3Store, make_blob_store
 
 logger = logging.getLogger(__name__)
@@ -87,11 +87,18 @@ class Command(BaseCommand):
             # 顺序入队
             bucket_dict[str(build.app.name)].append(build)
 
+        # 源码包可能被其他环境的构建复用（如测试环境上传的源码包被部署到生产环境），仍被保留的构建所使用的源码包不能删除
+        retained_tar_paths = get_source_tar_paths(
+            build for bucket in bucket_dict.values() for build in bucket.builds[:max_reserved_num_per_env]
+        )
+
         for bucket in bucket_dict.values():
             # 按创建时间倒序查询, 并顺序入队后, 目前队列则是按时间顺序排列,
             # 因此这里只需要保留前 max_reserved_num_per_env 个.
             for build in bucket.builds[max_reserved_num_per_env:]:
-                result = delete_from_blob_store(build, dry_run=dry_run, pattern=match_pattern)
+                result = delete_from_blob_store(
+                    build, dry_run=dry_run, pattern=match_pattern, retained_tar_paths=retained_tar_paths
+                )
 
                 deleted_count += result[0]
                 deleted_size += result[1]
@@ -101,8 +108,29 @@ class Command(BaseCommand):
         )
 
 
-def delete_from_blob_store(build: Build, dry_run: bool = True, pattern: Optional[Pattern] = None) -> Tuple[int, int]:
-    """从 blob_store 删除构建产物"""
+def get_source_tar_paths(builds: Iterable[Build], batch_size: int = 1000) -> Set[str]:
+    """获取构建所使用的源码包路径"""
+    paths: Set[str] = set()
+    build_ids = [build.uuid for build in builds]
+    for i in range(0, len(build_ids), batch_size):
+        paths.update(
+            BuildProcess.objects.filter(build_id__in=build_ids[i : i + batch_size]).values_list(
+                "source_tar_path", flat=True
+            )
+        )
+    return paths
+
+
+def delete_from_blob_store(
+    build: Build,
+    dry_run: bool = True,
+    pattern: Optional[Pattern] = None,
+    retained_tar_paths: Collection[str] = (),
+) -> Tuple[int, int]:
+    """从 blob_store 删除构建产物
+
+    :param retained_tar_paths: 仍在被使用，不能删除的源码包路径
+    """
     if build.artifact_deleted:
         return 0, 0
 
@@ -124,11 +152,15 @@ def delete_from_blob_store(build: Build, dry_run: bool = True, pattern: Optional
         if pattern and not pattern.match(key):
             logger.info("文件 %s 不符合删除规则 %s, 跳过删除.", key, pattern)
             continue
+        if key in retained_tar_paths:
+            logger.info("源码包 %s 仍被其他构建复用, 跳过删除.", key)
+            continue
 
         try:
             file_size = parse_file_size(store.get_file_metadata(key))
             logger.info("删除文件 %s, 将释放 %s bytes 空间", key, file_size)
             if not dry_run:
+                # 源码包的复用索引由 paasng 在复用前校验文件是否存在, 此处无需处理
                 store.delete_file(key)
             deleted_count += 1
             deleted_size += file_size
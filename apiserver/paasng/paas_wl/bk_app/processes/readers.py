@@ -59,6 +59,8 @@ class ProcessAPIAdapter:
 class ProcessReader(AppEntityReader[Process]):
     """Manager for ProcSpecs"""
 
+    use_informer = True
+
     def list_by_app_with_meta(
         self, app: "WlApp", labels: Optional[Dict] = None, fields: Optional[Dict] = None
     ) -> ResourceList[Process]:
@@ -82,6 +84,8 @@ process_kmodel = ProcessReader(Process)
 class InstanceReader(AppEntityReader[Instance]):
     """Customized reader for ProcInstance"""
 
+    use_informer = True
+
     def list_by_process_type(self, app: "WlApp", process_type: str) -> List[Instance]:
         """List instances by process type"""
         labels = get_process_selector(app, process_type)
@@ -140,6 +144,7 @@ def retrieve_associated_wl_app(labels: Dict[str, str]) -> WlApp:
 
 class ProcessNamespaceScopedReader(NamespaceScopedReader[Process]):
     entity_type = Process
+    use_informer = True
 
     def list_by_ns_with_mdata(
         self, cluster_name: str, namespace: str, labels: Optional[Dict] = None
@@ -156,6 +161,7 @@ class ProcessNamespaceScopedReader(NamespaceScopedReader[Process]):
 
 class InstanceNamespaceScopeReader(NamespaceScopedReader[Instance]):
     entity_type = Instance
+    use_informer = True
 
     def list_by_ns_with_mdata(
         self, cluster_name: str, namespace: str, labels: Optional[Dict] = None
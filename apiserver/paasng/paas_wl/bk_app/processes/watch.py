@@ -18,7 +18,7 @@
 import logging
 import queue
 import threading
-from typing import Any, Generator, List, Optional, Union
+from typing import Any, Generator, List, Optional, Union, cast
 
 from django.db import connection
 from django.utils.functional import cached_property
@@ -35,6 +35,7 @@ from paas_wl.bk_app.processes.readers import (
 )
 from paas_wl.infras.cluster.shim import EnvClusterService
 from paas_wl.infras.resources.kube_res.base import WatchEvent
+from paas_wl.infras.resources.kube_res.informer import InformerWatch, iter_informer_events
 from paasng.platform.applications.models import ModuleEnvironment
 
 logger = logging.getLogger(__name__)
@@ -83,6 +84,15 @@ class ProcInstByEnvListWatcher:
         :param rv_proc: if given, only events with greater resource_version will be returned
         :param rv_inst: same as rv_proc, but for ProcInst type
         """
+        informer_watches = [
+            ns_process_kmodel.informer_watch_by_ns(self.cluster_name, self.namespace, resource_version=rv_proc),
+            ns_instance_kmodel.informer_watch_by_ns(
+                self.cluster_name, self.namespace, resource_version=rv_inst, ignore_unknown_objs=True
+            ),
+        ]
+        if all(informer_watches):
+            yield from iter_informer_events(cast(List[InformerWatch], informer_watches), timeout_seconds)
+            return
 
         event_gens: List = [
             ns_process_kmodel.watch_by_ns(
@@ -141,6 +151,23 @@ class ProcInstByModuleEnvListWatcher:
         :param rv_proc: if given, only events with greater resource_version will be returned
         :param rv_inst: same as rv_proc, but for ProcInst type
         """
+        # Consume events from the shared informers in current thread if available, no extra threads or
+        # apiserver connections are needed.
+        informer_watches = [
+            process_kmodel.informer_watch_by_app(
+                self.wl_app, labels=ProcessAPIAdapter.app_selector(self.wl_app), resource_version=rv_proc
+            ),
+            instance_kmodel.informer_watch_by_app(
+                self.wl_app,
+                labels=ProcessAPIAdapter.app_selector(self.wl_app),
+                resource_version=rv_inst,
+                ignore_unknown_objs=True,
+            ),
+        ]
+        if all(informer_watches):
+            yield from iter_informer_events(cast(List[InformerWatch], informer_watches), timeout_seconds)
+            return
+
         event_gens: List = [
             process_kmodel.watch_by_app(
                 app=self.wl_app,
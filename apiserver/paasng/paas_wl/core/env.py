@@ -14,24 +14,32 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
-from typing import Callable, Dict
+from collections import defaultdict
+from typing import Callable, Dict, List
 
 from paas_wl.bk_app.applications.models.release import Release
 from paasng.platform.applications.constants import ApplicationType
 from paasng.platform.applications.models import ModuleEnvironment
 
 EnvIsRunningFunc = Callable[[ModuleEnvironment], bool]
+# Bulk version of EnvIsRunningFunc, returns a dict of {env.id: is_running}
+EnvsIsRunningFunc = Callable[[List[ModuleEnvironment]], Dict[int, bool]]
 
 
 class EnvIsRunningHub:
     """Get "is_running" property of env by different application type."""
 
     _map: Dict[str, EnvIsRunningFunc] = {}
+    _bulk_map: Dict[str, EnvsIsRunningFunc] = {}
 
     @classmethod
     def register_func(cls, type: ApplicationType, func: EnvIsRunningFunc):
         cls._map[type.value] = func
 
+    @classmethod
+    def register_bulk_func(cls, type: ApplicationType, func: EnvsIsRunningFunc):
+        cls._bulk_map[type.value] = func
+
     @classmethod
     def get(cls, env: ModuleEnvironment) -> bool:
         """Check if an env is running, which mean a successful deployment is available
@@ -47,11 +55,36 @@ class EnvIsRunningHub:
             raise RuntimeError(f'The "env_is_running" impl for {app_type} is not registered')
         return func(env)
 
+    @classmethod
+    def get_bulk(cls, envs: List[ModuleEnvironment]) -> Dict[int, bool]:
+        """Check if the envs are running in bulk. The envs are grouped by application type, the bulk
+        implementation of the type will be used if registered, otherwise check the envs one by one.
+
+        :param envs: The environment objects, the "application" relation should be loaded to avoid queries
+        :return: A dict of {env.id: is_running}
+        """
+        groups: Dict[str, List[ModuleEnvironment]] = defaultdict(list)
+        for env in envs:
+            groups[env.application.type].append(env)
+
+        results = {}
+        for app_type, group in groups.items():
+            if func := cls._bulk_map.get(app_type):
+                results.update(func(group))
+            else:
+                results.update({env.id: cls.get(env) for env in group})
+        return results
+
 
 def env_is_running(env: ModuleEnvironment) -> bool:
     return EnvIsRunningHub.get(env)
 
 
+def envs_is_running(envs: List[ModuleEnvironment]) -> Dict[int, bool]:
+    """Bulk version of `env_is_running`, return a dict of {env.id: is_running}"""
+    return EnvIsRunningHub.get_bulk(envs)
+
+
 # Register env_is_running implementations
 def _get_env_is_running(env: ModuleEnvironment) -> bool:
     """Get "is_running" status by query for successful releases."""
@@ -59,5 +92,20 @@ def _get_env_is_running(env: ModuleEnvironment) -> bool:
     return Release.objects.any_successful(wl_app) and not env.is_offlined
 
 
+def _get_envs_is_running(envs: List[ModuleEnvironment]) -> Dict[int, bool]:
+    """Bulk version of `_get_env_is_running`, the WlApp's primary key is the same as the engine app's."""
+    wl_app_ids = {env.engine_app_id for env in envs}
+    # Exclude the initial release objects, see `ReleaseManager.any_successful()`
+    released_ids = set(
+        Release.objects.exclude(version=1, build=None)
+        .filter(app_id__in=wl_app_ids, failed=False)
+        .values_list("app_id", flat=True)
+        .distinct()
+    )
+    return {env.id: env.engine_app_id in released_ids and not env.is_offlined for env in envs}
+
+
 EnvIsRunningHub.register_func(ApplicationType.DEFAULT, _get_env_is_running)
 EnvIsRunningHub.register_func(ApplicationType.ENGINELESS_APP, _get_env_is_running)
+EnvIsRunningHub.register_bulk_func(ApplicationType.DEFAULT, _get_envs_is_running)
+EnvIsRunningHub.register_bulk_func(ApplicationType.ENGINELESS_APP, _get_envs_is_running)
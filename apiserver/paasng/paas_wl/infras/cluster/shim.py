@@ -15,8 +15,12 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
-from typing import TYPE_CHECKING, Dict
+from typing import TYPE_CHECKING, Dict, List
 
+from django.db.models import OuterRef, Subquery
+
+from paas_wl.bk_app.applications.models.app import WlApp
+from paas_wl.bk_app.applications.models.config import Config
 from paas_wl.infras.cluster.allocator import ClusterAllocator
 from paas_wl.infras.cluster.constants import ClusterFeatureFlag
 from paas_wl.infras.cluster.entities import AllocationContext
@@ -96,6 +100,21 @@ class EnvClusterService:
         cfg.save()
 
 
+def get_envs_cluster_names(envs: List["ModuleEnvironment"]) -> Dict[int, str]:
+    """Bulk version of `EnvClusterService.get_cluster_name`, the bound clusters are queried in one query,
+    the envs which have no bound cluster fall back to the default cluster.
+
+    :return: A dict of {env.id: cluster_name}
+    """
+    latest_cluster = Config.objects.filter(app_id=OuterRef("pk")).order_by("-created").values("cluster")[:1]
+    bound_names = dict(
+        WlApp.objects.filter(pk__in=[env.engine_app_id for env in envs])
+        .annotate(cluster_name=Subquery(latest_cluster))
+        .values_list("pk", "cluster_name")
+    )
+    return {env.id: bound_names.get(env.engine_app_id) or EnvClusterService(env).get_cluster_name() for env in envs}
+
+
 def get_app_prod_env_cluster(app: "Application") -> Cluster:
     """获取默认模块生产环境应用使用的集群名称
 
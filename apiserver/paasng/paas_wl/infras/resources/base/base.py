@@ -18,18 +18,24 @@
 """Base utils for kubernetes scheduler"""
 
 import logging
+import threading
+import time
+import weakref
 from functools import lru_cache
-from typing import Dict, List
+from typing import Dict, List, Optional
 
-from blue_krill.connections.ha_endpoint_pool import HAEndpointPool
+from blue_krill.connections.ha_endpoint_pool import FAILURE_SCORE_DELTA, Endpoint, HAEndpointPool
+from django.conf import settings
 from django.utils import timezone
 from kubernetes.client import ApiClient as BaseApiClient
 from kubernetes.client import Configuration
+from kubernetes.client.exceptions import ApiException
 from kubernetes.client.rest import RESTClientObject
 from urllib3.exceptions import HTTPError
 
 from paas_wl.infras.cluster.pools import ContextConfigurationPoolMap
 from paasng.core.core.storages.redisdb import get_default_redis
+from paasng.misc.metrics import KUBE_CLIENT_REGISTRY_COUNTER, KUBE_ENDPOINT_HEALTH_CHECK_COUNTER
 
 logger = logging.getLogger(__name__)
 
@@ -62,6 +68,7 @@ class EnhancedApiClient(BaseApiClient):
     """Enhanced Kubernetes ApiClient, with some extra features:
 
     1. Client-side HA support using multiple endpoints
+    2. Thread-safe, the client object can be shared by multiple threads, see `ClientRegistry`
 
     Arguments:
 
@@ -70,9 +77,19 @@ class EnhancedApiClient(BaseApiClient):
 
     def __init__(self, ep_pool: HAEndpointPool, *args, **kwargs):
         self.ep_pool = ep_pool
+        self._local = threading.local()
         configuration = ep_pool.get()
         super().__init__(configuration, *args, **kwargs)
 
+    @property
+    def configuration(self) -> Configuration:
+        """The configuration of the endpoint which was elected by current thread"""
+        return getattr(self._local, "configuration", None) or self.ep_pool.get()
+
+    @configuration.setter
+    def configuration(self, configuration: Configuration):
+        self._local.configuration = configuration
+
     def call_api(self, *args, **kwargs):
         """Call Kubernetes API"""
         self.ep_pool.elect()
@@ -81,7 +98,7 @@ class EnhancedApiClient(BaseApiClient):
         # will stay intact because it's value was set in `BaseApiClient.__init__` method. This behaviour is not
         # harmful to current implementation, but due to this vulnerability, we may have to change current
         # implementation(e.g. create another `Client` object) in order to make things work in the future.
-        self.configuration: Configuration = self.ep_pool.get()
+        self.configuration = self.ep_pool.get()
         try:
             logger.debug("Send request to Kubernetes API %s...", self.configuration.host)
             ret = super().call_api(*args, **kwargs)
@@ -106,7 +123,134 @@ class EnhancedApiClient(BaseApiClient):
 @lru_cache(maxsize=128)
 def make_rest_client(configuration: Configuration) -> RESTClientObject:
     """Use LRU cache to avoid re-creating HTTP connections"""
-    return RESTClientObject(configuration)
+    # The connections in the pool are kept alive and reused, a larger pool avoids the extra
+    # TLS handshakes when the client is shared by many threads.
+    return RESTClientObject(configuration, maxsize=settings.KUBE_CLIENT_POOL_MAXSIZE)
+
+
+class ClientRegistry:
+    """A thread-safe registry which holds the reusable client object of each cluster, so that
+    the connection pools(and the TLS sessions) won't be re-created for every request.
+
+    The clients are keyed by cluster name and the last modified time of the global config, all
+    clients will be dropped once the clusters have been updated.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_modified: Optional[str] = None
+        self._clients: Dict[str, EnhancedApiClient] = {}
+
+    def get(self, cluster_name: str, last_modified: str) -> EnhancedApiClient:
+        """Get the client object of the given cluster, create one if not exists.
+
+        :raise KeyError: when the cluster can not be found
+        """
+        with self._lock:
+            if last_modified != self._last_modified:
+                self._clients = {}
+                self._last_modified = last_modified
+
+            if client := self._clients.get(cluster_name):
+                KUBE_CLIENT_REGISTRY_COUNTER.labels(cluster_name=cluster_name, result="hit").inc()
+                return client
+
+            ep_pool = _get_global_configuration_pool(last_modified)[cluster_name]
+            client = self._clients[cluster_name] = EnhancedApiClient(ep_pool=ep_pool)
+
+        KUBE_CLIENT_REGISTRY_COUNTER.labels(cluster_name=cluster_name, result="miss").inc()
+        endpoints_health_checker.watch(ep_pool)
+        return client
+
+    def clear(self):
+        with self._lock:
+            self._clients = {}
+            self._last_modified = None
+
+
+client_registry = ClientRegistry()
+
+
+class EndpointsHealthChecker:
+    """Check the health of the endpoints in the pools periodically in a background thread. The
+    unhealthy endpoints are excluded from the election in advance, and the recovered ones are
+    brought back without waiting for the recovery interval of the HA algorithm.
+
+    Only the pools which have multiple endpoints are checked.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools: "weakref.WeakSet[HAEndpointPool]" = weakref.WeakSet()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, ep_pool: HAEndpointPool):
+        """Start checking the endpoints of the given pool"""
+        if settings.KUBE_CLIENT_HEALTH_CHECK_INTERVAL <= 0 or len(ep_pool.endpoints) < 2:
+            return
+
+        with self._lock:
+            self._pools.add(ep_pool)
+            if not (self._thread and self._thread.is_alive()):
+                self._thread = threading.Thread(target=self._run, name="kube-endpoints-health-checker", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(settings.KUBE_CLIENT_HEALTH_CHECK_INTERVAL)
+            for ep_pool in list(self._pools):
+                try:
+                    self.check(ep_pool)
+                except Exception:
+                    logger.exception("Unable to check the health of endpoints: %s", ep_pool)
+
+    def check(self, ep_pool: HAEndpointPool):
+        """Check all endpoints of the pool, re-elect if the active endpoint becomes unhealthy."""
+        for ep in ep_pool.endpoints:
+            self._update_endpoint(ep_pool, ep, self.probe(ep.raw))
+
+        if ep_pool.get_endpoint().is_unhealthy() and ep_pool.list_healthy():
+            ep_pool.elect()
+
+    @staticmethod
+    def _update_endpoint(ep_pool: HAEndpointPool, ep: Endpoint, healthy: bool):
+        if healthy:
+            if ep.is_unhealthy():
+                logger.info("Endpoint %s has recovered", ep.raw.host)
+                ep.set_healthy()
+            return
+
+        ep.fail(score_delta=FAILURE_SCORE_DELTA)
+        if not ep.is_unhealthy() and ep_pool.algorithm.is_unhealthy(ep):
+            logger.warning("Endpoint %s is unhealthy", ep.raw.host)
+            ep.set_unhealthy()
+
+    @staticmethod
+    def probe(configuration: Configuration) -> bool:
+        """Probe the "/healthz" API of the apiserver"""
+        client = BaseApiClient(configuration)
+        client.rest_client = make_rest_client(configuration)
+        try:
+            client.call_api(
+                "/healthz",
+                "GET",
+                auth_settings=["BearerToken"],
+                _preload_content=False,
+                _request_timeout=settings.KUBE_CLIENT_HEALTH_CHECK_TIMEOUT,
+            )
+        except HTTPError:
+            healthy = False
+        except ApiException as e:
+            # The apiserver is reachable, but the authentication might be failed
+            healthy = e.status is not None and e.status < 500
+        else:
+            healthy = True
+
+        KUBE_ENDPOINT_HEALTH_CHECK_COUNTER.labels(host=configuration.host, healthy=str(healthy).lower()).inc()
+        return healthy
+
+
+endpoints_health_checker = EndpointsHealthChecker()
 
 
 def get_all_cluster_names() -> List[str]:
@@ -114,19 +258,19 @@ def get_all_cluster_names() -> List[str]:
 
 
 def get_client_by_cluster_name(cluster_name: str) -> EnhancedApiClient:
-    """Initialize an kubernetes api client object by given context
-
-    TODO/IMPORTANT: Add cache to reuse connection pools which were maintained by every individual client object
+    """Get the kubernetes api client object by given context, the client object is shared in
+    current process to reuse the connection pools, see `ClientRegistry` for details.
     """
     if not cluster_name:
         raise ValueError("context_name must not be empty")
 
-    if cluster_name not in get_all_cluster_names():
+    last_modified = _GlobalConfigLastModified().get()
+    all_cluster_names = list(_get_global_configuration_pool(last_modified).keys())
+    if cluster_name not in all_cluster_names:
         # if the context which user want to use do not exist, raise a ValueError
-        raise ValueError(f'context "{cluster_name}" not found in settings, all context: {get_all_cluster_names()}')
+        raise ValueError(f'context "{cluster_name}" not found in settings, all context: {all_cluster_names}')
 
-    ep_pool = get_global_configuration_pool()[cluster_name]
-    return EnhancedApiClient(ep_pool=ep_pool)
+    return client_registry.get(cluster_name, last_modified)
 
 
 class _GlobalConfigLastModified:
@@ -149,12 +149,13 @@ class BaseKresource:
 
         self.client = _api_client
 
-        # TODO: Add cache
+        # The discovery results are cached per cluster, see `LazyDiscoverer` for details
         self.dynamic_client = CoreDynamicClient(self.client)
         self.version = self.dynamic_client.version
 
         self.request_timeout = request_timeout or get_default_options().get("request_timeout")
         self.api_version = api_version
+        self._resources_lookup: Optional[Tuple[List[Resource], Optional[Resource]]] = None
         self.ops_name = NameBasedOperations(self, self.request_timeout)
         self.ops_batch = BatchOperations(self, self.request_timeout)
 
@@ -178,6 +179,26 @@ class BaseKresource:
         """Clone a Kres object from another"""
         return cls(obj.client, obj.request_timeout)
 
+    def lookup_resources(self) -> Tuple[List[Resource], Optional[Resource]]:
+        """Look up the available resources and the preferred resource of current kind, the result
+        is shared by all operations objects of current kres.
+
+        :raises: ResourceNotFoundError when the preferred resource is not found and no api_version is given
+        """
+        if self._resources_lookup is None:
+            available_resources = self.dynamic_client.resources.search(kind=self.kind)
+            try:
+                preferred_resource = self.dynamic_client.get_preferred_resource(self.kind)
+            except ResourceNotFoundError:
+                # 存在一种场景，即某类资源在 preferred group version 中是不存在的，
+                # 但集群中存在，此时如果指定 api_version 进行访问 / 操作，应当是被允许的
+                if not (available_resources and self.api_version):
+                    raise
+
+                preferred_resource = None
+            self._resources_lookup = (available_resources, preferred_resource)
+        return self._resources_lookup
+
 
 class BaseOperations:
     """Base operation class for kubernetes resources
@@ -193,16 +214,7 @@ class BaseOperations:
         self.kres = kres
         self.request_timeout = request_timeout
 
-        self._available_resources = self.client.resources.search(kind=self.kres.kind)
-        try:
-            self._preferred_resource = self.client.get_preferred_resource(self.kres.kind)
-        except ResourceNotFoundError:
-            # 存在一种场景，即某类资源在 preferred group version 中是不存在的，
-            # 但集群中存在，此时如果指定 api_version 进行访问 / 操作，应当是被允许的
-            if not (self._available_resources and self.kres.api_version):
-                raise
-
-            self._preferred_resource = None
+        self._available_resources, self._preferred_resource = self.kres.lookup_resources()
 
         self.resource: Resource  # make type checker happy
         if not self.kres.api_version:
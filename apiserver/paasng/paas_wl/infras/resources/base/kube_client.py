@@ -15,24 +15,128 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import hashlib
+import json
 import logging
-from collections import defaultdict
-from typing import Any, Dict
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Optional, Tuple
 
+from django.conf import settings
 from kubernetes.dynamic import DynamicClient, Resource
+from kubernetes.dynamic.discovery import CacheDecoder, CacheEncoder, ResourceGroup
 from kubernetes.dynamic.discovery import LazyDiscoverer as _LazyDiscoverer
-from kubernetes.dynamic.discovery import ResourceGroup
 from kubernetes.dynamic.exceptions import DynamicApiError, NotFoundError, ResourceNotFoundError, ResourceNotUniqueError
 
 logger = logging.getLogger(__name__)
 
 
+class DiscoveryCache:
+    """Process-level cache for the results of the Kubernetes API discovery. The discoverer objects
+    which connect to the same cluster share one cache, so that the discovery cache file won't be
+    read every time a resource helper(such as `KPod`) is initialized.
+
+    Only the clients which have an endpoints pool(`EnhancedApiClient`) are cached, the pool object is
+    identical for the same cluster config, it will be rebuilt when the clusters have been updated.
+
+    The cache is stored in the encoded(JSON) form, which is independent of the client, every `get` call
+    decodes a private copy bound to the given client, so discoverers in different threads never
+    mutate(or use the client of) each other's objects.
+
+    :param maxsize: The max number of clusters(pools) to be cached
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        # {key: (expires_at, ep_pool, encoded_cache)}, the pool object is kept to make sure that it's id
+        # won't be reused
+        self._entries: "OrderedDict[int, Tuple[float, Any, str]]" = OrderedDict()
+
+    @staticmethod
+    def make_key(client) -> Optional[int]:
+        """Make the cache key by the dynamic client object, return None if the client is not cacheable."""
+        ep_pool = getattr(getattr(client, "client", None), "ep_pool", None)
+        if ep_pool is None:
+            return None
+        return id(ep_pool)
+
+    def get(self, key: int, client) -> Optional[Dict]:
+        """Get the cache of given key, the `Resource` objects in it are bound to the given client."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+
+            expires_at, _, encoded = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+        return json.loads(encoded, cls=CacheDecoder, client=client)
+
+    def set(self, key: int, client, cache: Dict):
+        ttl = settings.KUBE_DISCOVERY_CACHE_TTL
+        if ttl <= 0:
+            return
+
+        encoded = json.dumps(cache, cls=CacheEncoder)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, client.client.ep_pool, encoded)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Optional[int] = None):
+        """Invalidate the cache of given key, all caches will be removed if key is not provided."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+discovery_cache = DiscoveryCache()
+
+
+def _get_default_cache_file(client) -> str:
+    """Get the default cache file path, same as the one used by the original `Discoverer`"""
+    cache_id = client.configuration.host.encode("utf-8")
+    return os.path.join(tempfile.gettempdir(), "osrcp-{0}.json".format(hashlib.md5(cache_id).hexdigest()))
+
+
 class LazyDiscoverer(_LazyDiscoverer):
-    """LazyDiscoverer fixed cache bug
+    """LazyDiscoverer fixed cache bug, the discovery results are shared in the process by using `discovery_cache`
 
     Note: You cannot change the name `LazyDiscoverer`, otherwise the override will not work
     """
 
+    def __init__(self, client, cache_file):
+        self._discovery_cache_key = key = discovery_cache.make_key(client)
+        cached = discovery_cache.get(key, client) if key is not None else None
+        if cached is None:
+            super().__init__(client, cache_file)
+            if key is not None:
+                discovery_cache.set(key, client, self._cache)
+            return
+
+        # Initialize from the shared cache, no file reading or API requests are required because
+        # the server info and the api groups are already in the cache.
+        self.client = client
+        self._Discoverer__cache_file = cache_file or _get_default_cache_file(client)
+        self._cache = cached
+        self._load_server_info()
+        self.discover()
+        self.__update_cache = False
+
+    def _write_cache(self):
+        super()._write_cache()
+        # Publish the updated cache(refreshed or lazily discovered groups) to other discoverers
+        if getattr(self, "_discovery_cache_key", None) is not None:
+            discovery_cache.set(self._discovery_cache_key, self.client, self._cache)
+
     def __search(self, parts, resources, reqParams):  # noqa
         part = parts[0]
         if part != "*":
@@ -36,10 +36,12 @@ from typing import (
     TypeVar,
 )
 
+from django.conf import settings
 from kubernetes.client.exceptions import ApiException
 from kubernetes.dynamic import ResourceField, ResourceInstance
 
 from paas_wl.bk_app.applications.models import WlApp
+from paas_wl.infras.cluster.utils import get_cluster_by_app
 from paas_wl.infras.resources.base import kres
 from paas_wl.infras.resources.base.exceptions import NotAppScopedResource, ResourceDeleteTimeout, ResourceMissing
 from paas_wl.infras.resources.kube_res.exceptions import (
@@ -47,6 +49,13 @@ from paas_wl.infras.resources.kube_res.exceptions import (
     AppEntityDeserializeError,
     AppEntityNotFound,
 )
+from paas_wl.infras.resources.kube_res.informer import (
+    InformerWatch,
+    RawEvent,
+    SharedInformer,
+    get_informer,
+    iter_informer_events,
+)
 from paas_wl.infras.resources.utils.basic import get_client_by_app, get_client_by_cluster_name
 
 if TYPE_CHECKING:
@@ -272,6 +281,8 @@ class NamespaceScopedReader(Generic[AET]):
     """A reader for namespace-scoped resources."""
 
     entity_type: Type[AET]
+    # Whether to list and watch resources from the process-wide shared informer(if enabled in settings)
+    use_informer: bool = False
 
     def retrieve_associated_wl_app(self, kube_data: ResourceInstance) -> WlApp:
         """Detect the corresponding wl_app for the given kube_data
@@ -294,11 +305,16 @@ class NamespaceScopedReader(Generic[AET]):
         """List resources from a specified namespace while optionally filtering based on labels."""
         labels = labels or {}
         deserializer = self._make_deserializer(cluster_name)
-        with self.kres(cluster_name, api_version=deserializer.get_apiversion()) as kres_client:
-            ret = kres_client.ops_batch.list(namespace=namespace, labels=labels)
+        if informer := self._get_informer(cluster_name, deserializer.get_apiversion()):
+            kube_objs, rv = informer.list(namespace=namespace, labels=labels)
+            metadata = ResourceField(params={"resourceVersion": str(rv)})
+        else:
+            with self.kres(cluster_name, api_version=deserializer.get_apiversion()) as kres_client:
+                ret = kres_client.ops_batch.list(namespace=namespace, labels=labels)
+            kube_objs, metadata = ret.items, ret.metadata
 
         items = []
-        for kube_data in ret.items:
+        for kube_data in kube_objs:
             try:
                 wl_app = self.retrieve_associated_wl_app(kube_data)
             except NotAppScopedResource:
@@ -307,7 +323,7 @@ class NamespaceScopedReader(Generic[AET]):
             # Set _kube_data
             item._kube_data = kube_data
             items.append(item)
-        return ResourceList[AET](items=items, metadata=ret.metadata)
+        return ResourceList[AET](items=items, metadata=metadata)
 
     def watch_by_ns(
         self,
@@ -369,6 +385,65 @@ class NamespaceScopedReader(Generic[AET]):
                 else:
                     raise
 
+    def informer_watch_by_ns(
+        self,
+        cluster_name: str,
+        namespace: str,
+        labels: Optional[Dict] = None,
+        resource_version: Optional[int] = None,
+        ignore_unknown_objs: bool = False,
+    ) -> Optional[InformerWatch]:
+        """Describe a watch of the namespace's resources from the shared informer, the result can be
+        consumed by `iter_informer_events` together with other watches in one thread.
+
+        :return: None if the informer is not enabled or not available
+        """
+        deserializer = self._make_deserializer(cluster_name)
+        informer = self._get_informer(cluster_name, deserializer.get_apiversion())
+        if not informer:
+            return None
+
+        def convert(raw_event: RawEvent) -> Optional[WatchEvent[AET]]:
+            if raw_event["type"] == "ERROR":
+                return WatchEvent(type="ERROR", error_message=raw_event["raw_object"].get("message", "Unknown"))
+
+            kube_data = raw_event["object"]
+            try:
+                wl_app = self.retrieve_associated_wl_app(kube_data)
+            except NotAppScopedResource:
+                return None
+
+            event = WatchEvent[AET](type=raw_event["type"])
+            try:
+                event.res_object = deserializer.deserialize(wl_app, kube_data)
+            except AppEntityDeserializeError as e:
+                if ignore_unknown_objs:
+                    logger.warning("failed to deserialize k8s resource %s, skip.", e.res)
+                    return None
+                return WatchEvent(type="ERROR", error_message=e.msg)
+            event.res_object._kube_data = kube_data
+            return event
+
+        return InformerWatch(
+            informer=informer,
+            namespace=namespace,
+            labels=labels,
+            resource_version=resource_version,
+            convert=convert,
+        )
+
+    def _get_informer(self, cluster_name: str, api_version: str) -> Optional[SharedInformer]:
+        """Get the shared informer for current kind, return None if it's not enabled or not available"""
+        if not (self.use_informer and settings.KUBE_RES_INFORMER_ENABLED):
+            return None
+        try:
+            return get_informer(
+                cluster_name, self.entity_type.Meta.kres_class, api_version, settings.KUBE_RES_INFORMER_LABELS
+            )
+        except Exception:
+            logger.warning("shared informer is not available, fallback to apiserver, cluster: %s", cluster_name)
+            return None
+
     @staticmethod
     def _exc_is_expired_rv(exc: ApiException) -> bool:
         """Check if an exception is raised because of expired ResourceVersion"""
@@ -415,6 +490,10 @@ class AppEntityReader(Generic[AET]):
     :param entity_type: Bind current reader with this type, it must be subtype of AppEntity
     """
 
+    # Whether to list and watch resources from the process-wide shared informer(if enabled in
+    # settings), only suitable for kinds which are listed and watched frequently.
+    use_informer: bool = False
+
     def __init__(self, entity_type: Type[AET]):
         self.entity_type = entity_type
 
@@ -450,16 +529,24 @@ class AppEntityReader(Generic[AET]):
         labels = labels or {}
         fields = fields or {}
         deserializer = self._make_deserializer(app)
-        with self.kres(app, api_version=deserializer.get_apiversion()) as kres_client:
-            ret = kres_client.ops_batch.list(namespace=self._get_namespace(app), labels=labels, fields=fields)
+
+        # Field selectors are not supported by the informer
+        informer = None if fields else self._get_informer(app, deserializer.get_apiversion())
+        if informer:
+            kube_objs, rv = informer.list(namespace=self._get_namespace(app), labels=labels)
+            metadata = ResourceField(params={"resourceVersion": str(rv)})
+        else:
+            with self.kres(app, api_version=deserializer.get_apiversion()) as kres_client:
+                ret = kres_client.ops_batch.list(namespace=self._get_namespace(app), labels=labels, fields=fields)
+            kube_objs, metadata = ret.items, ret.metadata
 
         items = []
-        for kube_data in ret.items:
+        for kube_data in kube_objs:
             item = deserializer.deserialize(app, kube_data)
             # Set _kube_data
             item._kube_data = kube_data
             items.append(item)
-        return ResourceList[AET](items=items, metadata=ret.metadata)
+        return ResourceList[AET](items=items, metadata=metadata)
 
     def watch_by_app(
         self, app: WlApp, labels: Optional[Dict] = None, ignore_unknown_objs: bool = False, **kwargs
@@ -478,6 +565,16 @@ class AppEntityReader(Generic[AET]):
             # Setting "namespace" is not allowed, this function use the namespace of "app"
             raise ValueError('"namespace" is not supported')
 
+        informer_watch = self.informer_watch_by_app(
+            app, labels, kwargs.get("resource_version"), ignore_unknown_objs=ignore_unknown_objs
+        )
+        if informer_watch:
+            timeout_seconds = kwargs.get("timeout_seconds") or kwargs.get("timeout")
+            if not timeout_seconds:
+                raise ValueError("timeout parameter is required")
+            yield from iter_informer_events([informer_watch], timeout_seconds)
+            return
+
         deserializer = self._make_deserializer(app)
         with self.kres(app, api_version=deserializer.get_apiversion()) as kres_client:
             try:
@@ -509,6 +606,61 @@ class AppEntityReader(Generic[AET]):
                 else:
                     raise
 
+    def informer_watch_by_app(
+        self,
+        app: WlApp,
+        labels: Optional[Dict] = None,
+        resource_version: Optional[int] = None,
+        ignore_unknown_objs: bool = False,
+    ) -> Optional[InformerWatch]:
+        """Describe a watch of app's resources from the shared informer, the result can be consumed
+        by `iter_informer_events` together with other watches in one thread.
+
+        :return: None if the informer is not enabled or not available
+        """
+        deserializer = self._make_deserializer(app)
+        informer = self._get_informer(app, deserializer.get_apiversion())
+        if not informer:
+            return None
+
+        def convert(raw_event: RawEvent) -> Optional[WatchEvent[AET]]:
+            if raw_event["type"] == "ERROR":
+                return WatchEvent(type="ERROR", error_message=raw_event["raw_object"].get("message", "Unknown"))
+
+            event = WatchEvent[AET](type=raw_event["type"])
+            try:
+                event.res_object = deserializer.deserialize(app, raw_event["object"])
+            except AppEntityDeserializeError as e:
+                if ignore_unknown_objs:
+                    logger.warning("failed to deserialize k8s resource %s, skip.", e.res)
+                    return None
+                return WatchEvent(type="ERROR", error_message=e.msg)
+            event.res_object._kube_data = raw_event["object"]
+            return event
+
+        return InformerWatch(
+            informer=informer,
+            namespace=self._get_namespace(app),
+            labels=labels,
+            resource_version=resource_version,
+            convert=convert,
+        )
+
+    def _get_informer(self, app: WlApp, api_version: str) -> Optional[SharedInformer]:
+        """Get the shared informer for current kind, return None if it's not enabled or not available"""
+        if not (self.use_informer and settings.KUBE_RES_INFORMER_ENABLED):
+            return None
+        try:
+            return get_informer(
+                get_cluster_by_app(app).name,
+                self.entity_type.Meta.kres_class,
+                api_version,
+                settings.KUBE_RES_INFORMER_LABELS,
+            )
+        except Exception:
+            logger.warning("shared informer is not available, fallback to apiserver, app: %s", app.name)
+            return None
+
     @staticmethod
     def _exc_is_expired_rv(exc: ApiException) -> bool:
         """Check if an exception is raised because of expired ResourceVersion"""
@@ -0,0 +1,400 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+"""Process-wide shared informers for kubernetes resources.
+
+An informer performs one LIST + WATCH against the apiserver for every (cluster, kind, api_version,
+labels) combination, and keeps the resources in an in-memory store. Readers can list resources
+from the store and subscribe to the changes, instead of sending their own LIST/WATCH requests to
+the apiserver.
+
+An informer stops itself when it has not been accessed for a while, so that clusters and kinds
+which nobody is interested in will not hold any watch connections.
+
+NOTE: Every process(e.g. each gunicorn worker) holds its own informers, an informer keeps all the
+objects of its kind in the cluster in memory unless it was created with labels(for processes and
+instances, see `KUBE_RES_INFORMER_LABELS`). For a cluster with N pods, the memory cost is roughly
+N * (size of a pod object, ~10KB) per process.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, NamedTuple, Optional, Tuple, Type
+
+from django.conf import settings
+from django.db import connection
+from kubernetes.client.exceptions import ApiException
+from kubernetes.dynamic import ResourceInstance
+
+from paas_wl.infras.resources.base import kres
+from paas_wl.infras.resources.utils.basic import get_client_by_cluster_name
+
+logger = logging.getLogger(__name__)
+
+# Raw watch event: {"type": ..., "object": ResourceInstance}
+RawEvent = Dict
+
+
+class InformerKey(NamedTuple):
+    cluster_name: str
+    kind: str
+    api_version: str
+    # Sorted items of the label selector
+    labels: Tuple[Tuple[str, str], ...] = ()
+
+    @classmethod
+    def create(cls, cluster_name: str, kind: str, api_version: str, labels: Optional[Dict] = None) -> "InformerKey":
+        return cls(cluster_name, kind, api_version, tuple(sorted((labels or {}).items())))
+
+
+def get_resource_version(obj: ResourceInstance) -> int:
+    try:
+        return int(obj.metadata.resourceVersion)
+    except (TypeError, ValueError):
+        return 0
+
+
+def match_labels(obj: ResourceInstance, labels: Optional[Dict]) -> bool:
+    """Check if the object matches all the given labels"""
+    if not labels:
+        return True
+    obj_labels = obj.metadata.labels or {}
+    return all(obj_labels.get(k) == v for k, v in labels.items())
+
+
+class ResourceStore:
+    """A thread-safe in-memory store of kubernetes resources, indexed by namespace."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._by_ns: Dict[str, Dict[str, ResourceInstance]] = {}
+
+    def replace(self, objs: List[ResourceInstance]):
+        by_ns: Dict[str, Dict[str, ResourceInstance]] = {}
+        for obj in objs:
+            by_ns.setdefault(obj.metadata.namespace or "", {})[obj.metadata.name] = obj
+        with self._lock:
+            self._by_ns = by_ns
+
+    def apply(self, event_type: str, obj: ResourceInstance):
+        namespace, name = obj.metadata.namespace or "", obj.metadata.name
+        with self._lock:
+            if event_type == "DELETED":
+                self._by_ns.get(namespace, {}).pop(name, None)
+            else:
+                self._by_ns.setdefault(namespace, {})[name] = obj
+
+    def list(self, namespace: Optional[str] = None, labels: Optional[Dict] = None) -> List[ResourceInstance]:
+        with self._lock:
+            if namespace is None:
+                objs = [obj for items in self._by_ns.values() for obj in items.values()]
+            else:
+                objs = list(self._by_ns.get(namespace, {}).values())
+        return [obj for obj in objs if match_labels(obj, labels)]
+
+
+@dataclass
+class Subscription:
+    """A subscription of the changes of an informer, events which match the namespace and labels
+    will be put into the queue as `(tag, raw_event)` tuples.
+    """
+
+    queue: "queue.Queue[Tuple[str, RawEvent]]"
+    namespace: Optional[str] = None
+    labels: Optional[Dict] = None
+    tag: str = ""
+
+    def accepts(self, obj: ResourceInstance) -> bool:
+        if self.namespace is not None and obj.metadata.namespace != self.namespace:
+            return False
+        return match_labels(obj, self.labels)
+
+
+class SharedInformer:
+    """Keep resources of a kind in sync with the apiserver by one LIST + WATCH.
+
+    :param key: The informer key.
+    :param kres_class: The kres class of the resource kind.
+    """
+
+    # Max count of the recent events kept for subscribers which start watching from a resource version
+    history_size = 2000
+    # The timeout seconds for every watch request, a new request will be sent when timed out
+    watch_timeout = 300
+    # The seconds to wait before re-listing when an error occurred
+    retry_interval = 3
+
+    def __init__(self, key: InformerKey, kres_class: Type[kres.BaseKresource]):
+        self.key = key
+        self.kres_class = kres_class
+        self.store = ResourceStore()
+        self.resource_version = 0
+
+        self._lock = threading.Lock()
+        self._synced = threading.Event()
+        # Set when the first LIST has finished, no matter it succeeded or not
+        self._sync_attempted = threading.Event()
+        self._stopped = threading.Event()
+        self._history: Deque[RawEvent] = deque(maxlen=self.history_size)
+        # The min resource version which can be replayed from history
+        self._history_since = 0
+        self._subscriptions: List[Subscription] = []
+        self._last_accessed = time.monotonic()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"informer-{self.key.cluster_name}-{self.key.kind}")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def is_alive(self) -> bool:
+        return not self._stopped.is_set()
+
+    def wait_for_synced(self, timeout: float) -> bool:
+        """Wait for the first LIST to finish, return False without waiting once a LIST has failed,
+        so callers won't be blocked when the cluster is not available. The informer keeps retrying in
+        background and will be used again after it has been synced.
+        """
+        self._sync_attempted.wait(timeout)
+        return self._synced.is_set()
+
+    def list(
+        self, namespace: Optional[str] = None, labels: Optional[Dict] = None
+    ) -> Tuple[List[ResourceInstance], int]:
+        """List objects from the store
+
+        :return: A tuple of (objects, resource_version)
+        """
+        self._touch()
+        with self._lock:
+            rv = self.resource_version
+            objs = self.store.list(namespace, labels)
+        return objs, rv
+
+    def subscribe(self, sub: Subscription, resource_version: Optional[int] = None):
+        """Subscribe the changes, events after the given resource_version will be replayed first. If the
+        resource_version is too old, an "ERROR" event will be sent and the subscriber should re-list.
+        """
+        self._touch()
+        with self._lock:
+            if resource_version:
+                if resource_version < self._history_since:
+                    sub.queue.put((sub.tag, {"type": "ERROR", "raw_object": {"message": "too old resource version"}}))
+                    return
+                for event in self._history:
+                    if get_resource_version(event["object"]) > resource_version and sub.accepts(event["object"]):
+                        sub.queue.put((sub.tag, event))
+            self._subscriptions.append(sub)
+
+    def unsubscribe(self, sub: Subscription):
+        self._touch()
+        with self._lock:
+            if sub in self._subscriptions:
+                self._subscriptions.remove(sub)
+
+    def _touch(self):
+        self._last_accessed = time.monotonic()
+
+    def _is_idle(self) -> bool:
+        with self._lock:
+            has_subscriptions = bool(self._subscriptions)
+        idle_seconds = time.monotonic() - self._last_accessed
+        return not has_subscriptions and idle_seconds > settings.KUBE_RES_INFORMER_IDLE_SECONDS
+
+    def _run(self):
+        try:
+            # Check idle and stop by the registry atomically, so an informer which was just returned by
+            # `get_informer()` will never be stopped
+            while not _registry.stop_if_idle(self):
+                try:
+                    self._list()
+                    self._watch_until_expired()
+                except Exception:
+                    logger.exception("informer %s failed, will re-list later", self.key)
+                    self._sync_attempted.set()
+                    time.sleep(self.retry_interval)
+        finally:
+            logger.info("informer %s stopped because it's idle", self.key)
+            self._sync_attempted.set()
+            self._stopped.set()
+            _registry.remove(self)
+            connection.close()
+
+    def _list(self):
+        with get_client_by_cluster_name(self.key.cluster_name) as client:
+            kres_client = self.kres_class(client, api_version=self.key.api_version)
+            ret = kres_client.ops_batch.list(labels=dict(self.key.labels))
+
+        with self._lock:
+            self.store.replace(ret.items)
+            self.resource_version = int(ret.metadata.resourceVersion or 0)
+            # Events in history can not be used anymore because some changes may be missing
+            self._history.clear()
+            self._history_since = self.resource_version
+            subscriptions = list(self._subscriptions)
+            self._subscriptions.clear()
+        self._synced.set()
+        self._sync_attempted.set()
+
+        # Current subscribers may have missed some events, ask them to re-list
+        for sub in subscriptions:
+            sub.queue.put((sub.tag, {"type": "ERROR", "raw_object": {"message": "informer was re-listed"}}))
+
+    def _watch_until_expired(self):
+        """Watch the changes and apply them to the store, return when the resource version expired"""
+        while not self._is_idle():
+            with get_client_by_cluster_name(self.key.cluster_name) as client:
+                kres_client = self.kres_class(client, api_version=self.key.api_version)
+                try:
+                    for raw_event in kres_client.ops_batch.create_watch_stream(
+                        labels=dict(self.key.labels),
+                        resource_version=self.resource_version,
+                        timeout_seconds=self.watch_timeout,
+                    ):
+                        if raw_event["type"] == "ERROR":
+                            logger.info("informer %s got error event: %s", self.key, raw_event.get("raw_object"))
+                            return
+                        self._dispatch(raw_event)
+                except ApiException as exc:
+                    if exc.status == 410:
+                        return
+                    raise
+
+    def _dispatch(self, raw_event: RawEvent):
+        obj = raw_event["object"]
+        event = {"type": raw_event["type"], "object": obj}
+        with self._lock:
+            self.store.apply(event["type"], obj)
+            self.resource_version = max(self.resource_version, get_resource_version(obj))
+            if len(self._history) == self._history.maxlen:
+                self._history_since = get_resource_version(self._history[0]["object"])
+            self._history.append(event)
+            subscriptions = list(self._subscriptions)
+
+        for sub in subscriptions:
+            if sub.accepts(obj):
+                sub.queue.put((sub.tag, event))
+
+
+class InformerRegistry:
+    """Hold all running informers of current process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._informers: Dict[InformerKey, SharedInformer] = {}
+
+    def get(self, key: InformerKey, kres_class: Type[kres.BaseKresource]) -> SharedInformer:
+        """Get the informer by key, start a new one if not exists or it has been stopped"""
+        with self._lock:
+            informer = self._informers.get(key)
+            if informer is None or not informer.is_alive():
+                informer = self._informers[key] = SharedInformer(key, kres_class)
+                informer.start()
+            # Touch it in the lock, so that it won't be considered as idle before the caller uses it
+            informer._touch()
+        return informer
+
+    def stop_if_idle(self, informer: SharedInformer) -> bool:
+        """Mark the informer as stopped and remove it if it's idle
+
+        :return: Whether the informer has been stopped.
+        """
+        with self._lock:
+            if not informer._is_idle():
+                return False
+            informer._stopped.set()
+            if self._informers.get(informer.key) is informer:
+                del self._informers[informer.key]
+        return True
+
+    def remove(self, informer: SharedInformer):
+        with self._lock:
+            if self._informers.get(informer.key) is informer:
+                del self._informers[informer.key]
+
+
+_registry = InformerRegistry()
+
+
+def get_informer(
+    cluster_name: str, kres_class: Type[kres.BaseKresource], api_version: str, labels: Optional[Dict] = None
+) -> SharedInformer:
+    """Get a synced shared informer
+
+    :param labels: The label selector of the informer, only the matched objects are kept.
+    :raise TimeoutError: When the informer was not synced in time, or the syncing has failed.
+    """
+    key = InformerKey.create(cluster_name, kres_class.kind, api_version, labels)
+    informer = _registry.get(key, kres_class)
+    if not informer.wait_for_synced(settings.KUBE_RES_INFORMER_SYNC_TIMEOUT):
+        raise TimeoutError(f"informer {key} is not synced")
+    # A stopped informer would never receive any changes, it will be replaced in the next call
+    if not informer.is_alive():
+        raise TimeoutError(f"informer {key} has been stopped")
+    return informer
+
+
+@dataclass
+class InformerWatch:
+    """Describe what to watch from an informer
+
+    :param convert: Convert the raw event into the wanted event type(which has a "type" attribute),
+        return None to skip the event.
+    """
+
+    informer: SharedInformer
+    namespace: Optional[str]
+    labels: Optional[Dict]
+    resource_version: Optional[int]
+    convert: Callable[[RawEvent], Optional[Any]]
+    tag: str = field(default="")
+
+
+def iter_informer_events(watches: List[InformerWatch], timeout_seconds: float) -> Iterator[Any]:
+    """Consume the events of multiple informers in current thread, stops when timed out or when
+    any watch yields an "ERROR" event.
+    """
+    q: "queue.Queue[Tuple[str, RawEvent]]" = queue.Queue()
+    subs = []
+    converters = {}
+    for i, w in enumerate(watches):
+        tag = w.tag or str(i)
+        converters[tag] = w.convert
+        sub = Subscription(queue=q, namespace=w.namespace, labels=w.labels, tag=tag)
+        w.informer.subscribe(sub, w.resource_version)
+        subs.append((w.informer, sub))
+
+    deadline = time.monotonic() + timeout_seconds
+    try:
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                tag, raw_event = q.get(timeout=min(remaining, 1))
+            except queue.Empty:
+                continue
+
+            event = converters[tag](raw_event)
+            if event is None:
+                continue
+            yield event
+            if event.type == "ERROR":
+                return
+    finally:
+        for informer, sub in subs:
+            informer.unsubscribe(sub)
@@ -16,11 +16,14 @@
 # to the current version of the project delivered to anyone in the future.
 
 import logging
-from typing import List, Optional, Tuple
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
 
 from paas_wl.bk_app.applications.models import WlApp
 from paas_wl.core.env import env_is_running
-from paas_wl.infras.cluster.shim import EnvClusterService
+from paas_wl.infras.cluster.entities import IngressConfig
+from paas_wl.infras.cluster.models import Cluster
+from paas_wl.infras.cluster.shim import EnvClusterService, get_envs_cluster_names
 from paas_wl.workloads.networking.entrance.addrs import URL, Address
 from paas_wl.workloads.networking.entrance.allocator.domains import ModuleEnvDomains
 from paas_wl.workloads.networking.entrance.allocator.subpaths import ModuleEnvSubpaths
@@ -102,9 +105,8 @@ class LiveEnvAddresses(BaseEnvAddresses):
 
     def list_subdomain(self) -> List[Address]:
         """list all `live` subdomain addresses for deployed environment"""
-        subdomains = AppDomain.objects.filter(app=self.wl_app, source=AppDomainSource.AUTO_GEN)
         addrs = []
-        for d in subdomains:
+        for d in self._list_auto_gen_domains():
             root_domain = self.ingress_cfg.find_app_root_domain(d.host)
             is_sys_reserved = root_domain.reserved if root_domain else False
             addrs.append(
@@ -118,7 +120,7 @@ class LiveEnvAddresses(BaseEnvAddresses):
 
     def list_subpath(self) -> List[Address]:
         """list all `activated` subpath for deployed environment"""
-        path_objs = AppSubpath.objects.filter(app=self.wl_app).order_by("created")
+        path_objs = self._list_subpath_objs()
         addrs = []
         for domain in self.ingress_cfg.sub_path_domains:
             for obj in path_objs:
@@ -126,6 +128,12 @@ class LiveEnvAddresses(BaseEnvAddresses):
                 addrs.append(Address(AddressType.SUBPATH, url, domain.reserved))
         return self._sort(addrs)
 
+    def _list_auto_gen_domains(self) -> List[AppDomain]:
+        return list(AppDomain.objects.filter(app=self.wl_app, source=AppDomainSource.AUTO_GEN))
+
+    def _list_subpath_objs(self) -> List[AppSubpath]:
+        return list(AppSubpath.objects.filter(app=self.wl_app).order_by("created"))
+
     def _make_url_by_protocol(self, protocol: str, https_enabled: bool, host: str) -> str:
         if protocol == AppDomainProtocol.GRPC:
             port = self.ingress_cfg.port_map.get_port_num(protocol)
@@ -137,6 +145,32 @@ class LiveEnvAddresses(BaseEnvAddresses):
         return self._make_url(https_enabled, host)
 
 
+class _PrefetchedLiveEnvAddresses(LiveEnvAddresses):
+    """LiveEnvAddresses whose related objects were loaded in advance, used by bulk querying"""
+
+    def __init__(
+        self,
+        env: ModuleEnvironment,
+        ingress_cfg: IngressConfig,
+        domains: List[AppDomain],
+        subpath_objs: List[AppSubpath],
+    ):
+        super().__init__(env)
+        self._ingress_cfg = ingress_cfg
+        self._domains = domains
+        self._subpath_objs = subpath_objs
+
+    @property
+    def ingress_cfg(self):
+        return self._ingress_cfg
+
+    def _list_auto_gen_domains(self) -> List[AppDomain]:
+        return self._domains
+
+    def _list_subpath_objs(self) -> List[AppSubpath]:
+        return self._subpath_objs
+
+
 class PreAllocatedEnvAddresses(BaseEnvAddresses):
     """Get all pre-allocated addresses for given environment
 
@@ -171,11 +205,49 @@ def get_builtin_addr_preferred(env: ModuleEnvironment) -> Tuple[bool, Optional[A
           * the matched address will be returned in priority.
           * If the env is not running, the URL returned is algorithmically allocated(MAY NOT accessible).
     """
-    module = env.module
     is_living, addresses = get_builtin_addrs(env)
+    return is_living, _pick_preferred_addr(env, addresses)
+
+
+def list_live_addrs_preferred(envs: List[ModuleEnvironment]) -> Dict[int, Optional[Address]]:
+    """Bulk version of `get_builtin_addr_preferred` for **running** environments, the related objects
+    are queried in a fixed number of queries.
+
+    :param envs: The running environments, the "application" and "module" relations should be loaded
+    :return: A dict of {env.id: preferred address}
+    """
+    if not envs:
+        return {}
+
+    wl_app_ids = [env.engine_app_id for env in envs]
+    domains = defaultdict(list)
+    for d in AppDomain.objects.filter(app_id__in=wl_app_ids, source=AppDomainSource.AUTO_GEN):
+        domains[d.app_id].append(d)
+    subpath_objs = defaultdict(list)
+    for p in AppSubpath.objects.filter(app_id__in=wl_app_ids).order_by("created"):
+        subpath_objs[p.app_id].append(p)
+
+    cluster_names = get_envs_cluster_names(envs)
+    clusters = {c.name: c for c in Cluster.objects.filter(name__in=set(cluster_names.values()))}
+
+    results = {}
+    for env in envs:
+        svc = _PrefetchedLiveEnvAddresses(
+            env,
+            clusters[cluster_names[env.id]].ingress_config,
+            domains[env.engine_app_id],
+            subpath_objs[env.engine_app_id],
+        )
+        results[env.id] = _pick_preferred_addr(env, _list_addrs_by_url_type(env, svc))
+    return results
+
+
+def _pick_preferred_addr(env: ModuleEnvironment, addresses: List[Address]) -> Optional[Address]:
+    """Pick the preferred address from the sorted addresses"""
     if not addresses:
-        return is_living, None
+        return None
 
+    module = env.module
     # Use the first address because the results is sorted already
     addr = addresses[0]
     if module.exposed_url_type in [ExposedURLType.SUBPATH, ExposedURLType.SUBDOMAIN] and (
@@ -187,7 +259,7 @@ def get_builtin_addr_preferred(env: ModuleEnvironment) -> Tuple[bool, Optional[A
             logger.warning("No addresses found matching preferred root domain: %s", preferred_root)
         else:
             addr = preferred_addr
-    return is_living, addr
+    return addr
 
 
 def get_builtin_addrs(env: ModuleEnvironment) -> Tuple[bool, List[Address]]:
@@ -200,19 +272,22 @@ def get_builtin_addrs(env: ModuleEnvironment) -> Tuple[bool, List[Address]]:
           * the matched address will be returned in priority.
           * If the env is not running, the URLs returned are algorithmically allocated(MAY NOT accessible).
     """
-    module = env.module
     svc: BaseEnvAddresses
     is_living = env_is_running(env)
     if is_living:
         svc = LiveEnvAddresses(env)
     else:
         svc = PreAllocatedEnvAddresses(env)
+    return is_living, _list_addrs_by_url_type(env, svc)
+
+
+def _list_addrs_by_url_type(env: ModuleEnvironment, svc: BaseEnvAddresses) -> List[Address]:
+    """List the addresses of the module's exposed url type"""
+    module = env.module
     if module.exposed_url_type == ExposedURLType.SUBPATH:
-        addresses = svc.list_subpath()
+        return svc.list_subpath()
     elif module.exposed_url_type == ExposedURLType.SUBDOMAIN:
-        addresses = svc.list_subdomain()
-    else:
-        # The "exposed_url_type" is None. This should not happen in normal cases.
-        logger.warning("The exposed_url_type is None when getting builtin addrs, module: %s", module)
-        addresses = []
-    return is_living, addresses
+        return svc.list_subdomain()
+    # The "exposed_url_type" is None. This should not happen in normal cases.
+    logger.warning("The exposed_url_type is None when getting builtin addrs, module: %s", module)
+    return []
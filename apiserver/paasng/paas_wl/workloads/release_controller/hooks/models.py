@@ -111,8 +111,11 @@ class Command(UuidAuditedModel):
         return self.app.region
 
     @property
-    def lines(self):
-        return self.output_stream.lines.all().order_by("created")
+    def lines(self) -> List[str]:
+        """All log lines of the command, the archived lines are also included"""
+        from paasng.platform.engine.log_archive import StreamLinesReader
+
+        return StreamLinesReader(self.output_stream).read_lines()
 
     @property
     def split_command(self) -> List[str]:
@@ -14,19 +14,22 @@
 #
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
+import hashlib
 import logging
 from operator import attrgetter
-from typing import Dict, List, Optional, Protocol, Tuple, Union
+from typing import Callable, Dict, Iterator, List, Optional, Protocol, Tuple, TypeVar, Union
 
 from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from elasticsearch import Elasticsearch
+from elasticsearch.exceptions import TransportError
 from elasticsearch.helpers import ScanError
 from elasticsearch_dsl.aggs import DateHistogram
-from elasticsearch_dsl.response import AggResponse, Response
+from elasticsearch_dsl.response import AggResponse, Hit, Response
 from elasticsearch_dsl.response.aggs import FieldBucketData
 
-from paasng.accessories.log.constants import DEFAULT_LOG_BATCH_SIZE
+from paasng.accessories.log.constants import DEFAULT_LOG_BATCH_SIZE, LOG_EXPORT_BATCH_SIZE
 from paasng.accessories.log.exceptions import BkLogApiError, LogQueryError, NoIndexError
 from paasng.accessories.log.filters import (
     FieldFilter,
@@ -36,12 +39,15 @@ from paasng.accessories.log.filters import (
     parse_properties_filters,
 )
 from paasng.accessories.log.models import BKLogConfig, ElasticSearchConfig, ElasticSearchHost
+from paasng.core.core.storages.cache import region as cache_region
 from paasng.infras.bk_log.client import _APIGWOperationStub, make_bk_log_esquery_client
 from paasng.utils.es_log.misc import filter_indexes_by_time_range
 from paasng.utils.es_log.search import SmartSearch, SmartTimeRange
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class LogClientProtocol(Protocol):
     """LogClient protocol, all log search backend should abide this protocol"""
@@ -54,6 +60,11 @@ class LogClientProtocol(Protocol):
     ) -> Tuple[Response, int]:
         """search log(scrolling) from index with search"""
 
+    def iter_search(
+        self, index: str, search: SmartSearch, timeout: int, batch_size: int = LOG_EXPORT_BATCH_SIZE
+    ) -> Iterator[List[Hit]]:
+        """Iterate all logs of the search page by page in sequence, useful for exporting logs"""
+
     def aggregate_date_histogram(self, index: str, search: SmartSearch, timeout: int) -> FieldBucketData:
         """Aggregate time-based histogram"""
 
@@ -69,6 +80,42 @@ class LogClientProtocol(Protocol):
         """
 
 
+def get_or_create_cached(key: str, creator: Callable[[], T]) -> T:
+    """Get the value(such as the mappings) from cache, call `creator` to create it when missing or expired.
+
+    The concurrent creations of the same key are merged into one by the dogpile lock within a process. The
+    region does not use a distributed lock, so every process may still send one request to ES when the cache
+    expires.
+    """
+    if settings.ES_LOG_MAPPINGS_CACHE_TTL <= 0:
+        return creator()
+    return cache_region.get_or_create(key, creator, expiration_time=settings.ES_LOG_MAPPINGS_CACHE_TTL)
+
+
+def make_cache_key(kind: str, *parts: str) -> str:
+    """Make the cache key, the indexes and mappings are cached in buckets by day(UTC) because the ES indexes
+    are created daily."""
+    day_bucket = timezone.now().strftime("%Y.%m.%d")
+    return ":".join(["log", kind, *parts, day_bucket])
+
+
+def iter_scroll_search(
+    client: LogClientProtocol, index: str, search: SmartSearch, timeout: int, batch_size: int
+) -> Iterator[List[Hit]]:
+    """Iterate all logs of the search page by page with the scroll API"""
+    search = search.limit_offset(limit=batch_size, offset=0)
+    scroll_id = None
+    while True:
+        response, _ = client.execute_scroll_search(index=index, search=search, timeout=timeout, scroll_id=scroll_id)
+        hits = list(response)
+        if not hits:
+            return
+        yield hits
+        if len(hits) < batch_size or not response._scroll_id:
+            return
+        scroll_id = response._scroll_id
+
+
 class BKLogClient:
     """BKLogClient is an implement of LogClientProtocol, the log search backend is bk log search"""
 
@@ -117,6 +164,12 @@ class BKLogClient:
             total = total["value"]
         return response, total
 
+    def iter_search(
+        self, index: str, search: SmartSearch, timeout: int, batch_size: int = LOG_EXPORT_BATCH_SIZE
+    ) -> Iterator[List[Hit]]:
+        """Iterate all logs of the search page by page, bk-log only supports the scroll API"""
+        return iter_scroll_search(self, index, search, timeout, batch_size)
+
     def aggregate_date_histogram(self, index: str, search: SmartSearch, timeout: int) -> FieldBucketData:
         """Aggregate time-based histogram"""
         agg = DateHistogram(
@@ -156,7 +209,11 @@ class BKLogClient:
         return sorted(filters.values(), key=attrgetter("total", "key"), reverse=True)
 
     def get_mappings(self, index: str, time_range: SmartTimeRange, timeout: int) -> dict:
-        """query the mappings in es"""
+        """query the mappings in es, the result is cached for a short time"""
+        key = make_cache_key("bklog-mappings", self.config.scenarioID, index)
+        return get_or_create_cached(key, lambda: self._get_mappings(index, timeout))
+
+    def _get_mappings(self, index: str, timeout: int) -> dict:
         data = {
             "indices": index,
             "scenario_id": self.config.scenarioID,
@@ -232,6 +289,45 @@ class ESLogClient:
             )
         return (response, self._get_response_count(index, search, timeout, response))
 
+    def iter_search(
+        self, index: str, search: SmartSearch, timeout: int, batch_size: int = LOG_EXPORT_BATCH_SIZE
+    ) -> Iterator[List[Hit]]:
+        """Iterate all logs of the search page by page, walk through the indexes with point-in-time and
+        search_after, fallback to the scroll API when point-in-time is not supported(ES < 7.10)
+        """
+        es_index = self._get_indexes(index, search.time_range, timeout)
+        keep_alive = "5m"
+        try:
+            pit_id = self._client.open_point_in_time(
+                index=",".join(es_index), keep_alive=keep_alive, params={"request_timeout": timeout}
+            )["id"]
+        except TransportError as e:
+            logger.warning("Unable to open point in time, fallback to scroll: %s", e)
+            yield from iter_scroll_search(self, index, search, timeout, batch_size)
+            return
+
+        body = search.limit_offset(limit=batch_size, offset=0).to_dict()
+        body.pop("from", None)
+        # 使用 point-in-time 时, ES 会自动追加 _shard_doc 作为排序的 tiebreaker, 保证 search_after 翻页不重不漏
+        body.setdefault("sort", [{search.time_field: {"order": "desc"}}])
+        try:
+            while True:
+                body["pit"] = {"id": pit_id, "keep_alive": keep_alive}
+                data = self._client.search(body=body, params={"request_timeout": timeout})
+                pit_id = data.get("pit_id", pit_id)
+                hits = list(Response(search.search, data))
+                if not hits:
+                    return
+                yield hits
+                if len(hits) < batch_size:
+                    return
+                body["search_after"] = data["hits"]["hits"][-1]["sort"]
+        finally:
+            try:
+                self._client.close_point_in_time(body={"id": pit_id})
+            except TransportError:
+                logger.warning("Unable to close point in time: %s", pit_id)
+
     def aggregate_date_histogram(self, index: str, search: SmartSearch, timeout: int) -> FieldBucketData:
         """Aggregate time-based histogram"""
         agg = DateHistogram(
@@ -271,10 +367,15 @@ class ESLogClient:
         return sorted(filters.values(), key=attrgetter("total", "key"), reverse=True)
 
     def get_mappings(self, index: str, time_range: SmartTimeRange, timeout: int) -> dict:
-        """query the mappings in es"""
+        """query the mappings in es, the result is cached for a short time"""
         # 当前假设同一批次的 index(类似 aa-2021.04.20,aa-2021.04.19) 拥有相同的 mapping, 因此直接获取最新的 mapping
         # 如果同一批次 index mapping 发生变化，可能会导致日志查询为空
         es_index = self._get_indexes(index, time_range, timeout)
+        indexes_digest = hashlib.md5(",".join(es_index).encode()).hexdigest()
+        key = make_cache_key("es-mappings", self._host_id, index, indexes_digest)
+        return get_or_create_cached(key, lambda: self._get_mappings(es_index, timeout))
+
+    def _get_mappings(self, es_index: List[str], timeout: int) -> dict:
         all_mappings = self._client.indices.get_mapping(index=es_index, params={"request_timeout": timeout})
         # 由于手动创建会没有 properties, 需要将无 properties 的 mappings 过滤掉
         all_not_empty_mappings = {
@@ -290,11 +391,9 @@ class ESLogClient:
         """Get indexes within the time_range range from ES"""
         # 为了避免 ES 会提前创建 index 导致无法查询到 mappings, 需要精准控制使用的 indexes
         # 为了避免 ES indexes 未即时清理, 导致查询的 indexes 范围过大, 需要精准控制使用的 indexes
-        # Note: 使用 stats 接口优化查询性能
-        all_indexes = list(
-            self._client.indices.stats(
-                index=index, metric="fielddata", params={"request_timeout": timeout, "level": "indices"}
-            )["indices"].keys()
+        # Note: 使用 stats 接口优化查询性能, 且结果会被短暂缓存
+        all_indexes = get_or_create_cached(
+            make_cache_key("es-indexes", self._host_id, index), lambda: self._list_indexes(index, timeout)
         )
         if filtered_indexes := filter_indexes_by_time_range(all_indexes, time_range=time_range):
             return filtered_indexes
@@ -303,6 +402,18 @@ class ESLogClient:
             raise NoIndexError
         return sorted(all_indexes)[-10:]
 
+    def _list_indexes(self, index: str, timeout: int) -> List[str]:
+        """List all indexes which match the index pattern"""
+        return list(
+            self._client.indices.stats(
+                index=index, metric="fielddata", params={"request_timeout": timeout, "level": "indices"}
+            )["indices"].keys()
+        )
+
+    @property
+    def _host_id(self) -> str:
+        return f"{self.host.host}:{self.host.port}{self.host.url_prefix}"
+
     def _get_response_count(
         self, index: Union[str, List[str]], search: SmartSearch, timeout: int, response: Response
     ) -> int:
@@ -26,6 +26,9 @@ DEFAULT_LOG_BATCH_SIZE = 200
 # 日志平台最多也只返回 10,000 条数据，且不可修改
 MAX_RESULT_WINDOW = 10000
 
+# 导出日志时每批次从 ES 拉取的日志条数
+LOG_EXPORT_BATCH_SIZE = 1000
+
 
 class LogTimeChoices(StrStructuredEnum):
     """日志搜索-日期范围可选值"""
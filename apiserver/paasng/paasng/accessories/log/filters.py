@@ -15,9 +15,11 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import hashlib
 import json
 import logging
-from collections import defaultdict
+import threading
+from collections import OrderedDict, defaultdict
 from functools import reduce
 from operator import add
 from typing import Counter, Dict, List, Optional
@@ -36,6 +38,11 @@ from paasng.utils.text import calculate_percentage
 
 logger = logging.getLogger(__name__)
 
+# mappings 解析结果的缓存, 以 mappings 的摘要为 key, 避免缓存中保存完整的 mappings
+_PROPERTIES_FILTERS_CACHE_MAXSIZE = 32
+_properties_filters_cache: "OrderedDict[str, Dict[str, FieldFilter]]" = OrderedDict()
+_properties_filters_cache_lock = threading.Lock()
+
 
 def agg_builtin_filters(search: SmartSearch, mappings: dict):
     """添加内置过滤条件查询语句, 内置过滤条件有 environment, process_id, stream"""
@@ -52,7 +59,29 @@ def agg_builtin_filters(search: SmartSearch, mappings: dict):
 
 
 def parse_properties_filters(mappings: dict) -> Dict[str, FieldFilter]:
-    """从 mappings 中解析出 field filter"""
+    """从 mappings 中解析出 field filter, 相同 mappings 的解析结果会被缓存"""
+    digest = hashlib.sha256(json.dumps(mappings, sort_keys=True).encode()).hexdigest()
+    with _properties_filters_cache_lock:
+        properties_filters = _properties_filters_cache.get(digest)
+        if properties_filters is not None:
+            _properties_filters_cache.move_to_end(digest)
+
+    if properties_filters is None:
+        properties_filters = _parse_properties_filters(mappings)
+        with _properties_filters_cache_lock:
+            _properties_filters_cache[digest] = properties_filters
+            if len(_properties_filters_cache) > _PROPERTIES_FILTERS_CACHE_MAXSIZE:
+                _properties_filters_cache.popitem(last=False)
+
+    # FieldFilter 对象会被调用方修改(如填充 options), 因此每次都返回新的对象
+    return {
+        key: FieldFilter(name=f.name, key=f.key, options=list(f.options), total=f.total)
+        for key, f in properties_filters.items()
+    }
+
+
+def _parse_properties_filters(mappings: dict) -> Dict[str, FieldFilter]:
+    """parse field filters from mappings"""
     # 为了简化 _clean_property 的递归代码, 传递给 _clean_property 时需要加上 {"properties": mappings} 这层封装
     all_properties_filters = {f.name: f for f in _clean_property([], {"properties": mappings})}
     # 从命名内置过滤条件, 内置过滤条件有 environment, process_id, stream
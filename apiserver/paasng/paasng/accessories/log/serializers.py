@@ -157,6 +157,12 @@ class LogQueryParamsSLZ(serializers.Serializer):
         return attrs
 
 
+class LogExportParamsSLZ(LogQueryParamsSLZ):
+    """导出日志的 query 参数"""
+
+    compress = serializers.BooleanField(default=False, help_text="是否使用 gzip 压缩")
+
+
 class LogQueryDSLSLZ(serializers.Serializer):
     """查询日志的 DSL 参数"""
 
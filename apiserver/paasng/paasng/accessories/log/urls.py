@@ -38,6 +38,11 @@ urlpatterns = [
         logs_views.StructuredLogAPIView.as_view({"post": "aggregate_fields_filters"}),
         name="api.logs.structured.aggregate_fields_filters",
     ),
+    re_path(
+        make_app_pattern(r"/log/structured/export/$"),
+        logs_views.StructuredLogAPIView.as_view({"post": "export_logs"}),
+        name="api.logs.structured.export_logs",
+    ),
     # 标准输出日志
     re_path(
         make_app_pattern(r"/log/stdout/list/$"),
@@ -49,6 +54,11 @@ urlpatterns = [
         logs_views.StdoutLogAPIView.as_view({"post": "aggregate_fields_filters"}),
         name="api.logs.stdout.aggregate_fields_filters",
     ),
+    re_path(
+        make_app_pattern(r"/log/stdout/export/$"),
+        logs_views.StdoutLogAPIView.as_view({"post": "export_logs"}),
+        name="api.logs.stdout.export_logs",
+    ),
     # Ingress 日志
     re_path(
         make_app_pattern(r"/log/ingress/list/$"),
@@ -65,6 +75,11 @@ urlpatterns = [
         logs_views.IngressLogAPIView.as_view({"post": "aggregate_fields_filters"}),
         name="api.logs.ingress.aggregate_fields_filters",
     ),
+    re_path(
+        make_app_pattern(r"/log/ingress/export/$"),
+        logs_views.IngressLogAPIView.as_view({"post": "export_logs"}),
+        name="api.logs.ingress.export_logs",
+    ),
     # 模块维度下的日志搜索
     re_path(
         make_app_pattern(r"/log/structured/list/$", include_envs=False),
@@ -18,10 +18,11 @@
 import logging
 import operator
 import re
-from functools import reduce
+import zlib
+from functools import lru_cache, reduce
 from itertools import chain
 from operator import and_
-from typing import TYPE_CHECKING, Any, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional
 
 from elasticsearch_dsl.query import Q, Query
 from elasticsearch_dsl.response import Hit
@@ -167,29 +168,90 @@ def build_filed_matcher(pattern: str):
     return match
 
 
-def clean_logs(
-    logs: List[Hit],
-    search_params: ElasticSearchParams,
-) -> List[FlattenLog]:
-    """从 ES 日志中转换成扁平化的 FlattenLog, 方便后续对日志字段的提取"""
-    cleaned: List[FlattenLog] = []
+class LogProjection:
+    """A compiled projection which transforms ES hits to FlattenLog objects. Everything depends only on the
+    search params(extractors, alias table, field matcher) is prepared once, the matching results of the
+    fields are also cached, because the logs of one index usually share the same set of fields.
+
+    Use `get_log_projection` to get the shared projection object of the search params.
+    """
+
+    # The max number of cached field matching results
+    max_matched_fields = 10000
 
-    matcher = build_filed_matcher(search_params.filedMatcher) if search_params.filedMatcher is not None else None
-    for log in logs:
+    def __init__(self, time_field: str, time_format: str, message_field: str, field_matcher: Optional[str]):
+        self.time_format = time_format
+        self._extract_timestamp = field_extractor_factory(time_field)
+        self._extract_message = field_extractor_factory(message_field)
+        # The last existed field in RESERVED_FIELDS takes priority, reverse them to stop at the first match
+        self._aliases = [(field, tuple(reversed(fields))) for field, fields in RESERVED_FIELDS.items()]
+        self._matcher = re.compile(field_matcher) if field_matcher is not None else None
+        self._matched_fields: Dict[str, bool] = {}
+
+    def project(self, logs: Iterable[Hit]) -> List[FlattenLog]:
+        """Transform the hits in batch"""
+        return [self.project_one(log) for log in logs]
+
+    def project_one(self, log: Hit) -> FlattenLog:
         raw = flatten_structure(log.to_dict(), None)
-        raw = rename_log_fields(raw)
+        for field, possible_fields in self._aliases:
+            value = NOT_SET
+            for pfield in possible_fields:
+                if pfield in raw:
+                    value = raw[pfield]
+                    break
+            raw[field] = value
+
         if hasattr(log.meta, "highlight") and log.meta.highlight:
             for k, v in log.meta.highlight.to_dict().items():
                 raw[k] = "".join(v)
 
-        cleaned.append(
-            FlattenLog(
-                timestamp=format_timestamp(
-                    field_extractor_factory(search_params.timeField)(raw), search_params.timeFormat
-                ),
-                message=field_extractor_factory(search_params.messageField)(raw),
-                # 如果设置了白名单, 则过滤白名单以外的字段(避免日志详情中太多字段)
-                raw={k: v for k, v in raw.items() if matcher(k)} if matcher is not None else raw,
-            )
+        return FlattenLog(
+            timestamp=format_timestamp(self._extract_timestamp(raw), self.time_format),  # type: ignore
+            message=self._extract_message(raw),
+            # 如果设置了白名单, 则过滤白名单以外的字段(避免日志详情中太多字段)
+            raw={k: v for k, v in raw.items() if self._match(k)} if self._matcher is not None else raw,
         )
-    return cleaned
+
+    def _match(self, field: str) -> bool:
+        try:
+            return self._matched_fields[field]
+        except KeyError:
+            pass
+
+        # 保留字段, 永远返回 True
+        matched = field in RESERVED_FIELDS or bool(self._matcher.fullmatch(field))  # type: ignore
+        if len(self._matched_fields) < self.max_matched_fields:
+            self._matched_fields[field] = matched
+        return matched
+
+
+def get_log_projection(search_params: ElasticSearchParams) -> LogProjection:
+    """Get the shared projection object of the search params"""
+    return _get_log_projection(
+        search_params.timeField, search_params.timeFormat, search_params.messageField, search_params.filedMatcher
+    )
+
+
+@lru_cache(maxsize=128)
+def _get_log_projection(
+    time_field: str, time_format: str, message_field: str, field_matcher: Optional[str]
+) -> LogProjection:
+    return LogProjection(time_field, time_format, message_field, field_matcher)
+
+
+def clean_logs(
+    logs: List[Hit],
+    search_params: ElasticSearchParams,
+) -> List[FlattenLog]:
+    """从 ES 日志中转换成扁平化的 FlattenLog, 方便后续对日志字段的提取"""
+    return get_log_projection(search_params).project(logs)
+
+
+def gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Compress the chunks in gzip format on the fly, useful for streaming responses"""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        if data := compressor.compress(chunk):
+            yield data
+    yield compressor.flush()
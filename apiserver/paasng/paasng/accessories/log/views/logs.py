@@ -19,10 +19,13 @@ import json
 import logging
 import re
 from functools import wraps
-from typing import TYPE_CHECKING, ClassVar, List, Optional, Tuple, Type
+from itertools import chain
+from typing import TYPE_CHECKING, ClassVar, Iterable, Iterator, List, Optional, Tuple, Type
 
 import cattr
 from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from django.utils.translation import gettext as _
 from drf_yasg.utils import swagger_auto_schema
 from elasticsearch.exceptions import RequestError
@@ -42,7 +45,7 @@ from paasng.accessories.log.filters import EnvFilter, ModuleFilter
 from paasng.accessories.log.models import ElasticSearchParams, ProcessLogQueryConfig
 from paasng.accessories.log.responses import IngressLogLine, StandardOutputLogLine, StructureLogLine
 from paasng.accessories.log.shim import setup_env_log_model
-from paasng.accessories.log.utils import clean_logs, parse_request_to_es_dsl
+from paasng.accessories.log.utils import clean_logs, gzip_stream, parse_request_to_es_dsl
 from paasng.core.tenant.user import get_tenant
 from paasng.infras.accounts.permissions.application import application_perm_class
 from paasng.infras.bk_log.exceptions import BkLogGatewayServiceError
@@ -196,6 +199,7 @@ class LogBaseAPIView(ViewSet, ApplicationCodeInPathMixin):
 class LogAPIView(LogBaseAPIView):
     line_model: ClassVar[Type]
     logs_serializer_class: ClassVar[Type[Serializer]]
+    line_serializer_class: ClassVar[Type[Serializer]]
 
     @swagger_auto_schema(
         query_serializer=serializers.LogQueryParamsSLZ,
@@ -291,6 +295,73 @@ class LogAPIView(LogBaseAPIView):
         )
         return Response(data=self.logs_serializer_class(logs).data)
 
+    @swagger_auto_schema(
+        query_serializer=serializers.LogExportParamsSLZ,
+        request_body=serializers.LogQueryBodySLZ,
+    )
+    @transform_noindex_error
+    @transform_bklog_error
+    def export_logs(self, request, code, module_name, environment):
+        """导出日志, 按 NDJSON 格式(每行一条日志)流式返回, 可选 gzip 压缩
+
+        日志会按批次顺序从 ES 中读取, 单次最多导出 settings.LOG_EXPORT_MAX_DOCS 条日志
+        """
+        slz = serializers.LogExportParamsSLZ(data=request.query_params)
+        slz.is_valid(raise_exception=True)
+        params = slz.validated_data
+
+        log_client, log_config = self.instantiate_log_client()
+        search = self.make_search(
+            mappings=log_client.get_mappings(
+                log_config.search_params.indexPattern,
+                time_range=params["smart_time_range"],
+                timeout=settings.DEFAULT_ES_SEARCH_TIMEOUT,
+            ),
+            time_field=log_config.search_params.timeField,
+        )
+        pages = log_client.iter_search(
+            index=log_config.search_params.indexPattern, search=search, timeout=settings.DEFAULT_ES_SEARCH_TIMEOUT
+        )
+        try:
+            # 先查询第一页, 以便在开始返回响应前就能发现查询语句的错误
+            first_page = next(pages, [])
+        except (NoIndexError, BkLogGatewayServiceError):
+            raise
+        except (RequestError, BkLogApiError) as e:
+            logger.error("Request error when exporting logs: %s", e)  # noqa: TRY400
+            raise error_codes.QUERY_REQUEST_ERROR
+        except Exception:
+            logger.exception("failed to export logs")
+            raise error_codes.QUERY_LOG_FAILED.f(_("日志查询失败，请稍后再试。"))
+
+        content: Iterable[bytes] = self._iter_export_lines(
+            chain([first_page], pages), log_config.search_params, settings.LOG_EXPORT_MAX_DOCS
+        )
+        filename = f"{code}-{module_name}-{environment}-{timezone.localtime().strftime('%Y%m%d%H%M%S')}.ndjson"
+        if params["compress"]:
+            content = gzip_stream(content)
+            filename += ".gz"
+
+        response = StreamingHttpResponse(
+            content, content_type="application/gzip" if params["compress"] else "application/x-ndjson"
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    def _iter_export_lines(
+        self, pages: Iterator[List], search_params: ElasticSearchParams, max_docs: int
+    ) -> Iterator[bytes]:
+        """Transform the log pages to NDJSON lines, stop when the amount of logs reaches `max_docs`"""
+        count = 0
+        for hits in pages:
+            for log in clean_logs(hits[: max_docs - count], search_params):
+                line = self.line_serializer_class(cattr.structure(log, self.line_model)).data
+                yield json.dumps(line, ensure_ascii=False).encode() + b"\n"
+            count += len(hits)
+            if count >= max_docs:
+                logger.info("The amount of exported logs reaches the limit: %s", max_docs)
+                return
+
     @swagger_auto_schema(
         query_serializer=serializers.LogQueryParamsSLZ,
         request_body=serializers.LogQueryBodySLZ,
@@ -364,18 +435,21 @@ class StdoutLogAPIView(LogAPIView):
     line_model = StandardOutputLogLine
     log_type = LogType.STANDARD_OUTPUT
     logs_serializer_class = serializers.StandardOutputLogsSLZ
+    line_serializer_class = serializers.StandardOutputLogLineSLZ
 
 
 class StructuredLogAPIView(LogAPIView):
     line_model = StructureLogLine
     log_type = LogType.STRUCTURED
     logs_serializer_class = serializers.StructureLogsSLZ
+    line_serializer_class = serializers.StructureLogLineSLZ
 
 
 class IngressLogAPIView(LogAPIView):
     line_model = IngressLogLine
     log_type = LogType.INGRESS
     logs_serializer_class = serializers.IngressLogSLZ
+    line_serializer_class = serializers.IngressLogLineSLZ
 
 
 if TYPE_CHECKING:
@@ -18,12 +18,12 @@
 """Manage logics related with how to expose an application"""
 
 import logging
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
-from paas_wl.core.env import env_is_running
+from paas_wl.core.env import env_is_running, envs_is_running
 from paas_wl.workloads.networking.entrance.addrs import EnvExposedURL
 from paas_wl.workloads.networking.entrance.handlers import refresh_module_domains
-from paas_wl.workloads.networking.entrance.shim import get_builtin_addr_preferred
+from paas_wl.workloads.networking.entrance.shim import get_builtin_addr_preferred, list_live_addrs_preferred
 from paasng.platform.applications.models import Application, ModuleEnvironment
 from paasng.platform.modules.constants import ExposedURLType
 from paasng.platform.modules.models import Module
@@ -53,6 +53,36 @@ def get_module_exposed_links(module: Module) -> Dict[str, Dict]:
     return links
 
 
+def list_modules_exposed_links(modules: List[Module]) -> Dict[str, Dict[str, Dict]]:
+    """Bulk version of `get_module_exposed_links`, the deployed status and addresses of all modules are
+    queried in a fixed number of queries.
+
+    :param modules: The modules, the "application" and "envs" relations should be loaded in advance,
+        such as by `prefetch_related("envs")`, or there will be extra queries.
+    :return: A dict of {module.id: links}
+    """
+    envs = []
+    for module in modules:
+        for env in module.get_envs():
+            # Share the loaded objects with env, avoid querying them again
+            env.module = module
+            env.application = module.application
+            envs.append(env)
+
+    deployed_map = envs_is_running(envs)
+    addrs = list_live_addrs_preferred([env for env in envs if deployed_map[env.id]])
+
+    results: Dict[str, Dict[str, Dict]] = {}
+    for module in modules:
+        links = {}
+        for env in module.get_envs():
+            addr = addrs.get(env.id)
+            url = addr.to_exposed_url().address if addr else None
+            links[env.environment] = {"deployed": deployed_map[env.id], "url": url}
+        results[str(module.id)] = links
+    return results
+
+
 def get_exposed_links(application: Application) -> Dict:
     """Return exposed links for default module"""
     return get_module_exposed_links(application.get_default_module())
@@ -19,9 +19,12 @@ import datetime
 import logging
 import operator
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, Dict, Generator, Iterable, Iterator, List, NamedTuple, Optional, TypeVar, cast
 
 from attrs import define
+from django.conf import settings
+from django.db import connections
 from django.http import Http404
 from django.utils import timezone
 
@@ -39,11 +42,17 @@ from paasng.accessories.servicehub.models import (
     RemoteServiceDBProperties,
     ServiceDBProperties,
 )
-from paasng.accessories.servicehub.remote.manager import RemotePlanMgr, RemoteServiceMgr, RemoteServiceObj
+from paasng.accessories.servicehub.remote.manager import (
+    RemoteEngineAppInstanceRel,
+    RemotePlanMgr,
+    RemoteServiceMgr,
+    RemoteServiceObj,
+)
 from paasng.accessories.servicehub.remote.store import get_remote_store
 from paasng.accessories.servicehub.services import (
     EngineAppInstanceRel,
     PlanObj,
+    ServiceInstanceObj,
     ServiceObj,
     UnboundEngineAppInstanceRel,
 )
@@ -262,12 +271,13 @@ class MixedServiceMgr:
         :param filter_enabled: Whether to filter enabled service instances
         :returns: List of env variable groups.
         """
+        rels = [
+            rel
+            for rel in self.list_provisioned_rels(engine_app, service=service)
+            if not (filter_enabled and not rel.db_obj.credentials_enabled)
+        ]
         results = []
-        for rel in self.list_provisioned_rels(engine_app, service=service):
-            if filter_enabled and not rel.db_obj.credentials_enabled:
-                continue
-
-            inst = rel.get_instance()
+        for rel, inst in zip(rels, get_rel_instances(rels), strict=True):
             results.append(
                 EnvVariableGroup(service=rel.get_service(), data=inst.credentials, created_at=inst.create_time)
             )
@@ -292,6 +302,34 @@ class MixedServiceMgr:
         )
 
 
+def get_rel_instances(rels: List[EngineAppInstanceRel]) -> List[ServiceInstanceObj]:
+    """Get the instances of the given relationships, in the same order.
+
+    The remote instances are fetched in parallel by a bounded thread pool, because it may require requests
+    to the remote services. The local instances are fetched in the current thread.
+    """
+
+    def _get_remote_instance(i: int) -> ServiceInstanceObj:
+        try:
+            return rels[i].get_instance()
+        finally:
+            # Always close connections in every worker thread to avoid leaking of database connections
+            connections.close_all()
+
+    instances: List[Optional[ServiceInstanceObj]] = [None] * len(rels)
+    remote_indexes = [i for i, rel in enumerate(rels) if isinstance(rel, RemoteEngineAppInstanceRel)]
+    max_workers = min(settings.SERVICE_INSTANCE_FETCH_CONCURRENCY, len(remote_indexes))
+    if max_workers > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for i, inst in zip(remote_indexes, executor.map(_get_remote_instance, remote_indexes), strict=True):
+                instances[i] = inst
+
+    for i, rel in enumerate(rels):
+        if instances[i] is None:
+            instances[i] = rel.get_instance()
+    return cast(List[ServiceInstanceObj], instances)
+
+
 def mark_default_policy_creation_finished(service_obj: ServiceObj):
     """Mark the default policy creation as finished."""
 
@@ -18,7 +18,9 @@
 """Collector for remote services"""
 
 import logging
+import time
 from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from typing import Dict, Generator, List, Optional
 
 from django.conf import settings
@@ -134,24 +136,60 @@ def refresh_remote_service(remote_store: RemoteServiceStore, service_id: str):
 
 
 def fetch_all_remote_services() -> Generator[FetchResult, None, None]:
-    """Fetch all service data defined in config"""
+    """Fetch all service data defined in config, the endpoints are fetched concurrently and the results
+    are yielded in the order of completion, so a slow endpoint won't delay others. The endpoints which
+    can not be fetched in `REMOTE_SERVICES_FETCH_TIMEOUT` seconds(since the request started) are skipped
+    in this round.
+    """
     try:
         remote_svc_configs = settings.SERVICE_REMOTE_ENDPOINTS
     except AttributeError:
         raise ImproperlyConfigured("Can't initialize remote services, SERVICE_REMOTE_ENDPOINTS is not configured")
     if not isinstance(remote_svc_configs, list):
         raise ImproperlyConfigured("SERVICE_REMOTE_ENDPOINTS must be list type")
-
-    for endpoint_conf in remote_svc_configs:
-        config = RemoteSvcConfig.from_json(endpoint_conf)
-        try:
-            yield fetch_remote_service(config)
-        except FetchRemoteSvcError:
-            logger.exception("unable to load remote service.")
-        except Exception:
-            logger.exception("unable to load remote service.")
-        else:
-            logger.debug(f"successfully loaded {config}.")
+    if not remote_svc_configs:
+        return
+
+    configs = [RemoteSvcConfig.from_json(endpoint_conf) for endpoint_conf in remote_svc_configs]
+    timeout = settings.REMOTE_SERVICES_FETCH_TIMEOUT
+    # 各请求开始的时间, 超时从请求开始时计算, 在线程池中排队的时间不计入
+    started_at: Dict[int, float] = {}
+
+    def fetch(idx: int) -> FetchResult:
+        started_at[idx] = time.monotonic()
+        return fetch_remote_service(configs[idx])
+
+    max_workers = max(min(settings.REMOTE_SERVICES_FETCH_CONCURRENCY, len(configs)), 1)
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="remote-svc-fetcher")
+    futures: Dict[Future, int] = {executor.submit(fetch, idx): idx for idx in range(len(configs))}
+    pending = set(futures)
+    try:
+        while pending:
+            deadlines = {f: started_at[futures[f]] + timeout for f in pending if futures[f] in started_at}
+            now = time.monotonic()
+            expired = {f for f, deadline in deadlines.items() if deadline <= now and not f.done()}
+            if expired:
+                skipped = ", ".join(str(configs[futures[f]]) for f in expired)
+                logger.warning("timeout loading remote services, skipped: %s", skipped)
+                pending -= expired
+                continue
+
+            wait_seconds = max(min(deadlines.values()) - now, 0) if deadlines else timeout
+            done, pending = wait(pending, timeout=wait_seconds, return_when=FIRST_COMPLETED)
+            for future in done:
+                config = configs[futures[future]]
+                try:
+                    ret = future.result()
+                except FetchRemoteSvcError:
+                    logger.exception("unable to load remote service.")
+                except Exception:
+                    logger.exception("unable to load remote service.")
+                else:
+                    logger.debug(f"successfully loaded {config}.")
+                    yield ret
+    finally:
+        # 超时的请求由客户端自身的超时设置结束，无需等待
+        executor.shutdown(wait=False, cancel_futures=True)
 
 
 def initialize_remote_services(remote_store: RemoteServiceStore):
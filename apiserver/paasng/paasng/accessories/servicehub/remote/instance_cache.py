@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+"""Cache for the data(credentials, config) of provisioned remote service instances"""
+
+import json
+import logging
+from typing import Callable, Dict, Optional, Tuple
+
+from blue_krill.encrypt.handler import EncryptHandler
+from django.conf import settings
+from django.utils.encoding import force_str
+from redis.exceptions import RedisError
+
+from paasng.core.core.storages.redisdb import get_default_redis
+
+logger = logging.getLogger(__name__)
+
+
+class InstanceDataCache:
+    """Cache the data of remote service instances in redis, so that reading the credentials of an instance
+    does not require a request to the remote service every time. The data is encrypted because it contains
+    credentials.
+
+    The entries never expire by time(except a long expiration for garbage collecting), they must be
+    invalidated explicitly when the instance has been changed. Every instance has a version which is bumped
+    by `invalidate()`, an entry is stamped with the version read before loading the data, so an entry loaded
+    before the invalidation is never served.
+    """
+
+    cache_key = "REDIS_"
+    # Update the namespace when the format of entries has been changed
+    namespace = "1"
+
+    def __init__(self):
+        self.redis = get_default_redis(self.cache_key)
+        self.encrypt_handler = EncryptHandler()
+
+    def _make_data_key(self, instance_id: str) -> str:
+        return self.namespace + f"remote:instance:data:{instance_id}"
+
+    def _make_version_key(self, instance_id: str) -> str:
+        return self.namespace + f"remote:instance:version:{instance_id}"
+
+    def get(self, instance_id: str, loader: Callable[[], Dict]) -> Dict:
+        """Get the data of the instance, call `loader` to load the data when it's not cached.
+
+        :param loader: A function which loads the data from the remote service.
+        """
+        if not settings.ENABLE_REMOTE_SVC_INSTANCE_CACHE:
+            return loader()
+
+        try:
+            version, data = self._read(instance_id)
+        except RedisError:
+            logger.warning("Unable to read the cached data of instance %s, load it directly", instance_id)
+            return loader()
+        if data is not None:
+            return data
+
+        data = loader()
+        try:
+            self._write(instance_id, version, data)
+        except RedisError:
+            logger.warning("Unable to cache the data of instance %s", instance_id)
+        return data
+
+    def refresh(self, instance_id: str, loader: Callable[[], Dict]) -> Dict:
+        """Drop the cached data and load the latest data"""
+        self.invalidate(instance_id)
+        return self.get(instance_id, loader)
+
+    def invalidate(self, instance_id: str):
+        """Invalidate the cached data of the instance"""
+        version_key = self._make_version_key(instance_id)
+        pipe = self.redis.pipeline()
+        pipe.incr(version_key)
+        pipe.expire(version_key, settings.REMOTE_SVC_INSTANCE_CACHE_EXPIRES)
+        pipe.delete(self._make_data_key(instance_id))
+        try:
+            pipe.execute()
+        except RedisError:
+            logger.exception("Unable to invalidate the cached data of instance %s", instance_id)
+
+    def _read(self, instance_id: str) -> Tuple[str, Optional[Dict]]:
+        """Read the current version and the cached data of the instance
+
+        :return: (version, data), data is None if it's not cached or it's outdated.
+        """
+        pipe = self.redis.pipeline()
+        pipe.get(self._make_version_key(instance_id))
+        pipe.get(self._make_data_key(instance_id))
+        version, entry = pipe.execute()
+        version = force_str(version or "0")
+        if entry is None:
+            return version, None
+
+        try:
+            payload = json.loads(self.encrypt_handler.decrypt(force_str(entry)))
+        except Exception:
+            logger.warning("The cached data of instance %s is malformed, ignore it", instance_id)
+            return version, None
+
+        if payload.get("version") != version:
+            return version, None
+        return version, payload["data"]
+
+    def _write(self, instance_id: str, version: str, data: Dict):
+        entry = self.encrypt_handler.encrypt(json.dumps({"version": version, "data": data}))
+        expires = settings.REMOTE_SVC_INSTANCE_CACHE_EXPIRES
+        pipe = self.redis.pipeline()
+        pipe.set(self._make_data_key(instance_id), entry, expires)
+        pipe.expire(self._make_version_key(instance_id), expires)
+        pipe.execute()
+
+
+_instance_data_cache: Optional[InstanceDataCache] = None
+
+
+def get_instance_data_cache() -> InstanceDataCache:
+    """Get the single instanced cache object"""
+    global _instance_data_cache
+    if _instance_data_cache is None:
+        _instance_data_cache = InstanceDataCache()
+    return _instance_data_cache
@@ -51,7 +51,8 @@ from paasng.accessories.servicehub.remote.exceptions import (
     ServiceNotFound,
     UnsupportedOperationError,
 )
-from paasng.accessories.servicehub.remote.store import RemoteServiceStore
+from paasng.accessories.servicehub.remote.instance_cache import get_instance_data_cache
+from paasng.accessories.servicehub.remote.store import RemoteServiceStore, thaw
 from paasng.accessories.servicehub.services import (
     NOTSET,
     BasePlanMgr,
@@ -116,6 +117,8 @@ VERSION_WITH_REST_UPSERT = "0.2.0"
 class RemotePlanObj(PlanObj):
     @classmethod
     def from_data(cls, data: Dict):
+        # Always work on a copy, the data may be an immutable view from the store
+        data = thaw(data)
         data.setdefault("is_active", True)
         properties = data.get("properties") or {}
         is_eager = data.pop("is_eager", False)
@@ -143,7 +146,8 @@ class RemoteServiceObj(ServiceObj):
     @classmethod
     def from_data(cls, service: Dict) -> "RemoteServiceObj":
         field_names = list(cls.__dataclass_fields__.keys())  # type: ignore
-        fields: Dict[str, Any] = {k: service.get(k) for k in field_names if k in service}
+        # The service may be an immutable view from the store, copy the fields to avoid sharing data
+        fields: Dict[str, Any] = {k: thaw(service.get(k)) for k in field_names if k in service}
         fields["plans"] = [asdict(RemotePlanObj.from_data(i)) for i in fields.get("plans") or ()]
 
         # Set up meta info
@@ -260,6 +264,8 @@ class RemoteEngineAppInstanceRel(EngineAppInstanceRel):
         # Update instance config
         if service_obj.supports_inst_config():
             self.sync_instance_config()
+        else:
+            self.refresh_instance_cache()
 
         SERVICE_PROVISION_COUNTER.labels(
             environment=self.db_env.environment,
@@ -285,10 +291,12 @@ class RemoteEngineAppInstanceRel(EngineAppInstanceRel):
             self.remote_client.update_instance_config(instance_id, config={"paas_app_info": paas_app_info})
         except Exception:
             logger.exception(f"Error when updating instance config for {instance_id}")
+        self.refresh_instance_cache()
 
     def recycle_resource(self):
         """对于 remote service 我们默认其已经具备了回收的能力"""
         if self.is_provisioned():
+            get_instance_data_cache().invalidate(str(self.db_obj.service_instance_id))
             try:
                 self.remote_client.delete_instance(instance_id=str(self.db_obj.service_instance_id))
             except Exception as e:
@@ -312,12 +320,7 @@ class RemoteEngineAppInstanceRel(EngineAppInstanceRel):
         if not self.is_provisioned():
             raise ValueError("relationship is not provisioned yet")
 
-        # TODO: failure tolerance
-        instance_data = self.remote_client.retrieve_instance(str(self.db_obj.service_instance_id))
-        # TODO: More data validations
-        if not instance_data.get("uuid") == str(self.db_obj.service_instance_id):
-            raise exceptions.SvcInstanceNotAvailableError("uuid in data does not match")
-
+        instance_data = get_instance_data_cache().get(str(self.db_obj.service_instance_id), self._retrieve_instance)
         svc_obj = self.get_service()
         create_time = arrow.get(instance_data.get("created"))  # type: ignore
         default_tenant_id = get_init_tenant_id()
@@ -330,6 +333,22 @@ class RemoteEngineAppInstanceRel(EngineAppInstanceRel):
             create_time=create_time.datetime,
         )
 
+    def refresh_instance_cache(self):
+        """Refresh the cached instance data, should be called when the instance has been changed"""
+        instance_id = str(self.db_obj.service_instance_id)
+        try:
+            get_instance_data_cache().refresh(instance_id, self._retrieve_instance)
+        except Exception:
+            logger.exception(f"Error when refreshing the cached data of instance {instance_id}")
+
+    def _retrieve_instance(self) -> Dict:
+        """Retrieve the instance data from remote service"""
+        instance_data = self.remote_client.retrieve_instance(str(self.db_obj.service_instance_id))
+        # TODO: More data validations
+        if not instance_data.get("uuid") == str(self.db_obj.service_instance_id):
+            raise exceptions.SvcInstanceNotAvailableError("uuid in data does not match")
+        return instance_data
+
     def render_params(self, params_tmpl: Dict) -> Dict:
         """Render params dict by current rel's context, Available keys:
 
@@ -480,6 +499,7 @@ class RemotePlainInstanceMgr(PlainInstanceMgr):
             self.remote_client.update_instance_config(str(instance_id), config={"paas_app_info": paas_app_info})
         except Exception:
             logger.exception(f"Error when updating instance config for {instance_id}")
+        get_instance_data_cache().invalidate(str(instance_id))
 
     def is_provisioned(self):
         return self.db_obj.service_instance_id is not None
@@ -520,6 +540,7 @@ class RemotePlainInstanceMgr(PlainInstanceMgr):
             return
 
         self.remote_client.destroy_client_side_instance(instance_id=str(self.db_obj.service_instance_id))
+        get_instance_data_cache().invalidate(str(self.db_obj.service_instance_id))
         logger.info("going to delete remote service attachment from db")
         # delete rel itself from real db
         self.db_obj.delete()
@@ -18,11 +18,14 @@
 """Storage for remote services"""
 
 import copy
+import hashlib
 import json
 import logging
 import pickle
-from collections import OrderedDict
-from typing import Callable, Dict, List, Optional, Set
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 from django.conf import settings
 from django.utils.encoding import force_bytes, force_str
@@ -51,6 +54,56 @@ def _loads(dumped: bytes) -> Dict:
         return pickle.loads(force_bytes(dumped, encoding="latin-1"))
 
 
+def _digest(service: Dict, config: Dict) -> str:
+    """Compute the content digest of a service and its source config, used to detect changes"""
+    content = json.dumps([service, config], sort_keys=True, default=str)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+class FrozenDict(dict):
+    """A read-only dict, used as the immutable view of cached service data, so that the same
+    object can be shared between callers safely without deep copying.
+
+    - `copy.deepcopy()` or `thaw()` returns a mutable copy
+    - `json.dumps()` works as a normal dict
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(f"'{type(self).__name__}' object is read-only, use thaw() to get a mutable copy")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly  # type: ignore[assignment]
+    clear = pop = popitem = setdefault = update = _readonly  # type: ignore[assignment]
+
+    def __copy__(self) -> Dict:
+        return dict(self)
+
+    def __deepcopy__(self, memo) -> Dict:
+        return thaw(self)
+
+    def __reduce__(self):
+        return (dict, (thaw(self),))
+
+
+def freeze(value: Any) -> Any:
+    """Make an immutable view of the given value, dicts and lists are converted recursively."""
+    if isinstance(value, FrozenDict):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(i) for i in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Make a mutable copy of the value produced by `freeze()`, the opposite of `freeze()`."""
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(i) for i in value]
+    return value
+
+
 def get_remote_store():
     """Get the single instanced remote services database object"""
     global _g_services_store
@@ -68,16 +121,7 @@ class StoreMixin:
 
         :param conditions: a dict of conditions, eg. {"category": 1}
         """
-        result = []
-        conditions = conditions or {}
-        for service in self.all():
-            for key, value in conditions.items():
-                if service.get(key) != value:
-                    break
-            else:
-                # Append the item to result when the forloop ends without break
-                result.append(copy.deepcopy(service))
-        return result
+        return _match_conditions(self.all(), conditions or {})
 
     def bulk_get(self, uuids: List[str]) -> List[Dict]:
         """Get multiple service instances by a list of uuids
@@ -95,6 +139,10 @@ class StoreMixin:
         return items
 
 
+def _match_conditions(services: Iterable[Dict], conditions: Dict) -> List[Dict]:
+    return [svc for svc in services if all(svc.get(key) == value for key, value in conditions.items())]
+
+
 class MemoryStore(StoreMixin):
     """Remote service store"""
 
@@ -102,9 +150,10 @@ class MemoryStore(StoreMixin):
         self._map_id_to_service = OrderedDict()
         self._map_id_to_config = {}
 
-    def bulk_upsert(self, services: List[Dict], meta_info: Optional[Dict], source_config: RemoteSvcConfig):
+    def bulk_upsert(self, services: List[Dict], meta_info: Optional[Dict], source_config: RemoteSvcConfig) -> int:
         """Insert the service if identical uuid does not exists, otherwise update it.
 
+        :return: The number of upserted services.
         :raises ValueError: When services with the same uuid and different names in the service configuration.
         """
         for service in services:
@@ -118,6 +167,7 @@ class MemoryStore(StoreMixin):
 
             self._map_id_to_service[service["uuid"]] = service
             self._map_id_to_config[service["uuid"]] = source_config
+        return len(services)
 
     def get_source_config(self, uuid: str) -> RemoteSvcConfig:
         """Get the source remote svc config by service uuid"""
@@ -140,7 +190,53 @@ class MemoryStore(StoreMixin):
         self._map_id_to_config = {}
 
 
+class _ServicesSnapshot:
+    """A decoded snapshot of all services in the redis store, the services are stored as immutable views
+    and indexed by "uuid", "name" and "category".
+
+    :param generation: The generation of the store when the snapshot was taken
+    """
+
+    # The fields which have secondary indexes
+    indexed_fields = ("name", "category")
+
+    def __init__(self, generation: Optional[bytes], services: List[Dict]):
+        self.generation = generation
+        self.built_at = self.checked_at = time.monotonic()
+        self.services: Tuple[Dict, ...] = tuple(freeze(svc) for svc in services)
+        self.by_uuid: Dict[str, Dict] = {svc["uuid"]: svc for svc in self.services}
+
+        self.indexes: Dict[str, Dict[Any, Tuple[Dict, ...]]] = {}
+        for field in self.indexed_fields:
+            index = defaultdict(list)
+            for svc in self.services:
+                index[svc.get(field)].append(svc)
+            self.indexes[field] = {k: tuple(v) for k, v in index.items()}
+
+    def filter(self, conditions: Dict) -> List[Dict]:
+        """Filter services by conditions, use the secondary index when possible"""
+        conditions = dict(conditions)
+        candidates: Iterable[Dict] = self.services
+        for field in self.indexed_fields:
+            if field in conditions:
+                candidates = self.indexes[field].get(conditions.pop(field), ())
+                break
+        return _match_conditions(candidates, conditions)
+
+
 class RedisStore(StoreMixin):
+    """Remote service store which saves the services in redis.
+
+    The reading methods(`get`, `all`, `filter`) are served by a process-level snapshot, every writing
+    which changes any service bumps the "generation" key, the snapshot will be rebuilt when a different
+    generation is found. The generation is checked at most once in `REMOTE_SERVICES_LOCAL_CACHE_TTL` seconds.
+    Services expired in redis do not bump the generation, so the snapshot is also rebuilt when it's older
+    than `REMOTE_SERVICES_SNAPSHOT_MAX_AGE` seconds.
+
+    The services returned by the reading methods are immutable views(`FrozenDict`), call `thaw()` to get
+    a mutable copy if it's needed.
+    """
+
     cache_key = "REDIS_"
 
     # Namespace for redis keys, when there are multiple running paas instances. If you modified the core logic of Store
@@ -148,8 +244,13 @@ class RedisStore(StoreMixin):
     namespace = "1"
     encoding = "utf-8"
     registered_services_key = namespace + "remote:registered:service:uuid"
+    generation_key = namespace + "remote:services:generation"
     expires = settings.REMOTE_SERVICES_UPDATE_INTERVAL_MINUTES * 60 * 10
 
+    # The snapshot is shared by all store objects in current process
+    _snapshot: Optional[_ServicesSnapshot] = None
+    _snapshot_lock = threading.Lock()
+
     def __init__(self):
         self.redis = get_default_redis(self.cache_key)
 
@@ -159,36 +260,77 @@ class RedisStore(StoreMixin):
     def _make_svc_config_key(self, uuid: str) -> str:
         return self.namespace + f"remote:service:config:{uuid}"
 
+    def _make_svc_digest_key(self, uuid: str) -> str:
+        return self.namespace + f"remote:service:digest:{uuid}"
+
     def get_service_keys(self) -> Set[str]:
         """Get all registered service key"""
         result = self.redis.smembers(self.registered_services_key)
         return {force_str(i, encoding=self.encoding) for i in result}
 
-    def bulk_upsert(self, services: List[Dict], meta_info: Optional[Dict], source_config: RemoteSvcConfig):
+    def bulk_upsert(self, services: List[Dict], meta_info: Optional[Dict], source_config: RemoteSvcConfig) -> int:
         """Insert the service if identical uuid does not exists, otherwise update it.
 
+        Only the services whose content digest has been changed are written, the expiration of others
+        is refreshed. The generation is bumped only when there is any change, so readers can detect
+        "nothing changed" cheaply.
+
         :param meta_info: Service's meta info, including `version` etc.
+        :return: The number of changed services.
         :raises ValueError: When services with the same uuid and different names in the service configuration.
         """
-        redis_client = self.redis
+        if not services:
+            return 0
+
         config = source_config.to_json()
-        for service in services:
+        sids = [service["uuid"] for service in services]
+
+        # 一次往返读取所有服务的旧配置与摘要
+        pipe = self.redis.pipeline()
+        for sid in sids:
+            pipe.get(self._make_svc_config_key(sid))
+            pipe.get(self._make_svc_digest_key(sid))
+        results = pipe.execute()
+
+        pipe = self.redis.pipeline()
+        changed = 0
+        for i, service in enumerate(services):
             service["_meta_info"] = meta_info
 
-            sid = service["uuid"]
+            sid = sids[i]
             info_key = self._make_svc_info_key(sid)
             config_key = self._make_svc_config_key(sid)
+            digest_key = self._make_svc_digest_key(sid)
 
-            legacy_config = redis_client.get(config_key)
+            legacy_config, legacy_digest = results[2 * i], results[2 * i + 1]
             # 如果新的配置项中的服务名 与 缓存中服务名不一致，则不更新，服务的其他配置发生变更可更新
             if legacy_config and _loads(legacy_config)["name"] != config["name"]:
                 raise ValueError(f"Service uuid={service['uuid']} with a different source name already exists")
 
-            pipe = redis_client.pipeline()
+            digest = _digest(service, config)
+            if legacy_config and legacy_digest and force_str(legacy_digest) == digest:
+                # 内容未变化，仅续期
+                for key in (info_key, config_key, digest_key):
+                    pipe.expire(key, self.expires)
+                continue
+
+            changed += 1
             pipe.set(info_key, _dumps(service), self.expires)
             pipe.set(config_key, _dumps(config), self.expires)
+            pipe.set(digest_key, digest, self.expires)
             pipe.sadd(self.registered_services_key, sid.encode(self.encoding))
-            pipe.execute()
+
+        if changed:
+            pipe.incr(self.generation_key)
+        pipe.execute()
+
+        if changed:
+            self.invalidate_snapshot()
+        return changed
+
+    def get_generation(self) -> int:
+        """Get the version of the services catalogue, it's bumped whenever any service was changed"""
+        return int(self.redis.get(self.generation_key) or 0)
 
     def get_source_config(self, uuid: str) -> RemoteSvcConfig:
         """Get the source remote svc config by service uuid"""
@@ -199,14 +341,60 @@ class RedisStore(StoreMixin):
 
     def get(self, uuid: str) -> Dict:
         """Get a service instance by uuid"""
+        if svc := self.get_snapshot().by_uuid.get(uuid):
+            return svc
+
+        # The service may be registered after the snapshot was taken, read it from redis directly
         result = self.redis.get(self._make_svc_info_key(uuid))
         if result is None:
             raise ServiceNotFound(f"remote service with id={uuid} not found")
 
-        return _loads(result)
+        return freeze(_loads(result))
 
     def all(self) -> List[Dict]:
         """List all services"""
+        return list(self.get_snapshot().services)
+
+    def filter(self, conditions: Optional[Dict] = None) -> List[Dict]:
+        """Find a list of services by given conditions, "name" and "category" are indexed
+
+        :param conditions: a dict of conditions, eg. {"category": 1}
+        """
+        return self.get_snapshot().filter(conditions or {})
+
+    def get_snapshot(self) -> _ServicesSnapshot:
+        """Get the snapshot of all services, rebuild it if the generation has been changed or it's too old"""
+        ttl = settings.REMOTE_SERVICES_LOCAL_CACHE_TTL
+        snapshot = type(self)._snapshot
+        if snapshot and time.monotonic() - snapshot.checked_at < ttl:
+            return snapshot
+
+        # Only one thread rebuilds the snapshot, others wait and reuse the result
+        with self._snapshot_lock:
+            snapshot = type(self)._snapshot
+            if snapshot and time.monotonic() - snapshot.checked_at < ttl:
+                return snapshot
+
+            generation = self.redis.get(self.generation_key)
+            if (
+                snapshot
+                and snapshot.generation == generation
+                and time.monotonic() - snapshot.built_at < settings.REMOTE_SERVICES_SNAPSHOT_MAX_AGE
+            ):
+                snapshot.checked_at = time.monotonic()
+                return snapshot
+
+            snapshot = _ServicesSnapshot(generation, self._load_all())
+            type(self)._snapshot = snapshot
+            return snapshot
+
+    def invalidate_snapshot(self):
+        """Drop the snapshot of current process, other processes are notified by the generation key"""
+        with self._snapshot_lock:
+            type(self)._snapshot = None
+
+    def _load_all(self) -> List[Dict]:
+        """Load all services from redis"""
         keys = self.get_service_keys()
         if not keys:
             return []
@@ -224,6 +412,7 @@ class RedisStore(StoreMixin):
 
     def empty(self):
         """Empty this store"""
+        self.invalidate_snapshot()
         keys = self.get_service_keys()
         if not keys:
             return
@@ -232,9 +421,12 @@ class RedisStore(StoreMixin):
         for i in keys:
             pipe.delete(self._make_svc_config_key(i))
             pipe.delete(self._make_svc_info_key(i))
+            pipe.delete(self._make_svc_digest_key(i))
 
         pipe.delete(self.registered_services_key)
+        pipe.incr(self.generation_key)
         pipe.execute()
+        self.invalidate_snapshot()
 
 
 RemoteServiceStore = RedisStore
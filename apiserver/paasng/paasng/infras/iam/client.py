@@ -303,22 +303,29 @@ class BKIAMClient:
         :returns: 用户组成员列表 ['username1', 'username2']
         """
         path_params = {"system_id": settings.IAM_PAAS_V3_SYSTEM_ID, "group_id": user_group_id}
-        params = {"page": DEFAULT_PAGE, "page_size": FETCH_USER_GROUP_MEMBERS_LIMIT}
-
-        try:
-            resp = self.client.v2_management_group_members(path_params=path_params, params=params)
-        except APIGatewayResponseError as e:
-            raise BKIAMGatewayServiceError(f"get user group members error, detail: {e}")
+        members: List[str] = []
+        page = DEFAULT_PAGE
+        # 成员数量超过单页上限时，需要继续查询后续分页
+        while True:
+            params = {"page": page, "page_size": FETCH_USER_GROUP_MEMBERS_LIMIT}
+            try:
+                resp = self.client.v2_management_group_members(path_params=path_params, params=params)
+            except APIGatewayResponseError as e:
+                raise BKIAMGatewayServiceError(f"get user group members error, detail: {e}")
 
-        if resp.get("code") != 0:
-            logger.exception(
-                "get user group members error, message:{} \n id: {}, params: {}".format(
-                    resp["message"], user_group_id, params
+            if resp.get("code") != 0:
+                logger.exception(
+                    "get user group members error, message:{} \n id: {}, params: {}".format(
+                        resp["message"], user_group_id, params
+                    )
                 )
-            )
-            raise BKIAMApiError(resp["message"], resp["code"])
+                raise BKIAMApiError(resp["message"], resp["code"])
 
-        return [user["id"] for user in resp["data"]["results"]]
+            results = resp["data"]["results"]
+            members.extend(user["id"] for user in results)
+            if not results or len(members) >= resp["data"].get("count", 0):
+                return members
+            page += 1
 
     def add_user_group_members(self, user_group_id: int, usernames: List[str], expired_after_days: int):
         """
@@ -15,12 +15,16 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
-from typing import Dict, List, Union
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Collection, Dict, List, Optional, Tuple, Union
 
 from bkpaas_auth.core.encoder import user_id_encoder
 from django.conf import settings
 
+from paasng.infras.iam.members.cache import get_user_group_members_cache
 from paasng.infras.iam.members.models import ApplicationGradeManager, ApplicationUserGroup
+from paasng.infras.iam.permissions.filter_cache import invalidate_user_policy_filters
 from paasng.platform.applications.constants import ApplicationRole
 from paasng.platform.applications.tenant import get_tenant_id_for_app
 
@@ -28,17 +32,78 @@ from .client import BKIAMClient
 from .constants import APP_DEFAULT_ROLES, NEVER_EXPIRE_DAYS
 
 
+def fetch_user_groups_members(
+    tenant_id: str, user_group_ids: Collection[int], use_cache: bool = True
+) -> Dict[int, List[str]]:
+    """
+    获取多个用户组的成员，优先读取缓存，未命中缓存的用户组将并发从权限中心拉取
+
+    :param tenant_id: 用户组所属租户 ID
+    :param user_group_ids: 用户组 ID 列表
+    :param use_cache: 是否读取缓存，鉴权等场景需要实时数据，应设置为 False 直接从权限中心拉取
+    :returns: {用户组 ID: 成员列表}
+    """
+
+    def load(group_ids: List[int]) -> Dict[int, List[str]]:
+        iam_client = BKIAMClient(tenant_id)
+        concurrency = min(settings.IAM_GROUP_MEMBERS_FETCH_CONCURRENCY, len(group_ids))
+        if concurrency <= 1:
+            return {group_id: iam_client.fetch_user_group_members(group_id) for group_id in group_ids}
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return dict(zip(group_ids, executor.map(iam_client.fetch_user_group_members, group_ids), strict=True))
+
+    if not use_cache:
+        return load(list(dict.fromkeys(user_group_ids)))
+    return get_user_group_members_cache().get_many(user_group_ids, load)
+
+
+def fetch_applications_members(
+    app_codes: Collection[str], roles: Optional[Collection[ApplicationRole]] = None
+) -> Dict[str, Dict[ApplicationRole, List[str]]]:
+    """
+    批量获取多个应用的成员，所有应用的用户组成员将一起被读取
+
+    :param app_codes: 蓝鲸应用 ID 列表
+    :param roles: 仅获取指定角色的成员，默认为全部角色
+    :returns: {应用 ID: {角色: 成员列表}}，未初始化用户组的应用 / 角色不会出现在结果中
+    """
+    groups = ApplicationUserGroup.objects.filter(app_code__in=app_codes)
+    if roles is not None:
+        groups = groups.filter(role__in=roles)
+
+    # 用户组总是和应用属于同一租户，按租户分组后批量获取成员
+    groups_by_tenant: Dict[str, List[ApplicationUserGroup]] = defaultdict(list)
+    for group in groups:
+        groups_by_tenant[group.tenant_id].append(group)
+
+    results: Dict[str, Dict[ApplicationRole, List[str]]] = defaultdict(dict)
+    for tenant_id, tenant_groups in groups_by_tenant.items():
+        members = fetch_user_groups_members(tenant_id, [g.user_group_id for g in tenant_groups])
+        for group in tenant_groups:
+            results[group.app_code][ApplicationRole(group.role)] = members[group.user_group_id]
+    return dict(results)
+
+
+def _fetch_app_groups_members(app_code: str, use_cache: bool = True) -> List[Tuple[ApplicationRole, List[str]]]:
+    """获取应用所有用户组的成员，按角色排序"""
+    groups = list(ApplicationUserGroup.objects.filter(app_code=app_code).order_by("role"))
+    members = fetch_user_groups_members(
+        get_tenant_id_for_app(app_code), [g.user_group_id for g in groups], use_cache=use_cache
+    )
+    return [(ApplicationRole(g.role), members[g.user_group_id]) for g in groups]
+
+
 def fetch_role_members(app_code: str, role: ApplicationRole) -> List[str]:
     """
-    通过指定应用与角色，获取对应的用户组信息
+    通过指定应用与角色，获取对应的用户组信息（结果用于鉴权，不读取缓存）
 
     :param app_code: 蓝鲸应用 ID
     :param role: 应用角色
     """
     tenant_id = get_tenant_id_for_app(app_code)
-    return BKIAMClient(tenant_id).fetch_user_group_members(
-        user_group_id=ApplicationUserGroup.objects.get(app_code=app_code, role=role).user_group_id
-    )
+    user_group_id = ApplicationUserGroup.objects.get(app_code=app_code, role=role).user_group_id
+    return fetch_user_groups_members(tenant_id, [user_group_id], use_cache=False)[user_group_id]
 
 
 def add_role_members(
@@ -63,11 +128,15 @@ def add_role_members(
             usernames=usernames,
         )
 
-    return iam_client.add_user_group_members(
-        user_group_id=ApplicationUserGroup.objects.get(app_code=app_code, role=role).user_group_id,
+    user_group_id = ApplicationUserGroup.objects.get(app_code=app_code, role=role).user_group_id
+    result = iam_client.add_user_group_members(
+        user_group_id=user_group_id,
         usernames=usernames,
         expired_after_days=expired_after_days,
     )
+    get_user_group_members_cache().invalidate([user_group_id])
+    invalidate_user_policy_filters(usernames)
+    return result
 
 
 def delete_role_members(app_code: str, role: ApplicationRole, usernames: Union[List[str], str]):
@@ -88,23 +157,24 @@ def delete_role_members(app_code: str, role: ApplicationRole, usernames: Union[L
             usernames=usernames,
         )
 
-    return iam_client.delete_user_group_members(
-        user_group_id=ApplicationUserGroup.objects.get(app_code=app_code, role=role).user_group_id,
-        usernames=usernames,
-    )
+    user_group_id = ApplicationUserGroup.objects.get(app_code=app_code, role=role).user_group_id
+    result = iam_client.delete_user_group_members(user_group_id=user_group_id, usernames=usernames)
+    get_user_group_members_cache().invalidate([user_group_id])
+    invalidate_user_policy_filters(usernames)
+    return result
 
 
 def fetch_user_roles(app_code: str, username: str) -> List[ApplicationRole]:
-    """原实现中用户只会有一个角色，但是接入权限中心后，角色表现为用户组，同一用户可能有多个角色"""
+    """原实现中用户只会有一个角色，但是接入权限中心后，角色表现为用户组，同一用户可能有多个角色
+
+    结果用于鉴权，总是从权限中心读取最新的成员，不读取缓存
+    """
     if username == settings.ADMIN_USERNAME:
         return [ApplicationRole.ADMINISTRATOR]
 
-    user_roles = []
-    tenant_id = get_tenant_id_for_app(app_code)
-    iam_client = BKIAMClient(tenant_id)
-    for group in ApplicationUserGroup.objects.filter(app_code=app_code).order_by("role"):
-        if username in iam_client.fetch_user_group_members(group.user_group_id):
-            user_roles.append(ApplicationRole(group.role))
+    user_roles = [
+        role for role, members in _fetch_app_groups_members(app_code, use_cache=False) if username in members
+    ]
 
     if not user_roles:
         return [ApplicationRole.NOBODY]
@@ -113,15 +183,13 @@ def fetch_user_roles(app_code: str, username: str) -> List[ApplicationRole]:
 
 
 def fetch_user_main_role(app_code: str, username: str) -> ApplicationRole:
-    """获取用户在某个应用中最高优先级的角色"""
+    """获取用户在某个应用中最高优先级的角色，结果用于鉴权，不读取缓存"""
     if username == settings.ADMIN_USERNAME:
         return ApplicationRole.ADMINISTRATOR
 
-    tenant_id = get_tenant_id_for_app(app_code)
-    iam_client = BKIAMClient(tenant_id)
-    for group in ApplicationUserGroup.objects.filter(app_code=app_code).order_by("role"):
-        if username in iam_client.fetch_user_group_members(group.user_group_id):
-            return ApplicationRole(group.role)
+    for role, members in _fetch_app_groups_members(app_code, use_cache=False):
+        if username in members:
+            return role
 
     return ApplicationRole.NOBODY
 
@@ -153,6 +221,8 @@ def remove_user_all_roles(app_code: str, usernames: Union[List[str], str]):
     # 再将所有的内建角色权限清理掉
     for role in APP_DEFAULT_ROLES:
         iam_client.delete_user_group_members(role_group_id_map[role], usernames)
+    get_user_group_members_cache().invalidate(role_group_id_map[role] for role in APP_DEFAULT_ROLES)
+    invalidate_user_policy_filters(usernames)
 
 
 def fetch_application_members(app_code: str) -> List[Dict]:
@@ -160,20 +230,17 @@ def fetch_application_members(app_code: str) -> List[Dict]:
     获取一个蓝鲸应用所有用户（包含角色信息）
     顺序：管理员 - 开发者 - 运营者
     """
-    tenant_id = get_tenant_id_for_app(app_code)
-    iam_client = BKIAMClient(tenant_id)
-
     member_map: Dict[str, Dict] = {}
-    for group in ApplicationUserGroup.objects.filter(app_code=app_code).order_by("role"):
-        for username in iam_client.fetch_user_group_members(group.user_group_id):
+    for role, members in _fetch_app_groups_members(app_code):
+        for username in members:
             if username not in member_map:
                 member_map[username] = {
-                    "roles": [group.role],
+                    "roles": [role],
                     "username": username,
                     "user": user_id_encoder.encode(username=username, provider_type=settings.USER_TYPE),
                 }
             else:
-                member_map[username]["roles"].append(group.role)
+                member_map[username]["roles"].append(role)
 
     return list(member_map.values())
 
@@ -181,8 +248,10 @@ def fetch_application_members(app_code: str) -> List[Dict]:
 def delete_builtin_user_groups(app_code: str):
     """删除应用的内建用户组"""
     user_groups = ApplicationUserGroup.objects.filter(app_code=app_code)
+    user_group_ids = list(user_groups.values_list("user_group_id", flat=True))
     tenant_id = get_tenant_id_for_app(app_code)
-    BKIAMClient(tenant_id).delete_user_groups(user_groups.values_list("user_group_id", flat=True))
+    BKIAMClient(tenant_id).delete_user_groups(user_group_ids)
+    get_user_group_members_cache().invalidate(user_group_ids)
     user_groups.delete()
 
 
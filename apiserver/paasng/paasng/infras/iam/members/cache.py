@@ -0,0 +1,149 @@
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+
+"""Cache for the members of applications' IAM user groups"""
+
+import json
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.utils.encoding import force_str
+from redis.exceptions import RedisError
+
+from paasng.core.core.storages.redisdb import get_default_redis
+from paasng.infras.iam.permissions.filter_cache import make_iam_cache_key
+
+logger = logging.getLogger(__name__)
+
+# A function which loads the members of the given user groups from IAM
+MembersLoader = Callable[[List[int]], Dict[int, List[str]]]
+
+
+class UserGroupMembersCache:
+    """Cache the members of IAM user groups in redis, so that reading the members of many applications
+    does not require requests to IAM for every group.
+
+    The members can be changed outside of the platform(e.g. by approving an application in IAM), so the
+    entries expire in a short time. Every group has a version which is bumped by `invalidate()`, the
+    entries are stamped with the version read before loading, so an entry loaded before the invalidation
+    is never served.
+
+    :param ttl: The expiration of the entries in seconds, 0 means disabling the cache, defaults to
+        `settings.IAM_GROUP_MEMBERS_CACHE_TTL`.
+    """
+
+    # Update the namespace when the format of entries has been changed
+    namespace = "1"
+
+    def __init__(self, ttl: Optional[int] = None):
+        self.redis = get_default_redis()
+        self._ttl = ttl
+
+    @property
+    def ttl(self) -> int:
+        return settings.IAM_GROUP_MEMBERS_CACHE_TTL if self._ttl is None else self._ttl
+
+    def _make_data_key(self, user_group_id: int) -> str:
+        return make_iam_cache_key(self.namespace, "group_members", "data", user_group_id)
+
+    def _make_version_key(self, user_group_id: int) -> str:
+        return make_iam_cache_key(self.namespace, "group_members", "version", user_group_id)
+
+    def get_many(self, user_group_ids: Iterable[int], loader: MembersLoader) -> Dict[int, List[str]]:
+        """Get the members of the user groups, call `loader` to load the groups which are not cached.
+
+        :return: {user_group_id: [username, ...]}
+        """
+        user_group_ids = list(dict.fromkeys(user_group_ids))
+        if not user_group_ids:
+            return {}
+        if self.ttl <= 0:
+            return loader(user_group_ids)
+
+        try:
+            versions, results = self._read_many(user_group_ids)
+        except RedisError:
+            logger.warning("Unable to read the cached members of user groups, load them directly")
+            return loader(user_group_ids)
+
+        missing_ids = [group_id for group_id in user_group_ids if group_id not in results]
+        if missing_ids:
+            loaded = loader(missing_ids)
+            self._write_many({group_id: (versions[group_id], members) for group_id, members in loaded.items()})
+            results.update(loaded)
+        return results
+
+    def invalidate(self, user_group_ids: Iterable[int]):
+        """Invalidate the cached members of the user groups"""
+        # The version key must outlive the entries, otherwise the version may go back to a stale one
+        version_expires = self.ttl * 2
+        pipe = self.redis.pipeline()
+        for group_id in set(user_group_ids):
+            version_key = self._make_version_key(group_id)
+            pipe.incr(version_key)
+            pipe.expire(version_key, version_expires)
+            pipe.delete(self._make_data_key(group_id))
+        try:
+            pipe.execute()
+        except RedisError:
+            logger.exception("Unable to invalidate the cached members of user groups: %s", user_group_ids)
+
+    def _read_many(self, user_group_ids: List[int]) -> Tuple[Dict[int, str], Dict[int, List[str]]]:
+        """Read the current versions and the cached members of the user groups
+
+        :return: (versions, members), the groups which are not cached or outdated are absent in members.
+        """
+        pipe = self.redis.pipeline()
+        pipe.mget([self._make_version_key(group_id) for group_id in user_group_ids])
+        pipe.mget([self._make_data_key(group_id) for group_id in user_group_ids])
+        raw_versions, entries = pipe.execute()
+
+        versions: Dict[int, str] = {}
+        results: Dict[int, List[str]] = {}
+        for group_id, raw_version, entry in zip(user_group_ids, raw_versions, entries, strict=True):
+            versions[group_id] = version = force_str(raw_version or "0")
+            if entry is None:
+                continue
+            try:
+                payload = json.loads(entry)
+            except ValueError:
+                logger.warning("The cached members of user group %s is malformed, ignore it", group_id)
+                continue
+            if payload.get("version") == version:
+                results[group_id] = payload["members"]
+        return versions, results
+
+    def _write_many(self, entries: Dict[int, Tuple[str, List[str]]]):
+        pipe = self.redis.pipeline()
+        for group_id, (version, members) in entries.items():
+            pipe.set(self._make_data_key(group_id), json.dumps({"version": version, "members": members}), self.ttl)
+        try:
+            pipe.execute()
+        except RedisError:
+            logger.warning("Unable to cache the members of user groups: %s", list(entries))
+
+
+_user_group_members_cache: Optional[UserGroupMembersCache] = None
+
+
+def get_user_group_members_cache() -> UserGroupMembersCache:
+    """Get the single instanced cache object"""
+    global _user_group_members_cache
+    if _user_group_members_cache is None:
+        _user_group_members_cache = UserGroupMembersCache()
+    return _user_group_members_cache
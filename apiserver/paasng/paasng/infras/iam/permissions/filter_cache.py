@@ -0,0 +1,183 @@
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+
+"""Cache for the filters made from users' IAM policies"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.utils.encoding import force_str
+from redis.exceptions import RedisError
+
+from paasng.core.core.storages.redisdb import get_default_redis
+
+logger = logging.getLogger(__name__)
+
+# (tenant_id, username, action_id)
+CacheKey = Tuple[str, str, str]
+
+# The serializable inputs of a filter, such as the policy expression, the Django filter is rebuilt from it
+FilterData = Optional[Dict[str, Any]]
+
+_MISSING = object()
+
+
+def make_iam_cache_key(namespace: str, *parts: Any) -> str:
+    """Make the redis key of the IAM related caches
+
+    :param namespace: The namespace of the cache, update it when the format of entries has been changed
+    """
+    return ":".join(["bk_paas3", f"v{namespace}", "iam", *map(str, parts)])
+
+
+class UserPolicyFilterCache:
+    """Cache the filters made from users' IAM policies, so that listing applications does not
+    require a policy query to IAM every time.
+
+    Only the serializable inputs of the filters(`FilterData`, such as the policy expression) are cached,
+    the callers rebuild the Django filters from them.
+
+    The filters are stored in redis and in a local LRU, both of them expire in a short time. Every user
+    has a version which is bumped by `invalidate()`, the entries are stamped with the version read before
+    loading, so an entry loaded before the invalidation is never served, in any process.
+
+    :param ttl: The expiration of the entries in seconds, 0 means disabling the cache.
+    :param local_maxsize: The max number of entries in the local LRU.
+    """
+
+    # Update the namespace when the format of entries has been changed
+    namespace = "1"
+
+    def __init__(self, ttl: int, local_maxsize: int = 1024):
+        self.redis = get_default_redis()
+        self.ttl = ttl
+        self.local_maxsize = local_maxsize
+        # {key: (version, expires_at, data)}
+        self._local: "OrderedDict[CacheKey, Tuple[str, float, FilterData]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _make_data_key(self, key: CacheKey) -> str:
+        tenant_id, username, action_id = key
+        return make_iam_cache_key(self.namespace, "policy_filter", "data", tenant_id, username, action_id)
+
+    def _make_version_key(self, username: str) -> str:
+        return make_iam_cache_key(self.namespace, "policy_filter", "version", username)
+
+    def get(self, tenant_id: str, username: str, action_id: str, loader: Callable[[], FilterData]) -> FilterData:
+        """Get the filter data of user's policies, call `loader` to make the data when it's not cached.
+
+        :param loader: A function which queries the policies from IAM and returns the JSON serializable
+            filter data, the exceptions raised by it are not handled, nothing will be cached in that case.
+        """
+        if self.ttl <= 0:
+            return loader()
+
+        key = (tenant_id, username, action_id)
+        try:
+            version = force_str(self.redis.get(self._make_version_key(username)) or "0")
+        except RedisError:
+            logger.warning("Unable to read the policy filter version of user %s, load it directly", username)
+            return loader()
+
+        data = self._get_local(key, version)
+        if data is _MISSING:
+            data = self._read(key, version)
+            if data is _MISSING:
+                data = loader()
+                self._write(key, version, data)
+            self._set_local(key, version, data)
+        return data  # type: ignore[return-value]
+
+    def invalidate(self, usernames: Iterable[str]):
+        """Invalidate the cached filters of the users, no matter which tenant or action they belong to"""
+        # The version key must outlive the entries, otherwise the version may go back to a stale one
+        version_expires = self.ttl * 2
+        pipe = self.redis.pipeline()
+        for username in set(usernames):
+            version_key = self._make_version_key(username)
+            pipe.incr(version_key)
+            pipe.expire(version_key, version_expires)
+        try:
+            pipe.execute()
+        except RedisError:
+            logger.exception("Unable to invalidate the policy filters of users: %s", usernames)
+
+    def _get_local(self, key: CacheKey, version: str):
+        with self._lock:
+            item = self._local.get(key)
+            if item is None:
+                return _MISSING
+            item_version, expires_at, data = item
+            if item_version != version or expires_at < time.monotonic():
+                del self._local[key]
+                return _MISSING
+            self._local.move_to_end(key)
+            return data
+
+    def _set_local(self, key: CacheKey, version: str, data: FilterData):
+        with self._lock:
+            self._local[key] = (version, time.monotonic() + self.ttl, data)
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_maxsize:
+                self._local.popitem(last=False)
+
+    def _read(self, key: CacheKey, version: str):
+        try:
+            entry = self.redis.get(self._make_data_key(key))
+        except RedisError:
+            logger.warning("Unable to read the cached policy filter: %s", key)
+            return _MISSING
+        if entry is None:
+            return _MISSING
+
+        try:
+            payload = json.loads(entry)
+        except ValueError:
+            logger.warning("The cached policy filter %s is malformed, ignore it", key)
+            return _MISSING
+        if payload.get("version") != version:
+            return _MISSING
+        return payload["data"]
+
+    def _write(self, key: CacheKey, version: str, data: FilterData):
+        try:
+            self.redis.set(self._make_data_key(key), json.dumps({"version": version, "data": data}), self.ttl)
+        except RedisError:
+            logger.warning("Unable to cache the policy filter: %s", key)
+
+
+_user_policy_filter_cache: Optional[UserPolicyFilterCache] = None
+
+
+def get_user_policy_filter_cache() -> UserPolicyFilterCache:
+    """Get the single instanced cache object"""
+    global _user_policy_filter_cache
+    if _user_policy_filter_cache is None:
+        _user_policy_filter_cache = UserPolicyFilterCache(
+            settings.IAM_POLICY_FILTER_CACHE_TTL, settings.IAM_POLICY_FILTER_LOCAL_CACHE_SIZE
+        )
+    return _user_policy_filter_cache
+
+
+def invalidate_user_policy_filters(usernames: Iterable[str]):
+    """Invalidate the cached policy filters of the users, should be called after their roles have been changed"""
+    get_user_policy_filter_cache().invalidate(usernames)
@@ -17,17 +17,20 @@
 
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, Type
+from typing import Dict, List, Optional, Type
 
 from attrs import define, field, validators
 from bkpaas_auth.core.encoder import user_id_encoder
 from blue_krill.data_types.enum import EnumField, StrStructuredEnum
+from django.apps import apps
 from django.conf import settings
 from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
+from iam.contrib.converter.queryset import DjangoQuerySetConverter
 from iam.exceptions import AuthAPIError
 
 from paasng.infras.iam.constants import ResourceType
+from paasng.infras.iam.permissions.filter_cache import FilterData, get_user_policy_filter_cache
 from paasng.infras.iam.permissions.perm import PermCtx, Permission, ResCreatorAction, validate_empty
 from paasng.infras.iam.permissions.request import ResourceRequest
 
@@ -219,12 +222,26 @@ class ApplicationPermission(Permission):
         """根据 IAM Auth Request 生成 Django 的过滤器"""
         key_mapping = {"application.id": "code"}
 
+        def make_filter_data() -> FilterData:
+            # Only the policy expression is cached, the Django filter is rebuilt from it
+            policies = self._make_iam(tenant_id).make_filter(request, converter_class=_PolicyExpressionConverter)
+            if not policies:
+                return None
+            if settings.IAM_APP_FILTER_MATERIALIZE_CODES:
+                filters = DjangoQuerySetConverter(key_mapping).convert(policies)
+                return {"codes": _materialize_app_codes(filters, tenant_id)}
+            return {"policies": policies}
+
         try:
-            filters = self._make_iam(tenant_id).make_filter(request, key_mapping=key_mapping)
+            data = get_user_policy_filter_cache().get(
+                tenant_id, request.subject.id, request.action.id, make_filter_data
+            )
         except AuthAPIError as e:
             logger.warning("generate user app filters failed: %s", str(e))
             return None
 
+        filters = _build_app_filters(data, key_mapping)
+
         # 因权限中心同步（用户组成员信息 —> 具体的权限策略）存在时延（约 20s），
         # 因此在应用创建后的短时间内，需特殊豁免以免在列表页无法查询到最新的应用
         perm_exempt_filter = Q(
@@ -236,3 +253,31 @@ class ApplicationPermission(Permission):
 
         # 过滤掉非当前租户的应用
         return (filters & Q(tenant_id=tenant_id)) | perm_exempt_filter
+
+
+class _PolicyExpressionConverter:
+    """A converter which keeps the policy expression queried from IAM as is, so that it can be cached"""
+
+    def __init__(self, key_mapping=None):
+        self.key_mapping = key_mapping
+
+    def convert(self, data: Dict) -> Dict:
+        return data
+
+
+def _build_app_filters(data: FilterData, key_mapping: Dict[str, str]) -> Optional[Q]:
+    """Build the Django filter of applications from the (cached) filter data"""
+    if not data:
+        return None
+    if "codes" in data:
+        return Q(code__in=data["codes"])
+    return DjangoQuerySetConverter(key_mapping).convert(data["policies"])
+
+
+def _materialize_app_codes(filters: Q, tenant_id: str) -> List[str]:
+    """Expand the filter converted from policies into the codes of matched applications, filtering by
+    `code__in` is much cheaper than the complex policy expressions"""
+    # The model is got from the registry, because the applications models module imports this module
+    application_model = apps.get_model("applications", "Application")
+    codes = application_model.default_objects.filter(filters, tenant_id=tenant_id).values_list("code", flat=True)
+    return list(codes)
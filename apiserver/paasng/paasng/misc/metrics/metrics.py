@@ -23,6 +23,8 @@ API_VISITED_COUNTER = Counter("api_visited_counter", "", ("method", "endpoint",
 API_VISITED_TIME_CONSUME_HISTOGRAM = Histogram(
     "api_visited_time_consumed", "", ("method", "endpoint", "status"), buckets=[50, 100, 200, 500, 1000, 2000, 5000]
 )
+# API access logs dropped before being shipped to redis, reason: "queue_full" or "ship_failed"
+API_LOG_DROPPED_COUNTER = Counter("api_log_dropped_counter", "", ("reason",))
 
 NEW_APP_COUNTER = Counter(
     "new_application",
@@ -57,3 +59,7 @@ SERVICE_PROVISION_COUNTER = Counter("service_provision", "", ("environment", "se
 
 # 进程
 PROCESS_OPERATE_COUNTER = Counter("process_operate", "", ("environment", "operate_type"))
+
+# Kubernetes 客户端
+KUBE_CLIENT_REGISTRY_COUNTER = Counter("kube_client_registry", "", ("cluster_name", "result"))
+KUBE_ENDPOINT_HEALTH_CHECK_COUNTER = Counter("kube_endpoint_health_check", "", ("host", "healthy"))
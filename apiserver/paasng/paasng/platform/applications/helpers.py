@@ -20,6 +20,7 @@ import logging
 from paasng.infras.iam.client import BKIAMClient
 from paasng.infras.iam.constants import NEVER_EXPIRE_DAYS
 from paasng.infras.iam.members.models import ApplicationGradeManager, ApplicationUserGroup
+from paasng.infras.iam.permissions.filter_cache import invalidate_user_policy_filters
 from paasng.platform.applications.models import Application
 from paasng.platform.applications.tenant import get_tenant_id_for_app
 from paasng.utils.basic import get_username_by_bkpaas_user_id
@@ -61,3 +62,4 @@ def register_builtin_user_groups_and_grade_manager(application: Application):
 
     # 5. 将创建者添加到管理者用户组，返回数据中第一个即为管理者用户组信息
     iam_client.add_user_group_members(user_groups[0]["id"], [creator], NEVER_EXPIRE_DAYS)
+    invalidate_user_policy_filters([creator])
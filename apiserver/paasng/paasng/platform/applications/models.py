@@ -25,7 +25,7 @@ from bkstorages.backends.bkrepo import RequestError
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist, SuspiciousOperation
 from django.db import models
-from django.db.models import Q, QuerySet
+from django.db.models import Exists, OuterRef, Q, QuerySet
 from pilkit.processors import ResizeToFill
 
 from paasng.core.core.storages.object_storage import app_logo_storage
@@ -120,6 +120,17 @@ class ApplicationQuerySet(models.QuerySet):
             qs = qs.filter(owner=self.get_user_id(user))
         return qs
 
+    def order_by_marked_first(self, user) -> QuerySet:
+        """Put applications marked by given user in front, the existing ordering is kept within each group.
+
+        The ordering is done by database, so the queryset can still be paginated in SQL.
+
+        :param user: User object or user_id
+        """
+        marked = UserMarkedApplication.objects.filter(owner=self.get_user_id(user), application=OuterRef("pk"))
+        ordering = self.query.order_by or self.model._meta.ordering
+        return self.annotate(is_marked=Exists(marked)).order_by("-is_marked", *ordering)
+
     def filter_by_source_origin(self, source_origin: SourceOrigin) -> QuerySet:
         """Filter applications which have at least one module with given source origin"""
         from paasng.platform.modules.models import Module
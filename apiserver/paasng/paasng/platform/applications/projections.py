@@ -0,0 +1,96 @@
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+
+"""Projections of applications, which load the related data of many applications in bulk"""
+
+from dataclasses import dataclass
+from typing import Dict, List
+
+from django.db.models import Prefetch, prefetch_related_objects
+
+from paasng.accessories.publish.entrance.exposer import list_modules_exposed_links
+from paasng.accessories.publish.market.models import MarketConfig
+from paasng.platform.applications.models import Application
+from paasng.platform.mgrlegacy.migrate import list_migration_process_statuses
+from paasng.platform.modules.models import Module
+
+
+@dataclass
+class ApplicationListItem:
+    """An item of the application list
+
+    :param deploy_info: The exposed links of the default module, see `get_exposed_links()`
+    """
+
+    application: Application
+    deploy_info: Dict
+    market_config: MarketConfig
+    migration_status: Dict[str, str]
+
+
+class ApplicationListProjection:
+    """Load the data required by the application list for a page of applications. The related objects
+    are queried in bulk, the number of queries does not grow with the number of applications.
+
+    - modules and envs: also cached on the application objects, `application.modules.all()` is free
+    - deployed status and exposed addresses of the default module
+    - market configs: created if not exists, which happens rarely
+    - migration status
+
+    :param applications: The applications of current page
+    """
+
+    def __init__(self, applications: List[Application]):
+        self.applications = applications
+
+    def load(self) -> List[ApplicationListItem]:
+        """Load the items, in the same order of the applications"""
+        if not self.applications:
+            return []
+
+        prefetch_related_objects(
+            self.applications, Prefetch("modules", queryset=Module.objects.prefetch_related("envs"))
+        )
+        default_modules = {app.id: next(m for m in app.modules.all() if m.is_default) for app in self.applications}
+        exposed_links = list_modules_exposed_links(list(default_modules.values()))
+        market_configs = self._load_market_configs()
+        migration_statuses = list_migration_process_statuses(self.applications)
+
+        return [
+            ApplicationListItem(
+                application=app,
+                deploy_info=exposed_links[str(default_modules[app.id].id)],
+                market_config=market_configs[str(app.id)],
+                migration_status=migration_statuses[str(app.id)],
+            )
+            for app in self.applications
+        ]
+
+    def _load_market_configs(self) -> Dict[str, MarketConfig]:
+        """Load the market configs, the configs are also cached on the application objects so that
+        `MarketConfig.objects.get_or_create_by_app()` won't query it again.
+        """
+        qs = MarketConfig.objects.filter(application__in=self.applications)
+        configs = {str(cfg.application_id): cfg for cfg in qs}
+        results = {}
+        for app in self.applications:
+            if cfg := configs.get(str(app.id)):
+                app.market_config = cfg
+            else:
+                cfg, _ = MarketConfig.objects.get_or_create_by_app(app)
+            results[str(app.id)] = cfg
+        return results
@@ -223,8 +223,9 @@ class ApplicationSLZ(serializers.ModelSerializer):
     owner = UserNameField()
 
     def get_modules(self, application: Application):
-        # 将 default_module 排在第一位
-        modules = application.modules.all().order_by("-is_default", "-created")
+        # 将 default_module 排在第一位，在内存中排序以便复用预加载（prefetch）的模块
+        modules = sorted(application.modules.all(), key=lambda m: m.created, reverse=True)
+        modules.sort(key=lambda m: not m.is_default)
         return ModuleSLZ(modules, many=True).data
 
     class Meta:
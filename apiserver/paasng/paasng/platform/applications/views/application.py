@@ -20,7 +20,7 @@ from typing import Dict, List, Set, Tuple
 
 from django.conf import settings
 from django.db import transaction
-from django.db.models import Count
+from django.db.models import Count, Q
 from django.utils import timezone
 from django.utils.translation import get_language
 from django.utils.translation import gettext_lazy as _
@@ -56,6 +56,7 @@ from paasng.platform.applications.constants import AppFeatureFlag, ApplicationTy
 from paasng.platform.applications.mixins import ApplicationCodeInPathMixin
 from paasng.platform.applications.models import Application, UserApplicationFilter, UserMarkedApplication
 from paasng.platform.applications.pagination import ApplicationListPagination
+from paasng.platform.applications.projections import ApplicationListProjection
 from paasng.platform.applications.protections import AppResProtector, ProtectedRes, raise_if_protected
 from paasng.platform.applications.utils import get_app_overview
 from paasng.platform.evaluation.constants import OperationIssueType
@@ -103,59 +104,62 @@ class ApplicationListViewSet(viewsets.ViewSet):
         if not settings.DISPLAY_BK_PLUGIN_APPS:
             applications = applications.filter(is_plugin_app=False)
 
-        # 查询我创建的应用时，也需要返回总的应用数量给前端
-        all_app_count = applications.count()
+        # 查询我创建的应用时，也需要返回总的应用数量给前端，因此先保留过滤前的 queryset 用于统计
+        all_applications = applications
+        extra_conds = Q()
         # 仅查询我创建的应用
         if params.get("exclude_collaborated") is True:
-            applications = applications.filter(owner=request.user.pk)
+            extra_conds &= Q(owner=request.user.pk)
 
         # 仅查看我标记的应用
         if params.get("is_marked") is True:
-            applications = applications.filter(id__in=marked_application_ids)
+            extra_conds &= Q(id__in=marked_applications.values("application_id"))
+        applications = applications.filter(extra_conds)
 
-        paginator = ApplicationListPagination()
-        # 如果将用户标记的应用排在前面，需要特殊处理一下
+        # 将用户标记的应用排在前面，排序在数据库中完成，以保证分页查询仍然只需加载当前页的数据
         if params.get("prefer_marked"):
-            applications_ids = applications.values_list("id", flat=True)
-            applications_ids = sorted(applications_ids, key=lambda x: x in marked_application_ids, reverse=True)
+            applications = applications.order_by_marked_first(request.user)
 
-            page = paginator.paginate_queryset(applications_ids, self.request, view=self)
-            page_applications = list(Application.objects.filter(id__in=page).select_related("product"))
-            page_applications = sorted(page_applications, key=lambda x: applications_ids.index(x.id))
-        else:
-            page_applications = paginator.paginate_queryset(applications, self.request, view=self)
+        paginator = ApplicationListPagination()
+        page_applications = paginator.paginate_queryset(
+            applications.select_related("product", "extra_info"), self.request, view=self
+        )
 
-        # Set exposed links property, to be used by the serializer later
-        for app in page_applications:
-            app._deploy_info = get_exposed_links(app)
-        data = [
-            {
-                "application": application,
-                "product": application.product if hasattr(application, "product") else None,
-                "marked": application.id in marked_application_ids,
-                # 应用市场访问地址信息
-                "market_config": MarketConfig.objects.get_or_create_by_app(application)[0],
-                "migration_status": get_migration_process_status(application),
-            }
-            for application in page_applications
-        ]
+        data = []
+        # 批量加载各应用的部署状态、访问地址、市场配置等信息，避免逐个应用查询
+        for item in ApplicationListProjection(page_applications).load():
+            application = item.application
+            # Set exposed links property, to be used by the serializer later
+            application._deploy_info = item.deploy_info
+            data.append(
+                {
+                    "application": application,
+                    "product": application.product if hasattr(application, "product") else None,
+                    "marked": application.id in marked_application_ids,
+                    # 应用市场访问地址信息
+                    "market_config": item.market_config,
+                    "migration_status": item.migration_status,
+                }
+            )
 
-        # 统计普通应用、云原生应用、外链应用的数量
-        default_app_count = applications.filter(type=ApplicationType.DEFAULT).count()
-        engineless_app_count = applications.filter(type=ApplicationType.ENGINELESS_APP).count()
-        cloud_native_app_count = applications.filter(type=ApplicationType.CLOUD_NATIVE).count()
-        # 统计我创建的应用数量
-        my_app_count = applications.filter(owner=request.user.pk).count()
+        # 统计普通应用、云原生应用、外链应用的数量，以及我创建的应用数量，使用一次条件聚合查询完成
+        counts = all_applications.aggregate(
+            all_app_count=Count("id"),
+            default_app_count=Count("id", filter=extra_conds & Q(type=ApplicationType.DEFAULT)),
+            engineless_app_count=Count("id", filter=extra_conds & Q(type=ApplicationType.ENGINELESS_APP)),
+            cloud_native_app_count=Count("id", filter=extra_conds & Q(type=ApplicationType.CLOUD_NATIVE)),
+            my_app_count=Count("id", filter=extra_conds & Q(owner=request.user.pk)),
+        )
 
         serializer = slzs.ApplicationWithMarketSLZ(data, many=True)
         return paginator.get_paginated_response(
             serializer.data,
             extra_data={
-                "default_app_count": default_app_count,
-                "engineless_app_count": engineless_app_count,
-                "cloud_native_app_count": cloud_native_app_count,
-                "my_app_count": my_app_count,
-                "all_app_count": all_app_count,
+                "default_app_count": counts["default_app_count"],
+                "engineless_app_count": counts["engineless_app_count"],
+                "cloud_native_app_count": counts["cloud_native_app_count"],
+                "my_app_count": counts["my_app_count"],
+                "all_app_count": counts["all_app_count"],
             },
         )
 
@@ -206,8 +210,7 @@ class ApplicationListViewSet(viewsets.ViewSet):
         marked_application_ids = set(marked_applications.values_list("application__id", flat=True))
 
         if params.get("prefer_marked"):
-            # then sort it
-            applications = sorted(applications, key=lambda app: app.id in marked_application_ids, reverse=True)
+            applications = applications.order_by_marked_first(request.user)
 
         data = [
             {
@@ -217,7 +220,7 @@ class ApplicationListViewSet(viewsets.ViewSet):
             for application in applications
         ]
         serializer = slzs.ApplicationWithMarkMinimalSLZ(data, many=True)
-        return Response({"count": len(applications), "results": serializer.data})
+        return Response({"count": len(data), "results": serializer.data})
 
     @swagger_auto_schema(
         tags=["应用列表"],
@@ -69,18 +69,22 @@ def start_bg_build_process(
     if stream_channel_id:
         stream_channel = StreamChannel(stream_channel_id, redis_db=get_default_redis())
         stream_channel.initialize()
-        stream = RedisWithModelStream(build_process.output_stream, stream_channel)
+        # Build logs can be very large, save them to database in batches
+        stream = RedisWithModelStream(build_process.output_stream.buffered_writer(), stream_channel)
     else:
         stream = ConsoleStream()
 
     build_metadata = cattr.structure(metadata, BuildMetadata)
-    if use_bk_ci_pipeline:
-        logger.info("deployment %s, build process %s use bk_ci pipeline to build image", deploy_id, bp_id)
-        pipeline_bp_executor = PipelineBuildProcessExecutor(deployment, build_process, stream)
-        pipeline_bp_executor.execute(metadata=build_metadata)
-    else:
-        bp_executor = DefaultBuildProcessExecutor(deployment, build_process, stream)
-        bp_executor.execute(metadata=build_metadata)
+    try:
+        if use_bk_ci_pipeline:
+            logger.info("deployment %s, build process %s use bk_ci pipeline to build image", deploy_id, bp_id)
+            pipeline_bp_executor = PipelineBuildProcessExecutor(deployment, build_process, stream)
+            pipeline_bp_executor.execute(metadata=build_metadata)
+        else:
+            bp_executor = DefaultBuildProcessExecutor(deployment, build_process, stream)
+            bp_executor.execute(metadata=build_metadata)
+    finally:
+        stream.flush()
 
 
 def interrupt_build_proc(bp_id: UUID) -> bool:
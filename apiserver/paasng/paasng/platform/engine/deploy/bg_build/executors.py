@@ -169,6 +169,8 @@ class DefaultBuildProcessExecutor(DeployStep):
         else:
             self.wait_for_succeeded()
         finally:
+            # Make sure all log lines were saved before the build process's status was updated
+            self.stream.flush()
             # 不管构建成功与否, 均需要清理 slugbuilder 容器
             self.clean_slugbuilder()
 
@@ -70,12 +70,15 @@ def execute_bg_command(uuid: str, stream_channel_id: Optional[str] = None, extra
     if stream_channel_id:
         stream_channel = StreamChannel(stream_channel_id, redis_db=get_default_redis())
         stream_channel.initialize()
-        stream = RedisWithModelStream(command.output_stream, stream_channel)
+        stream = RedisWithModelStream(command.output_stream.buffered_writer(), stream_channel)
     else:
         stream = ConsoleStream()
 
     executor = AppCommandExecutor(command=command, stream=stream, extra_envs=extra_envs or {})
-    executor.perform()
+    try:
+        executor.perform()
+    finally:
+        stream.flush()
 
 
 @shared_task
@@ -31,6 +31,7 @@ from blue_krill.async_utils.poll_task import (
     PollingStatus,
     TaskPoller,
 )
+from django.conf import settings
 from django.utils import timezone
 from pydantic import ValidationError as PyDanticValidationError
 
@@ -42,6 +43,7 @@ from paas_wl.bk_app.cnative.specs.constants import (
 from paas_wl.bk_app.cnative.specs.models import AppModelDeploy
 from paas_wl.bk_app.cnative.specs.resource import ModelResState, MresConditionParser, get_mres_from_cluster
 from paas_wl.bk_app.cnative.specs.signals import post_cnative_env_deploy
+from paas_wl.bk_app.cnative.specs.status_events import DeployStatusChannel, WatcherHeartbeat
 from paasng.platform.applications.models import ModuleEnvironment
 from paasng.platform.engine.constants import JobStatus
 from paasng.platform.engine.deploy.bg_wait.base import AbortedDetails, AbortedDetailsPolicy
@@ -162,7 +164,52 @@ class WaitAppModelReady(WaitProcedurePoller):
     # Abort policies were extra rules which were used to break current polling procedure
     abort_policies: List[AbortPolicy] = [UserInterruptedPolicy()]
 
-    def get_status(self) -> PollingResult:  # noqa: PLR0911
+    # 按事件等待部署结果时, 保存在轮询数据中的状态版本和查询时间
+    event_version_key = "_status_version"
+    queried_at_key = "_queried_at"
+
+    # 本轮查询是否出错
+    _query_failed = False
+
+    def query(self) -> PollingResult:
+        try:
+            return super().query()
+        except Exception:
+            self._query_failed = True
+            raise
+
+    def get_status(self) -> PollingResult:
+        if not settings.CNATIVE_DEPLOY_STATUS_EVENTS_ENABLED:
+            return self.query_deploy_status()
+        return self.check_deploy_status()
+
+    def get_retry_delay(self) -> int:
+        # 每一轮只检查部署状态是否有变更, 开销很小, 以较短的间隔检查, 尽快感知部署结果.
+        # 查询出错后仍按默认间隔重试, 避免很快耗尽重试次数; 监听进程未运行时也按默认间隔轮询
+        if settings.CNATIVE_DEPLOY_STATUS_EVENTS_ENABLED and not self._query_failed and WatcherHeartbeat().is_alive():
+            return settings.CNATIVE_DEPLOY_STATUS_EVENT_CHECK_INTERVAL
+        return super().get_retry_delay()
+
+    def check_deploy_status(self) -> PollingResult:
+        """Query the deploy status if the BkApp status has changed since last query, or it has been longer
+        than the polling interval, otherwise return the last result without querying the cluster.
+        """
+        last_data = self.metadata.last_polling_data or {}
+        # 先读取版本再查询, 查询期间发生的状态变更会在下一轮被发现
+        version = DeployStatusChannel(self.params["deploy_id"]).get_version()
+        queried_at = last_data.get(self.queried_at_key)
+        is_due = queried_at is None or time.time() - queried_at >= self.default_retry_delay_seconds
+        # 部署失败时需要按轮询的节奏累计失败次数, 不因事件提前查询
+        is_changed = version != last_data.get(self.event_version_key) and "polling_failure_count" not in last_data
+        if not (is_due or is_changed):
+            return PollingResult.doing(data=last_data)
+
+        result = self.query_deploy_status()
+        if result.status == PollingStatus.DOING:
+            result.data = {**(result.data or {}), self.event_version_key: version, self.queried_at_key: time.time()}
+        return result
+
+    def query_deploy_status(self) -> PollingResult:  # noqa: PLR0911
         deploy_id = self.params["deploy_id"]
         dp = AppModelDeploy.objects.get(id=deploy_id)
         mres = get_mres_from_cluster(
@@ -54,17 +54,21 @@ from paasng.platform.engine.deploy.base import DeployPoller
 from paasng.platform.engine.deploy.bg_build.bg_build import start_bg_build_process
 from paasng.platform.engine.deploy.release import start_release_step
 from paasng.platform.engine.exceptions import HandleAppDescriptionError, InitDeployDescHandlerError
+from paasng.platform.engine.log_archive import StreamLinesReader
 from paasng.platform.engine.models import Deployment
 from paasng.platform.engine.models.phases import DeployPhaseTypes
 from paasng.platform.engine.phases_steps.steps import update_step_by_line
 from paasng.platform.engine.signals import post_phase_end, pre_appenv_build, pre_phase_start
 from paasng.platform.engine.utils.output import Style
 from paasng.platform.engine.utils.source import (
-    check_source_package,
+    check_source_package_size,
     download_source_to_dir,
     get_deploy_desc_handler_by_version,
     get_dockerignore,
+    get_reusable_source_package,
+    get_source_package_digest,
     get_source_package_path,
+    record_source_package,
     tag_module_from_source_files,
 )
 from paasng.platform.engine.workflow import DeploymentCoordinator, DeploymentStateMgr, DeployProcedure, DeployStep
@@ -74,6 +78,7 @@ from paasng.platform.sourcectl.utils import (
     compress_directory_ext,
     generate_temp_dir,
     generate_temp_file,
+    upload_directory_as_tarball,
 )
 from paasng.platform.templates.constants import TemplateType
 from paasng.platform.templates.models import Template
@@ -113,11 +118,21 @@ def start_build_error_callback(*args, **kwargs):
 class BaseBuilder(DeployStep):
     phase_type = DeployPhaseTypes.BUILD
 
-    def compress_and_upload(self, source_destination_path: str, should_ignore: Optional[ExcludeChecker] = None):
+    def compress_and_upload(
+        self,
+        source_destination_path: str,
+        should_ignore: Optional[ExcludeChecker] = None,
+        package_digest: Optional[str] = None,
+    ) -> str:
         """Download, compress and upload module source files
 
         :param str source_destination_path: 表示将源码归档包上传至对象存储中的位置.
+        :param package_digest: 源码包摘要，已有相同摘要的源码包时直接复用，不再重新下载和上传
+        :return: 源码归档包在对象存储中的实际位置，复用已有的源码包时与 source_destination_path 不同
         """
+        if package_digest and (reused_path := self.reuse_source_package(package_digest)):
+            return reused_path
+
         module = self.deployment.app_environment.module
         with generate_temp_dir() as working_dir:
             try:
@@ -127,13 +142,42 @@ class BaseBuilder(DeployStep):
                 raise
 
             tag_module_from_source_files(module, source_dir)
-            with generate_temp_file(suffix=".tar.gz") as package_path:
-                compress_directory_ext(source_dir, package_path, should_ignore=should_ignore)
-                check_source_package(self.engine_app, package_path, self.stream)
-                logger.info(f"Uploading source files to {source_destination_path}")
-                make_blob_store(bucket=settings.BLOBSTORE_BUCKET_APP_SOURCE).upload_file(
-                    package_path, source_destination_path
+            store = make_blob_store(bucket=settings.BLOBSTORE_BUCKET_APP_SOURCE)
+            logger.info(f"Uploading source files to {source_destination_path}")
+            if settings.ENGINE_SOURCE_PACKAGE_STREAMING_UPLOAD:
+                # 边压缩边上传，压缩与网络传输同时进行，无需先将完整的源码包写入临时文件
+                size = upload_directory_as_tarball(
+                    source_dir,
+                    store,
+                    source_destination_path,
+                    should_ignore=should_ignore,
+                    threads=settings.ENGINE_SOURCE_PACKAGE_COMPRESS_THREADS or None,
                 )
+            else:
+                with generate_temp_file(suffix=".tar.gz") as package_path:
+                    compress_directory_ext(source_dir, package_path, should_ignore=should_ignore)
+                    store.upload_file(package_path, source_destination_path)
+                    size = package_path.stat().st_size
+
+        check_source_package_size(self.engine_app, size, self.stream)
+        if package_digest:
+            record_source_package(self.deployment, package_digest, source_destination_path, size)
+        return source_destination_path
+
+    def reuse_source_package(self, package_digest: str) -> Optional[str]:
+        """Find the uploaded source package with the same digest
+
+        :return: 已有源码包在对象存储中的位置，没有可复用的源码包时返回 None
+        """
+        artifact = get_reusable_source_package(package_digest)
+        if not artifact:
+            return None
+
+        self.stream.write_message(
+            Style.Comment(_("复用相同版本已上传的源码包（{revision}）").format(revision=artifact.revision))
+        )
+        logger.info(f"Reusing source package {artifact.package_path} for deployment {self.deployment.id}")
+        return artifact.package_path
 
     def handle_app_description(self) -> DeployHandleResult:
         """Handle the description files for deployment. It try to parse the app description
@@ -246,8 +290,10 @@ class ApplicationBuilder(BaseBuilder):
                 self.deployment.update_fields(bkapp_revision_id=bkapp_revision_id)
 
         with self.procedure_force_phase("上传仓库代码", phase=preparation_phase):
-            source_destination_path = get_source_package_path(self.deployment)
-            self.compress_and_upload(source_destination_path)
+            source_destination_path = self.compress_and_upload(
+                get_source_package_path(self.deployment),
+                package_digest=get_source_package_digest(self.deployment),
+            )
 
         with self.procedure_force_phase("配置资源实例", phase=preparation_phase) as p:
             self.provision_services(p, module)
@@ -354,9 +400,10 @@ class DockerBuilder(BaseBuilder):
             dockerignore = get_dockerignore(deployment=self.deployment)
 
         with self.procedure_force_phase("上传仓库代码", phase=preparation_phase):
-            source_destination_path = get_source_package_path(self.deployment)
-            self.compress_and_upload(
-                source_destination_path, should_ignore=dockerignore.should_ignore if dockerignore else None
+            source_destination_path = self.compress_and_upload(
+                get_source_package_path(self.deployment),
+                should_ignore=dockerignore.should_ignore if dockerignore else None,
+                package_digest=get_source_package_digest(self.deployment, dockerignore),
             )
 
         with self.procedure_force_phase("配置资源实例", phase=preparation_phase) as p:
@@ -479,7 +526,7 @@ class BuildProcessPoller(DeployPoller):
 
         # TODO: Use a flag value to indicate the progress of the scanning of the log,
         # so that we won't need to scan the log from the beginning every time.
-        for line in build_proc.output_stream.lines.all().values_list("line", flat=True):
+        for line in StreamLinesReader(build_proc.output_stream).read_lines():
             update_step_by_line(line, pattern_maps, phase)
 
         logger.info(
@@ -18,13 +18,19 @@
 import logging
 from typing import TYPE_CHECKING
 
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete
 from django.dispatch import receiver
 from django.utils import timezone
 
+from paas_wl.bk_app.applications.models.misc import OutputStreamArchive
 from paasng.platform.applications.models import ModuleEnvironment
 from paasng.platform.engine.constants import JobStatus
+from paasng.platform.engine.log_archive import delete_archive_file
 from paasng.platform.engine.models.phases import DeployPhaseTypes
 from paasng.platform.engine.phases_steps.phases import DeployPhaseManager
+from paasng.platform.engine.tasks import archive_deployment_logs
 
 from .signals import post_appenv_deploy, post_phase_end, pre_appenv_deploy, pre_phase_start
 
@@ -86,3 +92,23 @@ def update_last_deployed_date(sender, deployment: "Deployment", **kwargs):
 
     env.application.last_deployed_date = now
     env.application.save(update_fields=["last_deployed_date"])
+
+
+@receiver(post_appenv_deploy)
+def schedule_deployment_logs_archive(sender, deployment: "Deployment", **kwargs):
+    """Archive the logs of the finished deployment into the blob store when the feature is enabled,
+    the task is delayed to wait for the lines which are still being written.
+    """
+    if not settings.ENABLE_DEPLOY_LOG_ARCHIVE:
+        return
+
+    archive_deployment_logs.apply_async(args=(str(deployment.pk),), countdown=settings.DEPLOY_LOG_ARCHIVE_DELAY)
+
+
+@receiver(post_delete, sender=OutputStreamArchive)
+def delete_output_stream_archive_file(sender, instance: OutputStreamArchive, using: str, **kwargs):
+    """Delete the archive file in the blob store when the archive was deleted, e.g. the output
+    stream was cleaned up. The file is deleted after the transaction was committed.
+    """
+    blob_key = instance.blob_key
+    transaction.on_commit(lambda: delete_archive_file(blob_key), using=using)
@@ -0,0 +1,207 @@
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+
+"""Archive the log lines of finished deployments into the blob store.
+
+The archive file is a concatenation of independent gzip members, each member(chunk) contains
+at most `ARCHIVE_CHUNK_LINES` lines encoded as JSON lines. The chunk index is saved in the
+database, so that a range of lines can be read by downloading only the related chunks.
+"""
+
+import bisect
+import gzip
+import json
+import logging
+import tempfile
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import requests
+from blue_krill.storages.blobstore.base import SignatureType
+from django.conf import settings
+from django.db import transaction
+
+from paas_wl.bk_app.applications.models.misc import OutputStream, OutputStreamArchive, OutputStreamLine
+from paasng.utils.blobstore import make_blob_store
+
+logger = logging.getLogger(__name__)
+
+# Max lines in one chunk of the archive file
+ARCHIVE_CHUNK_LINES = 1000
+
+
+def archive_output_stream(output_stream: OutputStream) -> Optional[OutputStreamArchive]:
+    """Compact all lines of the output stream into one archive file in the blob store, the archived
+    lines in database will be deleted afterwards. Lines written during the archiving are kept in
+    database, readers will read them after the archived ones.
+
+    :return: The archive object, None if the stream has no lines or has already been archived.
+    """
+    if OutputStreamArchive.objects.filter(output_stream=output_stream).exists():
+        return None
+
+    lines_qs = OutputStreamLine.objects.filter(output_stream=output_stream).order_by("created", "seq")
+    max_id = 0
+
+    def _iter_lines() -> Iterator[Tuple[str, str]]:
+        nonlocal max_id
+        for pk, stream, line in lines_qs.values_list("id", "stream", "line").iterator(chunk_size=2000):
+            max_id = max(max_id, pk)
+            yield stream, line
+
+    with tempfile.TemporaryDirectory() as working_dir:
+        archive_path = Path(working_dir) / "logs.gz"
+        with archive_path.open("wb") as fp:
+            lines_count, chunks = _write_chunks(fp, _iter_lines())
+        if not lines_count:
+            return None
+
+        blob_key = f"deploy-logs/{output_stream.uuid}.gz"
+        make_blob_store(bucket=settings.BLOBSTORE_BUCKET_DEPLOY_LOGS).upload_file(archive_path, blob_key)
+
+    with transaction.atomic(using="workloads"):
+        archive = OutputStreamArchive.objects.create(
+            output_stream=output_stream, blob_key=blob_key, lines_count=lines_count, chunks=chunks
+        )
+        # Only delete the lines which have been archived
+        OutputStreamLine.objects.filter(output_stream=output_stream, id__lte=max_id).delete()
+    logger.info("archived %s lines of output stream %s to %s", lines_count, output_stream.uuid, blob_key)
+    return archive
+
+
+def delete_archive_file(blob_key: str):
+    """Delete the archive file from the blob store, errors are logged and ignored"""
+    try:
+        make_blob_store(bucket=settings.BLOBSTORE_BUCKET_DEPLOY_LOGS).delete_file(blob_key)
+    except Exception:
+        logger.exception("failed to delete the archived logs %s", blob_key)
+
+
+def _write_chunks(fp, lines: Iterable[Tuple[str, str]]) -> Tuple[int, List[List[int]]]:
+    """Write lines into the file as gzip chunks.
+
+    :return: A tuple of (lines count, chunks index)
+    """
+    chunks: List[List[int]] = []
+    buffer: List[str] = []
+    lines_count, offset = 0, 0
+
+    def _flush():
+        nonlocal offset
+        data = gzip.compress("".join(buffer).encode("utf-8"))
+        fp.write(data)
+        chunks.append([lines_count - len(buffer), offset, len(data)])
+        offset += len(data)
+        buffer.clear()
+
+    for stream, line in lines:
+        buffer.append(json.dumps([stream, line]) + "\n")
+        lines_count += 1
+        if len(buffer) >= ARCHIVE_CHUNK_LINES:
+            _flush()
+    if buffer:
+        _flush()
+    return lines_count, chunks
+
+
+class ArchivedLinesReader:
+    """Read lines from an archived output stream, only the chunks which contains the required
+    lines will be downloaded.
+    """
+
+    # Expire seconds of the presigned url used for downloading
+    url_expires_in = 60
+
+    def __init__(self, archive: OutputStreamArchive):
+        self.archive = archive
+        self._chunk_starts = [c[0] for c in archive.chunks]
+
+    def count(self) -> int:
+        return self.archive.lines_count
+
+    def read_lines(self, start: int = 0, stop: Optional[int] = None) -> List[str]:
+        """Read lines in range [start, stop)"""
+        start, stop, _ = slice(start, stop).indices(self.archive.lines_count)
+        if start >= stop:
+            return []
+
+        first = bisect.bisect_right(self._chunk_starts, start) - 1
+        last = bisect.bisect_right(self._chunk_starts, stop - 1) - 1
+        chunks = self.archive.chunks[first : last + 1]
+
+        range_start = chunks[0][1]
+        range_end = chunks[-1][1] + chunks[-1][2]
+        data = self._fetch_range(range_start, range_end - range_start)
+
+        lines: List[str] = []
+        for _, offset, length in chunks:
+            chunk_data = gzip.decompress(data[offset - range_start : offset - range_start + length])
+            lines.extend(json.loads(item)[1] for item in chunk_data.decode("utf-8").splitlines())
+
+        base = chunks[0][0]
+        return lines[start - base : stop - base]
+
+    def _fetch_range(self, offset: int, length: int) -> bytes:
+        """Download the given byte range of the archive file"""
+        store = make_blob_store(bucket=settings.BLOBSTORE_BUCKET_DEPLOY_LOGS)
+        url = store.generate_presigned_url(
+            key=self.archive.blob_key, expires_in=self.url_expires_in, signature_type=SignatureType.DOWNLOAD
+        )
+        resp = requests.get(url, headers={"Range": f"bytes={offset}-{offset + length - 1}"}, timeout=30)
+        resp.raise_for_status()
+        # The server may ignore the "Range" header and return the whole file
+        if resp.status_code == 206:
+            return resp.content
+        return resp.content[offset : offset + length]
+
+
+class StreamLinesReader:
+    """Read lines of an output stream, no matter whether it has been archived or not. The lines of
+    an archived stream are the archived lines followed by the lines still in database.
+    """
+
+    def __init__(self, output_stream: OutputStream):
+        self.output_stream = output_stream
+        try:
+            self._archived: Optional[ArchivedLinesReader] = ArchivedLinesReader(output_stream.archive)
+        except OutputStreamArchive.DoesNotExist:
+            self._archived = None
+
+    def count(self) -> int:
+        return self._archived_count() + self.output_stream.lines.count()
+
+    def read_lines(self, start: int = 0, stop: Optional[int] = None) -> List[str]:
+        """Read lines in range [start, stop)"""
+        if start < 0 or (stop is not None and stop < 0):
+            # Negative index is not supported by queryset, resolve it by the total count
+            start, stop, _ = slice(start, stop).indices(self.count())
+        if stop is not None and start >= stop:
+            return []
+
+        lines: List[str] = []
+        archived_count = self._archived_count()
+        if self._archived and start < archived_count:
+            lines.extend(
+                self._archived.read_lines(start, archived_count if stop is None else min(stop, archived_count))
+            )
+        if stop is None or stop > archived_count:
+            qs = self.output_stream.lines.all().order_by("created", "seq").values_list("line", flat=True)
+            lines.extend(qs[max(start - archived_count, 0) : None if stop is None else stop - archived_count])
+        return lines
+
+    def _archived_count(self) -> int:
+        return self._archived.count() if self._archived else 0
@@ -19,6 +19,7 @@ from typing import List, Optional
 from paas_wl.bk_app.applications.models.build import BuildProcess
 from paas_wl.bk_app.applications.models.misc import OutputStream
 from paasng.core.core.storages.redisdb import get_default_redis
+from paasng.platform.engine.log_archive import StreamLinesReader
 from paasng.platform.engine.models.deployment import Deployment
 from paasng.platform.engine.utils.output import RedisWithModelStream, StreamChannel
 
@@ -92,6 +93,17 @@ class DeploymentLogStreams:
         command = wl_app.command_set.get(pk=self.deployment.pre_release_id)
         return command.output_stream
 
+    def all_streams(self) -> List[OutputStream]:
+        """Return all existing streams of the deployment, in order of the deploy process."""
+        # TODO: 当前暂不包含“准备阶段”和“检测部署结果”这两个步骤的日志，将在未来版本添加
+        streams: List[Optional[OutputStream]] = [
+            self.preparation_stream,
+            self.build_proc_stream,
+            self.pre_release_cmd_stream,
+            self.main_stream,
+        ]
+        return [s for s in streams if s]
+
     def _get_stream_for_write(self, deployment: Deployment, field_name: str) -> OutputStream:
         """Return the output stream object, will initialize the object if not exist.
 
@@ -131,20 +143,53 @@ def get_all_logs(d: Deployment) -> str:
     :return: All logs of the current deployment
     """
     lines = []
-    log_streams = DeploymentLogStreams(d)
-    # TODO: 当前暂不包含“准备阶段”和“检测部署结果”这两个步骤的日志，将在未来版本添加
-    streams: List[Optional[OutputStream]] = [
-        log_streams.preparation_stream,
-        log_streams.build_proc_stream,
-        log_streams.pre_release_cmd_stream,
-        log_streams.main_stream,
-    ]
-    for s in streams:
-        if s:
-            lines.extend(serialize_stream_logs(s))
+    for s in DeploymentLogStreams(d).all_streams():
+        lines.extend(serialize_stream_logs(s))
     return "".join(lines) + "\n" + (d.err_detail or "")
 
 
 def serialize_stream_logs(output_stream: OutputStream) -> List[str]:
-    """Serialize all logs of the given output_stream object."""
-    return [line.line for line in output_stream.lines.all().order_by("created")]
+    """Serialize all logs of the given output_stream object, archived streams are also supported."""
+    return StreamLinesReader(output_stream).read_lines()
+
+
+class DeploymentLogsReader:
+    """Read a range of log lines of the given deployment, the lines of all streams are
+    concatenated in order. Only the required lines will be loaded, no matter whether the
+    streams have been archived or not.
+    """
+
+    def __init__(self, deployment: Deployment):
+        self.readers = [StreamLinesReader(s) for s in DeploymentLogStreams(deployment).all_streams()]
+        self._counts: Optional[List[int]] = None
+
+    @property
+    def counts(self) -> List[int]:
+        if self._counts is None:
+            self._counts = [r.count() for r in self.readers]
+        return self._counts
+
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def read_lines(self, start: int = 0, stop: Optional[int] = None) -> List[str]:
+        """Read lines in range [start, stop), negative index is supported."""
+        start, stop, _ = slice(start, stop).indices(self.count())
+        lines: List[str] = []
+        base = 0
+        for reader, count in zip(self.readers, self.counts, strict=True):
+            if start < base + count and stop > base:
+                lines.extend(reader.read_lines(max(start - base, 0), min(stop - base, count)))
+            base += count
+        return lines
+
+    def head(self, n: int) -> List[str]:
+        return self.read_lines(0, n)
+
+    def tail(self, n: int) -> List[str]:
+        return self.read_lines(-n) if n > 0 else []
+
+    def page(self, page: int, page_size: int) -> List[str]:
+        """Read the lines of page N, starts from 1"""
+        start = (page - 1) * page_size
+        return self.read_lines(start, start + page_size)
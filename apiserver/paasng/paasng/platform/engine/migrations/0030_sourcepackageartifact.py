@@ -0,0 +1,53 @@
+# Generated by Django 4.2.23 on 2026-10-18 12:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("modules", "0020_appslugbuilder_dev_sandbox_image"),
+        ("engine", "0029_moduleenvironmentoperations_tenant_id"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SourcePackageArtifact",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("region", models.CharField(help_text="部署区域", max_length=32)),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True)),
+                ("digest", models.CharField(max_length=64, unique=True, verbose_name="源码包摘要")),
+                ("package_path", models.CharField(max_length=2048, verbose_name="源码包在对象存储中的路径")),
+                ("size", models.BigIntegerField(help_text="单位：字节", verbose_name="源码包大小")),
+                ("revision", models.CharField(max_length=128, verbose_name="源码版本")),
+                (
+                    "last_used_at",
+                    models.DateTimeField(default=django.utils.timezone.now, verbose_name="最近使用时间"),
+                ),
+                (
+                    "tenant_id",
+                    models.CharField(
+                        db_index=True,
+                        default="default",
+                        help_text="本条数据的所属租户",
+                        max_length=32,
+                        verbose_name="租户 ID",
+                    ),
+                ),
+                (
+                    "module",
+                    models.ForeignKey(
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="modules.module",
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
@@ -21,6 +21,7 @@ from .deployment import Deployment, DeployOptions
 from .offline import OfflineOperation
 from .operations import ModuleEnvironmentOperations
 from .phases import DeployPhase, DeployPhaseTypes
+from .source_package import SourcePackageArtifact
 from .steps import DeployStep
 
 __all__ = [
@@ -35,4 +36,5 @@ __all__ = [
     "DeployPhase",
     "DeployStep",
     "DeployOptions",
+    "SourcePackageArtifact",
 ]
@@ -0,0 +1,42 @@
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+
+from django.db import models
+from django.utils import timezone
+
+from paasng.core.tenant.fields import tenant_id_field_factory
+from paasng.utils.models import TimestampedModel
+
+
+class SourcePackageArtifact(TimestampedModel):
+    """已上传到对象存储的源码包索引，以源码版本等信息计算出的摘要为键（参考 `get_source_package_digest`）。
+
+    同一模块再次部署相同的版本时（如测试环境部署后再部署到生产环境），直接引用已上传的源码包，无需重新下载、压缩和上传源码。
+    源码包文件本身仍然存放在首次部署的路径下，随构建产物一起被清理（参考 `delete_slug` 命令），清理时会一并删除对应的索引。
+    """
+
+    module = models.ForeignKey("modules.Module", on_delete=models.CASCADE, db_constraint=False)
+    digest = models.CharField(verbose_name="源码包摘要", max_length=64, unique=True)
+    package_path = models.CharField(verbose_name="源码包在对象存储中的路径", max_length=2048)
+    size = models.BigIntegerField(verbose_name="源码包大小", help_text="单位：字节")
+    revision = models.CharField(verbose_name="源码版本", max_length=128)
+    last_used_at = models.DateTimeField(verbose_name="最近使用时间", default=timezone.now)
+
+    tenant_id = tenant_id_field_factory()
+
+    def __str__(self):
+        return f"{self.module_id}:{self.revision}:{self.digest[:8]}"
@@ -206,6 +206,9 @@ class DeploymentResultQuerySLZ(serializers.Serializer):
         required=False,
         help_text="是否包含 ANSI 转义序列. true 保留终端颜色和格式控制字符, false 过滤这些字符",
     )
+    tail_lines = serializers.IntegerField(
+        required=False, min_value=1, max_value=100000, help_text="只返回最后 N 行日志，不传则返回全部日志"
+    )
 
 
 class BuildProcessSLZ(serializers.Serializer):
@@ -0,0 +1,45 @@
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+
+import logging
+
+from celery import shared_task
+
+from paasng.platform.engine.constants import JobStatus
+from paasng.platform.engine.log_archive import archive_output_stream
+from paasng.platform.engine.logs import DeploymentLogStreams
+from paasng.platform.engine.models import Deployment
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def archive_deployment_logs(deployment_id: str):
+    """Archive all log streams of a finished deployment into the blob store.
+
+    :param deployment_id: The ID of the Deployment object.
+    """
+    deployment = Deployment.objects.get(pk=deployment_id)
+    if deployment.status not in JobStatus.get_finished_states():
+        logger.warning("deployment %s is not finished, skip archiving logs", deployment_id)
+        return
+
+    for s in DeploymentLogStreams(deployment).all_streams():
+        try:
+            archive_output_stream(s)
+        except Exception:
+            logger.exception("failed to archive output stream %s of deployment %s", s.uuid, deployment_id)
@@ -91,6 +91,10 @@ class DeployStream(metaclass=abc.ABCMeta):
     def close(self):
         raise NotImplementedError
 
+    def flush(self):
+        """Flush the buffered messages(if any), intentionally optional: streams without buffer do nothing"""
+        return
+
     @classmethod
     @abc.abstractmethod
     def from_deployment_id(cls, deployment_id: str):
@@ -179,11 +183,20 @@ class ModelStream:
         message = sanitize_message(message)
         self.model.write(line=message, stream=stream)
 
+    def flush(self):
+        """Flush the buffered messages if the writer supports buffering, such as `BufferedOutputStreamWriter`"""
+        if flush := getattr(self.model, "flush", None):
+            flush()
+
 
 class RedisWithModelStream(RedisChannelStream):
     """A modified redis channel stream which writes message to both model's output_stream
     and redis channel.
 
+    Messages are always published to the redis channel in real time, while the model may buffer
+    them (e.g. `BufferedOutputStreamWriter`), the buffer will be flushed when a new title(which
+    means the start of a new step) was written or the stream was closed.
+
     :param model: A model which has output_stream field
     :param steam_channel: A redis channel stream
     """
@@ -192,10 +205,21 @@ class RedisWithModelStream(RedisChannelStream):
         self.model_stream = ModelStream(model)
         super().__init__(stream_channel)
 
+    def write_title(self, title):
+        self.model_stream.flush()
+        return super().write_title(title)
+
     def write_message(self, message, stream="STDOUT"):
         self.model_stream.write_message(message, stream)
         super().write_message(message, stream)
 
+    def flush(self):
+        self.model_stream.flush()
+
+    def close(self):
+        self.model_stream.flush()
+        return super().close()
+
 
 def get_default_stream(deployment: Deployment) -> RedisChannelStream:
     stream_channel = StreamChannel(deployment.id, redis_db=get_default_redis())
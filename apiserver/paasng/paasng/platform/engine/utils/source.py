@@ -15,6 +15,8 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import hashlib
+import json
 import logging
 from pathlib import Path
 from typing import Dict, Optional
@@ -22,6 +24,7 @@ from typing import Dict, Optional
 import cattr
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from django.utils.translation import gettext as _
 
 from paasng.accessories.smart_advisor.models import cleanup_module, tag_module
@@ -34,7 +37,7 @@ from paasng.platform.engine.configurations.building import get_dockerfile_path
 from paasng.platform.engine.configurations.source_file import get_metadata_reader
 from paasng.platform.engine.constants import RuntimeType
 from paasng.platform.engine.exceptions import InitDeployDescHandlerError
-from paasng.platform.engine.models import Deployment, EngineApp
+from paasng.platform.engine.models import Deployment, EngineApp, SourcePackageArtifact
 from paasng.platform.engine.models.deployment import ProcessTmpl
 from paasng.platform.engine.utils.output import DeployStream, Style
 from paasng.platform.engine.utils.patcher import patch_source_dir_procfile
@@ -51,7 +54,9 @@ from paasng.platform.sourcectl.exceptions import (
 )
 from paasng.platform.sourcectl.models import VersionInfo
 from paasng.platform.sourcectl.repo_controller import get_repo_controller
+from paasng.platform.sourcectl.source_types import get_sourcectl_names
 from paasng.platform.sourcectl.utils import DockerIgnore
+from paasng.utils.blobstore import make_blob_store
 from paasng.utils.file import validate_source_dir_str
 from paasng.utils.validators import PROC_TYPE_MAX_LENGTH, PROC_TYPE_PATTERN
 
@@ -228,6 +233,76 @@ def get_source_package_path(deployment: Deployment) -> str:
     return f"{engine_app.region}/home/{slug_name}/tar"
 
 
+def get_source_package_digest(deployment: Deployment, dockerignore: Optional[DockerIgnore] = None) -> Optional[str]:
+    """Return the digest of the deployment's source package, deployments with the same digest can share
+    the same package. The package content is decided by the module, the repository, the source version,
+    the source directory, the ".dockerignore" file and the Procfile which will be patched into the source.
+
+    :param dockerignore: The ".dockerignore" used when compressing the source files
+    :return: None if the source package should not be reused, e.g. the source version is not immutable
+    """
+    if not settings.ENABLE_SOURCE_PACKAGE_CACHE or not deployment.source_revision:
+        return None
+
+    module = deployment.app_environment.module
+    # 源码包部署时，相同版本号的源码包允许被重新上传，不能复用
+    if ModuleSpecs(module).source_origin_specs.source_origin != SourceOrigin.AUTHORIZED_VCS:
+        return None
+    # 裸 Git 仓库按分支名导出最新的代码，导出内容与部署记录中的版本号不一定一致
+    if module.source_type == get_sourcectl_names().bare_git:
+        return None
+
+    materials = {
+        "module_id": str(module.id),
+        "repo_url": module.get_source_obj().get_repo_url(),
+        "version_type": deployment.source_version_type,
+        "version_name": deployment.source_version_name,
+        "revision": deployment.source_revision,
+        "source_dir": str(deployment.get_source_dir()),
+        "dockerignore": [dockerignore.raw_content, [str(p) for p in dockerignore.whitelist]] if dockerignore else None,
+        "procfile": deployment.get_procfile(),
+    }
+    return hashlib.sha256(json.dumps(materials, sort_keys=True).encode()).hexdigest()
+
+
+def get_reusable_source_package(digest: str) -> Optional[SourcePackageArtifact]:
+    """Get the uploaded source package by digest, the index will be removed if the package file
+    does not exist anymore.
+    """
+    try:
+        artifact = SourcePackageArtifact.objects.get(digest=digest)
+    except SourcePackageArtifact.DoesNotExist:
+        return None
+
+    try:
+        make_blob_store(bucket=settings.BLOBSTORE_BUCKET_APP_SOURCE).get_file_metadata(artifact.package_path)
+    except Exception:
+        logger.info("Source package %s is unavailable, remove it from the index", artifact.package_path)
+        artifact.delete()
+        return None
+
+    artifact.last_used_at = timezone.now()
+    artifact.save(update_fields=["last_used_at", "updated"])
+    return artifact
+
+
+def record_source_package(deployment: Deployment, digest: str, package_path: str, size: int):
+    """Record the uploaded source package so that it can be reused by later deployments."""
+    module = deployment.app_environment.module
+    SourcePackageArtifact.objects.update_or_create(
+        digest=digest,
+        defaults={
+            "module": module,
+            "region": module.region,
+            "package_path": package_path,
+            "size": size,
+            "revision": deployment.source_revision,
+            "last_used_at": timezone.now(),
+            "tenant_id": deployment.tenant_id,
+        },
+    )
+
+
 def download_source_to_dir(module: Module, operator: str, deployment: Deployment, root_path: Path) -> tuple[str, Path]:
     """Download and extract the module's source files to local path, will generate Procfile if necessary
 
@@ -301,11 +376,12 @@ def download_source_to_dir(module: Module, operator: str, deployment: Deployment
     return source_dir_str, source_dir
 
 
-def check_source_package(engine_app: EngineApp, package_path: Path, stream: DeployStream):
-    """Check module source package, produce warning infos"""
-    # Check source package size
+def check_source_package_size(engine_app: EngineApp, size: int, stream: DeployStream):
+    """Check the size of module source package, produce warning infos
+
+    :param size: the size of the source package in bytes
+    """
     warning_threshold = settings.ENGINE_APP_SOURCE_SIZE_WARNING_THRESHOLD_MB
-    size = package_path.stat().st_size
     if size > warning_threshold * 1024 * 1024:
         stream.write_message(
             Style.Warning(
@@ -46,7 +46,7 @@ from paasng.platform.engine.constants import ReplicasPolicy, RuntimeType
 from paasng.platform.engine.deploy.interruptions import interrupt_deployment
 from paasng.platform.engine.deploy.start import DeployTaskRunner, initialize_deployment
 from paasng.platform.engine.exceptions import DeployInterruptionFailed
-from paasng.platform.engine.logs import get_all_logs
+from paasng.platform.engine.logs import DeploymentLogsReader, get_all_logs
 from paasng.platform.engine.models import Deployment, DeployOptions
 from paasng.platform.engine.phases_steps.phases import DeployPhaseManager
 from paasng.platform.engine.phases_steps.steps import get_sorted_steps
@@ -234,7 +234,11 @@ class DeploymentViewSet(viewsets.ViewSet, ApplicationCodeInPathMixin):
         include_ansi_codes = query_slz.validated_data.get("include_ansi_codes", False)
 
         deployment = _get_deployment(self.get_module_via_path(), uuid)
-        logs = get_all_logs(deployment)
+        if tail_lines := query_slz.validated_data.get("tail_lines"):
+            # Only load the required lines, archived logs will not be downloaded entirely
+            logs = "".join(DeploymentLogsReader(deployment).tail(tail_lines)) + "\n" + (deployment.err_detail or "")
+        else:
+            logs = get_all_logs(deployment)
         if not include_ansi_codes:
             logs = strip_ansi(logs)
         hint = get_failure_hint(deployment)
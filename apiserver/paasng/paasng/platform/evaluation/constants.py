@@ -24,6 +24,7 @@ class BatchTaskStatus(StrStructuredEnum):
 
     RUNNING = EnumField("running", label=_("运行中"))
     FINISHED = EnumField("finished", label=_("已完成"))
+    FAILED = EnumField("failed", label=_("已失败"))
 
 
 class EmailNotificationType(StrStructuredEnum):
@@ -49,3 +50,11 @@ class OperationIssueType(StrStructuredEnum):
     MAINTAINLESS = EnumField("maintainless", label=_("缺少维护"))
     UNDEPLOY = EnumField("undeploy", label=_("未部署/已下线"))
     MISCONFIGURED = EnumField("misconfigured", label=_("配置不当"))
+
+
+class CollectionBackend(StrStructuredEnum):
+    """采集运营报告时依赖的后端服务，用于限制访问各后端的并发数"""
+
+    PROMETHEUS = EnumField("prometheus", label=_("资源监控"))
+    PAAS_ANALYSIS = EnumField("paas_analysis", label=_("访问统计"))
+    IAM = EnumField("iam", label=_("权限中心"))
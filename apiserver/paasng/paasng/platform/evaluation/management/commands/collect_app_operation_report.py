@@ -27,6 +27,9 @@ Examples:
 
     # 采集全量应用 + 异步执行
     python manage.py collect_app_operation_report --all --async
+
+    # 采集全量应用 + 分片由多个 worker 并行采集 + 仅采集上次采集后有新部署 / 操作记录的应用
+    python manage.py collect_app_operation_report --all --async --fan-out --incremental
 """
 
 from django.core.management.base import BaseCommand
@@ -41,12 +44,16 @@ class Command(BaseCommand):
         parser.add_argument("--codes", dest="app_codes", default=[], nargs="*", help="应用 Code 列表")
         parser.add_argument("--all", dest="collect_all", default=False, action="store_true", help="采集全量应用")
         parser.add_argument("--async", dest="async_run", default=False, action="store_true", help="异步执行")
+        parser.add_argument("--fan-out", dest="fan_out", default=False, action="store_true", help="分片并行采集")
+        parser.add_argument(
+            "--incremental", dest="incremental", default=False, action="store_true", help="仅采集有变更的应用"
+        )
 
-    def handle(self, app_codes, collect_all, async_run, *args, **options):
+    def handle(self, app_codes, collect_all, async_run, fan_out, incremental, *args, **options):
         if not (collect_all or app_codes):
             raise ValueError("please specify --codes or --all")
 
         if async_run:
-            collect_and_update_app_operation_reports.delay(app_codes)
+            collect_and_update_app_operation_reports.delay(app_codes, fan_out=fan_out, incremental=incremental)
         else:
-            collect_and_update_app_operation_reports(app_codes)
+            collect_and_update_app_operation_reports(app_codes, fan_out=fan_out, incremental=incremental)
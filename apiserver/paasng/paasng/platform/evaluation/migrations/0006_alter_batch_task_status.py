@@ -0,0 +1,34 @@
+# Generated by Django 4.2.17 on 2026-10-18 22:30
+
+from django.db import migrations, models
+import paasng.platform.evaluation.constants
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("evaluation", "0005_idleappnotificationmuterule_tenant_id"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="appoperationemailnotificationtask",
+            name="status",
+            field=models.CharField(
+                choices=[("running", "运行中"), ("finished", "已完成"), ("failed", "已失败")],
+                default=paasng.platform.evaluation.constants.BatchTaskStatus["RUNNING"],
+                max_length=32,
+                verbose_name="任务状态",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="appoperationreportcollectiontask",
+            name="status",
+            field=models.CharField(
+                choices=[("running", "运行中"), ("finished", "已完成"), ("failed", "已失败")],
+                default=paasng.platform.evaluation.constants.BatchTaskStatus["RUNNING"],
+                max_length=32,
+                verbose_name="任务状态",
+            ),
+        ),
+    ]
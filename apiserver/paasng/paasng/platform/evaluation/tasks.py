@@ -16,14 +16,17 @@
 # to the current version of the project delivered to anyone in the future.
 
 import logging
+from contextlib import contextmanager
 from dataclasses import asdict
-from typing import List
+from typing import Dict, Iterator, List, Optional, Tuple
 
-from celery import shared_task
+from celery import chord, shared_task
 from django.conf import settings
+from django.db.models import F, Max
 from django.utils import timezone
 
-from paasng.infras.iam.helpers import fetch_role_members
+from paasng.core.core.storages.redisdb import get_default_redis
+from paasng.infras.iam.helpers import fetch_applications_members
 from paasng.infras.iam.permissions.resources.application import ApplicationPermission
 from paasng.misc.audit.models import AppOperationRecord
 from paasng.platform.applications.constants import ApplicationRole, ApplicationType
@@ -33,6 +36,7 @@ from paasng.platform.engine.models import Deployment
 from paasng.platform.evaluation.collectors import AppDeploymentCollector, AppResQuotaCollector, AppUserVisitCollector
 from paasng.platform.evaluation.constants import (
     BatchTaskStatus,
+    CollectionBackend,
     EmailNotificationType,
     EmailReceiverType,
     OperationIssueType,
@@ -45,12 +49,52 @@ from paasng.platform.evaluation.models import (
 )
 from paasng.platform.evaluation.notifiers import AppOperationReportNotifier
 from paasng.utils.basic import get_username_by_bkpaas_user_id
+from paasng.utils.rate_limit.semaphore import RedisSemaphore
 
 logger = logging.getLogger(__name__)
 
+# 批量获取应用成员时，每批次的应用数量
+MEMBERS_FETCH_BATCH_SIZE = 100
 
-def _update_or_create_operation_report(app: Application):
-    res_summary = AppResQuotaCollector(app).collect()
+# 运营报告中需要记录的成员角色
+REPORT_MEMBER_ROLES = [ApplicationRole.ADMINISTRATOR, ApplicationRole.DEVELOPER]
+
+# 每采集多少个应用更新一次任务进度
+PROGRESS_UPDATE_INTERVAL = 20
+
+
+@contextmanager
+def _limit_concurrency(backend: CollectionBackend, enabled: bool) -> Iterator[None]:
+    """限制访问指定后端服务的并发数（跨所有 worker），未启用或未配置上限时不限制
+
+    :param enabled: 是否启用限制，仅在多个 worker 并行采集（fan_out）时需要
+    """
+    limit = settings.APP_OPERATION_REPORT_BACKEND_CONCURRENCY.get(backend.value)
+    if not (enabled and limit):
+        yield
+        return
+
+    with RedisSemaphore(get_default_redis(), f"app_operation_report:{backend.value}", limit).hold():
+        yield
+
+
+def _update_or_create_operation_report(
+    app: Application,
+    members: Optional[Dict[ApplicationRole, List[str]]] = None,
+    *,
+    limit_concurrency: bool = False,
+):
+    """采集并更新应用的运营报告
+
+    :param members: 预先批量获取的应用成员，为空时将单独获取
+    :param limit_concurrency: 是否限制访问各后端服务的并发数
+    """
+    if members is None:
+        with _limit_concurrency(CollectionBackend.IAM, limit_concurrency):
+            members = fetch_applications_members([app.code], roles=REPORT_MEMBER_ROLES).get(app.code, {})
+
+    with _limit_concurrency(CollectionBackend.PROMETHEUS, limit_concurrency):
+        res_summary = AppResQuotaCollector(app).collect()
     # 统计资源配额 & 实际使用情况
     cpu_requests, mem_requests, cpu_limits, mem_limits = 0, 0, 0, 0
     cpu_usage_avg_val, mem_usage_avg_val = 0.0, 0.0
@@ -76,7 +120,8 @@ def _update_or_create_operation_report(app: Application):
 
     # 统计近 30 天总访问量 & 用户数
     total_pv, total_uv = 0, 0
-    visit_summary = AppUserVisitCollector(app).collect()
+    with _limit_concurrency(CollectionBackend.PAAS_ANALYSIS, limit_concurrency):
+        visit_summary = AppUserVisitCollector(app).collect()
     for mod in visit_summary.modules.values():
         for env in [mod.envs[AppEnvName.STAG], mod.envs[AppEnvName.PROD]]:
             total_pv += env.pv
@@ -111,8 +156,8 @@ def _update_or_create_operation_report(app: Application):
         "latest_operation": latest_operation.get_display_text() if latest_operation else None,
         "deploy_summary": asdict(deploy_summary),
         # 应用开发者 / 管理员
-        "administrators": fetch_role_members(app.code, ApplicationRole.ADMINISTRATOR),
-        "developers": fetch_role_members(app.code, ApplicationRole.DEVELOPER),
+        "administrators": members.get(ApplicationRole.ADMINISTRATOR, []),
+        "developers": members.get(ApplicationRole.DEVELOPER, []),
         "collected_at": timezone.now(),
     }
     report, _ = AppOperationReport.objects.update_or_create(app=app, defaults=defaults)
@@ -124,34 +169,95 @@ def _update_or_create_operation_report(app: Application):
     report.save(update_fields=["issue_type", "evaluate_result"])
 
 
-@shared_task
-def collect_and_update_app_operation_reports(app_codes: List[str]):
-    """采集并更新指定应用的资源使用情况报告"""
-    applications = Application.objects.exclude(type=ApplicationType.ENGINELESS_APP)
-    # 应用已经被删除的，还保留报告是没有意义的
-    AppOperationReport.objects.exclude(app__in=applications).delete()
+def _fetch_members_map(
+    applications: List[Application], *, limit_concurrency: bool = False
+) -> Optional[Dict[str, Dict[ApplicationRole, List[str]]]]:
+    """批量获取应用成员，获取失败时返回 None，由各应用单独获取"""
+    try:
+        with _limit_concurrency(CollectionBackend.IAM, limit_concurrency):
+            members_map = fetch_applications_members([app.code for app in applications], roles=REPORT_MEMBER_ROLES)
+    except Exception:
+        logger.exception("failed to fetch members of apps, fallback to fetch them one by one")
+        return None
+    return {app.code: members_map.get(app.code, {}) for app in applications}
+
+
+def _filter_changed_apps(applications: List[Application]) -> List[Application]:
+    """筛选出上次采集后有新的部署或操作记录的应用，尚未采集过的应用总是需要采集"""
+    collected_at = dict(AppOperationReport.objects.values_list("app_id", "collected_at"))
+    if not collected_at:
+        return applications
+
+    # 仅需查询最早一次采集之后的记录，按应用聚合出最新的时间
+    since = min(collected_at.values())
+    latest_deployed_at = {
+        item["app_environment__application_id"]: item["latest"]
+        for item in Deployment.objects.filter(created__gt=since)
+        .values("app_environment__application_id")
+        .annotate(latest=Max("created"))
+    }
+    latest_operated_at = {
+        item["app_code"]: item["latest"]
+        for item in AppOperationRecord.objects.filter(created__gt=since)
+        .values("app_code")
+        .annotate(latest=Max("created"))
+    }
 
-    if app_codes:
-        applications = applications.filter(code__in=app_codes)
+    changed_apps = []
+    for app in applications:
+        last_collected_at = collected_at.get(app.id)
+        if last_collected_at is None:
+            changed_apps.append(app)
+            continue
 
-    total_cnt, succeed_cnt = applications.count(), 0
-    failed_app_codes = []
-    task = AppOperationReportCollectionTask.objects.create(total_count=total_cnt)
+        deployed_at, operated_at = latest_deployed_at.get(app.id), latest_operated_at.get(app.code)
+        if (deployed_at and deployed_at > last_collected_at) or (operated_at and operated_at > last_collected_at):
+            changed_apps.append(app)
+    return changed_apps
 
+
+def _collect_operation_reports(
+    task_id: int, applications: List[Application], *, limit_concurrency: bool = False
+) -> Tuple[int, List[str]]:
+    """依次采集应用的运营报告，并定期将进度累加到采集任务上（多个分片可同时累加）
+
+    :param limit_concurrency: 是否限制访问各后端服务的并发数，多个分片并行采集时需要
+    :return: (已采集的应用数量, 采集失败的应用 Code 列表)
+    """
+    succeed_cnt, failed_app_codes = 0, []
+    # 已经累加到采集任务上的进度
+    saved_succeed_cnt, saved_failed_cnt = 0, 0
+
+    members_map: Optional[Dict[str, Dict[ApplicationRole, List[str]]]] = None
     for idx, app in enumerate(applications, start=1):
+        # 每个批次开始时，批量获取该批次所有应用的成员
+        if (idx - 1) % MEMBERS_FETCH_BATCH_SIZE == 0:
+            members_map = _fetch_members_map(
+                applications[idx - 1 : idx - 1 + MEMBERS_FETCH_BATCH_SIZE], limit_concurrency=limit_concurrency
+            )
+
         try:
-            _update_or_create_operation_report(app)
+            _update_or_create_operation_report(
+                app, None if members_map is None else members_map[app.code], limit_concurrency=limit_concurrency
+            )
         except Exception:
             failed_app_codes.append(app.code)
             logger.exception("failed to collect app: %s operation report", app.code)
 
         succeed_cnt += 1
         # 完整采集完需要较长时间，因此每隔一段时间更新下进度
-        if idx % 20 == 0:
-            task.succeed_count = succeed_cnt
-            task.failed_count = len(failed_app_codes)
-            task.save(update_fields=["succeed_count", "failed_count"])
+        if idx % PROGRESS_UPDATE_INTERVAL == 0 or idx == len(applications):
+            AppOperationReportCollectionTask.objects.filter(id=task_id).update(
+                succeed_count=F("succeed_count") + (succeed_cnt - saved_succeed_cnt),
+                failed_count=F("failed_count") + (len(failed_app_codes) - saved_failed_cnt),
+            )
+            saved_succeed_cnt, saved_failed_cnt = succeed_cnt, len(failed_app_codes)
+
+    return succeed_cnt, failed_app_codes
 
+
+def _finish_collection_task(task: AppOperationReportCollectionTask, succeed_cnt: int, failed_app_codes: List[str]):
+    """结束采集任务，并根据配置发送报告邮件"""
     task.succeed_count = succeed_cnt
     task.failed_count = len(failed_app_codes)
     task.failed_app_codes = failed_app_codes
@@ -165,6 +271,65 @@ def collect_and_update_app_operation_reports(app_codes: List[str]):
         AppOperationReportNotifier().send(reports, EmailReceiverType.PLAT_ADMIN, settings.BKPAAS_PLATFORM_MANAGERS)
 
 
+@shared_task
+def collect_and_update_app_operation_reports(app_codes: List[str], fan_out: bool = False, incremental: bool = False):
+    """采集并更新指定应用的资源使用情况报告
+
+    :param fan_out: 是否将应用拆分为多个分片（Celery chord），由多个 worker 并行采集
+    :param incremental: 是否仅采集上次采集后有新的部署或操作记录的应用
+    """
+    applications = Application.objects.exclude(type=ApplicationType.ENGINELESS_APP)
+    # 应用已经被删除的，还保留报告是没有意义的
+    AppOperationReport.objects.exclude(app__in=applications).delete()
+
+    if app_codes:
+        applications = applications.filter(code__in=app_codes)
+
+    app_list = list(applications)
+    if incremental:
+        app_list = _filter_changed_apps(app_list)
+
+    task = AppOperationReportCollectionTask.objects.create(total_count=len(app_list))
+    if fan_out and app_list:
+        shard_size = settings.APP_OPERATION_REPORT_COLLECT_SHARD_SIZE
+        shards = [[app.code for app in app_list[i : i + shard_size]] for i in range(0, len(app_list), shard_size)]
+        logger.info("collecting operation reports of %s apps in %s shards", len(app_list), len(shards))
+        # 任意分片或汇总任务执行失败时，将采集任务标记为失败，避免其一直处于运行中
+        callback = finish_app_operation_reports_collection.s(task.id).on_error(
+            mark_app_operation_reports_collection_failed.s(task.id)
+        )
+        chord([collect_app_operation_reports_shard.si(task.id, codes) for codes in shards])(callback)
+        return
+
+    succeed_cnt, failed_app_codes = _collect_operation_reports(task.id, app_list)
+    _finish_collection_task(task, succeed_cnt, failed_app_codes)
+
+
+@shared_task
+def collect_app_operation_reports_shard(task_id: int, app_codes: List[str]) -> Tuple[int, List[str]]:
+    """采集一个分片内应用的运营报告，进度累加到采集任务上"""
+    applications = list(Application.objects.filter(code__in=app_codes))
+    return _collect_operation_reports(task_id, applications, limit_concurrency=True)
+
+
+@shared_task
+def finish_app_operation_reports_collection(results: List[Tuple[int, List[str]]], task_id: int):
+    """汇总所有分片的采集结果，结束采集任务"""
+    task = AppOperationReportCollectionTask.objects.get(id=task_id)
+    succeed_cnt = sum(cnt for cnt, _ in results)
+    failed_app_codes = [code for _, codes in results for code in codes]
+    _finish_collection_task(task, succeed_cnt, failed_app_codes)
+
+
+@shared_task
+def mark_app_operation_reports_collection_failed(request, exc, traceback, task_id: int):
+    """分片或汇总任务执行失败时（chord 的 errback），将采集任务标记为失败"""
+    logger.error("failed to collect app operation reports, task: %s, error: %s", task_id, exc)
+    AppOperationReportCollectionTask.objects.filter(id=task_id).update(
+        status=BatchTaskStatus.FAILED, end_at=timezone.now()
+    )
+
+
 @shared_task
 def send_idle_email_to_app_developers(
     tenant_id: str, app_codes: List[str], only_specified_users: List[str], exclude_specified_users: List[str]
@@ -268,12 +268,30 @@ def get_migration_process_status(app: Application) -> Dict[str, str]:
     try:
         process = CNativeMigrationProcess.objects.filter(app=app).latest()
     except CNativeMigrationProcess.DoesNotExist:
+        process = None
+    return _make_migration_process_status(app, process)
+
+
+def list_migration_process_statuses(apps: List[Application]) -> Dict[str, Dict[str, str]]:
+    """Bulk version of `get_migration_process_status`, the migration processes are queried in one query
+
+    :return: A dict of {app.id: status}
+    """
+    latest_processes: Dict[str, CNativeMigrationProcess] = {}
+    # The later process overwrites the former, so the latest one is kept
+    for process in CNativeMigrationProcess.objects.filter(app__in=apps).order_by("created_at"):
+        latest_processes[str(process.app_id)] = process
+    return {str(app.id): _make_migration_process_status(app, latest_processes.get(str(app.id))) for app in apps}
+
+
+def _make_migration_process_status(app: Application, process: CNativeMigrationProcess | None) -> Dict[str, str]:
+    if process is None:
         if app.type == ApplicationType.DEFAULT.value:
             # 当普通应用没有迁移记录时, 处于待迁移状态
             return {"status": CNativeMigrationStatus.DEFAULT.value, "error_msg": ""}
         # 本身是云原生类型应用(cloud_native)或外链应用(engineless_app), 不需要迁移
         return {"status": CNativeMigrationStatus.NO_NEED_MIGRATION.value, "error_msg": ""}
-    else:
-        slz = CNativeMigrationProcessSLZ(process)
-        # 返回迁移记录中的迁移状态
-        return {"status": slz.data["status"], "error_msg": slz.data["error_msg"]}
+
+    slz = CNativeMigrationProcessSLZ(process)
+    # 返回迁移记录中的迁移状态
+    return {"status": slz.data["status"], "error_msg": slz.data["error_msg"]}
@@ -44,8 +44,10 @@ def update_remote_services():
     """Update remote services periodically"""
     remote_store = get_remote_store()
     logger.debug("Start updating remote services...")
+    changed = 0
     for ret in fetch_all_remote_services():
-        remote_store.bulk_upsert(ret.data, meta_info=ret.meta_info, source_config=ret.config)
+        changed += remote_store.bulk_upsert(ret.data, meta_info=ret.meta_info, source_config=ret.config)
+    logger.debug("Remote services updated, %s services changed", changed)
 
 
 @contextmanager
@@ -18,6 +18,7 @@
 import base64
 import hashlib
 import logging
+import os
 import re
 import zipfile
 from os import PathLike
@@ -33,6 +34,7 @@ from yaml import YAMLError
 from paasng.platform.declarative.constants import AppDescPluginType, AppSpecVersion
 from paasng.platform.declarative.exceptions import DescriptionValidationError
 from paasng.platform.declarative.handlers import detect_spec_version, get_desc_handler
+from paasng.platform.smart_app.services.scanner import READ_BUFFER_SIZE, PackageScanner, ScannedPackage
 from paasng.platform.sourcectl.exceptions import (
     PackageInvalidFileFormatError,
     ReadFileNotFoundError,
@@ -40,6 +42,7 @@ from paasng.platform.sourcectl.exceptions import (
 )
 from paasng.platform.sourcectl.models import SPStat
 from paasng.platform.sourcectl.package.client import BinaryTarClient, ZipClient
+from paasng.platform.sourcectl.utils import uncompress_directory
 from paasng.utils.file import path_may_escape
 
 logger = logging.getLogger(__name__)
@@ -81,6 +84,13 @@ def update_meta_info(meta_info: Dict, app_code: str, app_name: str) -> Dict:
             return meta_info
 
 
+def is_meta_file(filepath: str) -> bool:
+    """Check if the file is needed for reading the meta info of package, such as the app description
+    file and the logo.
+    """
+    return relative_path_of_app_desc(filepath) is not None or os.path.basename(filepath) == "logo.png"
+
+
 class SourcePackageStatReader:
     """Read local source package's stats"""
 
@@ -103,48 +113,62 @@ class SourcePackageStatReader:
         :raises PackageInvalidFileFormatError: The file is not valid, it's content might be corrupt.
         :raises ValidationError: The file content is not valid YAML.
         """
-        relative_path = "./"
+        if self.accessor is ZipClient:
+            with ZipClient(self.path) as archive:
+                return self._read_meta_info(archive)
+        return self._read_meta_info(self.scan())
 
-        with self.accessor(self.path) as archive:
-            try:
-                # 根据约定, application description file 应当在应用的外层目录, 排序后可以
-                # 更快地找到它。
-                existed_filenames = sorted(archive.list())
-            except RuntimeError:
-                logger.warning("Unable to list contents in the package file, path: %s.", self.path)
-                return relative_path, {}
-
-            for filepath in existed_filenames:
-                if (p := relative_path_of_app_desc(filepath)) is not None:
-                    app_filename = filepath
-                    relative_path = p
-                    break
-            else:
-                # If not description file can be found, return empty info
-                return relative_path, {}
+    def scan(self, target_dir: Optional[PathLike] = None) -> ScannedPackage:
+        """Scan the tarball package in a single pass, the meta files are captured and the sha256 digest
+        is computed while reading.
 
-            # Check if the relative path is valid, an invalid relative path may cause
-            # security issue if the archive.read_file has been implemented incorrectly.
-            if path_may_escape(relative_path):
-                logger.warning("Invalid relative path detected: %s", relative_path)
-                raise ValidationError(_("应用描述文件的所在目录不合法"))
+        :param target_dir: if given, the package will be extracted to this directory in the same pass
+        :raises PackageInvalidFileFormatError: The file is not a valid tarball.
+        """
+        return PackageScanner(self.path).scan(capture=is_meta_file, target_dir=target_dir)
 
-            meta_file = archive.read_file(app_filename)
-            if not meta_file:
-                raise RuntimeError("file: {} can not be extracted".format(app_filename))
+    def _read_meta_info(self, archive: Union[ZipClient, ScannedPackage]) -> Tuple[str, Dict]:
+        relative_path = "./"
 
-            try:
-                meta_info = yaml.safe_load(meta_file)
-            except YAMLError:
-                logger.exception(_("应用描述文件内容不是有效 YAML 格式"))
-                raise ValidationError(_("应用描述文件内容不是有效 YAML 格式"))
+        try:
+            # 根据约定, application description file 应当在应用的外层目录, 排序后可以
+            # 更快地找到它。
+            existed_filenames = sorted(archive.list())
+        except RuntimeError:
+            logger.warning("Unable to list contents in the package file, path: %s.", self.path)
+            return relative_path, {}
+
+        for filepath in existed_filenames:
+            if (p := relative_path_of_app_desc(filepath)) is not None:
+                app_filename = filepath
+                relative_path = p
+                break
+        else:
+            # If not description file can be found, return empty info
+            return relative_path, {}
+
+        # Check if the relative path is valid, an invalid relative path may cause
+        # security issue if the archive.read_file has been implemented incorrectly.
+        if path_may_escape(relative_path):
+            logger.warning("Invalid relative path detected: %s", relative_path)
+            raise ValidationError(_("应用描述文件的所在目录不合法"))
+
+        meta_file = archive.read_file(app_filename)
+        if not meta_file:
+            raise RuntimeError("file: {} can not be extracted".format(app_filename))
+
+        try:
+            meta_info = yaml.safe_load(meta_file)
+        except YAMLError:
+            logger.exception(_("应用描述文件内容不是有效 YAML 格式"))
+            raise ValidationError(_("应用描述文件内容不是有效 YAML 格式"))
 
-            logo_b64data = self._load_logo(archive=archive, relative_path=relative_path)
-            if logo_b64data:
-                meta_info["logo_b64data"] = logo_b64data
-                meta_info["logoB64data"] = logo_b64data
+        logo_b64data = self._load_logo(archive=archive, relative_path=relative_path)
+        if logo_b64data:
+            meta_info["logo_b64data"] = logo_b64data
+            meta_info["logoB64data"] = logo_b64data
 
-            return relative_path, meta_info
+        return relative_path, meta_info
 
     def _try_extract_version(self, meta_info: Dict) -> Optional[str]:
         """Try extracting version from meta info"""
@@ -164,19 +188,31 @@ class SourcePackageStatReader:
         # generate signature
         sha256_hash = hashlib.sha256()
         with open(self.path, mode="rb") as fh:
-            for byte_block in iter(lambda: fh.read(4096), b""):
+            for byte_block in iter(lambda: fh.read(READ_BUFFER_SIZE), b""):
                 sha256_hash.update(byte_block)
         return sha256_hash.hexdigest()
 
-    def read(self) -> SPStat:
+    def read(self, extract_to: Optional[PathLike] = None) -> SPStat:
         """Return source package's stats object.
 
+        A tarball package is read only once: the meta info, the sha256 digest and the extraction
+        (if `extract_to` is given) are all done in a single pass.
+
+        :param extract_to: if given, the package will also be extracted to this directory
         :raises ValidationError: Known errors when reading stats failed, it's message can
             be displayed to user.
         """
         logger.debug("parsing source package's stats object.")
         try:
-            relative_path, meta_info = self.get_meta_info()
+            if self.accessor is ZipClient:
+                if extract_to is not None:
+                    uncompress_directory(source_path=self.path, target_path=extract_to)
+                relative_path, meta_info = self.get_meta_info()
+                sha256_signature = self.compute_sha256_digest()
+            else:
+                package = self.scan(target_dir=extract_to)
+                relative_path, meta_info = self._read_meta_info(package)
+                sha256_signature = package.sha256_signature
         except PackageInvalidFileFormatError:
             raise ValidationError(_("源码包文件格式错误，文件可能已经损坏"))
         except ReadLinkFileOutsideDirectoryError:
@@ -189,11 +225,11 @@ class SourcePackageStatReader:
             size=self.path.stat().st_size,
             meta_info=meta_info,
             relative_path=relative_path,
-            sha256_signature=self.compute_sha256_digest(),
+            sha256_signature=sha256_signature,
         )
 
     @staticmethod
-    def _load_logo(archive: Union[ZipClient, BinaryTarClient], relative_path: str) -> Optional[str]:
+    def _load_logo(archive: Union[ZipClient, ScannedPackage], relative_path: str) -> Optional[str]:
         logo_b64data = None
         try:
             # Q: 为什么需要进行 base64 编码?
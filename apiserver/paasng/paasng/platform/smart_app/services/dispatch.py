@@ -18,9 +18,11 @@
 import json
 import logging
 from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
 from os import PathLike
 from pathlib import Path
-from typing import Callable, List, Set, cast
+from typing import Callable, List, Optional, Set, cast
 
 from paasng.infras.accounts.models import User
 from paasng.platform.applications.models import Application, SMartAppExtraInfo
@@ -30,12 +32,12 @@ from paasng.platform.smart_app.conf import bksmart_settings
 from paasng.platform.smart_app.constants import SMartPackageBuilderVersionFlag
 from paasng.platform.smart_app.entities import DockerExportedImageManifest
 from paasng.platform.smart_app.services.detector import SourcePackageStatReader
-from paasng.platform.smart_app.services.image_mgr import SMartImageManager
+from paasng.platform.smart_app.services.image_mgr import SharedLayerRegistry, SMartImageManager
 from paasng.platform.smart_app.services.patcher import patch_smart_tarball
 from paasng.platform.sourcectl.models import SourcePackage, SPStat, SPStoragePolicy
 from paasng.platform.sourcectl.package.uploader import generate_storage_path, upload_to_blob_store
 from paasng.platform.sourcectl.utils import generate_temp_dir, uncompress_directory
-from paasng.utils.moby_distribution import ImageJSON, ImageRef, LayerRef
+from paasng.utils.moby_distribution import ImageJSON, ImageRef
 from paasng.utils.text import remove_prefix
 
 logger = logging.getLogger(__name__)
@@ -46,22 +48,34 @@ _PARALLEL_PATCHING = True
 
 
 def dispatch_package_to_modules(
-    application: Application, tarball_filepath: PathLike, stat: SPStat, operator: User, modules: Set[str]
+    application: Application,
+    tarball_filepath: PathLike,
+    stat: SPStat,
+    operator: User,
+    modules: Set[str],
+    *,
+    extracted_dir: Optional[Path] = None,
 ) -> List[SourcePackage]:
-    """Dispatch package to those modules which mentioned in args modules"""
-    # TODO: 优化分发镜像的逻辑(如果存在多个模块用同一个镜像层, 那么应该只上传一次镜像)
-    with generate_temp_dir() as workplace:
-        uncompress_directory(source_path=tarball_filepath, target_path=workplace)
+    """Dispatch package to those modules which mentioned in args modules
+
+    :param extracted_dir: the directory where the package has already been extracted to(usually by
+        `SourcePackageStatReader.read(extract_to=...)`), the package will be extracted again if not given
+    """
+    with nullcontext(extracted_dir) if extracted_dir is not None else generate_temp_dir() as workplace:
+        if extracted_dir is None:
+            uncompress_directory(source_path=tarball_filepath, target_path=workplace)
 
         handler: Callable[[Module, Path, SPStat, User], SourcePackage]
         builder_flag = workplace / ".Version"
         if builder_flag.exists():
+            # 多个模块共用的镜像层只计算和上传一次, 其他模块通过跨仓库挂载获得
+            layer_registry = SharedLayerRegistry()
             version = builder_flag.read_text().strip()
             if version == SMartPackageBuilderVersionFlag.CNB_IMAGE_LAYERS:
                 parse_and_save_cnb_metadata(application, workplace)
-                handler = dispatch_cnb_image_to_registry
+                handler = partial(dispatch_cnb_image_to_registry, layer_registry=layer_registry)
             else:
-                handler = dispatch_slug_image_to_registry
+                handler = partial(dispatch_slug_image_to_registry, layer_registry=layer_registry)
             tasks = [(module, workplace, stat, operator) for module in application.modules.filter(name__in=modules)]
         else:
             tasks = [
@@ -103,10 +117,18 @@ def patch_and_store_package(module: Module, tarball_filepath: Path, stat: SPStat
         return source_package
 
 
-def dispatch_slug_image_to_registry(module: Module, workplace: Path, stat: SPStat, operator: User) -> SourcePackage:
+def dispatch_slug_image_to_registry(
+    module: Module,
+    workplace: Path,
+    stat: SPStat,
+    operator: User,
+    layer_registry: Optional[SharedLayerRegistry] = None,
+) -> SourcePackage:
     """Merge image layer to base image, then push the new image to registry
 
     [deprecated] `dispatch_slug_image_to_registry` is a handler for s-mart which is built with slug-pilot.
+
+    :param layer_registry: the registry of layers shared by the modules in the same package
     """
     logger.debug("dispatching slug-image for module '%s', working at '%s'", module.name, workplace)
 
@@ -119,6 +141,7 @@ def dispatch_slug_image_to_registry(module: Module, workplace: Path, stat: SPSta
     base_image = mgr.get_slugrunner_image_info()
     new_image_info = mgr.get_image_info(tag=stat.version)
 
+    layer_registry = layer_registry or SharedLayerRegistry()
     client = bksmart_settings.registry.get_client()
     image_ref = ImageRef.from_image(
         from_repo=base_image.name,
@@ -126,12 +149,15 @@ def dispatch_slug_image_to_registry(module: Module, workplace: Path, stat: SPSta
         to_repo=new_image_info.name,
         to_reference=new_image_info.tag,
         client=client,
+        diff_id_cache=layer_registry,
     )
-    image_ref.add_layer(LayerRef(local_path=layer_path))
-    image_ref.add_layer(LayerRef(local_path=procfile_path))
+    for layer in layer_registry.get_layers(
+        [layer_path, procfile_path], new_image_info.name, client, max_workers=None if _PARALLEL_PATCHING else 1
+    ):
+        image_ref.add_layer(layer)
 
     logger.debug("Start pushing Image.")
-    manifest = image_ref.push(max_worker=5 if _PARALLEL_PATCHING else 1)
+    manifest = image_ref.push(max_worker=None if _PARALLEL_PATCHING else 1)
 
     image_sha256_signature = remove_prefix(manifest.config.digest, "sha256:")
     policy = SPStoragePolicy(
@@ -147,8 +173,17 @@ def dispatch_slug_image_to_registry(module: Module, workplace: Path, stat: SPSta
     return source_package
 
 
-def dispatch_cnb_image_to_registry(module: Module, workplace: Path, stat: SPStat, operator: User) -> SourcePackage:
-    """Merge image layer to base image, then push the new image to registry"""
+def dispatch_cnb_image_to_registry(
+    module: Module,
+    workplace: Path,
+    stat: SPStat,
+    operator: User,
+    layer_registry: Optional[SharedLayerRegistry] = None,
+) -> SourcePackage:
+    """Merge image layer to base image, then push the new image to registry
+
+    :param layer_registry: the registry of layers shared by the modules in the same package
+    """
     logger.debug("dispatching cnb-image for module '%s', working at '%s'", module.name, workplace)
 
     mgr = SMartImageManager(module)
@@ -162,6 +197,7 @@ def dispatch_cnb_image_to_registry(module: Module, workplace: Path, stat: SPStat
     with generate_temp_dir() as image_tmp_folder:
         uncompress_directory(source_path=image_tarball, target_path=image_tmp_folder)
 
+        layer_registry = layer_registry or SharedLayerRegistry()
         client = bksmart_settings.registry.get_client()
         image_ref = ImageRef.from_image(
             from_repo=base_image.name,
@@ -169,6 +205,7 @@ def dispatch_cnb_image_to_registry(module: Module, workplace: Path, stat: SPStat
             to_repo=new_image_info.name,
             to_reference=new_image_info.tag,
             client=client,
+            diff_id_cache=layer_registry,
         )
 
         tarball_manifest = _construct_exported_image_manifest(image_tmp_folder)
@@ -182,11 +219,16 @@ def dispatch_cnb_image_to_registry(module: Module, workplace: Path, stat: SPStat
             exclude_unset=True, exclude_defaults=True, separators=(",", ":")
         )
 
-        for layer_path in tarball_manifest.layers:
-            image_ref.add_layer(LayerRef(local_path=image_tmp_folder / layer_path))
+        for layer in layer_registry.get_layers(
+            [image_tmp_folder / layer_path for layer_path in tarball_manifest.layers],
+            new_image_info.name,
+            client,
+            max_workers=None if _PARALLEL_PATCHING else 1,
+        ):
+            image_ref.add_layer(layer)
         logger.debug("Start pushing Image.")
 
-        manifest = image_ref.push(max_worker=5 if _PARALLEL_PATCHING else 1)
+        manifest = image_ref.push(max_worker=None if _PARALLEL_PATCHING else 1)
 
     image_sha256_signature = remove_prefix(manifest.config.digest, "sha256:")
     policy = SPStoragePolicy(
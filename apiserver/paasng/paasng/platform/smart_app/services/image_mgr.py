@@ -16,14 +16,27 @@
 # to the current version of the project delivered to anyone in the future.
 
 import logging
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Hashable, List, Optional, TypeVar
+
+from django.core.cache import cache
 
 from paasng.platform.modules.models.module import Module
 from paasng.platform.modules.models.runtime import AppSlugRunner
 from paasng.platform.smart_app.conf import bksmart_settings
+from paasng.utils.moby_distribution import Blob, DockerRegistryV2Client, LayerRef
+from paasng.utils.moby_distribution.registry.resources.blobs import LayerSignWrapper
+from paasng.utils.moby_distribution.registry.resources.image import DEFAULT_PUSH_MAX_WORKERS, DiffIDCache
 from paasng.utils.moby_distribution.registry.utils import NamedImage, parse_image
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class SMartImageManager:
     def __init__(self, module: Module):
@@ -62,3 +75,125 @@ class SMartImageManager:
             name=f"{bksmart_settings.registry.namespace}/{self.module.application.code}/{self.module.name}",
             tag=tag,
         )
+
+
+class LayerDiffIDCache(DiffIDCache):
+    """镜像层 digest -> diff_id 的缓存，保存在 Django cache 中以便在多个进程间共享
+
+    镜像层由 digest 唯一确定，diff_id 不会变化，因此各 S-Mart 应用共用的基础镜像层只需计算一次
+    """
+
+    cache_key_prefix = "bk_paas:smart_app:layer_diff_id"
+    timeout = 60 * 60 * 24 * 30
+
+    def get(self, digest: str) -> Optional[str]:
+        return cache.get(self._make_key(digest))
+
+    def set(self, digest: str, diff_id: str):
+        cache.set(self._make_key(digest), diff_id, timeout=self.timeout)
+
+    def _make_key(self, digest: str) -> str:
+        return f"{self.cache_key_prefix}:{digest}"
+
+
+layer_diff_id_cache = LayerDiffIDCache()
+
+
+@dataclass
+class LayerDigest:
+    """镜像层的摘要信息"""
+
+    digest: str
+    size: int
+    diff_id: str
+
+
+class SharedLayerRegistry(DiffIDCache):
+    """单次分发 S-Mart 包时各模块共享的镜像层登记表
+
+    - 同一个层文件只计算一次 digest 和 diff_id
+    - 相同 digest 的层只上传一次: 由首个使用它的模块上传到自己的镜像仓库, 其他模块推送镜像时通过跨仓库挂载(mount)获得
+    - 同一模块的多个层并发上传, 较大的层优先上传
+
+    登记表同时作为各模块镜像的 DiffIDCache, 添加已上传的层时无需再下载
+    """
+
+    def __init__(self, diff_id_cache: DiffIDCache = layer_diff_id_cache):
+        self._diff_id_cache = diff_id_cache
+        self._diff_ids: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        # 层文件路径 -> 层的摘要信息
+        self._signed: Dict[Hashable, Future] = {}
+        # 层的 digest -> 层所在的镜像仓库
+        self._uploaded: Dict[Hashable, Future] = {}
+
+    def get_layers(
+        self, paths: List[Path], repo: str, client: DockerRegistryV2Client, max_workers: Optional[int] = None
+    ) -> List[LayerRef]:
+        """获取已上传到 registry 的镜像层, 尚未上传的层将并发上传到 repo 中
+
+        :param paths: 层文件的路径
+        :param repo: 当前模块的镜像仓库
+        :param client: registry 客户端
+        :param max_workers: 并发上传的层数量, 默认为 `DEFAULT_PUSH_MAX_WORKERS`
+        :return: 可直接添加到镜像中的层, 与 paths 的顺序一致
+        """
+        max_workers = max(1, min(max_workers or DEFAULT_PUSH_MAX_WORKERS, len(paths)))
+        if max_workers == 1:
+            return [self.get_layer(path, repo, client) for path in paths]
+
+        # 较大的层优先上传, 避免最慢的层被留到最后
+        ordered = sorted(paths, key=lambda p: p.stat().st_size, reverse=True)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {path: executor.submit(self.get_layer, path, repo, client) for path in ordered}
+        return [futures[path].result() for path in paths]
+
+    def get_layer(self, path: Path, repo: str, client: DockerRegistryV2Client) -> LayerRef:
+        """获取已上传到 registry 的镜像层, 如果层尚未上传, 则上传到 repo 中
+
+        :param path: 层文件的路径
+        :param repo: 当前模块的镜像仓库
+        :param client: registry 客户端
+        :return: 可直接添加到镜像中的层, 包含层文件的路径, 在无法跨仓库挂载时从本地文件上传
+        """
+        layer = self._run_once(self._signed, path.resolve(), lambda: self._sign(path))
+        uploaded_repo = self._run_once(self._uploaded, layer.digest, lambda: self._upload(path, layer, repo, client))
+        return LayerRef(repo=uploaded_repo, digest=layer.digest, size=layer.size, exists=True, local_path=path)
+
+    def get(self, digest: str) -> Optional[str]:
+        with self._lock:
+            diff_id = self._diff_ids.get(digest)
+        return diff_id or self._diff_id_cache.get(digest)
+
+    def set(self, digest: str, diff_id: str):
+        with self._lock:
+            self._diff_ids[digest] = diff_id
+        self._diff_id_cache.set(digest, diff_id)
+
+    def _sign(self, path: Path) -> LayerDigest:
+        signer = LayerSignWrapper()
+        with path.open(mode="rb") as fh:
+            shutil.copyfileobj(fh, signer, length=1024 * 1024)
+        layer = LayerDigest(digest=signer.digest(), size=signer.tell(), diff_id=signer.diff_id())
+        self.set(layer.digest, layer.diff_id)
+        return layer
+
+    def _upload(self, path: Path, layer: LayerDigest, repo: str, client: DockerRegistryV2Client) -> str:
+        logger.debug("Uploading layer %s to %s", layer.digest, repo)
+        Blob(repo=repo, digest=layer.digest, local_path=path, client=client).upload()
+        return repo
+
+    def _run_once(self, futures: Dict[Hashable, Future], key: Hashable, func: Callable[[], T]) -> T:
+        """Run `func` only once for the same key, the other callers wait for the result"""
+        with self._lock:
+            future = futures.get(key)
+            is_owner = future is None
+            if future is None:
+                future = futures[key] = Future()
+
+        if is_owner:
+            try:
+                future.set_result(func())
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+
+"""Scan the S-Mart package in a single pass"""
+
+import contextlib
+import hashlib
+import logging
+import os
+import subprocess
+import tarfile
+import tempfile
+import zlib
+from os import PathLike
+from pathlib import Path
+from typing import IO, Callable, Dict, List, Optional, Set
+
+from paasng.platform.sourcectl.exceptions import (
+    PackageInvalidFileFormatError,
+    ReadFileNotFoundError,
+    ReadLinkFileOutsideDirectoryError,
+)
+from paasng.platform.sourcectl.package.client import BinaryTarClient
+
+logger = logging.getLogger(__name__)
+
+# 读取源码包时使用的缓冲区大小
+READ_BUFFER_SIZE = 1024 * 1024
+
+# 解析包内链接时的最大跳转次数, 避免循环链接
+MAX_LINK_HOPS = 40
+
+# 通过管道传给 tar 命令时, tar 无法自动识别压缩格式, 需要根据文件头指定解压参数
+_COMPRESSION_MAGIC_FLAGS = [
+    (b"\x1f\x8b", "-z"),
+    (b"BZh", "-j"),
+    (b"\xfd7zXZ\x00", "-J"),
+]
+
+
+class ScannedPackage:
+    """The result of scanning a package, it provides `list` and `read_file` like the package clients,
+    so the meta info can be read from it without opening the package again.
+
+    :param names: the names of all members in the package, the trailing "/" of directories is removed
+    :param sha256_signature: the sha256 digest of the package file
+    :param size: the size of the package file
+    :param files: the captured files, keyed by the normalized member name
+    :param outside_links: the captured links which point to outside of the package(or are cyclic)
+    :param extracted_dir: the directory where the package has been extracted to
+    """
+
+    def __init__(
+        self,
+        names: List[str],
+        sha256_signature: str,
+        size: int,
+        *,
+        files: Optional[Dict[str, bytes]] = None,
+        outside_links: Optional[Set[str]] = None,
+        extracted_dir: Optional[Path] = None,
+    ):
+        self.names = names
+        self.sha256_signature = sha256_signature
+        self.size = size
+        self.files = files or {}
+        self.outside_links = outside_links or set()
+        self.extracted_dir = extracted_dir
+
+    def list(self) -> List[str]:
+        return self.names
+
+    def read_file(self, filename: str) -> bytes:
+        """Read a file of the package
+
+        :raises ReadFileNotFoundError: The file does not exist or was not captured.
+        :raises ReadLinkFileOutsideDirectoryError: The file is a symbolic link which points to outside.
+        """
+        if self.extracted_dir is None:
+            key = os.path.normpath(filename)
+            if key in self.outside_links:
+                raise ReadLinkFileOutsideDirectoryError(f"{filename} is invalid")
+            try:
+                return self.files[key]
+            except KeyError:
+                raise ReadFileNotFoundError(f"file {filename} not found")
+
+        filepath = self.extracted_dir / filename
+        # Check if the file is a symbolic link and it's inside the directory
+        try:
+            filepath.resolve().relative_to(self.extracted_dir.resolve())
+        except ValueError:
+            raise ReadLinkFileOutsideDirectoryError(f"{filepath} is invalid")
+        if not filepath.is_file():
+            raise ReadFileNotFoundError(f"file {filename} not found")
+        return filepath.read_bytes()
+
+
+class PackageScanner:
+    """Scan a tarball in a single pass: the sha256 digest is computed while reading the file, and the
+    members are either extracted to a directory or streamed through to capture the files needed.
+
+    Reading a large package only once instead of extracting each file, computing the digest and
+    extracting the whole package separately.
+
+    :param path: the path of the tarball
+    :param buffer_size: the size of each read
+    """
+
+    def __init__(self, path: PathLike, buffer_size: int = READ_BUFFER_SIZE):
+        self.path = Path(path)
+        self.buffer_size = buffer_size
+
+    def scan(self, capture: Callable[[str], bool], target_dir: Optional[PathLike] = None) -> ScannedPackage:
+        """Scan the package
+
+        :param capture: whether a member should be captured(by member name), links are resolved to the
+            members they point to
+        :param target_dir: if given, all members will be extracted to this directory in the same pass,
+            and the captured files are read from it
+        :raises PackageInvalidFileFormatError: The file is not a valid tarball.
+        """
+        if target_dir is not None:
+            return self._scan_and_extract(Path(target_dir))
+        return self._scan_stream(capture)
+
+    def _scan_stream(self, capture: Callable[[str], bool]) -> ScannedPackage:
+        names: List[str] = []
+        files: Dict[str, bytes] = {}
+        # 链接(符号链接和硬链接)的名称 -> 指向的成员名称, 指向包外时为 None
+        links: Dict[str, Optional[str]] = {}
+        captured_links: List[str] = []
+        with self.path.open(mode="rb") as fh:
+            reader = _HashingReader(fh)
+            try:
+                with tarfile.open(fileobj=reader, mode="r|*", bufsize=self.buffer_size) as tar:
+                    for member in tar:
+                        names.append(member.name)
+                        if member.issym() or member.islnk():
+                            links[os.path.normpath(member.name)] = _get_link_target(member)
+                            if capture(member.name):
+                                captured_links.append(os.path.normpath(member.name))
+                        elif member.isfile() and capture(member.name):
+                            fileobj = tar.extractfile(member)
+                            if fileobj is not None:
+                                files[os.path.normpath(member.name)] = fileobj.read()
+            except (tarfile.TarError, EOFError, zlib.error) as e:
+                logger.warning("Unable to read the package file, path: %s, error: %s", self.path, e)
+                raise PackageInvalidFileFormatError()
+            # 归档的结束标记之后可能还有填充数据, 需要读完整个文件才能得到正确的签名
+            reader.consume(self.buffer_size)
+
+        # 需要读取的链接, 改为读取其指向的成员
+        targets = {name: _resolve_link(links, name) for name in captured_links}
+        outside_links = {name for name, target in targets.items() if target is None}
+        missing = {target for target in targets.values() if target is not None and target not in files}
+        if missing:
+            # 链接指向的成员未被捕获(名称不匹配或位于链接之前), 再读取一次源码包
+            files.update(self._read_members(missing))
+        for name, target in targets.items():
+            if target is not None and target in files:
+                files[name] = files[target]
+        return ScannedPackage(names, reader.hexdigest(), reader.size, files=files, outside_links=outside_links)
+
+    def _read_members(self, names: Set[str]) -> Dict[str, bytes]:
+        """Read the regular files of the given names"""
+        files: Dict[str, bytes] = {}
+        with tarfile.open(self.path, mode="r|*", bufsize=self.buffer_size) as tar:
+            for member in tar:
+                name = os.path.normpath(member.name)
+                if member.isfile() and name in names:
+                    fileobj = tar.extractfile(member)
+                    if fileobj is not None:
+                        files[name] = fileobj.read()
+        return files
+
+    def _scan_and_extract(self, target_dir: Path) -> ScannedPackage:
+        sha256 = hashlib.sha256()
+        size = 0
+        with (
+            self.path.open(mode="rb") as fh,
+            tempfile.TemporaryFile() as stdout,
+            tempfile.TemporaryFile() as stderr,
+        ):
+            chunk = fh.read(self.buffer_size)
+            # -m, --touch                don't extract file modified time
+            # -v, --verbose              list the extracted members, same as the output of "tar -tf"
+            cmd = ["tar", *self._compression_flags(chunk), "-m", "-xvf", "-", "-C", str(target_dir.absolute())]
+            p = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=stdout, stderr=stderr)
+            pipe: Optional[IO[bytes]] = p.stdin
+            try:
+                while chunk:
+                    sha256.update(chunk)
+                    size += len(chunk)
+                    if pipe is not None:
+                        try:
+                            pipe.write(chunk)
+                        except BrokenPipeError:
+                            # tar 读到归档的结束标记(或出错)后会提前退出, 剩余的数据仍需要计入签名
+                            pipe = None
+                    chunk = fh.read(self.buffer_size)
+            finally:
+                if p.stdin is not None:
+                    with contextlib.suppress(BrokenPipeError):
+                        p.stdin.close()
+                returncode = p.wait()
+
+            if returncode != 0:
+                stderr.seek(0)
+                message = stderr.read().decode(errors="replace")
+                if BinaryTarClient._is_invalid_file_format_error(message):
+                    raise PackageInvalidFileFormatError()
+                raise RuntimeError("Unable to unpackage source, error: %s" % message)
+
+            stdout.seek(0)
+            names = [line.rstrip(os.path.sep) for line in stdout.read().decode().splitlines() if line]
+        return ScannedPackage(names, sha256.hexdigest(), size, extracted_dir=target_dir)
+
+    @staticmethod
+    def _compression_flags(head: bytes) -> List[str]:
+        for magic, flag in _COMPRESSION_MAGIC_FLAGS:
+            if head.startswith(magic):
+                return [flag]
+        return []
+
+
+def _get_link_target(member: tarfile.TarInfo) -> Optional[str]:
+    """Get the normalized name of the member which the link points to, None if it points to outside"""
+    if os.path.isabs(member.linkname):
+        return None
+    if member.issym():
+        target = os.path.normpath(os.path.join(os.path.dirname(member.name), member.linkname))
+    else:
+        # 硬链接指向的是包内成员的名称
+        target = os.path.normpath(member.linkname)
+    if target == os.path.pardir or target.startswith(os.path.pardir + os.path.sep):
+        return None
+    return target
+
+
+def _resolve_link(links: Dict[str, Optional[str]], name: str) -> Optional[str]:
+    """Follow the links to get the final member name, None if any link points to outside or the links
+    are cyclic"""
+    target: Optional[str] = name
+    for _ in range(MAX_LINK_HOPS):
+        if target is None or target not in links:
+            return target
+        target = links[target]
+    return None
+
+
+class _HashingReader:
+    """A file-like object which computes the sha256 digest of the data read through it"""
+
+    def __init__(self, fh: IO[bytes]):
+        self.fh = fh
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.fh.read(size)
+        self._sha256.update(data)
+        self.size += len(data)
+        return data
+
+    def consume(self, buffer_size: int):
+        """Read the rest of the file"""
+        while self.read(buffer_size):
+            pass
+
+    def hexdigest(self) -> str:
+        return self._sha256.hexdigest()
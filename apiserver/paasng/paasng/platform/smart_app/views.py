@@ -144,7 +144,7 @@ class SMartPackageCreatorViewSet(viewsets.ViewSet):
             request.user, slz.validated_data["app_tenant_mode"]
         )
 
-        with generate_temp_dir() as download_dir:
+        with generate_temp_dir() as download_dir, generate_temp_dir() as workplace:
             # Step 1. retrieve package(tarball)
             try:
                 filepath = PreparedSourcePackage(request).retrieve(download_dir)
@@ -156,7 +156,8 @@ class SMartPackageCreatorViewSet(viewsets.ViewSet):
                 raise error_codes.FILE_CORRUPTED_ERROR.f(_("源码文件加载不完整，请重试或联系管理员"))
 
             # Step 2. create application, module
-            stat = SourcePackageStatReader(filepath).read()
+            # 读取源码包信息的同时将其解压到 workplace, 分发时无需再次解压
+            stat = SourcePackageStatReader(filepath).read(extract_to=workplace)
             if not stat.version:
                 raise error_codes.MISSING_VERSION_INFO
 
@@ -200,6 +201,7 @@ class SMartPackageCreatorViewSet(viewsets.ViewSet):
                         stat=stat,
                         operator=request.user,
                         modules=set(handler.app_desc.modules.keys()),
+                        extracted_dir=workplace,
                     )
             except DescriptionValidationError as e:
                 logger.exception("Handling S-Mart Package Exceptions!")
@@ -342,7 +344,7 @@ class SMartPackageManagerViewSet(viewsets.ViewSet, ApplicationCodeInPathMixin, v
         """保存暂存的源码包, 并应用源码包内的应用描述信息."""
         application = self.get_application()
 
-        with generate_temp_dir() as download_dir:
+        with generate_temp_dir() as download_dir, generate_temp_dir() as workplace:
             # Step 1. retrieve package(tarball)
             try:
                 filepath = PreparedSourcePackage(request).retrieve(download_dir)
@@ -350,7 +352,8 @@ class SMartPackageManagerViewSet(viewsets.ViewSet, ApplicationCodeInPathMixin, v
                 logger.exception("S-Mart package does not exist！")
                 raise error_codes.PREPARED_PACKAGE_NOT_FOUND
 
-            stat = SourcePackageStatReader(filepath).read()
+            # 读取源码包信息的同时将其解压到 workplace, 分发时无需再次解压
+            stat = SourcePackageStatReader(filepath).read(extract_to=workplace)
             if stat.sha256_signature != signature:
                 logger.error(
                     "the provided digital signature is inconsistent with "
@@ -388,6 +391,7 @@ class SMartPackageManagerViewSet(viewsets.ViewSet, ApplicationCodeInPathMixin, v
                     stat=stat,
                     operator=request.user,
                     modules=set(handler.app_desc.modules.keys()),
+                    extracted_dir=workplace,
                 )
             except DescriptionValidationError as e:
                 logger.exception("Handling S-Mart Package Exceptions!")
@@ -17,13 +17,18 @@
 
 import logging
 import operator
+import posixpath
+import re
+from contextlib import contextmanager
 from os import PathLike
 from pathlib import Path
 from typing import TYPE_CHECKING, Dict, Generator, Iterator, List, Optional, Tuple
 from urllib.parse import quote, urlparse
 
 from blue_krill.data_types.url import MutableURL
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
+from django.utils.encoding import force_str
 
 from paasng.platform.sourcectl.exceptions import (
     BasicAuthError,
@@ -39,9 +44,15 @@ if TYPE_CHECKING:
     from paasng.platform.sourcectl.models import RepositoryInstance
 
 from paasng.platform.sourcectl.git.client import GitClient, GitCommandExecutionError, Ref
+from paasng.platform.sourcectl.git.mirror import get_git_mirror_cache
 
 logger = logging.getLogger(__name__)
 
+# 读取文件时，最多跟随的符号链接层数
+MAX_SYMLINK_HOPS = 16
+# 版本信息中的 revision 为 commit id 时，读取文件与导出代码都固定使用该 commit
+COMMIT_ID_PATTERN = re.compile(r"[0-9a-f]{7,40}")
+
 
 class BareGitRepoController(BaseGitRepoController):
     """Git 协议仓库控制器"""
@@ -100,26 +111,36 @@ class BareGitRepoController(BaseGitRepoController):
         :param local_path: 本地路径
         :param version_info: 可选，指定版本信息
         """
-        branch = version_info.version_name if version_info else None
-
         local_path = Path(local_path)
+        if settings.GIT_MIRROR_CACHE_ENABLED and version_info:
+            with self._open_mirror(version_info) as (mirror_path, commit_id):
+                self.client.checkout_to_dir(mirror_path, commit_id, local_path)
+            return
+
+        branch = version_info.version_name if version_info else None
         self.client.clone(self.repo_url, local_path, depth=1, branch=branch)
         self.client.clean_meta_info(local_path)
 
     def list_alternative_versions(self) -> List[AlternativeVersion]:
         """尝试直接从远端获取可选的分支信息"""
-        with generate_temp_dir() as temp_dir:
-            # Use "blob-less" cloning for faster speed.
-            #
-            # NOTE: We should consider getting branches and tags using the "ls-remote"
-            # command to avoid any form of cloning. But there is still a problem with
-            # "ls-remote": We can't get commit time and message without cloning the repo.
-            self.client.clone_no_blob(self.repo_url, temp_dir)
-            return sorted(
-                self.transfer_refs_to_versions(self.client.list_refs(temp_dir)),
-                key=operator.attrgetter("last_update"),
-                reverse=True,
-            )
+        if settings.GIT_MIRROR_CACHE_ENABLED:
+            with get_git_mirror_cache().open(self.repo_url) as mirror_path:
+                refs = list(self.client.list_mirror_refs(mirror_path))
+        else:
+            with generate_temp_dir() as temp_dir:
+                # Use "blob-less" cloning for faster speed.
+                #
+                # NOTE: We should consider getting branches and tags using the "ls-remote"
+                # command to avoid any form of cloning. But there is still a problem with
+                # "ls-remote": We can't get commit time and message without cloning the repo.
+                self.client.clone_no_blob(self.repo_url, temp_dir)
+                refs = list(self.client.list_refs(temp_dir))
+
+        return sorted(
+            self.transfer_refs_to_versions(iter(refs)),
+            key=operator.attrgetter("last_update"),
+            reverse=True,
+        )
 
     @staticmethod
     def transfer_refs_to_versions(refs: Iterator[Ref]) -> Generator[AlternativeVersion, None, None]:
@@ -178,6 +199,10 @@ class BareGitRepoController(BaseGitRepoController):
 
     def read_file(self, file_path, version_info: VersionInfo) -> bytes:
         """读取目标文件"""
+        if settings.GIT_MIRROR_CACHE_ENABLED:
+            with self._open_mirror(version_info) as (mirror_path, commit_id):
+                return self._read_file_from_mirror(mirror_path, commit_id, str(file_path))
+
         with generate_temp_dir() as temp_dir:
             self.client.clone(self.repo_url, temp_dir, depth=1, branch=version_info.version_name)
 
@@ -189,3 +214,52 @@ class BareGitRepoController(BaseGitRepoController):
             except ValueError:
                 raise ReadLinkFileOutsideDirectoryError()
             return fp.read_bytes()
+
+    @contextmanager
+    def _open_mirror(self, version_info: VersionInfo) -> Iterator[Tuple[Path, str]]:
+        """打开本地镜像仓库，并将版本信息解析为 commit id
+
+        - 版本信息中包含 commit id 时，读取文件与导出代码都使用该 commit，镜像中没有该 commit 时才增量拉取
+        - 否则总是先增量拉取一次，保证读取到分支（或标签）的最新代码
+        """
+        mirror_cache = get_git_mirror_cache()
+        revision = version_info.revision if COMMIT_ID_PATTERN.fullmatch(version_info.revision or "") else None
+        if revision:
+            with mirror_cache.open(self.repo_url) as mirror_path:
+                if commit_id := self.client.resolve_commit(mirror_path, revision):
+                    yield mirror_path, commit_id
+                    return
+
+        with mirror_cache.open(self.repo_url, max_age=0) as mirror_path:
+            commit_id = self.client.resolve_commit(mirror_path, revision) if revision else None
+            yield mirror_path, commit_id or self._resolve_version(mirror_path, version_info)
+
+    def _resolve_version(self, mirror_path: Path, version_info: VersionInfo) -> str:
+        """将版本信息解析为镜像仓库中的 commit id，与 "git clone --branch" 一致，分支优先于同名标签"""
+        name = version_info.version_name
+        candidates = [f"refs/heads/{name}", f"refs/tags/{name}"]
+        if version_info.version_type == "tag":
+            candidates.reverse()
+
+        for rev in candidates:
+            if commit_id := self.client.resolve_commit(mirror_path, rev):
+                return commit_id
+        raise GitCommandExecutionError(f"Remote branch or tag {name} not found in the repository")
+
+    def _read_file_from_mirror(self, mirror_path: Path, commit_id: str, file_path: str) -> bytes:
+        """从镜像仓库中读取文件内容，符号链接只允许指向仓库内的文件"""
+        path = posixpath.normpath(file_path)
+        for _ in range(MAX_SYMLINK_HOPS):
+            if posixpath.isabs(path) or path == ".." or path.startswith("../"):
+                raise ReadLinkFileOutsideDirectoryError()
+
+            entry = self.client.get_tree_entry(mirror_path, commit_id, path)
+            if not entry or entry.type != "blob":
+                raise ReadFileNotFoundError(f"{file_path} not exists.")
+
+            content = self.client.read_blob(mirror_path, entry.object_id)
+            if not entry.is_symlink:
+                return content
+            # 符号链接的内容为其指向的路径，相对于链接所在目录
+            path = posixpath.normpath(posixpath.join(posixpath.dirname(path), force_str(content)))
+        raise ReadFileNotFoundError(f"{file_path} not exists, too many levels of symbolic links.")
@@ -20,6 +20,7 @@ import os
 import re
 import shutil
 import subprocess
+import tempfile
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
@@ -107,21 +108,81 @@ class GitCloneCommand(GitCommand):
         """Get sensitive texts in the current command, the texts must not be displayed
         to the user or written to the logs.
         """
-        netloc = self.repository.netloc
-        if not netloc:
-            return []
+        return get_url_sensitive_texts(self.repository)
 
-        user_info, have_info, _ = netloc.rpartition("@")
-        if not have_info:
-            return []
-        # Consider the user info as sensitive because it contains password
-        return [user_info + "@"]
+
+class GitFetchCommand(GitCommand):
+    def __init__(
+        self,
+        git_filepath: str,
+        repository: MutableURL,
+        *,
+        refspecs: Optional[List[str]] = None,
+        args: Optional[List[str]] = None,
+        cwd: str = "",
+        envs: Optional[Dict] = None,
+    ):
+        """
+        Name
+               git-fetch - Download objects and refs from another repository
+        SYNOPSIS
+               git fetch [<options>] <repository> [<refspec>...]
+        """
+        super().__init__(git_filepath, "fetch", args, cwd, envs)
+        self.repository = repository
+        self.refspecs = refspecs or []
+
+    def to_cmd(self, obscure: bool = False) -> List[str]:
+        cmd = super().to_cmd(obscure=obscure)
+        cmd.append(str(self.repository.obscure()) if obscure else str(self.repository))
+        cmd.extend(self.refspecs)
+        return cmd
+
+    def get_sensitive_texts(self) -> List[str]:
+        """Get sensitive texts in the current command, the texts must not be displayed
+        to the user or written to the logs.
+        """
+        return get_url_sensitive_texts(self.repository)
+
+
+def get_url_sensitive_texts(url: MutableURL) -> List[str]:
+    """Get the sensitive texts(the user info which contains password) in the repository url."""
+    netloc = url.netloc
+    if not netloc:
+        return []
+
+    user_info, have_info, _ = netloc.rpartition("@")
+    if not have_info:
+        return []
+    # Consider the user info as sensitive because it contains password
+    return [user_info + "@"]
+
+
+@dataclass
+class TreeEntry:
+    """An entry in the git tree object, as printed by "git ls-tree"."""
+
+    mode: str
+    type: str
+    object_id: str
+    path: str
+
+    @property
+    def is_symlink(self) -> bool:
+        return self.mode == "120000"
 
 
 class GitClient:
     """Git 客户端"""
 
     COMMIT_INFO_REGEX = re.compile(r"(?P<ts>(\d+))/(?P<msg>[\S\s]*)", re.M)
+    # 镜像仓库中同步的引用，分支与标签均与远端保持一致
+    MIRROR_REFSPECS = ["+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*"]
+    # 使用 "\x00" 分隔字段，"\x1e" 分隔记录（提交信息中可能包含换行）。带 "*" 的字段为附注标签所指向的提交的信息
+    MIRROR_REF_FORMAT = (
+        "%(objectname)%00%(*objectname)%00%(refname)%00%(committerdate:unix)%00%(*committerdate:unix)"
+        "%00%(contents)%00%(*contents)%1e"
+    )
     META_GIT_DIR = ".git"
     _git_filepath = "git"
     _default_timeout = 600
@@ -179,6 +240,145 @@ class GitClient:
         )
         return self.run(command)
 
+    def init_bare_repo(self, path: Path) -> str:
+        """初始化 git 裸仓库"""
+        command = GitCommand(
+            git_filepath=self._git_filepath, command="init", args=["--bare", "--quiet"], cwd=str(path)
+        )
+        return self.run(command)
+
+    def fetch_mirror(self, url: Union[str, MutableURL], path: Path) -> str:
+        """将远端仓库的所有分支与标签增量同步到本地裸仓库中，已在远端删除的分支与标签也会被清理。
+
+        仓库地址只通过命令行参数传递，不会写入本地仓库的配置以及 FETCH_HEAD 中，避免认证信息被持久化到磁盘上。
+
+        :param url: 仓库地址
+        :param path: 本地裸仓库路径
+        :return: 返回 fetch 命令执行结果
+        """
+        command = GitFetchCommand(
+            git_filepath=self._git_filepath,
+            repository=MutableURL(url),
+            refspecs=self.MIRROR_REFSPECS,
+            args=["--prune", "--quiet", "--no-write-fetch-head"],
+            cwd=str(path),
+        )
+        return self.run(command)
+
+    def list_mirror_refs(self, path: Path) -> Generator[Ref, None, None]:
+        """获取镜像裸仓库中的所有分支和标签，只需执行一次命令即可获得所有引用的提交信息。
+
+        :param path: 本地裸仓库路径
+        """
+        command = GitCommand(
+            git_filepath=self._git_filepath,
+            command="for-each-ref",
+            args=[f"--format={self.MIRROR_REF_FORMAT}", "refs/heads/", "refs/tags/"],
+            cwd=str(path),
+        )
+        output = force_str(self.run_raw(command))
+        for raw_record in output.split("\x1e"):
+            record = raw_record.lstrip("\n")
+            if not record:
+                continue
+
+            try:
+                object_id, peeled_id, ref, ts, peeled_ts, message, peeled_message = record.split("\x00")
+            except ValueError:
+                logger.warning('Failed to parse git ref from for-each-ref output, record: "%s"', record)
+                continue
+
+            parsed_obj = self.parse_ref(ref, branch_prefix="refs/heads/")
+            if not parsed_obj:
+                continue
+            # 标签可能指向非提交对象（如 tree），此时无法获取到提交时间，直接忽略
+            if not (peeled_ts or ts):
+                logger.warning("failed to get commit info from %s", ref)
+                continue
+
+            yield Ref(
+                # 附注标签使用其指向的提交的信息
+                commit_id=peeled_id or object_id,
+                type=parsed_obj[0],
+                name=parsed_obj[1],
+                commit_time=datetime.fromtimestamp(int(peeled_ts or ts)),
+                message=peeled_message if peeled_id else message,
+            )
+
+    def resolve_commit(self, path: Path, rev: str) -> Optional[str]:
+        """将分支、标签等版本号解析为 commit id，版本不存在时返回 None
+
+        :param path: Git 仓库所在的路径。
+        :param rev: 版本号，如 "refs/heads/master"
+        """
+        command = GitCommand(
+            git_filepath=self._git_filepath,
+            command="rev-parse",
+            args=["--verify", "--quiet", f"{rev}^{{commit}}"],
+            cwd=str(path),
+        )
+        try:
+            return self.run(command).strip()
+        except GitCommandExecutionError:
+            return None
+
+    def get_tree_entry(self, path: Path, rev: str, file_path: str) -> Optional[TreeEntry]:
+        """获取指定版本中某个路径的树对象条目，路径不存在时返回 None
+
+        :param path: Git 仓库所在的路径。
+        :param rev: 版本号
+        :param file_path: 相对于仓库根目录的路径
+        """
+        command = GitCommand(
+            git_filepath=self._git_filepath,
+            command="ls-tree",
+            args=["--full-tree", "-z", rev, "--", file_path],
+            cwd=str(path),
+        )
+        for record in force_str(self.run_raw(command)).split("\x00"):
+            if not record:
+                continue
+            meta, _, entry_path = record.partition("\t")
+            mode, type_, object_id = meta.split()
+            # 目录会被展开为其包含的条目，只返回与路径完全匹配的条目
+            if entry_path == file_path:
+                return TreeEntry(mode=mode, type=type_, object_id=object_id, path=entry_path)
+        return None
+
+    def read_blob(self, path: Path, object_id: str) -> bytes:
+        """读取 blob 对象的原始内容
+
+        :param path: Git 仓库所在的路径。
+        :param object_id: blob 对象 id
+        """
+        command = GitCommand(
+            git_filepath=self._git_filepath, command="cat-file", args=["blob", object_id], cwd=str(path)
+        )
+        return self.run_raw(command)
+
+    def checkout_to_dir(self, path: Path, rev: str, target: Path) -> str:
+        """将（裸）仓库中指定版本的所有文件检出到目标目录，目标目录中不会包含 git 元信息。
+
+        使用临时的索引文件，不会修改仓库中的 HEAD 和索引，因此多个检出操作可以同时进行。
+
+        :param path: Git 仓库所在的路径。
+        :param rev: 版本号
+        :param target: 检出的目标目录
+        """
+        with tempfile.TemporaryDirectory() as index_dir:
+            command = GitCommand(
+                git_filepath=self._git_filepath,
+                command="checkout",
+                args=["--force", rev, "--", "."],
+                cwd=str(path),
+                envs={
+                    "GIT_DIR": str(path),
+                    "GIT_WORK_TREE": str(target),
+                    "GIT_INDEX_FILE": os.path.join(index_dir, "index"),
+                },
+            )
+            return self.run(command)
+
     def list_remote(self, url: Union[str, MutableURL]) -> List[Tuple[str, str]]:
         """通过 ls-remote 命令，直接获取远端仓库的 branch 与 tag 等信息。该命令不依赖本地文件系统。
 
@@ -301,14 +501,15 @@ class GitClient:
         return {"time": datetime.fromtimestamp(int(matched.groupdict()["ts"])), "message": matched.groupdict()["msg"]}
 
     @staticmethod
-    def parse_ref(ref: str) -> Optional[Tuple[str, str]]:
+    def parse_ref(ref: str, branch_prefix: str = "refs/remotes/origin/") -> Optional[Tuple[str, str]]:
         """解析 ref 字符串，获取分支与标签。
 
+        :param branch_prefix: 分支引用的前缀，镜像裸仓库中的分支前缀为 "refs/heads/"
         :return: 包含类型（branch/tag）与值的元组。
         """
         prefixes = [
             ("tag", "refs/tags/"),
-            ("branch", "refs/remotes/origin/"),
+            ("branch", branch_prefix),
         ]
         # Ignore HEAD as branch
         invalid_values = {"HEAD"}
@@ -327,6 +528,18 @@ class GitClient:
         :param int success_code: 期待的执行成功的返回码
         :return: 返回结果
         """
+        return force_str(self._execute(command, success_code, merge_stderr=True))
+
+    def run_raw(self, command: GitCommand, success_code: int = 0) -> bytes:
+        """
+        执行 git 命令，返回标准输出的原始内容（不包含标准错误），适用于读取文件内容等场景
+        :param GitCommand command: Git 命令封装
+        :param int success_code: 期待的执行成功的返回码
+        :return: 标准输出的原始内容
+        """
+        return self._execute(command, success_code, merge_stderr=False)
+
+    def _execute(self, command: GitCommand, success_code: int, merge_stderr: bool) -> bytes:
         environment_variables = os.environ.copy()
         environment_variables.update(command.envs or {})
         environment_variables["LANG"] = "en_US.UTF-8"
@@ -334,13 +547,13 @@ class GitClient:
         with subprocess.Popen(
             command.to_cmd(),
             stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
+            stderr=subprocess.STDOUT if merge_stderr else subprocess.PIPE,
             env=environment_variables,
             cwd=command.cwd,
         ) as proc:
             timeout = False
             try:
-                stdout, _ = proc.communicate(timeout=self._default_timeout)
+                stdout, stderr = proc.communicate(timeout=self._default_timeout)
             except subprocess.TimeoutExpired:
                 proc.kill()
                 timeout = True
@@ -351,10 +564,10 @@ class GitClient:
                     f"Command failed: cmd <{command}> execution timeout({self._default_timeout}s)"
                 )
 
-            str_stdout = force_str(stdout)
             if proc.returncode != success_code:
-                raise self.err_stdout_as_exc(str_stdout, command, proc.returncode)
-            return str_stdout
+                output = force_str(stdout) if merge_stderr else force_str(stderr)
+                raise self.err_stdout_as_exc(output, command, proc.returncode)
+            return stdout
 
     @staticmethod
     def err_stdout_as_exc(stdout: str, command: GitCommand, return_code: int) -> GitCommandExecutionError:
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+"""Manage the local bare mirrors of remote git repositories.
+
+Cloning a repository for every file read, version listing or deployment is slow for
+big repositories. The mirrors are created by a full fetch for the first time and
+updated incrementally afterwards, all reads are served by the local mirror.
+"""
+
+import fcntl
+import hashlib
+import logging
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Collection, Iterator, Optional, Union
+
+from blue_krill.data_types.url import MutableURL
+from django.conf import settings
+
+from paasng.platform.sourcectl.git.client import GitClient
+
+logger = logging.getLogger(__name__)
+
+
+class GitMirrorCache:
+    """本地 Git 镜像仓库缓存
+
+    - 每个仓库地址对应一个本地裸仓库，首次使用时完整拉取，之后仅增量拉取
+    - 同一仓库的拉取操作通过文件锁互斥（跨进程生效），读取操作之间可以并发进行
+    - 缓存总大小超过上限时，按最近使用时间淘汰最久未使用的镜像
+
+    :param root_dir: 存放所有镜像仓库的目录
+    :param max_size: 所有镜像仓库的总大小上限，单位：字节
+    :param fetch_interval: 两次增量拉取的最小间隔，单位：秒。在该时间内重复使用镜像时，不会再访问远端仓库
+    """
+
+    # 镜像拉取成功后才会写入该文件，文件的修改时间即为最近一次拉取的时间
+    FETCHED_MARK_FILENAME = "paas_fetched_at"
+
+    def __init__(
+        self,
+        root_dir: Union[str, Path],
+        max_size: int,
+        fetch_interval: float,
+        client: Optional[GitClient] = None,
+    ):
+        self.root_dir = Path(root_dir)
+        self.max_size = max_size
+        self.fetch_interval = fetch_interval
+        self.client = client or GitClient()
+
+    @contextmanager
+    def open(self, repo_url: MutableURL, max_age: Optional[float] = None) -> Iterator[Path]:
+        """获取仓库的本地镜像，镜像不存在时创建，超过 max_age 未拉取时增量拉取。在上下文中镜像不会被修改或淘汰。
+
+        :param repo_url: 仓库地址（可包含认证信息）
+        :param max_age: 镜像距上次拉取的最大时长，单位：秒，默认使用 fetch_interval，传入 0 表示总是拉取
+        :return: 本地镜像仓库路径
+        """
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        path = self.get_mirror_path(repo_url)
+        max_age = self.fetch_interval if max_age is None else max_age
+
+        # 镜像足够新时只需持有共享锁，不会等待其他正在读取（如导出文件）的操作
+        with self._lock(path, shared=True):
+            if self._is_fresh(path, max_age):
+                try:
+                    yield path
+                finally:
+                    # 使用目录的修改时间记录最近使用时间，用于 LRU 淘汰
+                    os.utime(path)
+                return
+
+        # 需要拉取时才获取排他锁，获取锁之后会再次检查镜像是否已被其他操作拉取
+        with self._lock(path) as lock_fd:
+            updated = self._sync(repo_url, path, max_age)
+            # 同步完成后降级为共享锁，允许其他读取操作并发进行
+            fcntl.flock(lock_fd, fcntl.LOCK_SH)
+            try:
+                yield path
+            finally:
+                os.utime(path)
+
+        if updated:
+            self.evict(exclude=[path])
+
+    def get_mirror_path(self, repo_url: MutableURL) -> Path:
+        """获取仓库对应的镜像路径。
+
+        地址中的认证信息也参与计算，不同的凭证使用不同的镜像，避免无权限的用户读取到其他凭证拉取的内容。
+        """
+        key = hashlib.sha256(str(repo_url).encode()).hexdigest()
+        return self.root_dir / key
+
+    def evict(self, exclude: Collection[Path] = ()):
+        """按最近使用时间淘汰镜像，直到总大小不超过上限，正在使用中的镜像会被跳过。
+
+        :param exclude: 不参与淘汰的镜像路径
+        """
+        candidates = []
+        total_size = 0
+        for path in self.root_dir.iterdir():
+            if not path.is_dir():
+                continue
+            try:
+                size = _get_dir_size(path)
+                used_at = path.stat().st_mtime
+            except FileNotFoundError:
+                # 已被其他进程淘汰
+                continue
+
+            total_size += size
+            if path not in exclude:
+                candidates.append((used_at, size, path))
+
+        for _, size, path in sorted(candidates):
+            if total_size <= self.max_size:
+                break
+            with self._lock(path, blocking=False) as lock_fd:
+                if lock_fd is None:
+                    continue
+                logger.info("Evicting git mirror %s, size: %s", path, size)
+                shutil.rmtree(path, ignore_errors=True)
+                # 在持有锁时删除锁文件，等待该锁的其他操作会发现锁文件已失效并重新获取
+                _remove_file(self._get_lock_path(path))
+                total_size -= size
+
+    def _sync(self, repo_url: MutableURL, path: Path, max_age: float) -> bool:
+        """创建或增量拉取镜像，需在持有排他锁时调用
+
+        :return: 是否访问了远端仓库
+        """
+        if self._is_fresh(path, max_age):
+            return False
+
+        mark = path / self.FETCHED_MARK_FILENAME
+        if mark.exists():
+            self.client.fetch_mirror(repo_url, path)
+            mark.touch()
+            return True
+
+        # 镜像不存在，或上次创建时中途失败，重新完整拉取
+        shutil.rmtree(path, ignore_errors=True)
+        path.mkdir()
+        try:
+            self.client.init_bare_repo(path)
+            self.client.fetch_mirror(repo_url, path)
+        except Exception:
+            shutil.rmtree(path, ignore_errors=True)
+            raise
+        mark.touch()
+        return True
+
+    def _is_fresh(self, path: Path, max_age: float) -> bool:
+        """镜像是否已创建完成，且距上次拉取未超过 max_age"""
+        try:
+            fetched_at = (path / self.FETCHED_MARK_FILENAME).stat().st_mtime
+        except FileNotFoundError:
+            return False
+        return time.time() - fetched_at < max_age
+
+    @staticmethod
+    def _get_lock_path(path: Path) -> str:
+        return f"{path}.lock"
+
+    @contextmanager
+    def _lock(self, path: Path, shared: bool = False, blocking: bool = True) -> Iterator[Optional[int]]:
+        """获取镜像的文件锁，锁文件存放在镜像目录之外，在淘汰镜像时一并删除
+
+        :param shared: 为 True 时获取共享锁，否则获取排他锁
+        :param blocking: 为 False 时，若锁已被占用则立即返回 None
+        """
+        lock_path = self._get_lock_path(path)
+        operation = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        if not blocking:
+            operation |= fcntl.LOCK_NB
+
+        while True:
+            fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, operation)
+            except BlockingIOError:
+                os.close(fd)
+                yield None
+                return
+            # 锁文件可能在等待期间随镜像一起被淘汰，此时获得的是已删除文件上的锁，需要重新获取
+            if _is_same_file(fd, lock_path):
+                break
+            os.close(fd)
+
+        try:
+            yield fd
+        finally:
+            os.close(fd)
+
+
+def _get_dir_size(path: Path) -> int:
+    """Get the total size of the files in the directory."""
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except FileNotFoundError:
+                continue
+    return total
+
+
+def _is_same_file(fd: int, path: str) -> bool:
+    """Check whether the opened file is still the one at the path."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return False
+    fd_stat = os.fstat(fd)
+    return (stat.st_dev, stat.st_ino) == (fd_stat.st_dev, fd_stat.st_ino)
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def get_git_mirror_cache() -> GitMirrorCache:
+    """Get the mirror cache object configured by settings."""
+    return GitMirrorCache(
+        root_dir=settings.GIT_MIRROR_CACHE_DIR,
+        max_size=settings.GIT_MIRROR_CACHE_MAX_SIZE_MB * 1024 * 1024,
+        fetch_interval=settings.GIT_MIRROR_FETCH_INTERVAL,
+    )
@@ -15,16 +15,22 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import contextlib
 import logging
 import os
+import queue
 import shutil
 import subprocess
 import tarfile
 import tempfile
+import threading
 from contextlib import contextmanager
 from pathlib import Path, PurePath, PureWindowsPath
-from typing import Callable, ContextManager, Iterator, List, Optional, Tuple, Union
+from typing import BinaryIO, Callable, ContextManager, Iterator, List, Optional, Tuple, Union
 
+from blue_krill.storages.blobstore.base import BlobStore
+
+from paasng.utils.parallel_gzip import ParallelGzipWriter
 from paasng.utils.patternmatcher import Pattern
 
 logger = logging.getLogger(__name__)
@@ -48,7 +54,10 @@ class DockerIgnore:
             invert = pattern_str.startswith("!")
             if invert:
                 pattern_str_new = pattern_str[1:]
-            self.patterns.append((invert, Pattern(pattern_str_new)))
+            pattern = Pattern(pattern_str_new)
+            # Compile the pattern in advance, avoid doing it when matching the first file
+            pattern.compile(os.sep)
+            self.patterns.append((invert, pattern))
 
     def should_ignore(self, filename: str) -> bool:
         """detect whether to ignore given filename,
@@ -125,24 +134,171 @@ def compress_directory_ext(
     if should_ignore is None:
         return compress_directory(source_path, target_path)
 
-    def compress_core(tarball: tarfile.TarFile, p: Path):
-        arcname = str(p.relative_to(source_path))
-        if should_ignore and should_ignore(arcname):
+    with open(target_path, "wb") as fp, ParallelGzipWriter(fp) as gz:
+        write_tarball(source_path, gz, should_ignore=should_ignore)
+    return None
+
+
+def write_tarball(source_path: Union[str, Path], fileobj: BinaryIO, should_ignore: Optional[ExcludeChecker] = None):
+    """Write the files in a directory to `fileobj` as an uncompressed tar stream.
+
+    The behavior is the same as the tar command in `compress_directory`: ".svn" directories are
+    excluded, symbolic links are archived as links and never followed.
+
+    :param source_path: dir to be archived
+    :param fileobj: the writable file object
+    :param should_ignore: an optional checker, the directory will be skipped as a whole if it's ignored
+    """
+    source_path = str(source_path)
+    with tarfile.open(fileobj=fileobj, mode="w|") as tf:
+        for dirpath, dirnames, filenames in os.walk(source_path):
+            rel_dir = os.path.relpath(dirpath, source_path)
+            prefix = "" if rel_dir == "." else rel_dir + "/"
+
+            # Walk in sorted order so the output is stable
+            kept_dirnames = []
+            for name in sorted(dirnames):
+                arcname = prefix + name
+                if name == ".svn" or (should_ignore and should_ignore(arcname)):
+                    continue
+                path = os.path.join(dirpath, name)
+                tf.add(path, arcname, recursive=False)
+                if not os.path.islink(path):
+                    kept_dirnames.append(name)
+            dirnames[:] = kept_dirnames
+
+            for name in sorted(filenames):
+                arcname = prefix + name
+                if should_ignore and should_ignore(arcname):
+                    continue
+                tf.add(os.path.join(dirpath, name), arcname, recursive=False)
+
+
+class StreamPipe:
+    """An in-memory pipe which connects a writer thread to a reader thread, the amount of buffered data
+    is limited. The reader gets the writer's exception instead of EOF when the writer failed, so that a
+    broken stream will never be treated as complete.
+
+    :param max_chunks: the max number of chunks in the buffer, the writer blocks when it's full
+    """
+
+    _EOF = object()
+
+    def __init__(self, max_chunks: int = 16):
+        self._queue: queue.Queue = queue.Queue(maxsize=max_chunks)
+        self._buffer = bytearray()
+        self._eof = False
+        self._error: Optional[BaseException] = None
+        self._aborted = threading.Event()
+        self.bytes_written = 0
+
+    # Writer side
+
+    def write(self, data: bytes) -> int:
+        if not data:
+            return 0
+        self._put(bytes(data))
+        self.bytes_written += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self, error: Optional[BaseException] = None):
+        """Finish writing, the reader will get `error` if given."""
+        self._put((self._EOF, error))
+
+    def _put(self, item):
+        while not self._aborted.is_set():
+            try:
+                self._queue.put(item, timeout=1)
+            except queue.Full:
+                continue
             return
-        if p.is_dir():
-            for sub in p.iterdir():
-                compress_core(tarball, sub)
-        else:
-            tarball.add(p, arcname)
+        raise BrokenPipeError("the reader of the pipe has been aborted")
+
+    # Reader side
+
+    def read(self, size: int = -1) -> bytes:
+        """Read up to `size` bytes, only returns less bytes when the stream is ended."""
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            item = self._queue.get()
+            if isinstance(item, tuple) and item[0] is self._EOF:
+                self._eof = True
+                self._error = item[1]
+            else:
+                self._buffer += item
+
+        if self._error:
+            raise self._error
+
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def readable(self) -> bool:
+        return True
+
+    def __iter__(self) -> Iterator[bytes]:
+        while chunk := self.read(64 * 1024):
+            yield chunk
+
+    def abort(self):
+        """Stop reading, the writer will get `BrokenPipeError` when writing more data."""
+        self._aborted.set()
+
+    @property
+    def completed(self) -> bool:
+        """Whether the reader has read to the end of the stream successfully."""
+        return self._eof and not self._error and not self._buffer
+
+
+def upload_directory_as_tarball(
+    source_path: Union[str, Path],
+    store: BlobStore,
+    key: str,
+    should_ignore: Optional[ExcludeChecker] = None,
+    threads: Optional[int] = None,
+) -> int:
+    """Compress a directory using tar+gz and upload it to the blob store, the compressing and uploading
+    are performed at the same time, no temporary file is created.
+
+    :param source_path: dir to be compressed
+    :param store: the blob store, the stream is uploaded by multipart upload on S3, chunked
+        transfer encoding on BKRepo.
+    :param key: the key of the uploaded tarball
+    :param should_ignore: an optional checker the check whether compress a file in source_path
+    :param threads: the number of threads for compressing, defaults to the number of CPUs
+    :return: the size of the uploaded tarball
+    """
+    pipe = StreamPipe()
+
+    def produce():
+        try:
+            with ParallelGzipWriter(pipe, threads=threads) as gz:  # type: ignore[arg-type]
+                write_tarball(source_path, gz, should_ignore=should_ignore)  # type: ignore[arg-type]
+        except BaseException as e:
+            logger.warning("Failed to compress the directory %s: %s", source_path, e)
+            # The pipe may be aborted by the reader already, ignore the error
+            with contextlib.suppress(BrokenPipeError):
+                pipe.close(error=e)
+            return
+        pipe.close()
 
+    producer = threading.Thread(target=produce, name="source-tarball-producer", daemon=True)
+    producer.start()
     try:
-        from gzip import GzipFile
-    except ImportError:
-        raise tarfile.CompressionError("gzip module is not available")
+        store.upload_fileobj(pipe, key=key)  # type: ignore[arg-type]
+    finally:
+        # Unblock the producer if the upload stopped before reaching the end of the stream
+        pipe.abort()
+        producer.join()
 
-    with GzipFile(target_path, mode="w", mtime=0) as gz, tarfile.open(fileobj=gz, mode="w|") as tf:  # type: ignore
-        compress_core(tf, source_path)
-        return None
+    if not pipe.completed:
+        raise RuntimeError(f"The upload of {key} finished before the end of the source tarball")
+    return pipe.bytes_written
 
 
 def compress_directory(source_path, target_path):
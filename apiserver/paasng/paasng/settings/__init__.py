@@ -44,6 +44,7 @@ import copy
 import os
 import ssl
 import sys
+import tempfile
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
@@ -695,6 +696,19 @@ BK_IAM_SKIP = settings.get("BK_IAM_SKIP", False)
 # 退出用户组同理，因此在退出的一定时间内，需要先 exclude 掉避免退出后还可以看到应用的问题
 IAM_PERM_EFFECTIVE_TIMEDELTA = settings.get("BK_IAM_PERM_EFFECTIVE_TIMEDELTA", 5 * 60)
 
+# 用户在权限中心的策略（转换为 Django 过滤条件后）的缓存时间（单位：秒），设置为 0 表示不缓存
+# 用户的应用角色变更时缓存会被主动清理，因此该值只影响权限中心侧直接变更策略后的生效时间
+IAM_POLICY_FILTER_CACHE_TTL = settings.get("IAM_POLICY_FILTER_CACHE_TTL", 15)
+# 进程内缓存的用户策略条目数上限
+IAM_POLICY_FILTER_LOCAL_CACHE_SIZE = settings.get("IAM_POLICY_FILTER_LOCAL_CACHE_SIZE", 1024)
+# 是否将用户有权限的应用策略展开为应用 Code 列表后再缓存，适用于策略表达式较为复杂、查询较慢的场景
+IAM_APP_FILTER_MATERIALIZE_CODES = settings.get("IAM_APP_FILTER_MATERIALIZE_CODES", False)
+# 应用用户组成员的缓存时间（单位：秒），设置为 0 表示不缓存
+# 通过平台增删成员时缓存会被主动清理，因此该值只影响在权限中心侧直接变更成员（如审批加入用户组）后的生效时间
+IAM_GROUP_MEMBERS_CACHE_TTL = settings.get("IAM_GROUP_MEMBERS_CACHE_TTL", 60)
+# 并发从权限中心拉取用户组成员的最大线程数
+IAM_GROUP_MEMBERS_FETCH_CONCURRENCY = settings.get("IAM_GROUP_MEMBERS_FETCH_CONCURRENCY", 8)
+
 # 蓝鲸的云 API 地址，用于内置环境变量的配置项
 BK_COMPONENT_API_URL = settings.get("BK_COMPONENT_API_URL", "")
 # 蓝鲸的组件 API 地址，网关 SDK 依赖该配置项（该项值与 BK_COMPONENT_API_URL 一致）
@@ -1062,6 +1076,13 @@ BLOBSTORE_BUCKET_APP_SOURCE = settings.get("BLOBSTORE_BUCKET_APP_SOURCE", "bkpaa
 BLOBSTORE_BUCKET_TEMPLATES = settings.get("BLOBSTORE_BUCKET_TEMPLATES", "bkpaas3-apps-tmpls")
 # Bucket 名称：存储源码包
 BLOBSTORE_BUCKET_AP_PACKAGES = settings.get("BLOBSTORE_BUCKET_AP_PACKAGES", "bkpaas3-source-packages")
+# Bucket 名称：存储已归档的部署日志
+BLOBSTORE_BUCKET_DEPLOY_LOGS = settings.get("BLOBSTORE_BUCKET_DEPLOY_LOGS", BLOBSTORE_BUCKET_APP_SOURCE)
+
+# 是否在部署结束后将部署日志归档至对象存储（归档后数据库中的日志行记录会被删除）
+ENABLE_DEPLOY_LOG_ARCHIVE = settings.get("ENABLE_DEPLOY_LOG_ARCHIVE", False)
+# 部署结束后延迟多久（秒）执行归档，避免仍在写入的日志被遗漏
+DEPLOY_LOG_ARCHIVE_DELAY = settings.get("DEPLOY_LOG_ARCHIVE_DELAY", 10 * 60)
 
 # S-Mart 应用默认增强服务配置信息
 SMART_APP_DEFAULT_SERVICES_CONFIG = settings.get("SMART_APP_DEFAULT_SERVICES_CONFIG", {"mysql": {}})
@@ -1086,6 +1107,14 @@ ENGINE_PROC_REPLICAS_BY_TYPE = {
 # 如果应用源码打包后超过该尺寸，打印警告信息
 ENGINE_APP_SOURCE_SIZE_WARNING_THRESHOLD_MB = 300
 
+# 是否边压缩边上传应用源码包（S3 使用分片上传），关闭后先压缩到临时文件再上传
+ENGINE_SOURCE_PACKAGE_STREAMING_UPLOAD = settings.get("ENGINE_SOURCE_PACKAGE_STREAMING_UPLOAD", True)
+# 压缩源码包使用的线程数，为 0 时使用 CPU 核数
+ENGINE_SOURCE_PACKAGE_COMPRESS_THREADS = settings.get("ENGINE_SOURCE_PACKAGE_COMPRESS_THREADS", 0)
+
+# 是否复用已上传的源码包：同一模块再次部署相同的源码版本时（如部署到生产环境），直接使用已上传的源码包
+ENABLE_SOURCE_PACKAGE_CACHE = settings.get("ENABLE_SOURCE_PACKAGE_CACHE", True)
+
 # 可恢复下架操作的最长时限
 ENGINE_OFFLINE_RESUMABLE_SECS = 60
 
@@ -1117,6 +1146,22 @@ SERVICES_VENDOR_CONFIGS: Dict[str, Dict] = settings.get("SERVICES_VENDOR_CONFIGS
 
 # 后端轮询任务：刷新远程增强服务信息 - 默认轮询间隔
 REMOTE_SERVICES_UPDATE_INTERVAL_MINUTES = 5
+# 刷新远程增强服务信息时，并发请求各服务端点的最大线程数
+REMOTE_SERVICES_FETCH_CONCURRENCY = settings.get("REMOTE_SERVICES_FETCH_CONCURRENCY", 8)
+# 刷新远程增强服务信息时，等待单个服务端点返回的最长时间（秒，从请求开始时计算），超时的端点在本轮中跳过
+REMOTE_SERVICES_FETCH_TIMEOUT = settings.get("REMOTE_SERVICES_FETCH_TIMEOUT", 60)
+
+# 远程增强服务的进程内缓存：每隔多少秒检查一次 Redis 中的数据版本，为 0 时每次读取都检查
+REMOTE_SERVICES_LOCAL_CACHE_TTL = settings.get("REMOTE_SERVICES_LOCAL_CACHE_TTL", 5)
+# 远程增强服务的进程内缓存的最长存活时间（秒），Redis 中过期的服务不会更新数据版本，需要定期重建缓存
+REMOTE_SERVICES_SNAPSHOT_MAX_AGE = settings.get("REMOTE_SERVICES_SNAPSHOT_MAX_AGE", 60)
+
+# 是否缓存远程增强服务实例的数据（包含凭证信息，加密存储于 Redis），缓存只在实例变更时主动失效，默认关闭
+ENABLE_REMOTE_SVC_INSTANCE_CACHE = settings.get("ENABLE_REMOTE_SVC_INSTANCE_CACHE", False)
+# 远程增强服务实例缓存的过期时间（秒），仅用于清理不再使用的数据
+REMOTE_SVC_INSTANCE_CACHE_EXPIRES = settings.get("REMOTE_SVC_INSTANCE_CACHE_EXPIRES", 7 * 24 * 3600)
+# 获取增强服务环境变量时，并发读取远程增强服务实例的最大线程数
+SERVICE_INSTANCE_FETCH_CONCURRENCY = settings.get("SERVICE_INSTANCE_FETCH_CONCURRENCY", 8)
 
 # 是否禁用定时任务调度器
 DISABLE_PERIODICAL_JOBS = settings.get("DISABLE_PERIODICAL_JOBS", False)
@@ -1153,6 +1198,10 @@ PAAS_API_LOG_REDIS_HANDLER = settings.get(
         "url": "redis://localhost:6379/0",
         "queue_name": "paas_ng-meters",
         "tags": [],
+        # 日志先写入进程内的有界队列，由后台线程批量发送；队列已满时日志将被丢弃，不会阻塞请求
+        "buffer_size": 10000,
+        # 每批次发送的最大日志条数
+        "batch_size": 200,
     },
 )
 
@@ -1180,6 +1229,10 @@ ELASTICSEARCH_HOSTS = settings.get(
 
 # 日志 ES 搜索超时时间
 DEFAULT_ES_SEARCH_TIMEOUT = 30
+# 日志 ES 的 index 列表及 mappings 的缓存时间（秒），设置为 0 时不缓存
+ES_LOG_MAPPINGS_CACHE_TTL = settings.get("ES_LOG_MAPPINGS_CACHE_TTL", 60)
+# 单次导出日志的最大条数
+LOG_EXPORT_MAX_DOCS = settings.get("LOG_EXPORT_MAX_DOCS", 100000)
 
 # 日志 Index 名称模式
 ES_K8S_LOG_INDEX_PATTERNS = settings.get("ES_K8S_LOG_INDEX_PATTERNS", "app_log-*")
@@ -1347,6 +1400,15 @@ DOCKER_REGISTRY_CONFIG = settings.get(
     "DOCKER_REGISTRY_CONFIG", {"DEFAULT_REGISTRY": "https://hub.docker.com", "ALLOW_THIRD_PARTY_REGISTRY": False}
 )
 
+# 是否为 Git 仓库维护本地镜像缓存，读取文件、获取版本列表与部署时复用本地镜像（增量拉取），不再每次克隆仓库
+GIT_MIRROR_CACHE_ENABLED = settings.get("GIT_MIRROR_CACHE_ENABLED", True)
+# 本地镜像的存放目录
+GIT_MIRROR_CACHE_DIR = settings.get("GIT_MIRROR_CACHE_DIR", os.path.join(tempfile.gettempdir(), "bkpaas-git-mirrors"))
+# 本地镜像的总大小上限（MB），超出后按最近使用时间淘汰
+GIT_MIRROR_CACHE_MAX_SIZE_MB = settings.get("GIT_MIRROR_CACHE_MAX_SIZE_MB", 10240)
+# 读取文件、获取版本列表时，两次增量拉取镜像的最小间隔（秒）；部署时总是会拉取最新代码
+GIT_MIRROR_FETCH_INTERVAL = settings.get("GIT_MIRROR_FETCH_INTERVAL", 10)
+
 # -----------------
 # 插件开发中心配置项
 # -----------------
@@ -1487,6 +1549,12 @@ BKPAAS_PLATFORM_MANAGERS = settings.get("BKPAAS_PLATFORM_MANAGERS", [])
 ENABLE_SEND_OPERATION_REPORT_EMAIL_TO_PLAT_MANAGE = settings.get(
     "ENABLE_SEND_OPERATION_REPORT_EMAIL_TO_PLAT_MANAGE", False
 )
+# 分片并行采集应用运营报告时，每个分片（Celery 子任务）包含的应用数量
+APP_OPERATION_REPORT_COLLECT_SHARD_SIZE = settings.get("APP_OPERATION_REPORT_COLLECT_SHARD_SIZE", 100)
+# 采集应用运营报告时，访问各后端服务的最大并发数（跨所有 worker），未配置或为 0 的后端不限制
+APP_OPERATION_REPORT_BACKEND_CONCURRENCY: Dict[str, int] = settings.get(
+    "APP_OPERATION_REPORT_BACKEND_CONCURRENCY", {"prometheus": 4, "paas_analysis": 4, "iam": 2}
+)
 
 # 发送验证码，没有配置通知渠道的版本可以关闭该功能
 ENABLE_VERIFICATION_CODE = settings.get("ENABLE_VERIFICATION_CODE", False)
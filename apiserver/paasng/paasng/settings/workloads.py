@@ -169,6 +169,36 @@ LEGACY_MAPPER_VERSION = "v1"
 # 默认读取 POD 最近日志行数
 DEFAULT_POD_LOGS_LINE = 512
 
+# 是否启用进程内共享的 Informer 缓存，启用后进程、实例的 list/watch 将从内存缓存中读取，不再每次请求 apiserver
+KUBE_RES_INFORMER_ENABLED = settings.get("KUBE_RES_INFORMER_ENABLED", False)
+# Informer 无人访问多久（秒）后自动停止
+KUBE_RES_INFORMER_IDLE_SECONDS = settings.get("KUBE_RES_INFORMER_IDLE_SECONDS", 10 * 60)
+# 等待 Informer 首次同步完成的最长时间（秒），超时或同步失败后将直接请求 apiserver
+KUBE_RES_INFORMER_SYNC_TIMEOUT = settings.get("KUBE_RES_INFORMER_SYNC_TIMEOUT", 10)
+# 进程、实例 Informer 的标签选择器，默认缓存集群中全部的 Pod / Deployment 资源（每个进程一份，内存占用与集群规模成正比）
+# 仅当所有由平台管理的进程资源都带有这些标签时才可配置，如 {"bkapp.paas.bk.tencent.com/resource-type": "process"}
+KUBE_RES_INFORMER_LABELS = settings.get("KUBE_RES_INFORMER_LABELS", {})
+
+# 是否通过 BkApp 的状态变更事件（由 watch_bkapp_status 命令发布）等待云原生应用的部署结果，启用后轮询仅作为兜底
+CNATIVE_DEPLOY_STATUS_EVENTS_ENABLED = settings.get("CNATIVE_DEPLOY_STATUS_EVENTS_ENABLED", False)
+# 启用状态变更事件后，检查部署状态是否有变更的间隔（秒），每次检查只读取 Redis，仅在有变更时才查询集群。
+# 监听进程未运行或查询出错时，仍按照默认的轮询间隔检查
+CNATIVE_DEPLOY_STATUS_EVENT_CHECK_INTERVAL = settings.get("CNATIVE_DEPLOY_STATUS_EVENT_CHECK_INTERVAL", 2)
+
+# Kubernetes API 资源发现（discovery）结果在进程内的缓存时间（秒），同一集群的所有资源操作对象共享该缓存
+KUBE_DISCOVERY_CACHE_TTL = settings.get("KUBE_DISCOVERY_CACHE_TTL", 10 * 60)
+
+# 访问 Kubernetes API 的连接池大小（每个 apiserver 地址），默认使用 Configuration 中的值
+KUBE_CLIENT_POOL_MAXSIZE = settings.get("KUBE_CLIENT_POOL_MAXSIZE", None)
+# 对集群的多个 apiserver 地址进行健康检查的间隔（秒），设置为 0 时不检查
+KUBE_CLIENT_HEALTH_CHECK_INTERVAL = settings.get("KUBE_CLIENT_HEALTH_CHECK_INTERVAL", 30)
+# 健康检查请求的超时时间（秒）
+KUBE_CLIENT_HEALTH_CHECK_TIMEOUT = settings.get("KUBE_CLIENT_HEALTH_CHECK_TIMEOUT", 3)
+
+# 部署日志（如构建过程日志）写入数据库时，每批次最多缓存的行数，以及两次写入之间的最长间隔（秒）
+OUTPUT_STREAM_FLUSH_BATCH_SIZE = settings.get("OUTPUT_STREAM_FLUSH_BATCH_SIZE", 200)
+OUTPUT_STREAM_FLUSH_INTERVAL = settings.get("OUTPUT_STREAM_FLUSH_INTERVAL", 2)
+
 
 # ---------------
 # Ingress 配置
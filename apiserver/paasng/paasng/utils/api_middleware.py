@@ -15,10 +15,14 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import atexit
 import json
 import logging
+import os
+import queue
+import threading
 import time
-from typing import Dict
+from typing import Dict, List, Optional
 
 import redis
 from django.conf import settings
@@ -26,7 +30,7 @@ from django.http.response import HttpResponse
 from django.urls import resolve
 from django.utils.encoding import force_str
 
-from paasng.misc.metrics import API_VISITED_COUNTER, API_VISITED_TIME_CONSUME_HISTOGRAM
+from paasng.misc.metrics import API_LOG_DROPPED_COUNTER, API_VISITED_COUNTER, API_VISITED_TIME_CONSUME_HISTOGRAM
 from paasng.utils.basic import get_client_ip
 
 logger = logging.getLogger(__name__)
@@ -48,14 +52,7 @@ class ApiLogMiddleware:
         response = self.get_response(request)
         msecs_cost = int((time.time() - request.start_time) * 1000)
 
-        try:
-            data = dict(
-                method=request.method, endpoint=resolve(request.path_info).url_name, status=response.status_code
-            )
-        except Exception:
-            data = dict(method=request.method, endpoint="", status=response.status_code)
-            logger.warning(f"api<{request.path}> resolve failed")
-
+        data = dict(method=request.method, endpoint=self.get_endpoint(request), status=response.status_code)
         API_VISITED_COUNTER.labels(**data).inc()
         API_VISITED_TIME_CONSUME_HISTOGRAM.labels(**data).observe(msecs_cost)
 
@@ -68,10 +65,23 @@ class ApiLogMiddleware:
 
         return response
 
-    def truncate(self, content):
+    @staticmethod
+    def get_endpoint(request) -> Optional[str]:
+        # The url has been resolved when handling the request, avoid resolving it again
+        if request.resolver_match is not None:
+            return request.resolver_match.url_name
+
+        try:
+            return resolve(request.path_info).url_name
+        except Exception:
+            logger.warning(f"api<{request.path}> resolve failed")
+            return ""
+
+    def truncate(self, content: bytes) -> str:
+        """Decode the content, only the leading `max_content_size` bytes are decoded"""
         if len(content) > self.max_content_size:
-            content = content[: self.max_content_size] + "...(truncated)"
-        return content
+            return force_str(content[: self.max_content_size], errors="ignore") + "...(truncated)"
+        return force_str(content, errors="ignore")
 
     def get_api_data(self, request, response):
         if request.method in ["OPTIONS"]:
@@ -84,7 +94,7 @@ class ApiLogMiddleware:
 
         # django.http.response.StreamingHttpResponse just ignore
         if isinstance(response, HttpResponse):
-            content = self.truncate(force_str(response.content))
+            content = self.truncate(response.content)
         else:
             content = ""
 
@@ -111,29 +121,112 @@ class ApiLogMiddleware:
         save_redis(data)
 
 
-_redis_client = None
+class ApiLogShipper:
+    """Ship the API logs to the redis queue in batches.
 
+    The logs are put into a bounded in-process buffer and shipped by a background thread, so a slow redis
+    never adds latency to requests. When the buffer is full, new logs are dropped and counted.
 
-def save_redis(doc: Dict):
-    """
-    保存日志数据到 Redis 队列
+    :param handler_config: The config of the redis handler, see `settings.PAAS_API_LOG_REDIS_HANDLER`.
     """
-    handler_config = settings.PAAS_API_LOG_REDIS_HANDLER
-    if not handler_config.get("enabled", False):
-        return
 
-    # Connect to redis and save the connection pool afterwards
-    global _redis_client
-    if _redis_client is None:
+    def __init__(self, handler_config: Dict):
+        self.queue_name = handler_config["queue_name"]
+        self.tags = handler_config.get("tags", [])
+        self.buffer_size = handler_config.get("buffer_size", 10000)
+        self.batch_size = handler_config.get("batch_size", 200)
+        self.buffer: "queue.Queue[Dict]" = queue.Queue(maxsize=self.buffer_size)
+
         connection_options = getattr(settings, "REDIS_CONNECTION_OPTIONS", {})
         # TODO ee 版本如果开启, 再支持 sentinel 模式. 届时 PAAS_API_LOG_REDIS_HANDLER 参数也要适配调整
-        _redis_client = redis.from_url(handler_config["url"], **connection_options)
+        self.redis = redis.from_url(handler_config["url"], **connection_options)
+
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
 
-    doc["tags"] = handler_config.get("tags", [])
-    try:
-        data = json.dumps(doc)
-    except Exception as e:
-        logger.warning(f"unable to dump api log data: {e}")
+    def put(self, doc: Dict):
+        """Put a log into the buffer, never blocks"""
+        self._ensure_started()
+        try:
+            self.buffer.put_nowait(doc)
+        except queue.Full:
+            API_LOG_DROPPED_COUNTER.labels(reason="queue_full").inc()
+
+    def flush(self):
+        """Ship all the logs in the buffer in current thread"""
+        while batch := self._get_batch(block=False):
+            self.ship(batch)
+
+    def ship(self, docs: List[Dict]):
+        """Ship the logs to redis by a single command"""
+        items = []
+        for doc in docs:
+            doc["tags"] = self.tags
+            try:
+                items.append(json.dumps(doc))
+            except Exception as e:
+                logger.warning(f"unable to dump api log data: {e}")
+        if not items:
+            return
+
+        try:
+            self.redis.rpush(self.queue_name, *items)
+        except Exception:
+            logger.warning("unable to ship %s api logs to redis", len(items))
+            API_LOG_DROPPED_COUNTER.labels(reason="ship_failed").inc(len(items))
+
+    def _ensure_started(self):
+        """Start the background thread if it's not started in current process, the thread does not survive
+        fork(), so it must be started again in the forked processes(e.g. gunicorn workers)"""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+
+        with self._lock:
+            if self._pid == pid:
+                return
+            # The buffer inherited from the parent process is not usable, its locks may be held by other threads
+            self.buffer = queue.Queue(maxsize=self.buffer_size)
+            threading.Thread(target=self._run, name="api-log-shipper", daemon=True).start()
+            atexit.register(self.flush)
+            self._pid = pid
+
+    def _run(self):
+        while True:
+            try:
+                self.ship(self._get_batch(block=True))
+            except Exception:
+                logger.exception("unexpected error when shipping api logs")
+
+    def _get_batch(self, block: bool) -> List[Dict]:
+        """Get a batch of logs from the buffer, wait for the first one if `block` is True"""
+        batch: List[Dict] = []
+        try:
+            if block:
+                batch.append(self.buffer.get())
+            while len(batch) < self.batch_size:
+                batch.append(self.buffer.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+
+_shipper: Optional[ApiLogShipper] = None
+
+
+def get_api_log_shipper() -> ApiLogShipper:
+    global _shipper
+    if _shipper is None:
+        _shipper = ApiLogShipper(settings.PAAS_API_LOG_REDIS_HANDLER)
+    return _shipper
+
+
+def save_redis(doc: Dict):
+    """
+    保存日志数据到 Redis 队列（写入进程内缓冲区后由后台线程批量发送，不阻塞当前请求）
+    """
+    handler_config = settings.PAAS_API_LOG_REDIS_HANDLER
+    if not handler_config.get("enabled", False):
         return
 
-    _redis_client.rpush(handler_config["queue_name"], data)
+    get_api_log_shipper().put(doc)
@@ -45,17 +45,18 @@ def flatten_structure(structured_fields: Dict, parent: Optional[str] = None) ->
     :return: 转换后的扁平化结构体
     """
     ret: Dict[str, Any] = dict()
+    _flatten_into(ret, structured_fields, parent)
+    return ret
+
+
+def _flatten_into(ret: Dict[str, Any], structured_fields: Dict, parent: Optional[str]):
+    """Write the flattened fields into `ret` directly, avoid creating intermediate dicts for nested levels"""
     for sub_key, value in structured_fields.items():
-        if parent is None:
-            key = sub_key
-        else:
-            key = f"{parent}.{sub_key}"
+        key = sub_key if parent is None else f"{parent}.{sub_key}"
         if isinstance(value, dict):
-            sub = flatten_structure(value, key)
-            ret.update(sub)
+            _flatten_into(ret, value, key)
             continue
         ret[key] = value
-    return ret
 
 
 def clean_histogram_buckets(buckets: FieldBucketData) -> Dict:
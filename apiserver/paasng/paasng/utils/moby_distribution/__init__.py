@@ -27,7 +27,12 @@ from paasng.utils.moby_distribution.registry.client import (
     set_default_client,
 )
 from paasng.utils.moby_distribution.registry.resources.blobs import Blob
-from paasng.utils.moby_distribution.registry.resources.image import ImageRef, LayerRef
+from paasng.utils.moby_distribution.registry.resources.image import (
+    DiffIDCache,
+    ImageRef,
+    InMemoryDiffIDCache,
+    LayerRef,
+)
 from paasng.utils.moby_distribution.registry.resources.manifests import ManifestRef
 from paasng.utils.moby_distribution.registry.resources.tags import Tags
 from paasng.utils.moby_distribution.spec.endpoint import OFFICIAL_ENDPOINT, APIEndpoint
@@ -51,6 +56,8 @@ __all__ = [
     "ImageJSON",
     "ImageRef",
     "LayerRef",
+    "DiffIDCache",
+    "InMemoryDiffIDCache",
     "default_client",
     "set_default_client",
 ]
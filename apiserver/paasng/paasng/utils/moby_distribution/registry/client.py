@@ -159,7 +159,11 @@ class DockerRegistryV2Client:
         return resp
 
     def _validate_response(self, resp: requests.Response, auto_auth: bool = True) -> requests.Response:
+        if resp.ok:
+            return resp
+
         url = resp.request.url
+        # Only generate the curl command for the failed requests, the body of blob uploading may be very large
         try:
             curl = masked_curlify.to_curl(resp.request)
         except Exception:
@@ -188,10 +192,8 @@ class DockerRegistryV2Client:
             logger.info("Requesting %s, but ResourceNotFound, Equivalent curl command: %s", url, curl)
             raise exceptions.ResourceNotFound
 
-        if not resp.ok:
-            logger.warning("Requesting %s, but Response Not OK, Equivalent curl command: %s", url, curl)
-            raise exceptions.RequestErrorWithResponse(message=resp.text, status_code=resp.status_code, response=resp)
-        return resp
+        logger.warning("Requesting %s, but Response Not OK, Equivalent curl command: %s", url, curl)
+        raise exceptions.RequestErrorWithResponse(message=resp.text, status_code=resp.status_code, response=resp)
 
 
 class URLBuilder:
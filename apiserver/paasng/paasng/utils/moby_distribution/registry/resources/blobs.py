@@ -17,18 +17,28 @@
 
 import hashlib
 import io
+import logging
 import shutil
+import time
+import zlib
 from contextlib import contextmanager
 from pathlib import Path
 from typing import IO, Optional, Tuple, Union
 from urllib.parse import urlparse
 
+import requests
+
 from paasng.utils.moby_distribution.registry import exceptions
 from paasng.utils.moby_distribution.registry.client import DockerRegistryV2Client, URLBuilder, default_client
 from paasng.utils.moby_distribution.registry.resources import RepositoryResource
 from paasng.utils.moby_distribution.registry.utils import TypeTimeout
 from paasng.utils.moby_distribution.spec.base import Descriptor
 
+logger = logging.getLogger(__name__)
+
+# The size of each chunk when uploading a blob, a failed chunk is resumed rather than uploading the blob again
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+
 
 class Blob(RepositoryResource):
     def __init__(
@@ -86,13 +96,30 @@ class Blob(RepositoryResource):
             for chunk in resp.iter_content(chunk_size=1024):
                 fh.write(chunk)
 
-    def upload(self) -> Descriptor:
-        """upload the blob from `local_path` or `fileobj` to the registry by streaming"""
-        uuid, location = self._initiate_blob_upload()
-        blob = BlobWriter(uuid, location, client=self.client)
+    def upload(self, chunk_size: int = DEFAULT_CHUNK_SIZE, mount_from: Optional[str] = None) -> Descriptor:
+        """upload the blob from `local_path` or `fileobj` to the registry by streaming
+
+        The blob is uploaded by chunks, a failed chunk will be retried and resumed from the offset received by
+        the registry. If the digest is known, the uploading is skipped when the blob exists in the repo already,
+        or the blob will be mounted from the `mount_from` repo if possible.
+
+        :param chunk_size: the size of each chunk
+        :param mount_from: the repo(in the same registry) which may contain the blob
+        """
+        upload_session = None
+        if self.digest:
+            if self._exists():
+                return self.stat()
+            if mount_from and mount_from != self.repo:
+                mounted, upload_session = self._mount(mount_from)
+                if mounted:
+                    return self.stat()
+
+        uuid, location = upload_session or self._initiate_blob_upload()
+        blob = BlobWriter(uuid, location, client=self.client, timeout=self.timeout)
         with self.accessor.open(mode="rb") as fh:
             signer = HashSignWrapper(fh=blob)
-            shutil.copyfileobj(fsrc=fh, fdst=signer, length=1024 * 1024 * 64)
+            shutil.copyfileobj(fsrc=fh, fdst=signer, length=chunk_size)
 
         digest = signer.digest()
         blob.commit(digest)
@@ -122,7 +149,10 @@ class Blob(RepositoryResource):
         resp = self.client.post(url=url, timeout=self.timeout)
         if resp.status_code != 202:
             raise exceptions.RequestError("Unexpected status code.", status_code=resp.status_code)
+        return self._parse_upload_session(resp)
 
+    def _parse_upload_session(self, resp: requests.Response) -> Tuple[str, str]:
+        """Parse the uuid and upload location from the response of initiating a blob upload"""
         uuid = resp.headers.get("docker-upload-uuid")
         location = resp.headers["location"]
 
@@ -142,24 +172,44 @@ class Blob(RepositoryResource):
             location = f"{self.client.api_base_url}/{location.lstrip('/')}"
         return uuid, location
 
-    def mount_from(self, from_repo: str) -> Descriptor:
-        """Mount the blob from the given repo, if the client has read access to."""
+    def _exists(self) -> bool:
+        """Check whether the blob exists in the repo"""
+        try:
+            self.stat()
+        except exceptions.ResourceNotFound:
+            return False
+        return True
+
+    def _mount(self, from_repo: str) -> Tuple[bool, Optional[Tuple[str, str]]]:
+        """Try to mount the blob from the given repo.
+
+        :return: (mounted, upload session), if the blob can not be mounted, the registry initiates an upload
+            session instead, its uuid and location is returned.
+        """
         if self.digest is None:
             raise RuntimeError("unknown digest")
 
         url = URLBuilder.build_upload_blobs_url(self.client.api_base_url, self.repo)
         resp = self.client.post(url=url, params={"from": from_repo, "mount": self.digest}, timeout=self.timeout)
 
+        # If the blob is successfully mounted, the client will receive a `201` Created response
+        if resp.status_code == 201:
+            return True, None
+
         # If a registry does not support cross-repository mounting or is unable to mount the requested blob,
         # it SHOULD return a 202. At this time, we should upload the Blob to the registry.
         if resp.status_code == 202:
-            return self._download_then_upload(from_repo=from_repo)
+            return False, self._parse_upload_session(resp)
 
-        # If the blob is successfully mounted, the client will receive a `201` Created response
-        if resp.status_code != 201:
-            raise exceptions.RequestErrorWithResponse(
-                f"failed to mount blob({self.digest}) from `{from_repo}`", status_code=resp.status_code, response=resp
-            )
+        raise exceptions.RequestErrorWithResponse(
+            f"failed to mount blob({self.digest}) from `{from_repo}`", status_code=resp.status_code, response=resp
+        )
+
+    def mount_from(self, from_repo: str) -> Descriptor:
+        """Mount the blob from the given repo, if the client has read access to."""
+        mounted, _ = self._mount(from_repo)
+        if not mounted:
+            return self._download_then_upload(from_repo=from_repo)
         return self.stat()
 
     def delete(self, digest: Optional[str] = None):
@@ -187,20 +237,69 @@ class Blob(RepositoryResource):
 
 
 class BlobWriter:
-    def __init__(self, uuid: str, location: str, client: DockerRegistryV2Client, *, timeout: TypeTimeout = None):
+    """Write the blob to an upload session by chunks, each `write` sends a chunk by a PATCH request.
+
+    When sending a chunk fails, the writer asks the registry how many bytes it has received, then resumes from
+    that offset, so the data received already will never be sent again.
+
+    :param max_retries: the max number of retries for each chunk
+    :param retry_backoff: the seconds to wait before the first retry, doubles for each of the following retries
+    """
+
+    def __init__(
+        self,
+        uuid: str,
+        location: str,
+        client: DockerRegistryV2Client,
+        *,
+        timeout: TypeTimeout = None,
+        max_retries: int = 5,
+        retry_backoff: float = 1,
+    ):
         self.uuid = uuid
         self.location = location
         self.client = client
         self._committed = False
         self._offset = 0
         self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
 
     def write(self, buffer: Union[bytes, bytearray]) -> int:
+        start = self._offset
+        end = start + len(buffer)
+        retries = 0
+        should_refresh = False
+        while self._offset < end:
+            try:
+                if should_refresh:
+                    self._refresh_progress(min_offset=start)
+                    should_refresh = False
+                # Only send the data not received by the registry
+                chunk = buffer if self._offset == start else buffer[self._offset - start :]
+                self._send_chunk(chunk)
+            except (requests.ConnectionError, requests.Timeout, exceptions.RequestErrorWithResponse) as e:
+                if retries >= self.max_retries or not self._is_retryable(e):
+                    raise
+                retries += 1
+                logger.warning(
+                    "Failed to upload the chunk(%d-%d) of blob upload %s, retry %d: %s",
+                    self._offset,
+                    end - 1,
+                    self.uuid,
+                    retries,
+                    e,
+                )
+                time.sleep(self.retry_backoff * 2 ** (retries - 1))
+                should_refresh = True
+        return len(buffer)
+
+    def _send_chunk(self, chunk: Union[bytes, bytearray]):
         headers = {
-            "content-range": f"{self._offset}-{self._offset + len(buffer) - 1}",
+            "content-range": f"{self._offset}-{self._offset + len(chunk) - 1}",
             "content-type": "application/octet-stream",
         }
-        resp = self.client.patch(url=self.location, data=buffer, headers=headers, timeout=self.timeout)
+        resp = self.client.patch(url=self.location, data=chunk, headers=headers, timeout=self.timeout)
 
         if resp.status_code != 202:
             raise exceptions.RequestErrorWithResponse(
@@ -208,10 +307,36 @@ class BlobWriter:
                 status_code=resp.status_code,
                 response=resp,
             )
+        # The chunk has been accepted, the range "0-0" is ambiguous when only 1 byte is received
+        self._offset = max(self._update_session(resp), self._offset + len(chunk))
+
+    def _refresh_progress(self, min_offset: int):
+        """Get the progress of the upload session from the registry, the received data must not be
+        less than `min_offset`, which has been confirmed by the registry before."""
+        resp = self.client.get(url=self.location, timeout=self.timeout)
+        if resp.status_code != 204:
+            raise exceptions.RequestErrorWithResponse(
+                "fail to get the status of blob upload",
+                status_code=resp.status_code,
+                response=resp,
+            )
+        offset = self._update_session(resp)
+        if offset < min_offset:
+            raise exceptions.RequestErrorWithResponse(
+                f"the blob upload can not be resumed, offset {offset} < {min_offset}",
+                status_code=resp.status_code,
+                response=resp,
+            )
+        self._offset = offset
+
+    def _update_session(self, resp: requests.Response) -> int:
+        """Update the uuid and location by the response of the upload session
 
+        :return: the number of bytes received by the registry
+        """
+        # The range is inclusive, "0-0" is returned when nothing has been received
         start_s, end_s = resp.headers["range"].split("-", 1)
         start, end = int(start_s), int(end_s)
-        size = end - start + 1 - self._offset
 
         uuid = resp.headers.get("docker-upload-uuid")
         location = resp.headers["location"]
@@ -226,10 +351,21 @@ class BlobWriter:
                 response=resp,
             )
 
+        if urlparse(location).netloc == "":
+            location = f"{self.client.api_base_url}/{location.lstrip('/')}"
+
         self.uuid = uuid
         self.location = location
-        self._offset += size
-        return size
+        return end - start + 1 if end > 0 else 0
+
+    @staticmethod
+    def _is_retryable(e: Exception) -> bool:
+        if isinstance(e, exceptions.RequestErrorWithResponse):
+            if e.response is None:
+                return True
+            # 416: the range is not satisfiable, resume from the offset received by the registry
+            return e.response.status_code >= 500 or e.response.status_code == 416
+        return True
 
     def commit(self, digest: str) -> bool:
         params = {"digest": digest}
@@ -307,3 +443,72 @@ class HashSignWrapper:
     def digest(self) -> str:
         """return hexdigest with hash method name"""
         return f"{self.signer.name}:{self.signer.hexdigest()}"
+
+
+class LayerSignWrapper(HashSignWrapper):
+    """A HashSignWrapper which signs both the content of a layer and its uncompressed content, so the digest
+    and the diff_id of a gzipped layer can be calculated by reading it only once.
+
+    If the content is not gzipped, the diff_id is the same as the digest.
+    """
+
+    GZIP_MAGIC = b"\x1f\x8b"
+    # The max size of the uncompressed data produced at a time, avoid blowing up memory by the highly compressed data
+    MAX_OUTPUT_SIZE = 16 * 1024 * 1024
+
+    def __init__(self, fh: Optional[Union[IO, CounterIO, BlobWriter]] = None, constructor=hashlib.sha256):
+        super().__init__(fh=fh, constructor=constructor)
+        self.uncompressed_signer = constructor()
+        self._gzipped: Optional[bool] = None
+        self._head = b""
+        self._decompressor: Optional["zlib._Decompress"] = None
+
+    def write(self, chunk: bytes):
+        written = super().write(chunk)
+        self._decompress(bytes(chunk))
+        return written
+
+    def diff_id(self) -> str:
+        """return the hexdigest of the uncompressed content with hash method name
+
+        :raise ValueError: if the gzipped content is truncated
+        """
+        if not self._gzipped:
+            return self.digest()
+
+        if self._decompressor is not None:
+            self.uncompressed_signer.update(self._decompressor.flush())
+            if not self._decompressor.eof:
+                raise ValueError("Compressed layer ended before the end-of-stream marker was reached")
+            self._decompressor = None
+        return f"{self.uncompressed_signer.name}:{self.uncompressed_signer.hexdigest()}"
+
+    def _decompress(self, chunk: bytes):
+        # Detect whether the content is gzipped by the magic number
+        if self._gzipped is None:
+            self._head += chunk
+            if len(self._head) < len(self.GZIP_MAGIC):
+                return
+            self._gzipped = self._head.startswith(self.GZIP_MAGIC)
+            chunk, self._head = self._head, b""
+
+        if not self._gzipped:
+            return
+
+        while chunk:
+            if self._decompressor is None:
+                # gzip files can be padded with zeroes, skip them as the gzip module does
+                chunk = chunk.lstrip(b"\x00")
+                if not chunk:
+                    return
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+            decompressor = self._decompressor
+            while chunk and not decompressor.eof:
+                self.uncompressed_signer.update(decompressor.decompress(chunk, self.MAX_OUTPUT_SIZE))
+                chunk = decompressor.unconsumed_tail
+
+            if decompressor.eof:
+                # A gzip file may contain multiple members, the remaining data is the start of the next member
+                chunk = decompressor.unused_data
+                self._decompressor = None
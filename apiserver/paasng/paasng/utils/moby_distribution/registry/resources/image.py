@@ -22,6 +22,9 @@ import json
 import logging
 import shutil
 import tarfile
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Optional
@@ -38,7 +41,7 @@ except ImportError:
 
 from paasng.utils.moby_distribution.registry.client import DockerRegistryV2Client, default_client
 from paasng.utils.moby_distribution.registry.resources import RepositoryResource
-from paasng.utils.moby_distribution.registry.resources.blobs import Blob, HashSignWrapper
+from paasng.utils.moby_distribution.registry.resources.blobs import Blob, HashSignWrapper, LayerSignWrapper
 from paasng.utils.moby_distribution.registry.resources.manifests import ManifestRef
 from paasng.utils.moby_distribution.registry.utils import (
     TypeTimeout,
@@ -55,6 +58,9 @@ from paasng.utils.moby_distribution.spec.manifest import (
 
 logger = logging.getLogger(__name__)
 
+# The default max number of layers uploaded concurrently when pushing an image
+DEFAULT_PUSH_MAX_WORKERS = 8
+
 
 class ImageManifest(BaseModel):
     config: str = Field(default="", alias="Config")
@@ -70,6 +76,47 @@ class LayerRef(BaseModel):
     local_path: Optional[Path] = None
 
 
+class DiffIDCache(ABC):
+    """The cache of layer's digest -> diff_id, a layer is identified by its digest, so the diff_id never changes.
+
+    Implement a persistent one and pass it to `ImageRef` to share it between processes.
+    """
+
+    @abstractmethod
+    def get(self, digest: str) -> Optional[str]:
+        """Get the diff_id of the layer, return None if it's not cached"""
+
+    @abstractmethod
+    def set(self, digest: str, diff_id: str):
+        """Save the diff_id of the layer"""
+
+
+class InMemoryDiffIDCache(DiffIDCache):
+    """The in-memory DiffIDCache, the least recently used items are evicted when it's full"""
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._items: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest: str) -> Optional[str]:
+        with self._lock:
+            diff_id = self._items.get(digest)
+            if diff_id is not None:
+                self._items.move_to_end(digest)
+            return diff_id
+
+    def set(self, digest: str, diff_id: str):
+        with self._lock:
+            self._items[digest] = diff_id
+            self._items.move_to_end(digest)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+
+default_diff_id_cache: DiffIDCache = InMemoryDiffIDCache()
+
+
 class ImageRef(RepositoryResource):
     """ImageRef is used to Manipulate Docker images"""
 
@@ -82,11 +129,13 @@ class ImageRef(RepositoryResource):
         client: DockerRegistryV2Client = default_client,
         *,
         timeout: TypeTimeout = client_default_timeout,
+        diff_id_cache: DiffIDCache = default_diff_id_cache,
     ):
         super().__init__(repo, client, timeout=timeout)
         self.reference = reference
         self.layers = layers
         self._initial_config = initial_config
+        self.diff_id_cache = diff_id_cache
         self._dirty = False
         # diff id is the digest of uncompressed tarball
         self._append_diff_ids: List[str] = []
@@ -100,6 +149,8 @@ class ImageRef(RepositoryResource):
         to_repo: Optional[str] = None,
         to_reference: Optional[str] = None,
         client: DockerRegistryV2Client = default_client,
+        *,
+        diff_id_cache: DiffIDCache = default_diff_id_cache,
     ):
         """Initial a `ImageRef` from `{from_repo}:{from_reference}` but will named it as `{to_repo, to_reference}`
 
@@ -120,13 +171,16 @@ class ImageRef(RepositoryResource):
         Blob(repo=from_repo, digest=manifest.config.digest, client=client, fileobj=fh).download()
         fh.seek(0)
 
-        return cls(
+        ref = cls(
             repo=to_repo,
             reference=to_reference,
             layers=layers,
             initial_config=fh.read().decode(),
             client=client,
+            diff_id_cache=diff_id_cache,
         )
+        ref._cache_diff_ids()
+        return ref
 
     @classmethod
     def from_tarball(
@@ -136,6 +190,8 @@ class ImageRef(RepositoryResource):
         to_repo: Optional[str] = None,
         to_reference: Optional[str] = None,
         client: DockerRegistryV2Client = default_client,
+        *,
+        diff_id_cache: DiffIDCache = default_diff_id_cache,
     ):
         """Initial a `ImageRef` from a tarball locate in local disk, but will named it as `{to_repo, to_reference}`
 
@@ -166,33 +222,34 @@ class ImageRef(RepositoryResource):
 
             layers = []
             for layer in manifest.Layers:
-                # gzip it for smaller size
+                # gzip it for smaller size, and sign the gzipped content while writing it
                 gzipped_filepath = workplace / (layer + ".gz")
-                with (workplace / layer).open(mode="rb") as fh, gzip.open(gzipped_filepath, mode="wb") as compressed:
-                    shutil.copyfileobj(fh, compressed)
-
-                # The gzipped file can only be obtained after the compressed object is closed
-                # (because the gzip context information has not yet been written).
-                gzipped_signer = HashSignWrapper()
-                with gzipped_filepath.open(mode="rb") as fh:
-                    shutil.copyfileobj(fh, gzipped_signer)
+                with (workplace / layer).open(mode="rb") as fh, gzipped_filepath.open(mode="wb") as dest:
+                    gzipped_signer = HashSignWrapper(fh=dest)
+                    # The gzip trailer is written to the signer when the compressed object is closed
+                    with gzip.GzipFile(fileobj=gzipped_signer, mode="wb") as compressed:  # type: ignore[arg-type]
+                        shutil.copyfileobj(fh, compressed)
+                    size = gzipped_signer.tell()
 
                 layers.append(
                     LayerRef(
                         repo=to_repo,
                         digest=gzipped_signer.digest(),
-                        size=gzipped_signer.tell(),
+                        size=size,
                         local_path=gzipped_filepath,
                     )
                 )
 
-            return cls(
+            ref = cls(
                 repo=to_repo,
                 reference=to_reference,
                 layers=layers,
                 initial_config=(workplace / manifest.config).read_text(),
                 client=client,
+                diff_id_cache=diff_id_cache,
             )
+            ref._cache_diff_ids()
+            return ref
 
     def save(self, dest: str):
         """save the image to dest, as Docker Image Specification v1.2 Format
@@ -220,22 +277,30 @@ class ImageRef(RepositoryResource):
                     tarball.add(name=str(f.absolute()), arcname=str(f.relative_to(workplace)))
         return dest
 
-    def push(self, media_type: str = ManifestSchema2.content_type(), *, max_worker: int = 5):
+    def push(self, media_type: str = ManifestSchema2.content_type(), *, max_worker: Optional[int] = None):
         """push the image to the registry."""
         if media_type == ManifestSchema2.content_type():
             return self.push_v2(max_worker=max_worker)
         raise NotImplementedError("only support push images with Manifest Schema2.")
 
-    def push_v2(self, *, max_worker: int = 5) -> ManifestSchema2:
-        """push the image to the registry, with Manifest Schema2."""
-        layer_descriptors_futures = []
-        layer_descriptors = []
+    def push_v2(self, *, max_worker: Optional[int] = None) -> ManifestSchema2:
+        """push the image to the registry, with Manifest Schema2.
+
+        :param max_worker: the max number of layers uploaded concurrently, defaults to `DEFAULT_PUSH_MAX_WORKERS`.
+            The pool is sized by the number of layers to be transferred, and the larger layers are uploaded first,
+            so the slowest one is not left to the end.
+        """
         # Step 1: upload all layers
+        transfers = sum(1 for layer in self.layers if not layer.exists or layer.repo != self.repo)
+        max_worker = max(1, min(max_worker or DEFAULT_PUSH_MAX_WORKERS, transfers))
+        ordered = list(range(len(self.layers)))
+        if max_worker > 1:
+            ordered.sort(key=lambda idx: self.layers[idx].size, reverse=True)
         with ThreadPoolExecutor(max_workers=max_worker) as thread_pool:
-            for layer in self.layers:
-                layer_descriptors_futures.append(thread_pool.submit(self._upload_layer, layer))
-        for future in layer_descriptors_futures:
-            layer_descriptors.append(future.result())
+            layer_descriptors_futures = {
+                idx: thread_pool.submit(self._upload_layer, self.layers[idx]) for idx in ordered
+            }
+        layer_descriptors = [layer_descriptors_futures[idx].result() for idx in range(len(self.layers))]
 
         # Step 2: upload the image json
         config_descriptor = self._upload_config(self.image_json_str)
@@ -259,71 +324,77 @@ class ImageRef(RepositoryResource):
         Step:
           1. calculate the sha256 sum for the gzipped_tarball, as digest
           2. calculate the sha256 sum for the uncompressed_tarball, as diff_id
+
+        Both sums are calculated by reading the layer once, the diff_id of the remote layer is read from
+        `diff_id_cache` if the layer has been seen before.
+
+        A remote layer may also have the `local_path`, it's read instead of downloading the blob when the diff_id
+        is not cached, or uploaded when the layer can not be mounted from its repo.
         """
         if not layer.exists and not layer.local_path:
             raise ValueError("Unknown layer")
 
-        uncompressed_tarball_signer = HashSignWrapper()
         # Add local layer
-        if layer.local_path:
-            # Step 1: calculate the sha256 sum for the tarball file
-            raw_tarball_signer = HashSignWrapper()
-            with layer.local_path.open(mode="rb") as gzipped:
-                shutil.copyfileobj(gzipped, raw_tarball_signer)
-                size = raw_tarball_signer.tell()
-
-            # Step 2: calculate the sha256 sum for the uncompressed_tarball
-            # for gzipped tarball, we need decompress first
-            try:
-                with gzip.open(filename=layer.local_path) as uncompressed:
-                    shutil.copyfileobj(uncompressed, uncompressed_tarball_signer)
-            except OSError:
-                uncompressed_tarball_signer = raw_tarball_signer
-
-            if layer.digest and layer.digest != raw_tarball_signer.digest():
+        if layer.local_path and not layer.exists:
+            # calculate the sha256 sum for the tarball file and the uncompressed tarball in a single pass
+            signer = LayerSignWrapper()
+            with layer.local_path.open(mode="rb") as fh:
+                shutil.copyfileobj(fh, signer, length=1024 * 1024)
+            size = signer.tell()
+            digest = signer.digest()
+
+            if layer.digest and layer.digest != digest:
                 raise ValueError(
                     "Wrong digest, layer.digest<'%s'> != signer.digest<'%s'>",
                     layer.digest,
-                    raw_tarball_signer.digest(),
+                    digest,
                 )
 
-            layer.digest = raw_tarball_signer.digest()
+            diff_id = signer.diff_id()
+            layer.digest = digest
             layer.repo = self.repo
             layer.size = size
+            self.diff_id_cache.set(digest, diff_id)
 
         # Add remote layer if the layer is exists in registry
         else:
-            with generate_temp_dir() as temp_dir:
-                # Step 1: calculate the sha256 sum for the gzipped_tarball
-                with (temp_dir / "blob").open(mode="wb") as fh:
-                    raw_tarball_signer = HashSignWrapper(fh=fh)
+            cached_diff_id = self.diff_id_cache.get(layer.digest)
+            if cached_diff_id:
+                # The layer has been seen before, the digest and size are verified by the registry already
+                digest, size, diff_id = layer.digest, layer.size, cached_diff_id
+            else:
+                signer = LayerSignWrapper()
+                if layer.local_path:
+                    with layer.local_path.open(mode="rb") as fh:
+                        shutil.copyfileobj(fh, signer, length=1024 * 1024)
+                else:
+                    # Stream the blob to the signer, no temporary file is needed
                     Blob(
                         repo=layer.repo,
                         digest=layer.digest,
-                        fileobj=raw_tarball_signer,
+                        fileobj=signer,
                         client=self.client,
                     ).download()
-                    size = raw_tarball_signer.tell()
-
-                # Step 2: calculate the sha256 sum for the uncompressed_tarball
-                with gzip.open(filename=(temp_dir / "blob")) as uncompressed:
-                    shutil.copyfileobj(uncompressed, uncompressed_tarball_signer)
-
-            if layer.size != size:
-                raise ValueError(
-                    "Wrong Size, layer.size<'%d'> != signer.size<'%d'>",
-                    layer.size,
-                    size,
-                )
-            if layer.digest != raw_tarball_signer.digest():
-                raise ValueError(
-                    "Wrong digest, layer.digest<'%s'> != signer.digest<'%s'>",
-                    layer.digest,
-                    raw_tarball_signer.digest(),
-                )
+                size = signer.tell()
+                digest = signer.digest()
+
+                if layer.size != size:
+                    raise ValueError(
+                        "Wrong Size, layer.size<'%d'> != signer.size<'%d'>",
+                        layer.size,
+                        size,
+                    )
+                if layer.digest != digest:
+                    raise ValueError(
+                        "Wrong digest, layer.digest<'%s'> != signer.digest<'%s'>",
+                        layer.digest,
+                        digest,
+                    )
+                diff_id = signer.diff_id()
+                self.diff_id_cache.set(digest, diff_id)
 
         self._dirty = True
-        self._append_diff_ids.append(uncompressed_tarball_signer.digest())
+        self._append_diff_ids.append(diff_id)
         self._append_historys.append(
             history
             or History(
@@ -336,7 +407,7 @@ class ImageRef(RepositoryResource):
         self.layers.append(layer)
 
         return DockerManifestLayerDescriptor(
-            digest=raw_tarball_signer.digest(),
+            digest=digest,
             size=size,
         )
 
@@ -362,6 +433,17 @@ class ImageRef(RepositoryResource):
         else:
             return image_json.json(exclude_unset=True, exclude_defaults=True, separators=(",", ":"))
 
+    def _cache_diff_ids(self):
+        """Save the diff_ids of the layers in image json to `diff_id_cache`, so adding these layers to
+        other images doesn't need to download them again."""
+        diff_ids = self.image_json.rootfs.diff_ids
+        if len(diff_ids) != len(self.layers):
+            logger.warning("The number of layers does not match the diff_ids in image json, skip caching")
+            return
+
+        for layer, diff_id in zip(self.layers, diff_ids, strict=True):
+            self.diff_id_cache.set(layer.digest, diff_id)
+
     def _save_layer(self, workplace: Path, layer: LayerRef) -> str:
         """Download the gzipped layer, and uncompress as the raw tarball.
 
@@ -404,10 +486,13 @@ class ImageRef(RepositoryResource):
         """
 
         if layer.exists and layer.repo != self.repo:
-            descriptor = Blob(repo=self.repo, digest=layer.digest, client=self.client).mount_from(from_repo=layer.repo)
+            # The local file(if any) is uploaded when the registry refuses to mount the blob
+            blob = Blob(repo=self.repo, digest=layer.digest, local_path=layer.local_path, client=self.client)
+            descriptor = blob.mount_from(from_repo=layer.repo)
         elif not layer.exists:
-            blob = Blob(repo=self.repo, local_path=layer.local_path, client=self.client)
-            descriptor = blob.upload()
+            # The uploading is skipped if the blob exists already, or mounted from the repo of the layer
+            blob = Blob(repo=self.repo, digest=layer.digest or None, local_path=layer.local_path, client=self.client)
+            descriptor = blob.upload(mount_from=layer.repo)
         else:
             descriptor = Blob(repo=self.repo, client=self.client).stat(layer.digest)
 
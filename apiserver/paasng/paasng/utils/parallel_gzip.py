@@ -0,0 +1,132 @@
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+
+"""A gzip writer which compresses the data with multiple threads.
+
+The input is split into blocks, each block is compressed into a raw deflate stream
+by a worker thread (zlib releases the GIL while compressing), the last 32KB of the
+previous block is used as the dictionary so the compression ratio stays close to
+single-threaded gzip. The output is a standard single-member gzip file, same as `pigz`.
+"""
+
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Deque, Optional
+
+# The max window size of deflate
+_DICT_SIZE = 32 * 1024
+_GZIP_HEADER = b"\x1f\x8b\x08\x00" + struct.pack("<I", 0) + b"\x00\xff"
+
+
+def _compress_block(data: bytes, level: int, zdict: Optional[bytes]) -> bytes:
+    if zdict:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    # Use sync flush to end the block at byte boundary, so the blocks can be concatenated
+    return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+class ParallelGzipWriter:
+    """A writable file object which writes gzip compressed data to `fileobj`.
+
+    :param fileobj: The file object to write the compressed data to, it will not be closed.
+    :param level: The compression level
+    :param block_size: The size of the input data compressed by each thread at a time
+    :param threads: The number of threads, defaults to the number of CPUs
+    """
+
+    def __init__(
+        self,
+        fileobj: BinaryIO,
+        level: int = 6,
+        block_size: int = 1024 * 1024,
+        threads: Optional[int] = None,
+    ):
+        self.fileobj = fileobj
+        self.level = level
+        self.block_size = block_size
+        self.threads = threads or os.cpu_count() or 1
+
+        self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="pgzip")
+        # Compressed blocks in input order, the number is limited to keep the memory usage bounded
+        self._pending: Deque[Future] = deque()
+        self._buffer = bytearray()
+        self._zdict: Optional[bytes] = None
+        self._crc = 0
+        self._size = 0
+        self._closed = False
+
+        self.fileobj.write(_GZIP_HEADER)
+
+    def write(self, data: bytes) -> int:
+        if self._closed:
+            raise ValueError("write to closed file")
+
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            self._submit(bytes(self._buffer[: self.block_size]))
+            del self._buffer[: self.block_size]
+        return len(data)
+
+    def close(self):
+        """Compress the remaining data and write the gzip trailer."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if self._buffer:
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            while self._pending:
+                self.fileobj.write(self._pending.popleft().result())
+
+            # An empty final block marks the end of the deflate stream
+            self.fileobj.write(zlib.compressobj(self.level, zlib.DEFLATED, -zlib.MAX_WBITS).flush(zlib.Z_FINISH))
+            self.fileobj.write(struct.pack("<II", self._crc, self._size & 0xFFFFFFFF))
+        finally:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def writable(self) -> bool:
+        return True
+
+    def flush(self):
+        """The data is only written to `fileobj` when the blocks are compressed, nothing to do here."""
+
+    def _submit(self, block: bytes):
+        self._crc = zlib.crc32(block, self._crc)
+        self._size += len(block)
+        self._pending.append(self._executor.submit(_compress_block, block, self.level, self._zdict))
+        self._zdict = block[-_DICT_SIZE:]
+
+        # Write the finished blocks in order, wait for the oldest one when there are too many
+        while self._pending and (self._pending[0].done() or len(self._pending) > self.threads * 2):
+            self.fileobj.write(self._pending.popleft().result())
+
+    def __enter__(self) -> "ParallelGzipWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Do not write the trailer when failed, the output is incomplete anyway
+            self._closed = True
+            self._executor.shutdown(wait=True, cancel_futures=True)
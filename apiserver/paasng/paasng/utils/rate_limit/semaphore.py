@@ -0,0 +1,87 @@
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import redis
+
+
+class RedisSemaphore:
+    """基于 Redis 的分布式信号量，用于限制跨进程（如多个 Celery worker）访问同一后端的并发数
+
+    实现：以有序集合保存持有者，分数为获取时间（Redis 服务端时间，不受各进程本地时钟偏差的影响）；加入集合后排名小于上限即视为获取成功，否则移除并等待重试。
+    持有超过 lease 秒的条目会被视为已失效（如进程异常退出）并被清理，避免信号量被永久占用。
+    """
+
+    def __init__(self, redis_db: redis.Redis, name: str, limit: int, lease: int = 300, retry_interval: float = 0.2):
+        """
+        :param redis_db: redis client
+        :param name: 信号量名称，同名信号量共享并发配额
+        :param limit: 最大并发数
+        :param lease: 单次持有的最长时间（单位：秒）
+        :param retry_interval: 获取失败后的重试间隔（单位：秒）
+        """
+        self.redis_db = redis_db
+        self.limit = limit
+        self.lease = lease
+        self.retry_interval = retry_interval
+        self.key = f"bk_paas3:semaphores:{name}"
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[str]:
+        """获取信号量
+
+        :param timeout: 最长等待时间（单位：秒），为 None 时一直等待
+        :return: 持有凭证，超时未获取到时返回 None
+        """
+        token = uuid.uuid4().hex
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            now = self._get_server_time()
+            pipe = self.redis_db.pipeline()
+            pipe.zremrangebyscore(self.key, "-inf", now - self.lease)
+            pipe.zadd(self.key, {token: now})
+            pipe.zrank(self.key, token)
+            pipe.expire(self.key, self.lease)
+            rank = pipe.execute()[2]
+            if rank is not None and rank < self.limit:
+                return token
+
+            self.redis_db.zrem(self.key, token)
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(self.retry_interval)
+
+    def _get_server_time(self) -> float:
+        """获取 Redis 服务端的当前时间（单位：秒）"""
+        seconds, microseconds = self.redis_db.time()
+        return seconds + microseconds / 1_000_000
+
+    def release(self, token: str):
+        """释放信号量"""
+        self.redis_db.zrem(self.key, token)
+
+    @contextmanager
+    def hold(self) -> Iterator[None]:
+        """在上下文中持有信号量，获取不到时一直等待"""
+        token = self.acquire()
+        try:
+            yield
+        finally:
+            self.release(token)  # type: ignore[arg-type]
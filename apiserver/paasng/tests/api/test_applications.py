@@ -16,11 +16,15 @@
 # to the current version of the project delivered to anyone in the future.
 
 import logging
+import re
 from datetime import datetime, timedelta
+from typing import List
 from unittest import mock
 
 import pytest
 from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from django_dynamic_fixture import G
@@ -40,7 +44,7 @@ from paasng.misc.audit.constants import OperationEnum, OperationTarget, ResultCo
 from paasng.misc.audit.models import AppOperationRecord
 from paasng.platform.applications.constants import AppFeatureFlag, ApplicationRole, ApplicationType, AvailabilityLevel
 from paasng.platform.applications.handlers import post_create_application, turn_on_bk_log_feature_for_app
-from paasng.platform.applications.models import Application
+from paasng.platform.applications.models import Application, ApplicationMembership, UserMarkedApplication
 from paasng.platform.bkapp_model.models import ModuleProcessSpec
 from paasng.platform.declarative.handlers import get_desc_handler
 from paasng.platform.evaluation.constants import BatchTaskStatus
@@ -1167,3 +1171,89 @@ class TestApplicationList:
             )
             assert single_response.data["count"] == 1
             assert single_response.data["results"][0]["application"]["app_tenant_mode"] == AppTenantMode.SINGLE
+
+    def test_prefer_marked(self, api_client, bk_user):
+        apps = sorted((create_app(owner_username=bk_user.username) for _ in range(3)), key=lambda app: app.name)
+        G(UserMarkedApplication, owner=bk_user.pk, application=apps[-1])
+
+        response = api_client.get(reverse("api.applications.lists.detailed"), {"prefer_marked": True})
+        results = response.data["results"]
+        assert [r["application"]["code"] for r in results] == [apps[-1].code, apps[0].code, apps[1].code]
+        assert [r["marked"] for r in results] == [True, False, False]
+
+        response = api_client.get(reverse("api.applications.lists.search"), {"keyword": "ut", "prefer_marked": True})
+        assert response.data["count"] == 3
+        assert [r["application"]["code"] for r in response.data["results"]] == [
+            apps[-1].code,
+            apps[0].code,
+            apps[1].code,
+        ]
+
+
+class TestApplicationListPagination:
+    """The listing endpoints should paginate the accessible applications by database"""
+
+    total_count = 30
+    marked_count = 5
+
+    @pytest.fixture()
+    def accessible_apps(self, bk_user) -> List[Application]:
+        apps = [
+            Application(
+                owner=bk_user.pk,
+                creator=bk_user.pk,
+                code=f"paged{i:03d}",
+                name=f"paged{i:03d}",
+                name_en=f"paged{i:03d}",
+                language="Python",
+                region=settings.DEFAULT_REGION_NAME,
+                app_tenant_mode=AppTenantMode.GLOBAL,
+                app_tenant_id="",
+                tenant_id=DEFAULT_TENANT_ID,
+            )
+            for i in range(self.total_count)
+        ]
+        Application.objects.bulk_create(apps)
+        Module.objects.bulk_create(
+            [
+                Module(application=app, name="default", is_default=True, language="Python", tenant_id=app.tenant_id)
+                for app in apps
+            ]
+        )
+        ApplicationMembership.objects.bulk_create(
+            [ApplicationMembership(user=bk_user.pk, application=app) for app in apps]
+        )
+        # 标记排在最末尾的应用，使其在“标记优先”时被排到最前面
+        UserMarkedApplication.objects.bulk_create(
+            [
+                UserMarkedApplication(owner=bk_user.pk, application=app, tenant_id=app.tenant_id)
+                for app in apps[-self.marked_count :]
+            ]
+        )
+        return apps
+
+    def test_list_detailed_prefer_marked(self, api_client, accessible_apps):
+        limit = 3
+        url = reverse("api.applications.lists.detailed")
+        params = {"prefer_marked": True, "limit": limit}
+        # Warm up, the market configs of the applications in page are created by the first request
+        api_client.get(url, params)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = api_client.get(url, params)
+
+        assert response.data["count"] == self.total_count
+        results = response.data["results"]
+        assert len(results) == limit
+        assert all(r["marked"] for r in results)
+        marked_codes = [app.code for app in accessible_apps[-self.marked_count :]]
+        assert [r["application"]["code"] for r in results] == marked_codes[:limit]
+
+        # The applications should be paginated by database, no query loads all the accessible applications
+        app_selects = [
+            q["sql"]
+            for q in ctx.captured_queries
+            if re.match(r"SELECT [`\"]?applications_application[`\"]?\.", q["sql"])
+        ]
+        assert app_selects
+        assert all("LIMIT" in sql for sql in app_selects)
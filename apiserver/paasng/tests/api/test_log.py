@@ -15,6 +15,7 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import gzip
 import json
 from unittest import mock
 
@@ -24,6 +25,7 @@ from django_dynamic_fixture import G
 from elasticsearch_dsl.response import Hit
 
 from paasng.accessories.log.models import CustomCollectorConfig
+from paasng.accessories.log.shim import setup_env_log_model
 from paasng.accessories.log.shim.setup_bklog import build_custom_collector_config_name
 from paasng.infras.bkmonitorv3.models import BKMonitorSpace
 
@@ -154,6 +156,43 @@ class TestModuleStructuredLogAPIView:
         ]
 
 
+class TestStructuredLogExport:
+    @pytest.mark.parametrize("compress", [False, True])
+    def test_export(self, api_client, bk_app, bk_module, settings, compress):
+        settings.LOG_EXPORT_MAX_DOCS = 3
+        setup_env_log_model(bk_module.get_envs("stag"))
+        url = (
+            f"/api/bkapps/applications/{bk_app.code}/modules/{bk_module.name}/envs/stag/log/structured/export/"
+            f"?time_range=1h&compress={str(compress).lower()}"
+        )
+        hit = Hit(
+            {
+                "fields": {
+                    "@timestamp": 1,
+                    "json": {"message": "foo"},
+                    "app_code": bk_app.code,
+                    "module_name": bk_module.name,
+                    "environment": "stag",
+                    "process_id": "1234567",
+                    "stream": "foo",
+                }
+            }
+        )
+        with mock.patch("paasng.accessories.log.views.logs.instantiate_log_client") as client_factory:
+            client_factory().get_mappings.return_value = {"app_code": {"type": "text"}}
+            client_factory().iter_search.return_value = iter([[hit, hit], [hit, hit]])
+            response = api_client.post(url, data={"query": {"query_string": ""}})
+            content = b"".join(response.streaming_content)
+
+        if compress:
+            content = gzip.decompress(content)
+        lines = [json.loads(line) for line in content.splitlines()]
+        # 超过导出上限的日志会被忽略
+        assert len(lines) == 3
+        assert lines[0]["message"] == "foo"
+        assert lines[0]["process_id"] == "1234567"
+
+
 class TestCustomCollectorConfigViewSet:
     @pytest.fixture()
     def cfg_maker(self, bk_module):
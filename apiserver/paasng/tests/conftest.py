@@ -99,6 +99,16 @@ def pytest_addoption(parser):
     parser.addoption(
         "--run-e2e-test", dest="run_e2e_test", action="store_true", default=False, help="是否执行 e2e 测试"
     )
+    parser.addoption(
+        "--run-benchmark", dest="run_benchmark", action="store_true", default=False, help="是否执行性能基准测试"
+    )
+
+
+@pytest.fixture(autouse=True)
+def _skip_benchmark(request):
+    """Handle @pytest.mark.benchmark, the benchmarks are slow and only run with "--run-benchmark" option"""
+    if request.keywords.get("benchmark") and not request.config.getvalue("run_benchmark"):
+        pytest.skip("run_benchmark is disabled, skip benchmark")
 
 
 @pytest.fixture(autouse=True, scope="session")
@@ -413,6 +423,8 @@ def _mock_iam():
             "paasng.plat_admin.numbers.app.ApplicationPermission",
             new=StubApplicationPermission,
         ),
+        # StubBKIAMClient 从数据库读取用户组成员，缓存可能跨越测试用例，并发读取时也无法访问当前测试的事务，因此关闭
+        override_settings(IAM_GROUP_MEMBERS_CACHE_TTL=0, IAM_GROUP_MEMBERS_FETCH_CONCURRENCY=1),
     ):
         yield
 
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+
+import threading
+import time
+from typing import Dict, List, Optional
+from unittest import mock
+
+import pytest
+from kubernetes.dynamic import ResourceInstance
+
+from paas_wl.bk_app.cnative.specs.constants import BKPAAS_DEPLOY_ID_ANNO_KEY
+from paas_wl.bk_app.cnative.specs.status_events import BkAppStatusWatcher, DeployStatusChannel, WatcherHeartbeat
+from paas_wl.infras.resources.base import crd
+from paas_wl.infras.resources.kube_res.informer import InformerKey, SharedInformer
+
+
+def make_bkapp(
+    name: str, deploy_id: str, status_deploy_id: str, conditions: Optional[List[Dict]] = None, rv: int = 1
+) -> ResourceInstance:
+    return ResourceInstance(
+        None,
+        {
+            "kind": "BkApp",
+            "metadata": {
+                "name": name,
+                "namespace": "default",
+                "resourceVersion": str(rv),
+                "annotations": {BKPAAS_DEPLOY_ID_ANNO_KEY: deploy_id},
+            },
+            "status": {"deployId": status_deploy_id, "conditions": conditions or [], "lastUpdate": str(rv)},
+        },
+    )
+
+
+def notified_deploy_ids(redis_db) -> List[str]:
+    return [c.args[0].rsplit(":", 1)[1] for c in redis_db.pipeline.return_value.incr.call_args_list]
+
+
+class TestDeployStatusChannel:
+    def test_notify(self):
+        redis_db = mock.MagicMock()
+        redis_db.pipeline.return_value.execute.return_value = [1, True]
+        channel = DeployStatusChannel("1", redis_db=redis_db)
+
+        assert channel.notify() == 1
+        redis_db.pipeline.return_value.incr.assert_called_once_with(channel.key)
+        redis_db.pipeline.return_value.expire.assert_called_once_with(channel.key, channel.expires_seconds)
+
+    def test_get_version(self):
+        redis_db = mock.MagicMock()
+        redis_db.get.return_value = None
+        channel = DeployStatusChannel("1", redis_db=redis_db)
+        assert channel.get_version() == 0
+
+        redis_db.get.return_value = b"3"
+        assert channel.get_version() == 3
+
+
+class TestWatcherHeartbeat:
+    def test_beat(self):
+        redis_db = mock.MagicMock()
+        heartbeat = WatcherHeartbeat(redis_db=redis_db)
+        heartbeat.beat(expires_seconds=60)
+        assert redis_db.set.call_args.kwargs == {"ex": 60}
+
+        redis_db.exists.return_value = 0
+        assert not heartbeat.is_alive()
+        redis_db.exists.return_value = 1
+        assert heartbeat.is_alive()
+
+
+class TestBkAppStatusWatcher:
+    @pytest.fixture()
+    def redis_db(self):
+        return mock.MagicMock()
+
+    def test_handle(self, redis_db):
+        watcher = BkAppStatusWatcher("default", redis_db=redis_db)
+        # 新部署已下发, operator 尚未处理, 新旧部署都需要收到通知
+        assert watcher.handle(make_bkapp("foo", deploy_id="2", status_deploy_id="1")) == {"1", "2"}
+        # 状态未变化
+        assert watcher.handle(make_bkapp("foo", deploy_id="2", status_deploy_id="1", rv=2)) == set()
+
+        available = {"type": "AppAvailable", "status": "True", "reason": "", "message": ""}
+        assert watcher.handle(make_bkapp("foo", deploy_id="2", status_deploy_id="2", rv=3)) == {"2"}
+        assert watcher.handle(make_bkapp("foo", "2", "2", conditions=[available], rv=4)) == {"2"}
+        assert sorted(notified_deploy_ids(redis_db)) == ["1", "2", "2", "2"]
+
+    def test_watch(self, redis_db):
+        informer = SharedInformer(InformerKey.create("default", "BkApp", "v1alpha2"), crd.BkApp)
+        informer.store.replace([make_bkapp("foo", deploy_id="1", status_deploy_id="1", rv=10)])
+        informer.resource_version = informer._history_since = 10
+
+        watcher = BkAppStatusWatcher("default", redis_db=redis_db)
+        with mock.patch("paas_wl.bk_app.cnative.specs.status_events.get_informer", return_value=informer):
+            thread = threading.Thread(target=watcher.watch, kwargs={"timeout_seconds": 1})
+            thread.start()
+            while not informer._subscriptions:
+                time.sleep(0.01)
+            informer._dispatch({"type": "MODIFIED", "object": make_bkapp("foo", "2", "1", rv=11)})
+            informer._dispatch({"type": "DELETED", "object": make_bkapp("foo", "2", "1", rv=12)})
+            thread.join()
+
+        assert sorted(notified_deploy_ids(redis_db)) == ["1", "1", "2"]
+        assert watcher._published == {}
+        redis_db.set.assert_called_once()
+        assert redis_db.set.call_args.args[0] == WatcherHeartbeat.key
@@ -94,6 +94,92 @@ class TestWaitAppModelReady:
         assert "last_update" in extra_data
 
 
+class TestWaitAppModelReadyByEvents:
+    @pytest.fixture(autouse=True)
+    def channel(self, settings):
+        """Enable waiting for the status events, return the mocked status channel of the deploy"""
+        settings.CNATIVE_DEPLOY_STATUS_EVENTS_ENABLED = True
+        settings.CNATIVE_DEPLOY_STATUS_EVENT_CHECK_INTERVAL = 2
+        with (
+            patch("paasng.platform.engine.deploy.bg_wait.wait_bkapp.DeployStatusChannel") as channel_cls,
+            patch("paasng.platform.engine.deploy.bg_wait.wait_bkapp.WatcherHeartbeat") as heartbeat_cls,
+        ):
+            channel_cls.return_value.get_version.return_value = 0
+            heartbeat_cls.return_value.is_alive.return_value = True
+            yield channel_cls.return_value
+
+    @staticmethod
+    def next_tick(poller: WaitAppModelReady, last_polling_data) -> WaitAppModelReady:
+        return WaitAppModelReady(params=poller.params, metadata=poller.make_next_metadata(False, last_polling_data))
+
+    @patch("paasng.platform.engine.deploy.bg_wait.wait_bkapp.get_mres_from_cluster")
+    def test_query_on_event(self, mocker, dp, poller, channel):
+        mocker.side_effect = [
+            create_res(with_deploy_id(deploy_id=str(dp.id), status_deploy_id="0")),
+            create_res(
+                with_conds([create_condition(MResConditionType.APP_AVAILABLE, "True")], MResPhaseType.AppRunning),
+                with_deploy_id(deploy_id=str(dp.id)),
+            ),
+        ]
+        ret = poller.query()
+        assert ret.status == PollingStatus.DOING
+        assert poller.get_retry_delay() == 2
+
+        # 状态没有变更, 不查询集群
+        poller = self.next_tick(poller, ret.data)
+        ret = poller.query()
+        assert ret.status == PollingStatus.DOING
+        assert mocker.call_count == 1
+
+        # 状态变更后立即查询
+        channel.get_version.return_value = 1
+        ret = self.next_tick(poller, ret.data).query()
+        assert ret.status == PollingStatus.DONE
+        assert ret.data["extra_data"]["state"].status == DeployStatus.READY
+        assert mocker.call_count == 2
+
+    @patch("paasng.platform.engine.deploy.bg_wait.wait_bkapp.get_mres_from_cluster")
+    def test_retry_delay_on_error(self, mocker, dp, poller):
+        mocker.side_effect = RuntimeError("cluster is unavailable")
+        with pytest.raises(RuntimeError):
+            poller.query()
+        # 查询出错后按默认间隔重试
+        assert poller.get_retry_delay() == poller.default_retry_delay_seconds
+
+    def test_retry_delay_without_watcher(self, poller):
+        with patch("paasng.platform.engine.deploy.bg_wait.wait_bkapp.WatcherHeartbeat") as heartbeat_cls:
+            heartbeat_cls.return_value.is_alive.return_value = False
+            assert poller.get_retry_delay() == poller.default_retry_delay_seconds
+
+    @patch("paasng.platform.engine.deploy.bg_wait.wait_bkapp.get_mres_from_cluster")
+    def test_query_on_interval(self, mocker, dp, poller):
+        mocker.return_value = create_res(with_deploy_id(deploy_id=str(dp.id), status_deploy_id="0"))
+        ret = poller.query()
+        assert mocker.call_count == 1
+
+        # 没有收到事件, 按照轮询的间隔查询
+        with patch("time.time", return_value=time.time() + poller.default_retry_delay_seconds):
+            ret = self.next_tick(poller, ret.data).query()
+        assert ret.status == PollingStatus.DOING
+        assert mocker.call_count == 2
+
+    @patch("paasng.platform.engine.deploy.bg_wait.wait_bkapp.get_mres_from_cluster")
+    def test_failing_not_query_on_event(self, mocker, dp, poller, channel):
+        mocker.return_value = create_res(
+            with_conds([create_condition(MResConditionType.APP_AVAILABLE, "False")], MResPhaseType.AppFailed),
+            with_deploy_id(deploy_id=str(dp.id)),
+        )
+        ret = poller.query()
+        assert ret.status == PollingStatus.DOING
+        assert ret.data["polling_failure_count"] == 1
+
+        # 失败次数按照轮询的节奏累计
+        channel.get_version.return_value = 1
+        ret = self.next_tick(poller, ret.data).query()
+        assert ret.data["polling_failure_count"] == 1
+        assert mocker.call_count == 1
+
+
 class TestDeployStatusHandler:
     def test_handle_failed(self, dp, poller):
         DeployStatusHandler().handle(result=CallbackResult(status=CallbackStatus.EXCEPTION), poller=poller)
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+from unittest import mock
+
+import pytest
+from blue_krill.connections.ha_endpoint_pool import HAEndpointPool
+from kubernetes.client import Configuration
+
+from paas_wl.infras.resources.base.base import ClientRegistry, EndpointsHealthChecker
+
+
+def make_configuration(host: str) -> Configuration:
+    c = Configuration()
+    c.host = host
+    return c
+
+
+@pytest.fixture()
+def pools():
+    return {"foo": HAEndpointPool(items=[make_configuration("https://foo.example.com")])}
+
+
+class TestClientRegistry:
+    def test_reuse(self, pools):
+        registry = ClientRegistry()
+        with mock.patch("paas_wl.infras.resources.base.base._get_global_configuration_pool", return_value=pools):
+            client = registry.get("foo", "1")
+            assert registry.get("foo", "1") is client
+            assert client.ep_pool is pools["foo"]
+
+    def test_config_modified(self, pools):
+        registry = ClientRegistry()
+        with mock.patch("paas_wl.infras.resources.base.base._get_global_configuration_pool", return_value=pools):
+            client = registry.get("foo", "1")
+            assert registry.get("foo", "2") is not client
+
+    def test_not_found(self, pools):
+        registry = ClientRegistry()
+        with (
+            mock.patch("paas_wl.infras.resources.base.base._get_global_configuration_pool", return_value=pools),
+            pytest.raises(KeyError),
+        ):
+            registry.get("bar", "1")
+
+
+class TestEndpointsHealthChecker:
+    def test_failover(self):
+        ep_pool = HAEndpointPool(
+            items=[make_configuration("https://a.example.com"), make_configuration("https://b.example.com")]
+        )
+        ep_pool.elect(ep_pool.endpoints[0])
+
+        checker = EndpointsHealthChecker()
+        with mock.patch.object(checker, "probe", side_effect=lambda c: c.host != "https://a.example.com"):
+            # The endpoint will be marked as unhealthy after multiple failures
+            for _ in range(3):
+                checker.check(ep_pool)
+
+        assert ep_pool.endpoints[0].is_unhealthy()
+        assert ep_pool.get().host == "https://b.example.com"
+
+    def test_recover(self):
+        ep_pool = HAEndpointPool(
+            items=[make_configuration("https://a.example.com"), make_configuration("https://b.example.com")]
+        )
+        ep_pool.endpoints[0].set_unhealthy()
+
+        checker = EndpointsHealthChecker()
+        with mock.patch.object(checker, "probe", return_value=True):
+            checker.check(ep_pool)
+
+        assert not ep_pool.endpoints[0].is_unhealthy()
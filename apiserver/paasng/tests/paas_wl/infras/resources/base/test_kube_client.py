@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from paas_wl.infras.resources.base.kres import KPod
+from paas_wl.infras.resources.base.kube_client import DiscoveryCache, LazyDiscoverer, discovery_cache
+
+pytestmark = pytest.mark.django_db(databases=["default", "workloads"])
+
+
+def make_dynamic_client(ep_pool=None):
+    return SimpleNamespace(client=SimpleNamespace(ep_pool=ep_pool) if ep_pool else object())
+
+
+class TestDiscoveryCache:
+    def test_make_key(self):
+        ep_pool = object()
+        assert DiscoveryCache.make_key(make_dynamic_client(ep_pool)) == id(ep_pool)
+        assert DiscoveryCache.make_key(make_dynamic_client()) is None
+
+    def test_get_set(self, settings):
+        settings.KUBE_DISCOVERY_CACHE_TTL = 60
+        cache = DiscoveryCache()
+        client = make_dynamic_client(object())
+        key = DiscoveryCache.make_key(client)
+        assert cache.get(key, client) is None
+
+        cache.set(key, client, {"resources": {}})
+        assert cache.get(key, client) == {"resources": {}}
+
+        cache.invalidate(key)
+        assert cache.get(key, client) is None
+
+    def test_expired(self, settings):
+        settings.KUBE_DISCOVERY_CACHE_TTL = 60
+        cache = DiscoveryCache()
+        client = make_dynamic_client(object())
+        key = DiscoveryCache.make_key(client)
+        cache.set(key, client, {})
+        with mock.patch("time.monotonic", return_value=time.monotonic() + 61):
+            assert cache.get(key, client) is None
+
+    def test_disabled(self, settings):
+        settings.KUBE_DISCOVERY_CACHE_TTL = 0
+        cache = DiscoveryCache()
+        client = make_dynamic_client(object())
+        cache.set(DiscoveryCache.make_key(client), client, {})
+        assert cache.get(DiscoveryCache.make_key(client), client) is None
+
+    def test_maxsize(self, settings):
+        settings.KUBE_DISCOVERY_CACHE_TTL = 60
+        cache = DiscoveryCache(maxsize=2)
+        clients = [make_dynamic_client(object()) for _ in range(3)]
+        for c in clients:
+            cache.set(DiscoveryCache.make_key(c), c, {})
+
+        assert cache.get(DiscoveryCache.make_key(clients[0]), clients[0]) is None
+        assert cache.get(DiscoveryCache.make_key(clients[2]), clients[2]) is not None
+
+
+class TestKresInitialization:
+    def test_shared_discovery(self, k8s_client):
+        discovery_cache.invalidate()
+        KPod(k8s_client)
+
+        with mock.patch(
+            "kubernetes.dynamic.discovery.Discoverer._Discoverer__init_cache", side_effect=AssertionError
+        ) as init_cache:
+            KPod(k8s_client).get_preferred_version()
+            assert not init_cache.called
+
+    def test_discoverers_isolated(self, k8s_client):
+        discovery_cache.invalidate()
+        discoverer_a = KPod(k8s_client).dynamic_client.resources
+        pod_a = discoverer_a.get(prefix="api", api_version="v1", kind="Pod")
+
+        # The lazily discovered group was published, no more discovery requests are required
+        with mock.patch.object(
+            LazyDiscoverer, "get_resources_for_api_version", side_effect=AssertionError
+        ) as get_resources:
+            discoverer_b = KPod(k8s_client).dynamic_client.resources
+            pod_b = discoverer_b.get(prefix="api", api_version="v1", kind="Pod")
+            assert not get_resources.called
+
+        # Every discoverer owns its objects, which are bound to it's own client
+        assert discoverer_a._cache is not discoverer_b._cache
+        assert pod_a is not pod_b
+        assert pod_b.client is discoverer_b.client
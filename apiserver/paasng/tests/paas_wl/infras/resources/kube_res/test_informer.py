@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import queue
+import threading
+import time
+from unittest import mock
+
+import pytest
+from kubernetes.client.exceptions import ApiException
+from kubernetes.dynamic import ResourceInstance
+
+from paas_wl.infras.resources.base.kres import KPod
+from paas_wl.infras.resources.kube_res.informer import (
+    InformerKey,
+    InformerRegistry,
+    InformerWatch,
+    ResourceStore,
+    SharedInformer,
+    Subscription,
+    iter_informer_events,
+)
+
+
+def make_pod(name: str, namespace: str = "default", rv: int = 1, labels=None) -> ResourceInstance:
+    return ResourceInstance(
+        None,
+        {
+            "kind": "Pod",
+            "metadata": {"name": name, "namespace": namespace, "resourceVersion": str(rv), "labels": labels or {}},
+        },
+    )
+
+
+class TestResourceStore:
+    def test_list(self):
+        store = ResourceStore()
+        store.replace([make_pod("a", labels={"app": "foo"}), make_pod("b"), make_pod("c", namespace="other")])
+        assert {o.metadata.name for o in store.list()} == {"a", "b", "c"}
+        assert {o.metadata.name for o in store.list(namespace="default")} == {"a", "b"}
+        assert [o.metadata.name for o in store.list(labels={"app": "foo"})] == ["a"]
+
+    def test_apply(self):
+        store = ResourceStore()
+        store.apply("ADDED", make_pod("a"))
+        store.apply("MODIFIED", make_pod("a", rv=2))
+        assert [o.metadata.resourceVersion for o in store.list()] == ["2"]
+        store.apply("DELETED", make_pod("a", rv=3))
+        assert store.list() == []
+
+
+class TestSharedInformer:
+    @pytest.fixture()
+    def informer(self):
+        informer = SharedInformer(InformerKey.create("default", "Pod", "v1"), KPod)
+        informer.store.replace([make_pod("a", rv=10)])
+        informer.resource_version = informer._history_since = 10
+        return informer
+
+    def test_dispatch(self, informer):
+        sub = Subscription(queue=queue.Queue(), namespace="default")
+        informer.subscribe(sub)
+        informer._dispatch({"type": "ADDED", "object": make_pod("b", rv=11)})
+        informer._dispatch({"type": "ADDED", "object": make_pod("c", namespace="other", rv=12)})
+
+        assert informer.resource_version == 12
+        assert sub.queue.qsize() == 1
+        objs, rv = informer.list(namespace="default")
+        assert {o.metadata.name for o in objs} == {"a", "b"}
+        assert rv == 12
+
+    def test_sync_failed_fail_fast(self):
+        informer = SharedInformer(InformerKey.create("default", "Pod", "v1"), KPod)
+        informer.retry_interval = 0.1
+        stopped = threading.Event()
+        with (
+            mock.patch.object(informer, "_list", side_effect=ApiException(status=403)),
+            mock.patch.object(informer, "_is_idle", side_effect=stopped.is_set),
+        ):
+            informer.start()
+            try:
+                started_at = time.monotonic()
+                assert informer.wait_for_synced(10) is False
+                # Once failed, callers won't wait anymore
+                assert informer.wait_for_synced(10) is False
+                assert time.monotonic() - started_at < 1
+            finally:
+                stopped.set()
+                informer._thread.join(timeout=5)
+
+    def test_subscribe_replay(self, informer):
+        for i in range(3):
+            informer._dispatch({"type": "ADDED", "object": make_pod(f"p{i}", rv=11 + i)})
+
+        sub = Subscription(queue=queue.Queue())
+        informer.subscribe(sub, resource_version=11)
+        assert [sub.queue.get()[1]["object"].metadata.name for _ in range(2)] == ["p1", "p2"]
+
+    def test_subscribe_too_old(self, informer):
+        sub = Subscription(queue=queue.Queue())
+        informer.subscribe(sub, resource_version=5)
+        _, event = sub.queue.get_nowait()
+        assert event["type"] == "ERROR"
+
+    def test_iter_informer_events(self, informer):
+        informer._dispatch({"type": "ADDED", "object": make_pod("b", rv=11)})
+        informer._dispatch({"type": "DELETED", "object": make_pod("b", rv=12)})
+        watch = InformerWatch(
+            informer=informer,
+            namespace="default",
+            labels=None,
+            resource_version=10,
+            convert=lambda e: type("Event", (), {"type": e["type"], "name": e["object"].metadata.name}),
+        )
+        events = list(iter_informer_events([watch], timeout_seconds=0.5))
+        assert [(e.type, e.name) for e in events] == [("ADDED", "b"), ("DELETED", "b")]
+        assert informer._subscriptions == [], "subscription should be removed"
+
+
+class TestInformerRegistry:
+    @pytest.fixture(autouse=True)
+    def _no_thread(self):
+        with mock.patch.object(SharedInformer, "start"):
+            yield
+
+    def test_stop_if_idle(self, settings):
+        settings.KUBE_RES_INFORMER_IDLE_SECONDS = 60
+        registry = InformerRegistry()
+        key = InformerKey.create("default", "Pod", "v1")
+        informer = registry.get(key, KPod)
+        # Just returned by the registry, should not be idle
+        assert registry.stop_if_idle(informer) is False
+
+        informer._last_accessed -= 120
+        assert registry.stop_if_idle(informer) is True
+        assert not informer.is_alive()
+        # The stopped informer is replaced
+        assert registry.get(key, KPod) is not informer
+
+    def test_get_touches_informer(self, settings):
+        settings.KUBE_RES_INFORMER_IDLE_SECONDS = 60
+        registry = InformerRegistry()
+        key = InformerKey.create("default", "Pod", "v1")
+        informer = registry.get(key, KPod)
+
+        informer._last_accessed -= 120
+        assert registry.get(key, KPod) is informer
+        assert registry.stop_if_idle(informer) is False
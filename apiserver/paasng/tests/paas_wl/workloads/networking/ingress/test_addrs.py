@@ -20,9 +20,15 @@ import pytest
 from paas_wl.infras.cluster.entities import Domain as ClusterDomain
 from paas_wl.infras.cluster.entities import PortMap
 from paas_wl.workloads.networking.entrance.addrs import Address, AddressType
-from paas_wl.workloads.networking.entrance.shim import LiveEnvAddresses, PreAllocatedEnvAddresses
+from paas_wl.workloads.networking.entrance.shim import (
+    LiveEnvAddresses,
+    PreAllocatedEnvAddresses,
+    get_builtin_addr_preferred,
+    list_live_addrs_preferred,
+)
 from paas_wl.workloads.networking.ingress.constants import AppDomainSource, AppSubpathSource
 from paas_wl.workloads.networking.ingress.models import AppDomain, AppSubpath, Domain
+from paasng.platform.modules.constants import ExposedURLType
 from tests.paas_wl.utils.release import create_release
 
 pytestmark = pytest.mark.django_db(databases=["default", "workloads"])
@@ -88,3 +94,15 @@ class TestEnvAddresses:
                 id=Domain.objects.get(environment_id=bk_stag_env.id).id,
             ),
         ]
+
+    @pytest.mark.parametrize("exposed_url_type", [ExposedURLType.SUBDOMAIN, ExposedURLType.SUBPATH])
+    def test_list_live_addrs_preferred(self, bk_user, bk_module, bk_stag_env, exposed_url_type, patch_ingress_config):
+        patch_ingress_config(sub_path_domains=[ClusterDomain(name="p1.example.com", https_enabled=True)])
+        bk_module.exposed_url_type = exposed_url_type
+        bk_module.save(update_fields=["exposed_url_type"])
+        create_release(bk_stag_env.wl_app, bk_user, failed=False)
+
+        env = bk_module.envs.get(environment="stag")
+        _, expected = get_builtin_addr_preferred(env)
+        assert expected is not None
+        assert list_live_addrs_preferred([env]) == {env.id: expected}
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+from unittest import mock
+
+import pytest
+from dogpile.cache import make_region
+
+from paasng.accessories.log.client import ESLogClient
+from paasng.accessories.log.filters import (
+    _PROPERTIES_FILTERS_CACHE_MAXSIZE,
+    _properties_filters_cache,
+    parse_properties_filters,
+)
+from paasng.accessories.log.models import ElasticSearchHost
+from paasng.utils.es_log.time_range import SmartTimeRange
+
+
+@pytest.fixture(autouse=True)
+def _memory_cache_region(settings):
+    settings.ES_LOG_MAPPINGS_CACHE_TTL = 60
+    with mock.patch("paasng.accessories.log.client.cache_region", make_region().configure("dogpile.cache.memory")):
+        yield
+
+
+@pytest.fixture()
+def es_client():
+    with mock.patch("paasng.accessories.log.client.Elasticsearch") as es_cls:
+        client = ESLogClient(ElasticSearchHost(host="localhost", port=9200))
+        es = es_cls()
+        es.indices.stats.return_value = {"indices": {"app_log-2000.01.01": {}}}
+        es.indices.get_mapping.return_value = {
+            "app_log-2000.01.01": {"mappings": {"properties": {"message": {"type": "text"}}}}
+        }
+        yield client, es
+
+
+class TestESLogClientCache:
+    def test_get_mappings_cached(self, es_client):
+        client, es = es_client
+        time_range = SmartTimeRange(time_range="1h")
+        for _ in range(3):
+            assert client.get_mappings("app_log-*", time_range, timeout=30) == {"message": {"type": "text"}}
+
+        assert es.indices.stats.call_count == 1
+        assert es.indices.get_mapping.call_count == 1
+
+    def test_cache_disabled(self, es_client, settings):
+        settings.ES_LOG_MAPPINGS_CACHE_TTL = 0
+        client, es = es_client
+        time_range = SmartTimeRange(time_range="1h")
+        client.get_mappings("app_log-*", time_range, timeout=30)
+        client.get_mappings("app_log-*", time_range, timeout=30)
+
+        assert es.indices.stats.call_count == 2
+
+
+def test_parse_properties_filters_cached():
+    mappings = {"message": {"type": "text"}, "json": {"properties": {"levelname": {"type": "keyword"}}}}
+    filters = parse_properties_filters(mappings)
+    assert filters["message"].key == "message.keyword"
+
+    # The returned objects are modified by the callers, the cached ones should not be affected
+    filters["message"].options = [("foo", "100.00%")]
+    assert parse_properties_filters(mappings)["message"].options == []
+
+
+def test_parse_properties_filters_cache_bounded():
+    for i in range(_PROPERTIES_FILTERS_CACHE_MAXSIZE + 10):
+        parse_properties_filters({f"field_{i}": {"type": "keyword"}})
+    assert len(_properties_filters_cache) == _PROPERTIES_FILTERS_CACHE_MAXSIZE
+    # The cache is keyed on the digest of mappings rather than the full mappings
+    assert all(len(key) == 64 for key in _properties_filters_cache)
@@ -15,14 +15,27 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import json
+from pathlib import Path
 from typing import Dict, List
 
 import pytest
+from elasticsearch_dsl import Search
+from elasticsearch_dsl.response import Hit, Response
 
 from paasng.accessories.log.dsl import SearchRequestSchema
-from paasng.accessories.log.utils import NOT_SET, get_es_term, parse_request_to_es_dsl, rename_log_fields
+from paasng.accessories.log.models import ElasticSearchParams
+from paasng.accessories.log.utils import (
+    NOT_SET,
+    build_filed_matcher,
+    clean_logs,
+    get_es_term,
+    get_log_projection,
+    parse_request_to_es_dsl,
+    rename_log_fields,
+)
 from paasng.utils.datetime import convert_timestamp_to_str
-from paasng.utils.es_log.misc import format_timestamp
+from paasng.utils.es_log.misc import flatten_structure, format_timestamp
 
 
 @pytest.fixture()
@@ -226,3 +239,37 @@ def test_parse_request_to_es_dsl(query_conditions, mappings, expected):
 def test_legacy_ts_field(es_timestamp: str, expected_ts):
     timestamp = format_timestamp(es_timestamp, input_format="datetime")
     assert convert_timestamp_to_str(timestamp) == expected_ts
+
+
+class TestLogProjection:
+    @pytest.fixture()
+    def hits(self) -> List[Hit]:
+        data = json.loads((Path(__file__).parent / "assets" / "es_response.json").read_text())
+        return list(Response(Search(), data))
+
+    @staticmethod
+    def legacy_clean_logs(logs: List[Hit], search_params: ElasticSearchParams) -> List[Dict]:
+        """The original implementation of `clean_logs`, used as the reference"""
+        matcher = build_filed_matcher(search_params.filedMatcher) if search_params.filedMatcher is not None else None
+        results = []
+        for log in logs:
+            raw = rename_log_fields(flatten_structure(log.to_dict(), None))
+            results.append(
+                {
+                    "timestamp": format_timestamp(raw[search_params.timeField], search_params.timeFormat),
+                    "message": raw[search_params.messageField],
+                    "raw": {k: v for k, v in raw.items() if matcher(k)} if matcher is not None else raw,
+                }
+            )
+        return results
+
+    @pytest.mark.parametrize("filed_matcher", [None, r"json\..*"])
+    def test_same_as_legacy(self, hits, filed_matcher):
+        search_params = ElasticSearchParams(
+            indexPattern="app_log-*", termTemplate={}, timeFormat="datetime", filedMatcher=filed_matcher
+        )
+        assert clean_logs(hits, search_params) == self.legacy_clean_logs(hits, search_params)
+
+    def test_projection_shared(self):
+        search_params = ElasticSearchParams(indexPattern="app_log-*", termTemplate={})
+        assert get_log_projection(search_params) is get_log_projection(search_params.copy())
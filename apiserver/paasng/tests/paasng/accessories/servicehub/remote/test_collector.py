@@ -15,13 +15,18 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import time
 from unittest import mock
 
 import pytest
 from django.core.exceptions import ImproperlyConfigured
 from django.test import override_settings
 
-from paasng.accessories.servicehub.remote.collector import initialize_remote_services
+from paasng.accessories.servicehub.remote.collector import (
+    FetchResult,
+    fetch_all_remote_services,
+    initialize_remote_services,
+)
 from tests.paasng.accessories.servicehub import data_mocks
 from tests.utils.api import mock_json_response
 
@@ -46,3 +51,51 @@ class TestInitialize:
         assert mocked_store.bulk_upsert.call_count == len(service_remote_endpoints)
         assert mocked_get.called
         assert mocked_get.call_args[0][0] == "http://faked-host/services/"
+
+
+class TestFetchAll:
+    @pytest.fixture()
+    def endpoints(self, config):
+        return [{**config.to_json(), "name": name} for name in ("slow", "fast", "broken")]
+
+    @staticmethod
+    def fake_fetch(config):
+        if config.name == "slow":
+            time.sleep(1)
+        elif config.name == "broken":
+            raise ValueError("broken")
+        return FetchResult(config, [], None)
+
+    def test_slow_endpoint_skipped(self, endpoints, settings):
+        settings.SERVICE_REMOTE_ENDPOINTS = endpoints
+        settings.REMOTE_SERVICES_FETCH_TIMEOUT = 0.5
+        with mock.patch(
+            "paasng.accessories.servicehub.remote.collector.fetch_remote_service", side_effect=self.fake_fetch
+        ):
+            started_at = time.perf_counter()
+            results = list(fetch_all_remote_services())
+
+        assert [ret.config.name for ret in results] == ["fast"]
+        assert time.perf_counter() - started_at < 1
+
+    def test_concurrent(self, endpoints, settings):
+        settings.SERVICE_REMOTE_ENDPOINTS = endpoints
+        with mock.patch(
+            "paasng.accessories.servicehub.remote.collector.fetch_remote_service", side_effect=self.fake_fetch
+        ):
+            results = list(fetch_all_remote_services())
+
+        # The fast endpoint is not delayed by the slow one
+        assert [ret.config.name for ret in results] == ["fast", "slow"]
+
+    def test_timeout_per_request(self, endpoints, settings):
+        settings.SERVICE_REMOTE_ENDPOINTS = endpoints
+        settings.REMOTE_SERVICES_FETCH_CONCURRENCY = 1
+        settings.REMOTE_SERVICES_FETCH_TIMEOUT = 0.5
+        with mock.patch(
+            "paasng.accessories.servicehub.remote.collector.fetch_remote_service", side_effect=self.fake_fetch
+        ):
+            results = list(fetch_all_remote_services())
+
+        # The fast endpoint waits for the slow one in the queue, the waiting time is not counted as timeout
+        assert [ret.config.name for ret in results] == ["fast"]
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+import uuid
+from unittest import mock
+
+import pytest
+
+from paasng.accessories.servicehub.remote.instance_cache import InstanceDataCache
+
+
+@pytest.fixture()
+def cache():
+    return InstanceDataCache()
+
+
+@pytest.fixture()
+def instance_id(cache):
+    instance_id = str(uuid.uuid4())
+    yield instance_id
+    cache.redis.delete(cache._make_data_key(instance_id), cache._make_version_key(instance_id))
+
+
+@pytest.fixture()
+def loader(instance_id):
+    return mock.MagicMock(return_value={"uuid": instance_id, "credentials": {"password": "secret-password"}})
+
+
+class TestInstanceDataCache:
+    @pytest.fixture(autouse=True)
+    def _enable_cache(self, settings):
+        settings.ENABLE_REMOTE_SVC_INSTANCE_CACHE = True
+
+    def test_get_cached(self, cache, instance_id, loader):
+        assert cache.get(instance_id, loader) == loader.return_value
+        assert cache.get(instance_id, loader) == loader.return_value
+        assert loader.call_count == 1
+
+    def test_encrypted(self, cache, instance_id, loader):
+        cache.get(instance_id, loader)
+        raw = cache.redis.get(cache._make_data_key(instance_id))
+        assert raw is not None
+        assert b"secret-password" not in raw
+
+    def test_invalidate(self, cache, instance_id, loader):
+        cache.get(instance_id, loader)
+        cache.invalidate(instance_id)
+        cache.get(instance_id, loader)
+        assert loader.call_count == 2
+
+    def test_refresh(self, cache, instance_id, loader):
+        cache.get(instance_id, loader)
+        loader.return_value = {"uuid": instance_id, "credentials": {"password": "new-password"}}
+        assert cache.refresh(instance_id, loader)["credentials"]["password"] == "new-password"
+        assert cache.get(instance_id, loader)["credentials"]["password"] == "new-password"
+        assert loader.call_count == 2
+
+    def test_outdated_write_ignored(self, cache, instance_id, loader):
+        def invalidated_during_loading():
+            # The instance was changed by others while loading the data
+            cache.invalidate(instance_id)
+            return {"uuid": instance_id, "credentials": {"password": "outdated"}}
+
+        assert cache.get(instance_id, invalidated_during_loading)["credentials"]["password"] == "outdated"
+        assert cache.get(instance_id, loader) == loader.return_value
+
+    def test_disabled(self, cache, instance_id, loader, settings):
+        settings.ENABLE_REMOTE_SVC_INSTANCE_CACHE = False
+        cache.get(instance_id, loader)
+        cache.get(instance_id, loader)
+        assert loader.call_count == 2
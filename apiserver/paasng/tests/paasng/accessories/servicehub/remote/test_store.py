@@ -24,6 +24,7 @@ import pytest
 from paasng.accessories.servicehub.constants import Category
 from paasng.accessories.servicehub.remote import collector
 from paasng.accessories.servicehub.remote.exceptions import ServiceConfigNotFound, ServiceNotFound
+from paasng.accessories.servicehub.remote.store import FrozenDict, _dumps, freeze, thaw
 from tests.paasng.accessories.servicehub import data_mocks
 from tests.utils.api import mock_json_response
 
@@ -111,3 +112,100 @@ class TestRemoteStore:
         config_json["name"] = "xman"
         with pytest.raises(ValueError, match=r".* already exists"):
             store.bulk_upsert(deepcopy(store.all()), meta_info, collector.RemoteSvcConfig.from_json(config_json))
+
+    def test_bulk_upsert_unchanged(self, store, config):
+        generation = store.get_generation()
+        services = [thaw(svc) for svc in store.all()]
+        with mock.patch.object(store.redis, "pipeline", wraps=store.redis.pipeline) as mocked_pipeline:
+            assert store.bulk_upsert(services, {"version": None}, config) == 0
+
+        # One pipeline for reading and one for refreshing the expiration
+        assert mocked_pipeline.call_count == 2
+        assert store.get_generation() == generation
+
+    def test_bulk_upsert_changed(self, store, config):
+        generation = store.get_generation()
+        services = [thaw(svc) for svc in store.all()]
+        services[0]["display_name"] = "new-name"
+        assert store.bulk_upsert(services, {"version": None}, config) == 1
+
+        assert store.get_generation() == generation + 1
+        assert store.get(services[0]["uuid"])["display_name"] == "new-name"
+        # The meta info is a part of the content
+        assert store.bulk_upsert(services, {"version": "v2"}, config) == 2
+
+    def test_filter_by_name(self, store):
+        name = data_mocks.OBJ_STORE_REMOTE_SERVICES_JSON[0]["name"]
+        services = store.filter(conditions={"name": name})
+        assert len(services) == 1
+        assert services[0]["name"] == name
+        assert store.filter(conditions={"name": name, "category": -1}) == []
+        assert store.filter(conditions={"name": "invalid-name"}) == []
+
+    def test_immutable_views(self, store):
+        svc = store.all()[0]
+        with pytest.raises(TypeError):
+            svc["name"] = "foo"
+        with pytest.raises(TypeError):
+            svc["plans"][0].pop("config")
+
+        # A deep copied service is mutable
+        copied = deepcopy(svc)
+        copied["name"] = "foo"
+        assert not isinstance(copied, FrozenDict)
+        assert store.get(svc["uuid"])["name"] != "foo"
+
+    def test_snapshot_reused(self, store):
+        assert store.get_snapshot() is store.get_snapshot()
+        with mock.patch.object(store, "_load_all") as mocked_load_all:
+            store.all()
+            store.filter(conditions={"category": Category.DATA_STORAGE})
+            assert mocked_load_all.call_count == 0
+
+    def test_snapshot_rebuilt_when_generation_changed(self, store, settings):
+        settings.REMOTE_SERVICES_LOCAL_CACHE_TTL = 0
+        svc = thaw(store.all()[0])
+        assert store.get(svc["uuid"]).get("display_name") != "new-name"
+
+        # Simulate an update made by other processes
+        svc["display_name"] = "new-name"
+        store.redis.set(store._make_svc_info_key(svc["uuid"]), _dumps(svc))
+        assert store.get(svc["uuid"]).get("display_name") != "new-name"
+        store.redis.incr(store.generation_key)
+        assert store.get(svc["uuid"])["display_name"] == "new-name"
+
+    def test_snapshot_rebuilt_when_too_old(self, store, settings):
+        settings.REMOTE_SERVICES_LOCAL_CACHE_TTL = 0
+        svc = store.all()[0]
+        assert store.get(svc["uuid"]) is svc
+
+        # Expired keys never bump the generation
+        store.redis.delete(store._make_svc_info_key(svc["uuid"]))
+        assert store.get(svc["uuid"]) is svc
+
+        settings.REMOTE_SERVICES_SNAPSHOT_MAX_AGE = 0
+        with pytest.raises(ServiceNotFound):
+            store.get(svc["uuid"])
+
+
+class TestFreeze:
+    def test_freeze_and_thaw(self):
+        data = {"a": [{"b": 1}], "c": {"d": "e"}}
+        frozen = freeze(data)
+        assert frozen == {"a": ({"b": 1},), "c": {"d": "e"}}
+        assert isinstance(frozen["c"], FrozenDict)
+        assert thaw(frozen) == data
+
+    @pytest.mark.parametrize(
+        "operation",
+        [
+            lambda d: d.update({"a": 2}),
+            lambda d: d.setdefault("b", 1),
+            lambda d: d.pop("a"),
+            lambda d: d.clear(),
+            lambda d: d.__delitem__("a"),
+        ],
+    )
+    def test_readonly(self, operation):
+        with pytest.raises(TypeError):
+            operation(freeze({"a": 1}))
@@ -38,9 +38,10 @@ from paasng.accessories.servicehub.exceptions import (
     UnboundSvcAttachmentDoesNotExist,
 )
 from paasng.accessories.servicehub.local import LocalServiceMgr, LocalServiceObj
-from paasng.accessories.servicehub.manager import mixed_service_mgr
+from paasng.accessories.servicehub.manager import get_rel_instances, mixed_service_mgr
 from paasng.accessories.servicehub.models import ServiceEngineAppAttachment
 from paasng.accessories.servicehub.remote import RemoteServiceObj
+from paasng.accessories.servicehub.remote.manager import RemoteEngineAppInstanceRel
 from paasng.accessories.servicehub.services import ServiceInstanceObj
 from paasng.accessories.services.models import Plan, Service, ServiceCategory, ServiceInstance
 from paasng.core.tenant.user import DEFAULT_TENANT_ID
@@ -516,3 +517,29 @@ class TestLocalMgrProvisionAndInstance:
         for instance_id in attachments:
             with pytest.raises(UnboundSvcAttachmentDoesNotExist):
                 mgr.get_unbound_instance_rel_by_instance_id(svc, instance_id)
+
+
+class TestGetRelInstances:
+    def test_keep_order(self):
+        rels = []
+        for i in range(6):
+            # Mix the remote and local relationships
+            rel = mock.MagicMock(spec=RemoteEngineAppInstanceRel) if i % 2 else mock.MagicMock()
+            rel.get_instance.return_value = i
+            rels.append(rel)
+
+        assert get_rel_instances(rels) == list(range(6))
+        for rel in rels:
+            assert rel.get_instance.call_count == 1
+
+    def test_connections_closed_in_workers(self):
+        rels = [mock.MagicMock(spec=RemoteEngineAppInstanceRel) for _ in range(3)]
+        with mock.patch("paasng.accessories.servicehub.manager.connections") as mocked_connections:
+            get_rel_instances(rels)
+        assert mocked_connections.close_all.call_count == 3
+
+    def test_error_raised(self):
+        rels = [mock.MagicMock(spec=RemoteEngineAppInstanceRel) for _ in range(3)]
+        rels[1].get_instance.side_effect = RuntimeError("remote service is down")
+        with pytest.raises(RuntimeError):
+            get_rel_instances(rels)
@@ -0,0 +1,74 @@
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+
+import random
+from unittest import mock
+
+import pytest
+
+from paasng.infras.iam.members.cache import UserGroupMembersCache
+
+
+@pytest.fixture()
+def cache():
+    return UserGroupMembersCache(ttl=60)
+
+
+@pytest.fixture()
+def group_ids(cache):
+    group_ids = random.sample(range(10**8, 10**9), 3)
+    yield group_ids
+    for group_id in group_ids:
+        cache.redis.delete(cache._make_data_key(group_id), cache._make_version_key(group_id))
+
+
+@pytest.fixture()
+def loader():
+    return mock.MagicMock(side_effect=lambda group_ids: {gid: [f"user-{gid}"] for gid in group_ids})
+
+
+class TestUserGroupMembersCache:
+    def test_get_many(self, cache, group_ids, loader):
+        expected = {gid: [f"user-{gid}"] for gid in group_ids}
+        assert cache.get_many(group_ids, loader) == expected
+        assert cache.get_many(group_ids, loader) == expected
+        assert loader.call_count == 1
+
+    def test_load_missing_only(self, cache, group_ids, loader):
+        cache.get_many(group_ids[:1], loader)
+        cache.get_many(group_ids, loader)
+        assert loader.call_args_list == [mock.call(group_ids[:1]), mock.call(group_ids[1:])]
+
+    def test_invalidate(self, cache, group_ids, loader):
+        cache.get_many(group_ids, loader)
+        cache.invalidate(group_ids[:1])
+        cache.get_many(group_ids, loader)
+        assert loader.call_args_list[-1] == mock.call(group_ids[:1])
+
+    def test_outdated_entry(self, cache, group_ids):
+        version = cache._read_many(group_ids)[0][group_ids[0]]
+
+        # Simulate the members loaded before the invalidation have been written after it
+        cache.invalidate(group_ids[:1])
+        cache._write_many({group_ids[0]: (version, ["stale"])})
+        assert cache._read_many(group_ids[:1])[1] == {}
+
+    def test_disabled(self, group_ids, loader):
+        cache = UserGroupMembersCache(ttl=0)
+        cache.get_many(group_ids, loader)
+        cache.get_many(group_ids, loader)
+        assert loader.call_count == 2
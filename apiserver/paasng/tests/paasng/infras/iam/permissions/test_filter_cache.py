@@ -0,0 +1,142 @@
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+
+from unittest import mock
+
+import pytest
+
+from paasng.infras.iam.permissions.filter_cache import (
+    UserPolicyFilterCache,
+    invalidate_user_policy_filters,
+    make_iam_cache_key,
+)
+from paasng.infras.iam.permissions.resources.application import ApplicationPermission
+from paasng.platform.applications.models import Application
+from tests.utils.basic import generate_random_string
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def cache():
+    return UserPolicyFilterCache(ttl=15, local_maxsize=2)
+
+
+@pytest.fixture()
+def username():
+    return generate_random_string(12)
+
+
+@pytest.fixture()
+def loader():
+    return mock.MagicMock(return_value={"codes": ["foo", "bar"]})
+
+
+class TestUserPolicyFilterCache:
+    def test_get_cached(self, cache, username, loader):
+        assert cache.get("default", username, "view_basic_info", loader) == loader.return_value
+        assert cache.get("default", username, "view_basic_info", loader) == loader.return_value
+        assert loader.call_count == 1
+
+    def test_shared_by_redis(self, cache, username, loader):
+        cache.get("default", username, "view_basic_info", loader)
+        # A new cache object has an empty local LRU, the filter should be read from redis
+        other_cache = UserPolicyFilterCache(ttl=15)
+        assert other_cache.get("default", username, "view_basic_info", loader) == loader.return_value
+        assert loader.call_count == 1
+
+    def test_keys(self, cache, username, loader):
+        cache.get("default", username, "view_basic_info", loader)
+        cache.get("default", username, "basic_develop", loader)
+        cache.get("system", username, "view_basic_info", loader)
+        assert loader.call_count == 3
+
+    def test_empty_filter_cached(self, cache, username):
+        loader = mock.MagicMock(return_value=None)
+        assert cache.get("default", username, "view_basic_info", loader) is None
+        assert cache.get("default", username, "view_basic_info", loader) is None
+        assert loader.call_count == 1
+
+    def test_invalidate(self, cache, username, loader):
+        cache.get("default", username, "view_basic_info", loader)
+        cache.get("default", username, "basic_develop", loader)
+        # Invalidated by another cache object, the local entries should also be outdated
+        UserPolicyFilterCache(ttl=15).invalidate([username])
+
+        cache.get("default", username, "view_basic_info", loader)
+        cache.get("default", username, "basic_develop", loader)
+        assert loader.call_count == 4
+
+    def test_loader_error_not_cached(self, cache, username, loader):
+        failed_loader = mock.MagicMock(side_effect=RuntimeError("IAM is unavailable"))
+        with pytest.raises(RuntimeError):
+            cache.get("default", username, "view_basic_info", failed_loader)
+
+        assert cache.get("default", username, "view_basic_info", loader) == loader.return_value
+        assert loader.call_count == 1
+
+    def test_disabled(self, username, loader):
+        cache = UserPolicyFilterCache(ttl=0)
+        cache.get("default", username, "view_basic_info", loader)
+        cache.get("default", username, "view_basic_info", loader)
+        assert loader.call_count == 2
+
+    def test_local_lru(self, cache, username, loader):
+        for action in ["a1", "a2", "a3"]:
+            cache.get("default", username, action, loader)
+        assert len(cache._local) == 2
+        assert ("default", username, "a1") not in cache._local
+
+
+def test_make_iam_cache_key():
+    assert (
+        make_iam_cache_key("1", "policy_filter", "version", "admin") == "bk_paas3:v1:iam:policy_filter:version:admin"
+    )
+
+
+class TestGenUserAppFilters:
+    @pytest.fixture()
+    def make_filter(self):
+        iam = mock.MagicMock()
+        iam.make_filter.return_value = {"op": "in", "field": "application.id", "value": ["foo"]}
+        with mock.patch.object(ApplicationPermission, "_make_iam", return_value=iam):
+            yield iam.make_filter
+
+    def test_cached(self, username, make_filter):
+        ApplicationPermission().gen_user_app_filters(username, "default")
+        ApplicationPermission().gen_user_app_filters(username, "default")
+        assert make_filter.call_count == 1
+
+        invalidate_user_policy_filters([username])
+        ApplicationPermission().gen_user_app_filters(username, "default")
+        assert make_filter.call_count == 2
+
+    def test_rebuilt_from_cache(self, bk_app, username, make_filter):
+        make_filter.return_value = {"op": "in", "field": "application.id", "value": [bk_app.code, "not-exists"]}
+        ApplicationPermission().gen_user_app_filters(username, bk_app.tenant_id)
+
+        # The filter is rebuilt from the cached policy expression
+        filters = ApplicationPermission().gen_user_app_filters(username, bk_app.tenant_id)
+        assert make_filter.call_count == 1
+        assert list(Application.objects.filter(filters).values_list("code", flat=True)) == [bk_app.code]
+
+    def test_materialize_codes(self, settings, bk_app, username, make_filter):
+        settings.IAM_APP_FILTER_MATERIALIZE_CODES = True
+        make_filter.return_value = {"op": "in", "field": "application.id", "value": [bk_app.code, "not-exists"]}
+
+        filters = ApplicationPermission().gen_user_app_filters(username, bk_app.tenant_id)
+        assert list(Application.objects.filter(filters).values_list("code", flat=True)) == [bk_app.code]
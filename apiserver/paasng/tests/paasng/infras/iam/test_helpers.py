@@ -0,0 +1,89 @@
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+
+from unittest import mock
+
+import pytest
+
+from paasng.infras.iam.client import BKIAMClient
+from paasng.infras.iam.helpers import (
+    add_role_members,
+    fetch_applications_members,
+    fetch_role_members,
+    fetch_user_main_role,
+    fetch_user_roles,
+)
+from paasng.platform.applications.constants import ApplicationRole
+from tests.utils.helpers import create_app
+
+pytestmark = pytest.mark.django_db
+
+
+class TestFetchApplicationsMembers:
+    def test_normal(self, bk_user):
+        apps = [create_app(owner_username=bk_user.username) for _ in range(3)]
+        add_role_members(apps[0].code, ApplicationRole.DEVELOPER, ["foo", "bar"])
+
+        members = fetch_applications_members([app.code for app in apps])
+        assert set(members) == {app.code for app in apps}
+        assert members[apps[0].code][ApplicationRole.ADMINISTRATOR] == [bk_user.username]
+        assert sorted(members[apps[0].code][ApplicationRole.DEVELOPER]) == ["bar", "foo"]
+        assert members[apps[1].code][ApplicationRole.DEVELOPER] == []
+
+    def test_roles(self, bk_user):
+        app = create_app(owner_username=bk_user.username)
+        members = fetch_applications_members([app.code], roles=[ApplicationRole.ADMINISTRATOR])
+        assert members == {app.code: {ApplicationRole.ADMINISTRATOR: [bk_user.username]}}
+
+
+class TestMembersCache:
+    @pytest.fixture(autouse=True)
+    def _enable_cache(self, settings):
+        settings.IAM_GROUP_MEMBERS_CACHE_TTL = 60
+
+    def test_invalidated_by_add_members(self, bk_user):
+        app = create_app(owner_username=bk_user.username)
+        roles = [ApplicationRole.DEVELOPER]
+        assert fetch_applications_members([app.code], roles=roles) == {app.code: {ApplicationRole.DEVELOPER: []}}
+
+        add_role_members(app.code, ApplicationRole.DEVELOPER, ["foo"])
+        assert fetch_applications_members([app.code], roles=roles) == {app.code: {ApplicationRole.DEVELOPER: ["foo"]}}
+
+    def test_permission_helpers_bypass_cache(self, bk_user):
+        app = create_app(owner_username=bk_user.username)
+        # Fill the cache with the current members
+        fetch_applications_members([app.code])
+
+        with mock.patch("paasng.infras.iam.helpers.get_user_group_members_cache") as get_cache:
+            assert fetch_role_members(app.code, ApplicationRole.ADMINISTRATOR) == [bk_user.username]
+            assert fetch_user_roles(app.code, bk_user.username) == [ApplicationRole.ADMINISTRATOR]
+            assert fetch_user_main_role(app.code, bk_user.username) == ApplicationRole.ADMINISTRATOR
+        assert not get_cache.called
+
+
+class TestFetchUserGroupMembers:
+    def test_pagination(self, settings):
+        pages = [
+            {"code": 0, "data": {"count": 3, "results": [{"id": "foo"}, {"id": "bar"}]}},
+            {"code": 0, "data": {"count": 3, "results": [{"id": "baz"}]}},
+        ]
+        client = BKIAMClient("default")
+        with mock.patch.object(client, "client") as api:
+            api.v2_management_group_members.side_effect = pages
+            assert client.fetch_user_group_members(1) == ["foo", "bar", "baz"]
+
+        assert [c.kwargs["params"]["page"] for c in api.v2_management_group_members.call_args_list] == [1, 2]
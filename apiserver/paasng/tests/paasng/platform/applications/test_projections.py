@@ -0,0 +1,72 @@
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+
+import pytest
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from paas_wl.core.env import env_is_running, envs_is_running
+from paasng.accessories.publish.entrance.exposer import get_exposed_links
+from paasng.accessories.publish.market.models import MarketConfig
+from paasng.platform.applications.models import Application
+from paasng.platform.applications.projections import ApplicationListProjection
+from paasng.platform.mgrlegacy.migrate import get_migration_process_status
+from tests.paas_wl.utils.release import create_release
+from tests.utils.helpers import create_app
+
+pytestmark = pytest.mark.django_db(databases=["default", "workloads"])
+
+
+def _count_queries(func) -> int:
+    """Count the queries of both "default" and "workloads" databases"""
+    with (
+        CaptureQueriesContext(connections["default"]) as default_ctx,
+        CaptureQueriesContext(connections["workloads"]) as wl_ctx,
+    ):
+        func()
+    return len(default_ctx) + len(wl_ctx)
+
+
+class TestApplicationListProjection:
+    def test_load(self, bk_app, bk_user):
+        stag_env = bk_app.get_default_module().envs.get(environment="stag")
+        create_release(stag_env.wl_app, bk_user, failed=False)
+
+        items = ApplicationListProjection([Application.objects.get(pk=bk_app.pk)]).load()
+        assert len(items) == 1
+        assert items[0].application == bk_app
+        assert items[0].deploy_info == get_exposed_links(bk_app)
+        assert items[0].deploy_info["stag"]["deployed"] is True
+        assert items[0].migration_status == get_migration_process_status(bk_app)
+        assert items[0].market_config == MarketConfig.objects.get(application=bk_app)
+
+    def test_queries_not_grow(self, bk_user):
+        apps = [create_app(owner_username=bk_user.username) for _ in range(4)]
+
+        def _load(n: int):
+            ApplicationListProjection(list(Application.objects.filter(pk__in=[a.pk for a in apps[:n]]))).load()
+
+        # The first loading creates the market configs
+        _load(len(apps))
+        assert _count_queries(lambda: _load(1)) == _count_queries(lambda: _load(len(apps)))
+
+
+def test_envs_is_running(bk_app, bk_user):
+    envs = list(bk_app.envs.all())
+    create_release(envs[0].wl_app, bk_user, failed=False)
+    assert envs_is_running(envs) == {env.id: env_is_running(env) for env in envs}
+    assert envs_is_running(envs)[envs[0].id] is True
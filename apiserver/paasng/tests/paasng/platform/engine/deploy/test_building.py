@@ -25,7 +25,7 @@ from paasng.platform.declarative.handlers import get_deploy_desc_handler
 from paasng.platform.engine.constants import JobStatus
 from paasng.platform.engine.deploy.building import ApplicationBuilder, BuildProcessResultHandler, DockerBuilder
 from paasng.platform.engine.handlers import attach_all_phases
-from paasng.platform.engine.models import Deployment, DeployPhaseTypes
+from paasng.platform.engine.models import Deployment, DeployPhaseTypes, SourcePackageArtifact
 from paasng.platform.engine.phases_steps.phases import DeployPhaseManager
 from paasng.platform.sourcectl.exceptions import GetAppYamlError, GetProcfileError
 from tests.utils.mocks.poll_task import FakeTaskPoller
@@ -231,3 +231,35 @@ class TestBuildProcessResultHandler:
             deployment.refresh_from_db()
             assert deployment.status == JobStatus.PENDING.value
             assert mocked_release_mgr.called
+
+
+class TestCompressAndUpload:
+    @pytest.fixture()
+    def builder(self, bk_deployment_full):
+        with mock.patch("paasng.platform.engine.utils.output.RedisChannelStream"):
+            yield ApplicationBuilder.from_deployment_id(bk_deployment_full.id)
+
+    def test_upload_and_reuse(self, builder, bk_deployment_full, tmp_path):
+        (tmp_path / "app.py").write_text("print('hello')")
+        with (
+            mock.patch(
+                "paasng.platform.engine.deploy.building.download_source_to_dir", return_value=("", tmp_path)
+            ) as download_source_to_dir,
+            mock.patch("paasng.platform.engine.deploy.building.tag_module_from_source_files"),
+            mock.patch("paasng.platform.engine.deploy.building.make_blob_store") as make_blob_store,
+            mock.patch("paasng.platform.engine.utils.source.make_blob_store"),
+        ):
+            make_blob_store().upload_fileobj.side_effect = lambda fh, key: fh.read()
+
+            assert builder.compress_and_upload("stag/tar", package_digest="d" * 64) == "stag/tar"
+            assert make_blob_store().upload_fileobj.call_count == 1
+            assert SourcePackageArtifact.objects.get(digest="d" * 64).package_path == "stag/tar"
+
+            # The package with the same digest is reused without downloading and uploading
+            assert builder.compress_and_upload("prod/tar", package_digest="d" * 64) == "stag/tar"
+            assert download_source_to_dir.call_count == 1
+            assert make_blob_store().upload_fileobj.call_count == 1
+
+            # Always upload when no digest is given
+            assert builder.compress_and_upload("prod/tar") == "prod/tar"
+            assert make_blob_store().upload_fileobj.call_count == 2
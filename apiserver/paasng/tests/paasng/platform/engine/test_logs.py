@@ -14,9 +14,12 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+from unittest import mock
+
 import pytest
 
-from paasng.platform.engine.logs import DeploymentLogStreams, get_all_logs, make_channel_stream
+from paasng.platform.engine.log_archive import ArchivedLinesReader, archive_output_stream
+from paasng.platform.engine.logs import DeploymentLogsReader, DeploymentLogStreams, get_all_logs, make_channel_stream
 
 pytestmark = pytest.mark.django_db(databases=["default", "workloads"])
 
@@ -56,3 +59,63 @@ class TestDeploymentLogs:
 def test_get_all_logs(bk_deployment):
     logs = get_all_logs(bk_deployment)
     assert logs.strip() == ""
+
+
+class TestDeploymentLogsReader:
+    @pytest.fixture()
+    def _write_logs(self, bk_deployment):
+        log_streams = DeploymentLogStreams(bk_deployment)
+        for i in range(3):
+            log_streams.preparation_stream_for_write.write(f"prep {i}")
+        for i in range(5):
+            log_streams.main_stream_for_write.write(f"main {i}")
+
+    @pytest.mark.usefixtures("_write_logs")
+    def test_read_lines(self, bk_deployment):
+        reader = DeploymentLogsReader(bk_deployment)
+        assert reader.count() == 8
+        assert reader.head(2) == ["prep 0\n", "prep 1\n"]
+        assert reader.tail(2) == ["main 3\n", "main 4\n"]
+        assert reader.page(2, 3) == ["main 0\n", "main 1\n", "main 2\n"]
+        assert reader.read_lines() == [f"prep {i}\n" for i in range(3)] + [f"main {i}\n" for i in range(5)]
+
+    @pytest.mark.usefixtures("_write_logs")
+    def test_read_archived(self, bk_deployment, django_capture_on_commit_callbacks):
+        archived_data = {}
+
+        def fake_upload(filepath, key):
+            archived_data[key] = filepath.read_bytes()
+
+        def fake_fetch_range(self, offset, length):
+            return archived_data[self.archive.blob_key][offset : offset + length]
+
+        with (
+            mock.patch("paasng.platform.engine.log_archive.ARCHIVE_CHUNK_LINES", 2),
+            mock.patch("paasng.platform.engine.log_archive.make_blob_store") as make_blob_store,
+            mock.patch.object(ArchivedLinesReader, "_fetch_range", fake_fetch_range),
+        ):
+            make_blob_store().upload_file.side_effect = fake_upload
+
+            main_stream = DeploymentLogStreams(bk_deployment).main_stream
+            archive = archive_output_stream(main_stream)
+            assert archive is not None
+            assert archive.lines_count == 5
+            assert len(archive.chunks) == 3
+            assert main_stream.lines.count() == 0, "lines in database should be deleted"
+
+            reader = DeploymentLogsReader(bk_deployment)
+            assert reader.count() == 8
+            assert reader.tail(3) == ["main 2\n", "main 3\n", "main 4\n"]
+            assert reader.page(2, 4) == ["main 1\n", "main 2\n", "main 3\n", "main 4\n"]
+            assert get_all_logs(bk_deployment).startswith("prep 0\nprep 1\nprep 2\nmain 0\n")
+
+            # Lines written after archiving are read after the archived ones
+            main_stream.write("main 5")
+            reader = DeploymentLogsReader(bk_deployment)
+            assert reader.count() == 9
+            assert reader.tail(2) == ["main 4\n", "main 5\n"]
+
+            # The archive file is deleted with the stream
+            with django_capture_on_commit_callbacks(execute=True, using="workloads"):
+                main_stream.delete()
+            make_blob_store().delete_file.assert_called_once_with(archive.blob_key)
@@ -15,6 +15,7 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import threading
 from unittest import mock
 
 import pytest
@@ -63,3 +64,37 @@ class TestMixStream:
     def test_write_title(self, build_proc):
         RedisWithModelStream(build_proc, mock.MagicMock()).write_title("title")
         assert build_proc.output_stream.lines.count() == 0, "title should not be saved"
+
+    def test_write_message_buffered(self, build_proc):
+        writer = build_proc.output_stream.buffered_writer(batch_size=3, flush_interval=60)
+        bps = RedisWithModelStream(writer, mock.MagicMock())
+        bps.write_message("line 1")
+        bps.write_message("line 2")
+        assert build_proc.output_stream.lines.count() == 0, "lines should be buffered"
+
+        bps.write_message("line 3")
+        bps.write_message("line 4")
+        assert build_proc.output_stream.lines.count() == 3
+
+        bps.close()
+        assert list(build_proc.output_stream.lines.values_list("line", "seq")) == [
+            ("line 1\n", 0),
+            ("line 2\n", 1),
+            ("line 3\n", 2),
+            ("line 4\n", 3),
+        ]
+
+    def test_flush_by_timer(self, build_proc):
+        writer = build_proc.output_stream.buffered_writer(batch_size=100, flush_interval=0.1)
+        flushed = threading.Event()
+        with mock.patch.object(type(writer), "_flush", side_effect=flushed.set):
+            writer.write("line 1")
+            # The buffer should be flushed by the timer even if no more lines arrive
+            assert flushed.wait(timeout=5)
+
+    def test_write_title_flush(self, build_proc):
+        writer = build_proc.output_stream.buffered_writer(batch_size=100, flush_interval=60)
+        bps = RedisWithModelStream(writer, mock.MagicMock())
+        bps.write_message("message")
+        bps.write_title("title")
+        assert build_proc.output_stream.lines.count() == 1
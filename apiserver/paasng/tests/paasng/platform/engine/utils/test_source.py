@@ -15,7 +15,6 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
-import pathlib
 from typing import Any, Dict, Optional
 from unittest import mock
 
@@ -27,20 +26,24 @@ from django_dynamic_fixture import G
 
 from paasng.platform.declarative.constants import WEB_PROCESS
 from paasng.platform.declarative.deployment.controller import DeploymentDescription
-from paasng.platform.engine.models import Deployment
+from paasng.platform.engine.models import Deployment, SourcePackageArtifact
 from paasng.platform.engine.models.deployment import ProcessTmpl
 from paasng.platform.engine.utils.output import ConsoleStream
 from paasng.platform.engine.utils.source import (
     TypeProcesses,
-    check_source_package,
+    check_source_package_size,
     download_source_to_dir,
+    get_reusable_source_package,
     get_source_dir,
+    get_source_package_digest,
     get_source_package_path,
+    record_source_package,
 )
 from paasng.platform.modules.constants import SourceOrigin
 from paasng.platform.sourcectl.exceptions import GetAppYamlError
 from paasng.platform.sourcectl.models import VersionInfo
-from paasng.platform.sourcectl.utils import generate_temp_dir, generate_temp_file
+from paasng.platform.sourcectl.source_types import get_sourcectl_names
+from paasng.platform.sourcectl.utils import DockerIgnore, generate_temp_dir
 
 pytestmark = pytest.mark.django_db(databases=["default", "workloads"])
 
@@ -92,6 +95,78 @@ class TestGetSourcePackagePath:
         )
 
 
+class TestSourcePackageDigest:
+    """Test get_source_package_digest()"""
+
+    @staticmethod
+    def make_deployment(bk_module, env_name="stag", revision="6f3bfa8adf8be3") -> Deployment:
+        return Deployment.objects.create(
+            region=bk_module.region,
+            operator=bk_module.owner,
+            app_environment=bk_module.get_envs(env_name),
+            source_type=bk_module.source_type,
+            source_location="http://git.bking.com/node-spa-demo.git",
+            source_revision=revision,
+            source_version_type="branch",
+            source_version_name="dev",
+            advanced_options={},
+        )
+
+    def test_same_revision_across_envs(self, bk_module):
+        stag_digest = get_source_package_digest(self.make_deployment(bk_module, "stag"))
+        assert stag_digest is not None
+        assert get_source_package_digest(self.make_deployment(bk_module, "prod")) == stag_digest
+        assert get_source_package_digest(self.make_deployment(bk_module, "prod", revision="a1b2c3")) != stag_digest
+
+    def test_dockerignore(self, bk_module):
+        deployment = self.make_deployment(bk_module)
+        digest = get_source_package_digest(deployment)
+        assert get_source_package_digest(deployment, DockerIgnore("*.log")) != digest
+        assert get_source_package_digest(deployment, DockerIgnore("*.log")) == get_source_package_digest(
+            deployment, DockerIgnore("*.log")
+        )
+
+    def test_disabled(self, bk_module):
+        deployment = self.make_deployment(bk_module)
+        with override_settings(ENABLE_SOURCE_PACKAGE_CACHE=False):
+            assert get_source_package_digest(deployment) is None
+
+    def test_mutable_sources(self, bk_module):
+        deployment = self.make_deployment(bk_module)
+        bk_module.source_type = get_sourcectl_names().bare_git
+        bk_module.save(update_fields=["source_type"])
+        assert get_source_package_digest(Deployment.objects.get(pk=deployment.pk)) is None
+
+        bk_module.source_origin = SourceOrigin.BK_LESS_CODE.value
+        bk_module.save(update_fields=["source_origin"])
+        assert get_source_package_digest(Deployment.objects.get(pk=deployment.pk)) is None
+
+
+class TestReusableSourcePackage:
+    """Test reusing the source package by digest"""
+
+    @pytest.fixture()
+    def deployment(self, bk_module):
+        return TestSourcePackageDigest.make_deployment(bk_module)
+
+    def test_reuse(self, deployment):
+        assert get_reusable_source_package("d" * 64) is None
+
+        record_source_package(deployment, "d" * 64, "foo/tar", 1024)
+        with mock.patch("paasng.platform.engine.utils.source.make_blob_store"):
+            artifact = get_reusable_source_package("d" * 64)
+        assert artifact is not None
+        assert artifact.package_path == "foo/tar"
+        assert artifact.revision == deployment.source_revision
+
+    def test_package_missing(self, deployment):
+        record_source_package(deployment, "d" * 64, "foo/tar", 1024)
+        with mock.patch("paasng.platform.engine.utils.source.make_blob_store") as make_blob_store:
+            make_blob_store().get_file_metadata.side_effect = RuntimeError("not found")
+            assert get_reusable_source_package("d" * 64) is None
+        assert not SourcePackageArtifact.objects.filter(digest="d" * 64).exists()
+
+
 @pytest.mark.usefixtures("_init_tmpls")
 class TestDownloadSourceToDir:
     """Test download_source_to_dir()"""
@@ -159,28 +234,24 @@ class TestDownloadSourceToDir:
             assert yaml.safe_load(procfile.read_text()) == expected
 
 
-class TestCheckSourcePackage:
-    """Test check_source_package()"""
+class TestCheckSourcePackageSize:
+    """Test check_source_package_size()"""
 
     @override_settings(ENGINE_APP_SOURCE_SIZE_WARNING_THRESHOLD_MB=100)
     def test_normal(self, bk_module, capsys):
         stream = ConsoleStream()
-        with generate_temp_file(suffix=".tar.gz") as package_path:
-            pathlib.Path(package_path).write_text("Hello")
-            check_source_package(bk_module.get_envs("prod").engine_app, package_path, stream)
+        check_source_package_size(bk_module.get_envs("prod").engine_app, len("Hello"), stream)
 
-            out, err = capsys.readouterr()
-            assert out == ""
+        out, err = capsys.readouterr()
+        assert out == ""
 
     @override_settings(ENGINE_APP_SOURCE_SIZE_WARNING_THRESHOLD_MB=0)
     def test_big_package(self, bk_module, capsys):
         stream = ConsoleStream()
-        with generate_temp_file(suffix=".tar.gz") as package_path:
-            pathlib.Path(package_path).write_text("Hello")
-            check_source_package(bk_module.get_envs("prod").engine_app, package_path, stream)
+        check_source_package_size(bk_module.get_envs("prod").engine_app, len("Hello"), stream)
 
-            out, err = capsys.readouterr()
-            assert out
+        out, err = capsys.readouterr()
+        assert out
 
 
 class Test__get_source_dir:
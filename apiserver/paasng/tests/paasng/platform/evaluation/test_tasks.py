@@ -0,0 +1,110 @@
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+from unittest import mock
+
+import pytest
+from django.utils import timezone
+
+from paasng.platform.evaluation.constants import BatchTaskStatus
+from paasng.platform.evaluation.models import AppOperationReport, AppOperationReportCollectionTask
+from paasng.platform.evaluation.tasks import (
+    _filter_changed_apps,
+    collect_and_update_app_operation_reports,
+    collect_app_operation_reports_shard,
+    finish_app_operation_reports_collection,
+    mark_app_operation_reports_collection_failed,
+)
+from tests.paasng.platform.engine.setup_utils import create_fake_deployment
+from tests.utils.helpers import create_app
+
+pytestmark = pytest.mark.django_db(databases=["default", "workloads"])
+
+
+@pytest.fixture()
+def another_app():
+    return create_app()
+
+
+@pytest.fixture()
+def mocked_update_report():
+    with (
+        mock.patch("paasng.platform.evaluation.tasks._update_or_create_operation_report") as mocked_update,
+        mock.patch("paasng.platform.evaluation.tasks._fetch_members_map", return_value=None),
+    ):
+        yield mocked_update
+
+
+class TestCollectReports:
+    def test_sequential(self, bk_app, another_app, mocked_update_report):
+        mocked_update_report.side_effect = lambda app, members, **kwargs: app == another_app and 1 / 0
+
+        collect_and_update_app_operation_reports([bk_app.code, another_app.code])
+        # 顺序采集时无需限制后端服务的并发数
+        assert all(not c.kwargs["limit_concurrency"] for c in mocked_update_report.call_args_list)
+
+        task = AppOperationReportCollectionTask.objects.latest("start_at")
+        assert task.status == BatchTaskStatus.FINISHED
+        assert (task.total_count, task.succeed_count, task.failed_count) == (2, 2, 1)
+        assert task.failed_app_codes == [another_app.code]
+
+    def test_fan_out(self, bk_app, another_app, mocked_update_report, settings):
+        settings.APP_OPERATION_REPORT_COLLECT_SHARD_SIZE = 1
+        mocked_update_report.side_effect = lambda app, members, **kwargs: app == another_app and 1 / 0
+
+        with mock.patch("paasng.platform.evaluation.tasks.chord") as mocked_chord:
+            collect_and_update_app_operation_reports([bk_app.code, another_app.code], fan_out=True)
+
+        header = mocked_chord.call_args[0][0]
+        assert sorted(sig.args[1] for sig in header) == sorted([[bk_app.code], [another_app.code]])
+        callback = mocked_chord.return_value.call_args[0][0]
+        assert [errback.task for errback in callback.options["link_error"]] == [
+            mark_app_operation_reports_collection_failed.name
+        ]
+
+        # Run the shards and the callback synchronously
+        results = [collect_app_operation_reports_shard(*sig.args) for sig in header]
+        assert all(c.kwargs["limit_concurrency"] for c in mocked_update_report.call_args_list)
+        task = AppOperationReportCollectionTask.objects.latest("start_at")
+        assert task.status == BatchTaskStatus.RUNNING
+        assert (task.succeed_count, task.failed_count) == (2, 1)
+
+        finish_app_operation_reports_collection(results, task.id)
+        task.refresh_from_db()
+        assert task.status == BatchTaskStatus.FINISHED
+        assert task.failed_app_codes == [another_app.code]
+
+    def test_fan_out_failed(self):
+        task = AppOperationReportCollectionTask.objects.create(total_count=1)
+
+        mark_app_operation_reports_collection_failed(None, ValueError("shard failed"), None, task.id)
+        task.refresh_from_db()
+        assert task.status == BatchTaskStatus.FAILED
+        assert task.end_at is not None
+
+
+class TestFilterChangedApps:
+    def test_not_collected(self, bk_app):
+        assert _filter_changed_apps([bk_app]) == [bk_app]
+
+    def test_unchanged(self, bk_app):
+        AppOperationReport.objects.create(app=bk_app, collected_at=timezone.now())
+        assert _filter_changed_apps([bk_app]) == []
+
+    def test_deployed(self, bk_app, bk_module):
+        AppOperationReport.objects.create(app=bk_app, collected_at=timezone.now())
+        create_fake_deployment(bk_module)
+        assert _filter_changed_apps([bk_app]) == [bk_app]
@@ -15,11 +15,14 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import hashlib
+
 import pytest
 import yaml
 from rest_framework.exceptions import ValidationError
 
 from paasng.platform.smart_app.services.detector import SourcePackageStatReader, relative_path_of_app_desc
+from paasng.platform.sourcectl.utils import generate_temp_dir
 from tests.paasng.platform.sourcectl.packages.utils import V2_APP_DESC_EXAMPLE
 
 pytestmark = pytest.mark.django_db
@@ -105,3 +108,16 @@ class TestSourcePackageStatReader:
         stat = SourcePackageStatReader(tar_path).read()
         assert stat.meta_info == meta_info
         assert stat.version == version
+
+    @pytest.mark.parametrize(
+        "contents",
+        [{"app_desc.yaml": yaml.dump(V2_APP_DESC_EXAMPLE), "logo.png": "dummy", "src/main.py": "print(1)"}],
+    )
+    def test_read_and_extract(self, tar_path):
+        with generate_temp_dir() as workplace:
+            stat = SourcePackageStatReader(tar_path).read(extract_to=workplace)
+            assert (workplace / "src" / "main.py").read_text() == "print(1)"
+
+        assert stat == SourcePackageStatReader(tar_path).read()
+        assert stat.meta_info["logo_b64data"] == "base64,ZHVtbXk="
+        assert stat.sha256_signature == hashlib.sha256(tar_path.read_bytes()).hexdigest()
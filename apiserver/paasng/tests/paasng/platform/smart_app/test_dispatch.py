@@ -34,8 +34,11 @@ from paasng.platform.smart_app.services.dispatch import (
     dispatch_slug_image_to_registry,
     parse_and_save_cnb_metadata,
 )
-from paasng.platform.smart_app.services.image_mgr import SMartImageManager
+from paasng.platform.smart_app.services.image_mgr import SharedLayerRegistry, SMartImageManager
 from paasng.platform.sourcectl.utils import compress_directory, generate_temp_dir, uncompress_directory
+from paasng.utils.moby_distribution import Blob, ImageRef, ManifestRef, ManifestSchema2
+from paasng.utils.moby_distribution.spec.base import Descriptor
+from paasng.utils.moby_distribution.spec.manifest import DockerManifestConfigDescriptor
 
 pytestmark = pytest.mark.django_db
 
@@ -98,7 +101,7 @@ def test_dispatch_slug_image_to_registry(
     """测试将 slug runner 镜像分发到 registry, 涉及多次网络请求, 要保证顺序正确。
 
     1. 获取镜像镜像信息 -> slugrunner_manifest_url & slugrunner_config_url
-    2. 初始化上传 -> init_upload_url
+    2. 检查层文件是否已存在，初始化上传 -> part_layer_touch_url & init_upload_url
     3. 上传层文件 -> upload_url
     4. 提交层文件 -> part_layer_commit_url
     5. 上传 Procfile -> upload_url
@@ -137,16 +140,30 @@ def test_dispatch_slug_image_to_registry(
         headers={"range": "0-10000000", "docker-upload-uuid": "abc", "location": commit_url},
     )
 
+    # Step 7 & 8: 上传合并后的配置文件 & 验证配置文件已上传成功
+    # 由于有时间字段, 镜像 id 每个单测都会改变
+    # requests_mock 优先匹配后注册的规则, 因此需要先于层文件注册, 避免覆盖层文件的 HEAD 请求
+    app_image_config_url = f"{base_url}/v2/{module_image.name}/blobs/sha256:.*"
+    mock_adapter.register_uri(
+        "HEAD",
+        url=re.compile(app_image_config_url),
+        headers={"Content-Type": "application/vnd.docker.distribution.manifest.v2+json"},
+    )
+
     # 测试上传 layer.tar.gz 和 main.Procfile.tar.gz
     # Step 3 & 4: 上传层文件 & 提交层文件
     layer_tar_gz_sha256 = hashlib.sha256((smart_asserts_path / "main" / "layer.tar.gz").read_bytes()).hexdigest()
     part_layer_commit_url = f"{commit_url}?digest=sha256%3A{layer_tar_gz_sha256}"
     mock_adapter.register_uri("POST", url=part_layer_commit_url, status_code=201)
     part_layer_touch_url = f"{base_url}/v2/{module_image.name}/blobs/sha256:{layer_tar_gz_sha256}"
+    # 上传前检查层是否已存在
     mock_adapter.register_uri(
         "HEAD",
         url=part_layer_touch_url,
-        headers={"Content-Type": "application/vnd.docker.distribution.manifest.v2+json"},
+        response_list=[
+            {"status_code": 404},
+            {"headers": {"Content-Type": "application/vnd.docker.distribution.manifest.v2+json"}},
+        ],
     )
     # Step 5 & 6: 上传 Procfile & 提交 Procfile
     procfile_tar_gz_sha256 = hashlib.sha256(
@@ -158,16 +175,10 @@ def test_dispatch_slug_image_to_registry(
     mock_adapter.register_uri(
         "HEAD",
         url=part_procfile_touch_url,
-        headers={"Content-Type": "application/vnd.docker.distribution.manifest.v2+json"},
-    )
-
-    # 由于有时间字段, 镜像 id 每个单测都会改变
-    # Step 7 & 8: 上传合并后的配置文件 & 验证配置文件已上传成功
-    app_image_config_url = f"{base_url}/v2/{module_image.name}/blobs/sha256:.*"
-    mock_adapter.register_uri(
-        "HEAD",
-        url=re.compile(app_image_config_url),
-        headers={"Content-Type": "application/vnd.docker.distribution.manifest.v2+json"},
+        response_list=[
+            {"status_code": 404},
+            {"headers": {"Content-Type": "application/vnd.docker.distribution.manifest.v2+json"}},
+        ],
     )
 
     # Step 9: 提交 App Image Manifest
@@ -195,15 +206,20 @@ def test_dispatch_slug_image_to_registry(
         ("GET", slugrunner_manifest_url),
         ("GET", slugrunner_config_url),
         # 2. 上传 slug 层
+        ("HEAD", part_layer_touch_url),
         ("POST", init_upload_url),
         ("PATCH", upload_url),
         ("PUT", part_layer_commit_url),
         ("HEAD", part_layer_touch_url),
         # 3. 上传 Procfile 层
+        ("HEAD", part_procfile_touch_url),
         ("POST", init_upload_url),
         ("PATCH", upload_url),
         ("PUT", part_procfile_commit_url),
         ("HEAD", part_procfile_touch_url),
+        # 推送镜像时, 层已存在于仓库中, 无需再次上传
+        ("HEAD", part_layer_touch_url),
+        ("HEAD", part_procfile_touch_url),
         # 4. 上传 image config
         ("POST", init_upload_url),
         ("PATCH", upload_url),
@@ -289,26 +305,31 @@ def test_dispatch_cnb_image_to_registry(
         headers={"range": "0-10000000", "docker-upload-uuid": "abc", "location": commit_url},
     )
 
+    # Step 4 & 5: 上传合并后的配置文件 & 验证配置文件已上传成功
+    # 由于有时间字段, 镜像 id 每个单测都会改变
+    # requests_mock 优先匹配后注册的规则, 因此需要先于层文件注册, 避免覆盖层文件的 HEAD 请求
+    app_image_config_url = f"{base_url}/v2/{module_image.name}/blobs/sha256:.*"
+    mock_adapter.register_uri(
+        "HEAD",
+        url=re.compile(app_image_config_url),
+        headers={"Content-Type": "application/vnd.docker.distribution.manifest.v2+json"},
+    )
+
     # Step 3: 逐层上传镜像层文件到 registry
     for sha256_digest in layer_digest_list:
         layer_commit_url = f"{commit_url}?digest=sha256%3A{sha256_digest}"
         mock_adapter.register_uri("PUT", url=layer_commit_url, status_code=201)
         layer_touch_url = f"{base_url}/v2/{module_image.name}/blobs/sha256:{sha256_digest}"
+        # 上传前检查层是否已存在
         mock_adapter.register_uri(
             "HEAD",
             url=layer_touch_url,
-            headers={"Content-Type": "application/vnd.docker.distribution.manifest.v2+json"},
+            response_list=[
+                {"status_code": 404},
+                {"headers": {"Content-Type": "application/vnd.docker.distribution.manifest.v2+json"}},
+            ],
         )
 
-    # 由于有时间字段, 镜像 id 每个单测都会改变
-    # Step 4 & 5: 上传合并后的配置文件 & 验证配置文件已上传成功
-    app_image_config_url = f"{base_url}/v2/{module_image.name}/blobs/sha256:.*"
-    mock_adapter.register_uri(
-        "HEAD",
-        url=re.compile(app_image_config_url),
-        headers={"Content-Type": "application/vnd.docker.distribution.manifest.v2+json"},
-    )
-
     # Step 6: 提交 App Image Manifest
     app_image_commit_url = f"{commit_url}\\?digest=.*"
     mock_adapter.register_uri("PUT", url=re.compile(app_image_commit_url), status_code=201)
@@ -337,6 +358,7 @@ def test_dispatch_cnb_image_to_registry(
         *list(
             chain.from_iterable(
                 [
+                    ("HEAD", f"{base_url}/v2/{module_image.name}/blobs/sha256:{sha256_digest}"),
                     ("POST", init_upload_url),
                     ("PATCH", upload_url),
                     ("PUT", f"{commit_url}?digest=sha256%3A{sha256_digest}"),
@@ -345,6 +367,11 @@ def test_dispatch_cnb_image_to_registry(
                 for sha256_digest in layer_digest_list
             )
         ),
+        # 3. 推送镜像时, 层已存在于仓库中, 无需再次上传
+        *[
+            ("HEAD", f"{base_url}/v2/{module_image.name}/blobs/sha256:{sha256_digest}")
+            for sha256_digest in layer_digest_list
+        ],
         # 4. 上传 image config
         ("POST", init_upload_url),
         ("PATCH", upload_url),
@@ -364,6 +391,70 @@ def test_dispatch_cnb_image_to_registry(
             assert expected_url == req.url
 
 
+@pytest.mark.parametrize("mount_accepted", [True, False])
+def test_dispatch_cnb_image_shared_layers(
+    bk_module, bk_module_2, bk_user, assets_rootpath, image_config_content, smart_app_extra, mount_accepted
+):
+    """测试多个模块共用镜像层时, 层只上传一次, 其他模块通过跨仓库挂载获得, 挂载失败时从本地文件上传"""
+    smart_asserts_path = assets_rootpath / "cnb-image"
+    for module in [bk_module, bk_module_2]:
+        smart_app_extra.set_image_tar(module.name, "main.tgz")
+    repo, repo_2 = (SMartImageManager(module).get_image_info().name for module in [bk_module, bk_module_2])
+
+    def from_image(from_repo, from_reference, to_repo, to_reference, client, *, diff_id_cache):
+        return ImageRef(
+            repo=to_repo,
+            reference=to_reference,
+            layers=[],
+            initial_config=image_config_content.decode(),
+            client=client,
+            diff_id_cache=diff_id_cache,
+        )
+
+    def make_descriptor(blob, *args, **kwargs):
+        return Descriptor(mediaType="application/octet-stream", size=0, digest=blob.digest)
+
+    config_descriptor = DockerManifestConfigDescriptor(size=0, digest="sha256:config")
+    with (
+        mock.patch.object(ImageRef, "from_image", side_effect=from_image),
+        mock.patch.object(ImageRef, "_upload_config", return_value=config_descriptor),
+        mock.patch.object(ManifestRef, "put"),
+        mock.patch.object(ManifestRef, "get", return_value=ManifestSchema2(config=config_descriptor, layers=[])),
+        mock.patch.object(Blob, "upload", autospec=True, side_effect=make_descriptor) as upload,
+        mock.patch.object(Blob, "stat", autospec=True, side_effect=make_descriptor),
+        mock.patch.object(Blob, "download", autospec=True) as download,
+        mock.patch.object(Blob, "_mount", autospec=True, return_value=(mount_accepted, None)) as mount,
+        generate_temp_dir() as tempdir,
+    ):
+        tarball_path = tempdir / "tar.gz"
+        compress_directory(smart_asserts_path, tarball_path)
+        stat = SourcePackageStatReader(tarball_path).read()
+        layer_registry = SharedLayerRegistry()
+        for module in [bk_module, bk_module_2]:
+            dispatch_cnb_image_to_registry(
+                module=module,
+                workplace=smart_asserts_path,
+                stat=stat,
+                operator=bk_user,
+                layer_registry=layer_registry,
+            )
+
+    # main.tgz 包含 2 个层, 均由第一个模块上传, 第二个模块从第一个模块的仓库挂载
+    uploaded = [(call.args[0].repo, call.args[0].digest) for call in upload.call_args_list]
+    layer_digests = [digest for upload_repo, digest in uploaded if upload_repo == repo]
+    assert len(layer_digests) == len(set(layer_digests)) == 2
+    assert [(call.args[0].repo, call.args[0].digest, call.args[1]) for call in mount.call_args_list] == [
+        (repo_2, digest, repo) for digest in layer_digests
+    ]
+    if mount_accepted:
+        assert len(uploaded) == 2
+    else:
+        # 挂载失败时, 直接上传本地的层文件, 无需从 registry 下载
+        assert [digest for upload_repo, digest in uploaded if upload_repo == repo_2] == layer_digests
+        assert all(call.args[0].local_path for call in upload.call_args_list)
+        assert not download.called
+
+
 @pytest.mark.usefixtures("smart_app_extra")
 @pytest.mark.parametrize(
     ("package_path", "dispatcher_uri"),
@@ -373,18 +464,23 @@ def test_dispatch_cnb_image_to_registry(
         ("slugrunner-image", "paasng.platform.smart_app.services.dispatch.dispatch_slug_image_to_registry"),
     ],
 )
-def test_dispatch_package_to_modules(bk_app, bk_module, bk_user, assets_rootpath, package_path, dispatcher_uri):
+@pytest.mark.parametrize("pre_extracted", [True, False])
+def test_dispatch_package_to_modules(
+    bk_app, bk_module, bk_user, assets_rootpath, package_path, dispatcher_uri, pre_extracted
+):
     """测试根据 s-mart 包结构选择不同的 dispatcher"""
     smart_asserts_path = assets_rootpath / package_path
     bk_module.name = "main"
     bk_module.save()
 
-    with generate_temp_dir() as tempdir:
+    with generate_temp_dir() as tempdir, generate_temp_dir() as workplace:
         tarball_path = tempdir / "tar.gz"
         compress_directory(smart_asserts_path, tarball_path)
-        stat = SourcePackageStatReader(tarball_path).read()
+        # 读取源码包信息时已解压的目录可直接用于分发
+        extracted_dir = workplace if pre_extracted else None
+        stat = SourcePackageStatReader(tarball_path).read(extract_to=extracted_dir)
         with mock.patch(dispatcher_uri) as dispatcher:
-            dispatch_package_to_modules(bk_app, tarball_path, stat, bk_user, {"main"})
+            dispatch_package_to_modules(bk_app, tarball_path, stat, bk_user, {"main"}, extracted_dir=extracted_dir)
         assert dispatcher.called
 
 
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+
+import hashlib
+import io
+import tarfile
+
+import pytest
+
+from paasng.platform.smart_app.services.scanner import PackageScanner
+from paasng.platform.sourcectl.exceptions import (
+    PackageInvalidFileFormatError,
+    ReadFileNotFoundError,
+    ReadLinkFileOutsideDirectoryError,
+)
+from paasng.platform.sourcectl.utils import generate_temp_dir, generate_temp_file
+
+
+def capture_yaml(filepath: str) -> bool:
+    return filepath.endswith(".yaml")
+
+
+@pytest.fixture()
+def contents():
+    return {"app_desc.yaml": "foo: bar", "src/main.py": "print(1)", "src/conf.yaml": "a: b"}
+
+
+class TestPackageScanner:
+    @pytest.mark.parametrize("extract", [True, False])
+    def test_scan(self, tar_path, extract):
+        with generate_temp_dir() as target_dir:
+            package = PackageScanner(tar_path).scan(capture_yaml, target_dir=target_dir if extract else None)
+
+            assert package.sha256_signature == hashlib.sha256(tar_path.read_bytes()).hexdigest()
+            assert package.size == tar_path.stat().st_size
+            assert sorted(package.list()) == [".", "./app_desc.yaml", "./src", "./src/conf.yaml", "./src/main.py"]
+            assert package.read_file("./app_desc.yaml") == b"foo: bar"
+            assert package.read_file("src/conf.yaml") == b"a: b"
+            if extract:
+                assert (target_dir / "src" / "main.py").read_text() == "print(1)"
+            else:
+                assert not any(target_dir.iterdir())
+                with pytest.raises(ReadFileNotFoundError):
+                    package.read_file("./src/main.py")
+
+    @pytest.mark.parametrize("mode", ["w", "w:bz2", "w:xz"])
+    @pytest.mark.parametrize("extract", [True, False])
+    def test_compression(self, contents, mode, extract):
+        with generate_temp_dir() as source_dir, generate_temp_dir() as target_dir, generate_temp_file() as tar_path:
+            (source_dir / "app_desc.yaml").write_text(contents["app_desc.yaml"])
+            with tarfile.open(tar_path, mode) as tar:
+                tar.add(source_dir / "app_desc.yaml", arcname="app_desc.yaml")
+            # 结束标记之后的填充数据也要计入签名
+            with tar_path.open("ab") as fh:
+                fh.write(b"\0" * 10240)
+
+            package = PackageScanner(tar_path).scan(capture_yaml, target_dir=target_dir if extract else None)
+
+            assert package.sha256_signature == hashlib.sha256(tar_path.read_bytes()).hexdigest()
+            assert package.read_file("app_desc.yaml") == b"foo: bar"
+
+    @pytest.mark.parametrize("extract", [True, False])
+    def test_invalid_file_format(self, extract):
+        with generate_temp_dir() as target_dir, generate_temp_file() as tar_path:
+            tar_path.write_bytes(b"not a tarball" * 1024)
+            with pytest.raises(PackageInvalidFileFormatError):
+                PackageScanner(tar_path).scan(capture_yaml, target_dir=target_dir if extract else None)
+
+    def test_small_buffer(self, tar_path):
+        package = PackageScanner(tar_path, buffer_size=7).scan(capture_yaml)
+        assert package.sha256_signature == hashlib.sha256(tar_path.read_bytes()).hexdigest()
+        assert package.read_file("app_desc.yaml") == b"foo: bar"
+
+    @pytest.mark.parametrize("extract", [True, False])
+    @pytest.mark.parametrize("link_type", [tarfile.SYMTYPE, tarfile.LNKTYPE])
+    def test_link_inside(self, extract, link_type):
+        with generate_temp_dir() as target_dir, generate_temp_file() as tar_path:
+            data = b"foo: bar"
+            info = tarfile.TarInfo("conf/app_desc.yml")
+            info.size = len(data)
+            link = tarfile.TarInfo("app_desc.yaml")
+            link.type = link_type
+            link.linkname = "conf/app_desc.yml"
+            with tarfile.open(tar_path, "w:gz") as tar:
+                # 指向的文件名称不会被捕获, 符号链接位于其指向的文件之前, 硬链接则只能在其之后
+                if link_type == tarfile.SYMTYPE:
+                    tar.addfile(link)
+                tar.addfile(info, io.BytesIO(data))
+                if link_type == tarfile.LNKTYPE:
+                    tar.addfile(link)
+
+            package = PackageScanner(tar_path).scan(capture_yaml, target_dir=target_dir if extract else None)
+            assert package.read_file("app_desc.yaml") == b"foo: bar"
+
+    @pytest.mark.parametrize("extract", [True, False])
+    @pytest.mark.parametrize("linkname", ["/etc/passwd", "../app_desc.yaml", "src/../../app_desc.yaml"])
+    def test_link_outside(self, extract, linkname):
+        with generate_temp_dir() as target_dir, generate_temp_file() as tar_path:
+            with tarfile.open(tar_path, "w:gz") as tar:
+                link = tarfile.TarInfo("app_desc.yaml")
+                link.type = tarfile.SYMTYPE
+                link.linkname = linkname
+                tar.addfile(link)
+
+            package = PackageScanner(tar_path).scan(capture_yaml, target_dir=target_dir if extract else None)
+            assert "app_desc.yaml" in package.list()
+            with pytest.raises(ReadLinkFileOutsideDirectoryError):
+                package.read_file("app_desc.yaml")
@@ -15,6 +15,8 @@
 # We undertake not to change the open source license (MIT license) applicable
 # to the current version of the project delivered to anyone in the future.
 
+import subprocess
+
 import pytest
 
 
@@ -31,3 +33,48 @@ def github_repo_url():
 @pytest.fixture()
 def gitee_repo_url():
     return "https://gitee.com/owner/repo.git"
+
+
+@pytest.fixture(autouse=True)
+def _git_mirror_cache_dir(settings, tmp_path_factory):
+    """Store the git mirrors in a temporary directory for each test."""
+    settings.GIT_MIRROR_CACHE_DIR = str(tmp_path_factory.mktemp("git-mirrors"))
+
+
+def _run_git(path, *args: str) -> str:
+    """Run git command in the given path and return the output."""
+    return subprocess.check_output(
+        ["git", "-c", "user.name=tester", "-c", "user.email=tester@example.com", *args], cwd=path, text=True
+    )
+
+
+@pytest.fixture()
+def run_git():
+    return _run_git
+
+
+@pytest.fixture()
+def local_git_repo(tmp_path):
+    """A local git repository with branch "master", annotated tag "v1" and lightweight tag "v2".
+
+    Files in "master":
+
+    - app_desc.yaml
+    - src/main.py
+    - link_inside -> src/main.py
+    - link_outside -> ../outside.txt
+    """
+    path = tmp_path / "origin"
+    path.mkdir()
+    _run_git(path, "init", "--quiet", "--initial-branch=master")
+    (path / "app_desc.yaml").write_text("spec_version: 2")
+    (path / "src").mkdir()
+    (path / "src" / "main.py").write_text("print('hello')")
+    (path / "link_inside").symlink_to("src/main.py")
+    (path / "link_outside").symlink_to("../outside.txt")
+    (tmp_path / "outside.txt").write_text("sensitive content")
+    _run_git(path, "add", "-A")
+    _run_git(path, "commit", "--quiet", "-m", "init")
+    _run_git(path, "tag", "-a", "v1", "-m", "release v1")
+    _run_git(path, "tag", "v2")
+    return path
@@ -22,7 +22,7 @@ from unittest import mock
 import pytest
 
 from paasng.platform.sourcectl.controllers.bare_git import BareGitRepoController
-from paasng.platform.sourcectl.exceptions import ReadLinkFileOutsideDirectoryError
+from paasng.platform.sourcectl.exceptions import ReadFileNotFoundError, ReadLinkFileOutsideDirectoryError
 from paasng.platform.sourcectl.git.client import GitCommandExecutionError
 from paasng.platform.sourcectl.models import GitRepository, RepoBasicAuthHolder, VersionInfo
 from paasng.platform.sourcectl.source_types import get_sourcectl_names
@@ -120,8 +120,9 @@ class TestBareGitRepoController:
         self.get_fake_auth_holder(bk_module, fake_repo, "admin", "password")
         return BareGitRepoController.init_by_module(bk_module, "admin")
 
-    def test_read_files(self, bk_module, fake_controller, safe_files_setup, tmp_path):
+    def test_read_files(self, bk_module, fake_controller, safe_files_setup, tmp_path, settings):
         """Test reading a normal file successfully"""
+        settings.GIT_MIRROR_CACHE_ENABLED = False
         with (
             mock.patch("paasng.platform.sourcectl.controllers.bare_git.generate_temp_dir") as generate_temp_dir,
             mock.patch.object(fake_controller.client, "clone"),
@@ -137,3 +138,91 @@ class TestBareGitRepoController:
             # Read malicious link file should fail
             with pytest.raises(ReadLinkFileOutsideDirectoryError):
                 fake_controller.read_file("test_link.txt", version_info)
+
+
+class TestBareGitRepoControllerWithMirror:
+    """Test BareGitRepoController with the local mirror cache"""
+
+    @pytest.fixture()
+    def controller(self, local_git_repo):
+        return BareGitRepoController(repo_url=f"file://{local_git_repo}", repo_obj=mock.MagicMock())
+
+    @pytest.fixture()
+    def master(self):
+        return VersionInfo(revision="", version_type="branch", version_name="master")
+
+    def test_read_file(self, controller, master):
+        assert controller.read_file("app_desc.yaml", master) == b"spec_version: 2"
+        assert controller.read_file("./src/main.py", master) == b"print('hello')"
+        assert controller.read_file("link_inside", master) == b"print('hello')"
+
+        with pytest.raises(ReadLinkFileOutsideDirectoryError):
+            controller.read_file("link_outside", master)
+        with pytest.raises(ReadLinkFileOutsideDirectoryError):
+            controller.read_file("../outside.txt", master)
+        with pytest.raises(ReadFileNotFoundError):
+            controller.read_file("Procfile", master)
+        with pytest.raises(ReadFileNotFoundError):
+            controller.read_file("src", master)
+
+    def test_read_file_by_revision(self, controller, master, local_git_repo, run_git):
+        init_commit = run_git(local_git_repo, "rev-parse", "HEAD").strip()
+        # Read files to create the mirror
+        controller.read_file("app_desc.yaml", master)
+
+        (local_git_repo / "app_desc.yaml").write_text("spec_version: 3")
+        run_git(local_git_repo, "commit", "--quiet", "-am", "update")
+        new_commit = run_git(local_git_repo, "rev-parse", "HEAD").strip()
+
+        # The given revision is used, the mirror is fetched when the revision is not found in it
+        init_version = VersionInfo(revision=init_commit, version_type="branch", version_name="master")
+        new_version = VersionInfo(revision=new_commit, version_type="branch", version_name="master")
+        assert controller.read_file("app_desc.yaml", new_version) == b"spec_version: 3"
+        assert controller.read_file("app_desc.yaml", init_version) == b"spec_version: 2"
+
+    def test_read_file_without_revision(self, controller, master, local_git_repo, run_git):
+        assert controller.read_file("app_desc.yaml", master) == b"spec_version: 2"
+
+        (local_git_repo / "app_desc.yaml").write_text("spec_version: 3")
+        run_git(local_git_repo, "commit", "--quiet", "-am", "update")
+        # Always read the latest code of the branch
+        assert controller.read_file("app_desc.yaml", master) == b"spec_version: 3"
+
+    def test_list_alternative_versions(self, controller):
+        versions = {(v.type, v.name): v for v in controller.list_alternative_versions()}
+        assert set(versions) == {("branch", "master"), ("tag", "v1"), ("tag", "v2")}
+        # The annotated tag is resolved to the commit
+        assert versions[("tag", "v1")].revision == versions[("branch", "master")].revision
+        assert versions[("branch", "master")].message.strip() == "init"
+
+    def test_export(self, controller, master, local_git_repo, run_git, tmp_path):
+        run_git(local_git_repo, "checkout", "--quiet", "-b", "feature")
+        (local_git_repo / "app_desc.yaml").write_text("spec_version: 3")
+        run_git(local_git_repo, "commit", "--quiet", "-am", "update")
+
+        # Read files to create the mirror, the deployment should always fetch the latest code
+        controller.read_file("app_desc.yaml", master)
+        target = tmp_path / "export"
+        target.mkdir()
+        controller.export(target, VersionInfo(revision="", version_type="branch", version_name="feature"))
+
+        assert (target / "app_desc.yaml").read_text() == "spec_version: 3"
+        assert (target / "src" / "main.py").exists()
+        assert not (target / ".git").exists()
+
+    def test_export_by_revision(self, controller, master, local_git_repo, run_git, tmp_path):
+        init_commit = run_git(local_git_repo, "rev-parse", "HEAD").strip()
+        (local_git_repo / "app_desc.yaml").write_text("spec_version: 3")
+        run_git(local_git_repo, "commit", "--quiet", "-am", "update")
+
+        # The exported code is the same as the files read by the revision, not the head of the branch
+        version_info = VersionInfo(revision=init_commit, version_type="branch", version_name="master")
+        assert controller.read_file("app_desc.yaml", version_info) == b"spec_version: 2"
+        target = tmp_path / "export"
+        target.mkdir()
+        controller.export(target, version_info)
+        assert (target / "app_desc.yaml").read_text() == "spec_version: 2"
+
+    def test_export_version_not_found(self, controller, tmp_path):
+        with pytest.raises(GitCommandExecutionError):
+            controller.export(tmp_path, VersionInfo(revision="", version_type="branch", version_name="foo"))
@@ -0,0 +1,231 @@
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+
+import io
+import os
+import tarfile
+import threading
+import time
+
+import pytest
+
+from paasng.platform.sourcectl.utils import (
+    DockerIgnore,
+    StreamPipe,
+    compress_directory_ext,
+    generate_temp_dir,
+    generate_temp_file,
+    upload_directory_as_tarball,
+    write_tarball,
+)
+
+
+class FakeStore:
+    """A fake blob store which reads the file object in chunks, like a multipart upload"""
+
+    def __init__(self, chunk_size: int = 5 * 1024 * 1024, fail_after: int = -1):
+        self.chunk_size = chunk_size
+        self.fail_after = fail_after
+        self.objects = {}
+
+    def upload_fileobj(self, fh, key):
+        parts = []
+        while chunk := fh.read(self.chunk_size):
+            if len(parts) == self.fail_after:
+                raise ConnectionError("upload failed")
+            parts.append(chunk)
+        self.objects[key] = b"".join(parts)
+
+
+class CountingStore:
+    """A fake blob store which only counts the uploaded bytes, used by benchmarks"""
+
+    def __init__(self, chunk_size: int = 5 * 1024 * 1024):
+        self.chunk_size = chunk_size
+        self.sizes = {}
+
+    def upload_fileobj(self, fh, key):
+        size = 0
+        while chunk := fh.read(self.chunk_size):
+            size += len(chunk)
+        self.sizes[key] = size
+
+
+@pytest.fixture()
+def source_dir():
+    with generate_temp_dir() as workdir:
+        (workdir / "src").mkdir()
+        (workdir / "src" / "app.py").write_text("print('hello')")
+        (workdir / "src" / "README.md").write_text("readme")
+        (workdir / "node_modules").mkdir()
+        (workdir / "node_modules" / "foo.js").write_text("foo")
+        (workdir / ".svn").mkdir()
+        (workdir / ".svn" / "entries").write_text("")
+        (workdir / "Procfile").write_text("web: python src/app.py")
+        os.symlink("src", workdir / "link_to_src")
+        yield workdir
+
+
+class TestWriteTarball:
+    def test_normal(self, source_dir):
+        di = DockerIgnore("node_modules\n**/*.md")
+        output = io.BytesIO()
+        write_tarball(source_dir, output, should_ignore=di.should_ignore)
+
+        output.seek(0)
+        with tarfile.open(fileobj=output, mode="r:") as tf:
+            members = {m.name: m for m in tf.getmembers()}
+        assert list(members) == ["link_to_src", "src", "Procfile", "src/app.py"]
+        # Symbolic links are archived as links, the target is never followed
+        assert members["link_to_src"].issym()
+        assert members["link_to_src"].linkname == "src"
+
+    def test_same_as_compress_directory_ext(self, source_dir):
+        di = DockerIgnore("node_modules")
+        with generate_temp_file(suffix=".tar.gz") as dest:
+            compress_directory_ext(source_dir, dest, di.should_ignore)
+            with tarfile.open(dest, mode="r:gz") as tf:
+                names = {m.name for m in tf.getmembers()}
+        assert names == {"link_to_src", "src", "src/app.py", "src/README.md", "Procfile"}
+
+
+class TestStreamPipe:
+    def test_read(self):
+        pipe = StreamPipe(max_chunks=2)
+
+        def produce():
+            for _ in range(10):
+                pipe.write(b"x" * 7)
+            pipe.close()
+
+        t = threading.Thread(target=produce)
+        t.start()
+        # Always returns the full size until the end of the stream
+        assert pipe.read(20) == b"x" * 20
+        assert pipe.read(20) == b"x" * 20
+        assert pipe.read(20) == b"x" * 20
+        assert pipe.read(20) == b"x" * 10
+        assert pipe.read(20) == b""
+        t.join()
+        assert pipe.completed
+        assert pipe.bytes_written == 70
+
+    def test_writer_error(self):
+        pipe = StreamPipe()
+        pipe.write(b"foo")
+        pipe.close(error=OSError("disk error"))
+
+        # The reader never get a normal EOF when the writer failed
+        with pytest.raises(OSError, match="disk error"):
+            pipe.read()
+        assert not pipe.completed
+
+    def test_abort(self):
+        pipe = StreamPipe(max_chunks=1)
+        pipe.write(b"foo")
+        pipe.abort()
+        with pytest.raises(BrokenPipeError):
+            pipe.write(b"bar")
+
+
+class TestUploadDirectoryAsTarball:
+    def test_normal(self, source_dir):
+        store = FakeStore(chunk_size=100)
+        di = DockerIgnore("node_modules")
+
+        size = upload_directory_as_tarball(source_dir, store, "foo.tar.gz", should_ignore=di.should_ignore)
+
+        data = store.objects["foo.tar.gz"]
+        assert size == len(data)
+        with tarfile.open(fileobj=io.BytesIO(data), mode="r:gz") as tf:
+            names = {m.name for m in tf.getmembers()}
+            assert tf.extractfile("src/app.py").read() == b"print('hello')"
+        assert names == {"link_to_src", "src", "src/app.py", "src/README.md", "Procfile"}
+
+    def test_upload_failed(self, source_dir):
+        (source_dir / "large.bin").write_bytes(os.urandom(4 * 1024 * 1024))
+        store = FakeStore(chunk_size=1024, fail_after=1)
+
+        with pytest.raises(ConnectionError):
+            upload_directory_as_tarball(source_dir, store, "foo.tar.gz")
+        assert "foo.tar.gz" not in store.objects
+
+    def test_compress_failed(self, source_dir):
+        def should_ignore(path):
+            raise ValueError("invalid pattern")
+
+        store = FakeStore()
+        with pytest.raises(ValueError, match="invalid pattern"):
+            upload_directory_as_tarball(source_dir, store, "foo.tar.gz", should_ignore=should_ignore)
+        assert "foo.tar.gz" not in store.objects
+
+    def test_same_contents(self):
+        """The streamed tarball spans many chunks, the files in it should be the same as the source tree"""
+        with generate_temp_dir() as workdir:
+            text = b"".join(f"line {i}: the quick brown fox jumps over the lazy dog\n".encode() for i in range(2000))
+            contents = {}
+            for i in range(8):
+                content = os.urandom(64 * 1024) if i % 4 == 0 else text
+                contents[f"dir{i % 3}/file{i}"] = content
+                (workdir / f"dir{i % 3}").mkdir(exist_ok=True)
+                (workdir / f"dir{i % 3}" / f"file{i}").write_bytes(content)
+            (workdir / "debug.log").write_text("ignored")
+
+            store = FakeStore(chunk_size=16 * 1024)
+            upload_directory_as_tarball(
+                workdir, store, "foo.tar.gz", should_ignore=DockerIgnore("*.log").should_ignore
+            )
+
+        with tarfile.open(fileobj=io.BytesIO(store.objects["foo.tar.gz"]), mode="r:gz") as tf:
+            files = {m.name: tf.extractfile(m).read() for m in tf.getmembers() if m.isfile()}
+        assert files == contents
+
+
+@pytest.mark.benchmark
+def test_benchmark_upload_directory_as_tarball():
+    """Compare the streaming upload with compressing to a temporary file and then uploading, on a 1GB
+    source tree. Run it by: pytest --run-benchmark -s -k test_benchmark_upload_directory_as_tarball
+    """
+    size_mb = 1024
+    with generate_temp_dir() as workdir:
+        # Mix compressible text with incompressible binary files, 1MB per file
+        text = b"".join(f"line {i}: the quick brown fox jumps over the lazy dog\n".encode() for i in range(20000))
+        for i in range(size_mb):
+            sub_dir = workdir / f"dir{i % 16}"
+            sub_dir.mkdir(exist_ok=True)
+            content = os.urandom(1024 * 1024) if i % 4 == 0 else text[: 1024 * 1024]
+            (sub_dir / f"file{i}").write_bytes(content)
+        should_ignore = DockerIgnore("*.log").should_ignore
+
+        store = CountingStore()
+        started_at = time.perf_counter()
+        with generate_temp_file(suffix=".tar.gz") as package_path:
+            compress_directory_ext(workdir, package_path, should_ignore=should_ignore)
+            with open(package_path, "rb") as fh:
+                store.upload_fileobj(fh, "legacy.tar.gz")
+        legacy_cost = time.perf_counter() - started_at
+
+        started_at = time.perf_counter()
+        size = upload_directory_as_tarball(workdir, store, "streaming.tar.gz", should_ignore=should_ignore)
+        streaming_cost = time.perf_counter() - started_at
+
+    assert size == store.sizes["streaming.tar.gz"]
+    print(
+        f"\nupload a {size_mb}MB source tree with {os.cpu_count()} CPUs: "
+        f"legacy {legacy_cost:.2f}s({store.sizes['legacy.tar.gz']} bytes), "
+        f"streaming {streaming_cost:.2f}s({size} bytes)"
+    )
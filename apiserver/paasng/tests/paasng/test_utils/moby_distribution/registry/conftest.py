@@ -0,0 +1,122 @@
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+
+import hashlib
+import uuid
+from typing import Dict, Optional, Tuple
+
+import pytest
+import requests
+
+from paasng.utils.moby_distribution.registry import exceptions
+
+
+class FakeRegistry:
+    """A fake registry client which implements the blob APIs in memory
+
+    :param fail_patches: the number of PATCH requests to break, each of them breaks after receiving half of the chunk
+    """
+
+    api_base_url = "http://registry.example.com"
+
+    def __init__(self, fail_patches: int = 0):
+        self.fail_patches = fail_patches
+        self.blobs: Dict[Tuple[str, str], bytes] = {}
+        self.sessions: Dict[str, bytearray] = {}
+        self.requests: list = []
+
+    def post(self, url: str, params: Optional[Dict] = None, timeout=None):
+        repo = self._parse_repo(url)
+        self.requests.append(("POST", repo, params))
+        if params and (params["from"], params["mount"]) in self.blobs:
+            self.blobs[(repo, params["mount"])] = self.blobs[(params["from"], params["mount"])]
+            return self._make_response(201)
+
+        session_id = uuid.uuid4().hex
+        self.sessions[session_id] = bytearray()
+        return self._make_response(202, self._session_headers(repo, session_id))
+
+    def patch(self, url: str, data: bytes, headers: Dict, timeout=None):
+        repo, session_id = self._parse_session(url)
+        self.requests.append(("PATCH", repo, headers["content-range"]))
+        received = self.sessions[session_id]
+        start = int(headers["content-range"].split("-")[0])
+        if start != len(received):
+            self._raise(416)
+
+        if self.fail_patches:
+            self.fail_patches -= 1
+            received += data[: len(data) // 2]
+            raise requests.ConnectionError("connection reset")
+
+        received += data
+        return self._make_response(202, self._session_headers(repo, session_id))
+
+    def get(self, url: str, timeout=None):
+        repo, session_id = self._parse_session(url)
+        self.requests.append(("GET", repo, None))
+        return self._make_response(204, self._session_headers(repo, session_id))
+
+    def put(self, url: str, params: Dict, timeout=None):
+        repo, session_id = self._parse_session(url)
+        data = bytes(self.sessions.pop(session_id))
+        if params["digest"] != f"sha256:{hashlib.sha256(data).hexdigest()}":
+            self._raise(400)
+        self.blobs[(repo, params["digest"])] = data
+        return self._make_response(201)
+
+    def head(self, url: str, timeout=None):
+        repo, _, digest = url[len(self.api_base_url) + len("/v2/") :].rpartition("/blobs/")
+        if (repo, digest) not in self.blobs:
+            raise exceptions.ResourceNotFound
+        headers = {
+            "Content-Type": "application/octet-stream",
+            "Content-Length": str(len(self.blobs[(repo, digest)])),
+            "Docker-Content-Digest": digest,
+        }
+        return self._make_response(200, headers)
+
+    def _session_headers(self, repo: str, session_id: str) -> Dict[str, str]:
+        size = len(self.sessions[session_id])
+        return {
+            "location": f"/v2/{repo}/blobs/uploads/{session_id}",
+            "docker-upload-uuid": session_id,
+            "range": f"0-{max(size - 1, 0)}",
+        }
+
+    def _parse_repo(self, url: str) -> str:
+        return url[len(self.api_base_url) + len("/v2/") :].split("/blobs/", 1)[0]
+
+    def _parse_session(self, url: str) -> Tuple[str, str]:
+        path = url[len(self.api_base_url) + len("/v2/") :]
+        repo, _, session_id = path.partition("/blobs/uploads/")
+        return repo, session_id
+
+    def _make_response(self, status_code: int, headers: Optional[Dict] = None) -> requests.Response:
+        resp = requests.Response()
+        resp.status_code = status_code
+        resp.headers.update(headers or {})
+        return resp
+
+    def _raise(self, status_code: int):
+        resp = self._make_response(status_code)
+        raise exceptions.RequestErrorWithResponse("", status_code=status_code, response=resp)
+
+
+@pytest.fixture()
+def fake_registry():
+    return FakeRegistry()
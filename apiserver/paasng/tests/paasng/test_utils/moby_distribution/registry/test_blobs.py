@@ -0,0 +1,152 @@
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+
+import gzip
+import hashlib
+import io
+import os
+import shutil
+from unittest import mock
+
+import pytest
+import requests
+
+from paasng.utils.moby_distribution.registry.resources.blobs import Blob, LayerSignWrapper
+
+
+def sha256(data: bytes) -> str:
+    return f"sha256:{hashlib.sha256(data).hexdigest()}"
+
+
+class TestLayerSignWrapper:
+    @pytest.mark.parametrize("chunk_size", [1, 7, 1024, 1024 * 1024])
+    @pytest.mark.parametrize(
+        "content",
+        [
+            b"",
+            b"x" * 10000,
+            os.urandom(100 * 1024),
+        ],
+    )
+    def test_gzipped(self, content, chunk_size):
+        gzipped = gzip.compress(content)
+        signer = LayerSignWrapper()
+        for i in range(0, len(gzipped), chunk_size):
+            signer.write(gzipped[i : i + chunk_size])
+
+        assert signer.tell() == len(gzipped)
+        assert signer.digest() == sha256(gzipped)
+        assert signer.diff_id() == sha256(content)
+
+    def test_multiple_members(self):
+        gzipped = gzip.compress(b"foo") + gzip.compress(b"bar") + b"\x00" * 16
+        signer = LayerSignWrapper()
+        signer.write(gzipped)
+        assert signer.diff_id() == sha256(b"foobar")
+
+    def test_highly_compressed(self, monkeypatch):
+        monkeypatch.setattr(LayerSignWrapper, "MAX_OUTPUT_SIZE", 1024)
+        content = b"\x00" * 1024 * 1024
+        signer = LayerSignWrapper()
+        signer.write(gzip.compress(content))
+        assert signer.diff_id() == sha256(content)
+
+    @pytest.mark.parametrize("content", [b"", b"a", b"plain tarball"])
+    def test_not_gzipped(self, content):
+        signer = LayerSignWrapper()
+        signer.write(content)
+        assert signer.digest() == sha256(content)
+        assert signer.diff_id() == sha256(content)
+
+    def test_truncated(self):
+        gzipped = gzip.compress(os.urandom(1024))
+        signer = LayerSignWrapper()
+        signer.write(gzipped[:-16])
+        with pytest.raises(ValueError, match="end-of-stream"):
+            signer.diff_id()
+
+    def test_write_through(self, tmp_path):
+        gzipped = gzip.compress(b"foo")
+        with (tmp_path / "blob").open(mode="wb") as fh:
+            signer = LayerSignWrapper(fh=fh)
+            shutil.copyfileobj(io.BytesIO(gzipped), signer)
+        assert (tmp_path / "blob").read_bytes() == gzipped
+        assert signer.diff_id() == sha256(b"foo")
+
+
+class TestBlobUpload:
+    @pytest.fixture(autouse=True)
+    def _no_sleep(self):
+        with mock.patch("paasng.utils.moby_distribution.registry.resources.blobs.time.sleep"):
+            yield
+
+    def test_chunked(self, fake_registry):
+        content = os.urandom(1000)
+        descriptor = Blob(repo="foo", fileobj=io.BytesIO(content), client=fake_registry).upload(chunk_size=300)
+
+        assert descriptor.digest == sha256(content)
+        assert fake_registry.blobs[("foo", sha256(content))] == content
+        assert [r[2] for r in fake_registry.requests if r[0] == "PATCH"] == ["0-299", "300-599", "600-899", "900-999"]
+
+    def test_resume(self, fake_registry):
+        fake_registry.fail_patches = 2
+        content = os.urandom(1000)
+        Blob(repo="foo", fileobj=io.BytesIO(content), client=fake_registry).upload(chunk_size=400)
+
+        assert fake_registry.blobs[("foo", sha256(content))] == content
+        # The data received by the registry is never sent again
+        assert [r[2] for r in fake_registry.requests if r[0] == "PATCH"] == [
+            "0-399",
+            "200-399",
+            "300-399",
+            "400-799",
+            "800-999",
+        ]
+
+    def test_too_many_failures(self, fake_registry):
+        fake_registry.fail_patches = 100
+        with pytest.raises(requests.ConnectionError):
+            Blob(repo="foo", fileobj=io.BytesIO(os.urandom(1000)), client=fake_registry).upload()
+
+    def test_skip_existing(self, fake_registry):
+        content = b"foo"
+        fake_registry.blobs[("foo", sha256(content))] = content
+
+        descriptor = Blob(
+            repo="foo", digest=sha256(content), fileobj=io.BytesIO(content), client=fake_registry
+        ).upload()
+        assert descriptor.digest == sha256(content)
+        assert fake_registry.requests == []
+
+    def test_mount(self, fake_registry):
+        content = b"foo"
+        fake_registry.blobs[("bar", sha256(content))] = content
+
+        Blob(repo="foo", digest=sha256(content), fileobj=io.BytesIO(content), client=fake_registry).upload(
+            mount_from="bar"
+        )
+        assert fake_registry.blobs[("foo", sha256(content))] == content
+        assert [r[0] for r in fake_registry.requests] == ["POST"]
+
+    def test_mount_failed(self, fake_registry):
+        content = b"foo"
+        Blob(repo="foo", digest=sha256(content), fileobj=io.BytesIO(content), client=fake_registry).upload(
+            mount_from="bar"
+        )
+        assert fake_registry.blobs[("foo", sha256(content))] == content
+        # The upload session initiated by the mount request is used
+        assert [r[0] for r in fake_registry.requests] == ["POST", "PATCH"]
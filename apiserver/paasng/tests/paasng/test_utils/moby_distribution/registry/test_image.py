@@ -0,0 +1,163 @@
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+
+import gzip
+import hashlib
+import json
+from unittest import mock
+
+import pytest
+
+from paasng.utils.moby_distribution.registry.resources.image import ImageRef, InMemoryDiffIDCache, LayerRef
+
+BASE_LAYER = gzip.compress(b"base layer")
+BASE_LAYER_DIGEST = f"sha256:{hashlib.sha256(BASE_LAYER).hexdigest()}"
+BASE_LAYER_DIFF_ID = f"sha256:{hashlib.sha256(b'base layer').hexdigest()}"
+
+
+@pytest.fixture()
+def initial_config():
+    return json.dumps(
+        {
+            "created": "2024-01-01T00:00:00Z",
+            "architecture": "amd64",
+            "os": "linux",
+            "config": {},
+            "rootfs": {"type": "layers", "diff_ids": [BASE_LAYER_DIFF_ID]},
+            "history": [{"created_by": "base"}],
+        }
+    )
+
+
+@pytest.fixture()
+def mock_blob_download():
+    def download(self, digest=None):
+        assert self.digest == BASE_LAYER_DIGEST
+        self.fileobj.write(BASE_LAYER)
+
+    with mock.patch(
+        "paasng.utils.moby_distribution.registry.resources.blobs.Blob.download", autospec=True
+    ) as mocked_download:
+        mocked_download.side_effect = download
+        yield mocked_download
+
+
+class TestAddLayer:
+    def make_image_ref(self, initial_config, diff_id_cache):
+        base_layer = LayerRef(repo="base", digest=BASE_LAYER_DIGEST, size=len(BASE_LAYER), exists=True)
+        return ImageRef(
+            repo="foo",
+            reference="latest",
+            layers=[base_layer],
+            initial_config=initial_config,
+            client=mock.MagicMock(),
+            diff_id_cache=diff_id_cache,
+        )
+
+    def test_local_layer(self, tmp_path, initial_config):
+        content = b"app layer"
+        path = tmp_path / "layer.tar.gz"
+        path.write_bytes(gzip.compress(content))
+
+        cache = InMemoryDiffIDCache()
+        ref = self.make_image_ref(initial_config, cache)
+        descriptor = ref.add_layer(LayerRef(local_path=path))
+
+        digest = f"sha256:{hashlib.sha256(path.read_bytes()).hexdigest()}"
+        diff_id = f"sha256:{hashlib.sha256(content).hexdigest()}"
+        assert descriptor.digest == digest
+        assert descriptor.size == path.stat().st_size
+        assert ref.image_json.rootfs.diff_ids == [BASE_LAYER_DIFF_ID, diff_id]
+        assert cache.get(digest) == diff_id
+
+    def test_local_layer_wrong_digest(self, tmp_path, initial_config):
+        path = tmp_path / "layer.tar.gz"
+        path.write_bytes(gzip.compress(b"app layer"))
+
+        ref = self.make_image_ref(initial_config, InMemoryDiffIDCache())
+        with pytest.raises(ValueError, match="Wrong digest"):
+            ref.add_layer(LayerRef(local_path=path, digest="sha256:foo"))
+
+    def test_remote_layer(self, initial_config, mock_blob_download):
+        cache = InMemoryDiffIDCache()
+        ref = self.make_image_ref(initial_config, cache)
+        ref.add_layer(LayerRef(repo="base", digest=BASE_LAYER_DIGEST, size=len(BASE_LAYER), exists=True))
+
+        assert mock_blob_download.call_count == 1
+        assert ref.image_json.rootfs.diff_ids == [BASE_LAYER_DIFF_ID, BASE_LAYER_DIFF_ID]
+
+        # The diff_id is cached, the layer will not be downloaded again
+        ref = self.make_image_ref(initial_config, cache)
+        ref.add_layer(LayerRef(repo="base", digest=BASE_LAYER_DIGEST, size=len(BASE_LAYER), exists=True))
+        assert mock_blob_download.call_count == 1
+        assert ref.image_json.rootfs.diff_ids == [BASE_LAYER_DIFF_ID, BASE_LAYER_DIFF_ID]
+
+    def test_remote_layer_wrong_size(self, initial_config, mock_blob_download):
+        ref = self.make_image_ref(initial_config, InMemoryDiffIDCache())
+        with pytest.raises(ValueError, match="Wrong Size"):
+            ref.add_layer(LayerRef(repo="base", digest=BASE_LAYER_DIGEST, size=1, exists=True))
+
+    def test_cache_diff_ids(self, initial_config, mock_blob_download):
+        cache = InMemoryDiffIDCache()
+        ref = self.make_image_ref(initial_config, cache)
+        ref._cache_diff_ids()
+        assert cache.get(BASE_LAYER_DIGEST) == BASE_LAYER_DIFF_ID
+
+        # The layers of base image never need to be downloaded
+        ref.add_layer(ref.layers[0])
+        assert mock_blob_download.call_count == 0
+
+
+def test_in_memory_diff_id_cache():
+    cache = InMemoryDiffIDCache(max_size=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+
+    # "b" is the least recently used one
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+
+class TestPush:
+    @pytest.fixture(autouse=True)
+    def _mock_manifest_ref(self):
+        with mock.patch("paasng.utils.moby_distribution.registry.resources.image.ManifestRef"):
+            yield
+
+    def test_push(self, tmp_path, initial_config, fake_registry):
+        fake_registry.blobs[("base", BASE_LAYER_DIGEST)] = BASE_LAYER
+        base_layer = LayerRef(repo="base", digest=BASE_LAYER_DIGEST, size=len(BASE_LAYER), exists=True)
+        ref = ImageRef(
+            repo="foo", reference="latest", layers=[base_layer], initial_config=initial_config, client=fake_registry
+        )
+        path = tmp_path / "layer.tar.gz"
+        path.write_bytes(gzip.compress(b"app layer"))
+        ref.add_layer(LayerRef(local_path=path))
+
+        ref.push_v2()
+        assert fake_registry.blobs[("foo", BASE_LAYER_DIGEST)] == BASE_LAYER
+        assert fake_registry.blobs[("foo", ref.layers[1].digest)] == path.read_bytes()
+
+        # Push again, the layers exist in the repo already
+        fake_registry.requests.clear()
+        ref.push_v2()
+        assert [r for r in fake_registry.requests if r[2] is not None and r[0] == "PATCH"] == [
+            ("PATCH", "foo", f"0-{len(ref.image_json_str) - 1}")
+        ]
@@ -0,0 +1,81 @@
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+
+import json
+from unittest import mock
+
+import pytest
+
+from paasng.utils.api_middleware import ApiLogMiddleware, ApiLogShipper
+
+
+class TestTruncate:
+    @pytest.mark.parametrize(
+        ("content", "expected"),
+        [
+            (b"foo", "foo"),
+            (b"x" * 1024, "x" * 1024),
+            (b"x" * 1025, "x" * 1024 + "...(truncated)"),
+            # The multi-byte character at the boundary is dropped
+            (b"x" * 1023 + "中".encode(), "x" * 1023 + "...(truncated)"),
+        ],
+    )
+    def test_normal(self, content, expected):
+        assert ApiLogMiddleware(get_response=None).truncate(content) == expected
+
+
+class TestApiLogShipper:
+    @pytest.fixture()
+    def shipper(self):
+        config = {
+            "url": "redis://localhost:6379/0",
+            "queue_name": "paas_ng-meters",
+            "tags": ["foo"],
+            "buffer_size": 3,
+            "batch_size": 2,
+        }
+        shipper = ApiLogShipper(config)
+        shipper.redis = mock.MagicMock()
+        # Do not start the background thread, the logs are shipped by calling `flush()`
+        with mock.patch.object(shipper, "_ensure_started"):
+            yield shipper
+
+    def test_ship_in_batches(self, shipper):
+        for i in range(3):
+            shipper.put({"path": f"/api/{i}/"})
+        shipper.flush()
+
+        calls = shipper.redis.rpush.call_args_list
+        assert [len(c.args) - 1 for c in calls] == [2, 1]
+        assert all(c.args[0] == "paas_ng-meters" for c in calls)
+        assert json.loads(calls[0].args[1]) == {"path": "/api/0/", "tags": ["foo"]}
+
+    def test_drop_when_full(self, shipper):
+        with mock.patch("paasng.utils.api_middleware.API_LOG_DROPPED_COUNTER") as counter:
+            for i in range(5):
+                shipper.put({"path": f"/api/{i}/"})
+
+        assert shipper.buffer.qsize() == 3
+        counter.labels.assert_called_with(reason="queue_full")
+        assert counter.labels.return_value.inc.call_count == 2
+
+    def test_ship_failed(self, shipper):
+        shipper.redis.rpush.side_effect = ConnectionError
+        shipper.put({"path": "/api/"})
+        # Errors should never be raised
+        shipper.flush()
+        assert shipper.buffer.empty()
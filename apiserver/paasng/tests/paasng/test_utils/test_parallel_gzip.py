@@ -0,0 +1,61 @@
+# TencentBlueKing is pleased to support the open source community by making
+# 蓝鲸智云 - PaaS 平台 (BlueKing - PaaS System) available.
+# Copyright (C) 2017 THL A29 Limited, a Tencent company. All rights reserved.
+# Licensed under the MIT License (the "License"); you may not use this file except
+# in compliance with the License. You may obtain a copy of the License at
+#
+#     http://opensource.org/licenses/MIT
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# We undertake not to change the open source license (MIT license) applicable
+# to the current version of the project delivered to anyone in the future.
+
+
+import gzip
+import io
+import os
+
+import pytest
+
+from paasng.utils.parallel_gzip import ParallelGzipWriter
+
+
+@pytest.mark.parametrize(
+    ("data", "block_size"),
+    [
+        (b"", 64),
+        (b"hello", 64),
+        (b"0123456789" * 1000, 64),
+        (os.urandom(100 * 1024) + b"a" * 100 * 1024, 32 * 1024),
+    ],
+)
+def test_round_trip(data, block_size):
+    output = io.BytesIO()
+    with ParallelGzipWriter(output, block_size=block_size, threads=4) as gz:
+        # Write in small pieces to cross the block boundaries
+        for i in range(0, len(data), 1000):
+            gz.write(data[i : i + 1000])
+
+    assert gzip.decompress(output.getvalue()) == data
+    assert not output.closed
+
+
+def test_compression_ratio():
+    data = b"".join(f"line {i}: the quick brown fox jumps over the lazy dog\n".encode() for i in range(50000))
+    output = io.BytesIO()
+    with ParallelGzipWriter(output, block_size=64 * 1024) as gz:
+        gz.write(data)
+
+    # The dictionary shared between blocks keeps the ratio close to single-threaded gzip
+    assert len(output.getvalue()) < len(gzip.compress(data, compresslevel=6)) * 1.05
+
+
+def test_write_after_close():
+    gz = ParallelGzipWriter(io.BytesIO())
+    gz.close()
+    with pytest.raises(ValueError, match="closed"):
+        gz.write(b"foo")
@@ -26,8 +26,10 @@ from paasng.core.core.storages.redisdb import get_default_redis
 from paasng.utils.rate_limit.constants import UserAction
 from paasng.utils.rate_limit.fixed_window import UserActionRateLimiter as UserActionFixedWindowRateLimiter
 from paasng.utils.rate_limit.fixed_window import rate_limits_by_user
+from paasng.utils.rate_limit.semaphore import RedisSemaphore
 from paasng.utils.rate_limit.token_bucket import UserActionRateLimiter as UserActionTokenBucketRateLimiter
 from tests.utils.auth import create_user
+from tests.utils.basic import generate_random_string
 
 
 @pytest.mark.parametrize("limiter_cls", [UserActionTokenBucketRateLimiter, UserActionFixedWindowRateLimiter])
@@ -67,3 +69,17 @@ def test_rate_limits_on_view_func():
     assert viewset.fake_view_func().status_code == HTTP_429_TOO_MANY_REQUESTS
     time.sleep(window_size)
     assert viewset.fake_view_func().status_code == HTTP_200_OK
+
+
+def test_redis_semaphore():
+    semaphore = RedisSemaphore(get_default_redis(), generate_random_string(), limit=2, lease=2, retry_interval=0.01)
+    tokens = [semaphore.acquire(timeout=0), semaphore.acquire(timeout=0)]
+    assert all(tokens)
+    assert semaphore.acquire(timeout=0.1) is None
+
+    semaphore.release(tokens[0])
+    assert semaphore.acquire(timeout=0) is not None
+
+    # The expired holders are dropped
+    time.sleep(2)
+    assert semaphore.acquire(timeout=0) is not None